@@ -0,0 +1,116 @@
+"""
+Benchmark: approximate nearest-neighbour backends vs exact search.
+
+Generates clustered random embeddings (a mixture of Gaussians, closer to real
+chunk embeddings than uniform noise) and reports build time, QPS and
+recall@10 against exact float32 search for:
+
+  exact  - tools.vector_store.MemmapVectorStore (float16, brute force)
+  ivf    - tools.ann_index.IVFIndex at each --nprobe
+  hnsw   - tools.ann_index.HNSWIndex at each --ef (skipped without hnswlib)
+
+    python benchmarks/bench_ann.py --sizes 10000 100000 1000000 --dim 384
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.vector_store import MemmapVectorStore, _normalize  # noqa: E402
+from tools.ann_index import IVFIndex, HNSWIndex  # noqa: E402
+
+
+def clustered(n: int, dim: int, seed: int = 0, clusters: int = 1000) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100000):
+        m = min(100000, n - start)
+        out[start:start + m] = centers[rng.integers(0, clusters, m)] + 0.6 * rng.standard_normal((m, dim))
+    return out
+
+
+def ground_truth(matrix: np.ndarray, queries: np.ndarray, k: int) -> list:
+    q = _normalize(queries)
+    best = [np.empty(0, dtype=np.int64)] * len(q)
+    best_scores = [np.empty(0, dtype=np.float32)] * len(q)
+    for start in range(0, len(matrix), 100000):
+        scores = q @ _normalize(matrix[start:start + 100000]).T
+        for i, row in enumerate(scores):
+            cand = np.concatenate([best_scores[i], row])
+            idx = np.concatenate([best[i], np.arange(start, start + len(row))])
+            top = np.argpartition(-cand, k - 1)[:k]
+            best[i], best_scores[i] = idx[top], cand[top]
+    return [set(b.tolist()) for b in best]
+
+
+def measure(search, queries, truth, k) -> tuple:
+    hits = 0
+    t0 = time.perf_counter()
+    for q, expected in zip(queries, truth):
+        hits += len({int(i) for i, _ in search(q, k)} & expected)
+    elapsed = time.perf_counter() - t0
+    return len(queries) / elapsed, hits / (len(queries) * k)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    ap.add_argument("--ef", type=int, nargs="+", default=[32, 128])
+    args = ap.parse_args()
+
+    try:
+        import hnswlib  # noqa: F401
+        has_hnsw = True
+    except ImportError:
+        has_hnsw = False
+        print("hnswlib not installed: skipping the hnsw backend\n")
+
+    tmp = tempfile.mkdtemp(prefix="bench_ann_")
+    try:
+        print(f"{'chunks':>8} | {'backend':<14} | {'build s':>8} | {'QPS':>9} | recall@{args.top_k}")
+        print("-" * 60)
+        for n in args.sizes:
+            matrix = clustered(n, args.dim)
+            rng = np.random.default_rng(1)
+            queries = matrix[rng.choice(n, args.queries, replace=False)] + 0.3 * rng.standard_normal((args.queries, args.dim))
+            truth = ground_truth(matrix, queries, args.top_k)
+            ids = [str(i) for i in range(n)]
+
+            t0 = time.perf_counter()
+            exact = MemmapVectorStore.write(os.path.join(tmp, f"exact_{n}"), ids, matrix)
+            build = time.perf_counter() - t0
+            qps, recall = measure(exact.query, queries, truth, args.top_k)
+            print(f"{n:>8} | {'exact f16':<14} | {build:>8.1f} | {qps:>9.1f} | {recall:.3f}")
+
+            t0 = time.perf_counter()
+            ivf = IVFIndex.build(ids, matrix).save(os.path.join(tmp, f"ivf_{n}"))
+            build = time.perf_counter() - t0
+            for nprobe in args.nprobe:
+                qps, recall = measure(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, truth, args.top_k)
+                print(f"{n:>8} | {f'ivf nprobe={nprobe}':<14} | {build:>8.1f} | {qps:>9.1f} | {recall:.3f}")
+
+            if has_hnsw:
+                t0 = time.perf_counter()
+                hnsw = HNSWIndex.build(ids, matrix)
+                build = time.perf_counter() - t0
+                for ef in args.ef:
+                    qps, recall = measure(lambda q, k: hnsw.search(q, k, ef=ef), queries, truth, args.top_k)
+                    print(f"{n:>8} | {f'hnsw ef={ef}':<14} | {build:>8.1f} | {qps:>9.1f} | {recall:.3f}")
+            shutil.rmtree(os.path.join(tmp, f"exact_{n}"), ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Benchmark: reading members of a multi-GB nested archive with tools.archive_vfs,
+vs the previous materialising approach and plain stdlib streaming.
+
+Builds, under --workdir, bundle.tar (--size_gb) holding
+
+  filler.bin              half the size, ahead of the zip
+  bundle.zip              the other half:
+    blob.bin              stored, most of the zip
+    logs.txt              deflated, --log_mb of log lines
+    audit/audit.csv       a few rows, last in the zip
+
+and times, each in a fresh process (peak RSS is the growth over the
+process's baseline after imports):
+
+  audit.csv  one small CSV from the zip inside the tar
+               old       tar getmembers(), read the whole zip into BytesIO
+                         (what the p3_sql_recon handler did)
+               stdlib    tar getmembers(), ZipFile over extractfile()
+               vfs cold  tools.archive_vfs, member indexes built
+               vfs warm  the same read again, indexes cached
+  logs.txt   stream the deflated member through, 1 MB reads
+  blob.bin   random 4 KB reads in the stored member: --seeks through the
+             vfs, --stdlib_seeks through zipfile (each backward seek there
+             re-reads the member from its start)
+
+    python benchmarks/bench_archive_vfs.py --size_gb 2 4
+"""
+import io
+import os
+import sys
+import csv
+import time
+import random
+import shutil
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.archive_vfs import ArchiveVFS  # noqa: E402
+
+MB = 1 << 20
+LOG_LINE = "2025-07-28T14:05:{:02d}Z worker-{} payments POST /api/payments 500 deadlock detected, retrying txn {}\n"
+
+
+def build(workdir: str, size_gb: float, log_mb: int) -> str:
+    """Writes bundle.tar for 'size_gb' (reused if present) and returns its path."""
+    tar_path = os.path.join(workdir, f"bundle_{size_gb:g}gb.tar")
+    if os.path.exists(tar_path):
+        return tar_path
+    half = int(size_gb * 1024 * MB / 2)
+    block = os.urandom(MB)
+    filler = os.path.join(workdir, "filler.bin")
+    with open(filler, "wb") as f:
+        for _ in range(half // MB):
+            f.write(block)
+    zip_path = os.path.join(workdir, "bundle.zip")
+    with zipfile.ZipFile(zip_path, "w", allowZip64=True) as z:
+        with z.open(zipfile.ZipInfo("blob.bin"), "w", force_zip64=True) as f:
+            for _ in range(max(1, (half - log_mb * MB // 8) // MB)):
+                f.write(block)
+        info = zipfile.ZipInfo("logs.txt")
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with z.open(info, "w", force_zip64=True) as f:
+            written, i = 0, 0
+            while written < log_mb * MB:
+                chunk = "".join(LOG_LINE.format(j % 60, j % 16, j) for j in range(i, i + 10000)).encode()
+                f.write(chunk)
+                written += len(chunk)
+                i += 10000
+        rows = "order_id,sku,agreed_unit_price_usd\n" + "".join(f"O-{2000 + k},SKU-B,{150 + k}.00\n" for k in range(20))
+        z.writestr("audit/audit.csv", rows, compress_type=zipfile.ZIP_DEFLATED)
+    tmp = tar_path + ".tmp"
+    with tarfile.open(tmp, "w") as t:
+        t.add(filler, "filler.bin")
+        t.add(zip_path, "bundle.zip")
+    os.replace(tmp, tar_path)
+    os.remove(filler)
+    os.remove(zip_path)
+    return tar_path
+
+
+# ------------------------------------------------------------------------------
+# Methods (run in child processes)
+# ------------------------------------------------------------------------------
+def _agreed(f) -> str:
+    for r in csv.DictReader(f):
+        if r["order_id"] == "O-2007":
+            return r["agreed_unit_price_usd"]
+    return ""
+
+
+def audit_old(tar_path, vfs):
+    with tarfile.open(tar_path, "r") as t:
+        for m in t.getmembers():
+            if m.name.endswith(".zip"):
+                data = t.extractfile(m).read()
+                with zipfile.ZipFile(io.BytesIO(data)) as z:
+                    with z.open("audit/audit.csv") as c:
+                        return _agreed(io.TextIOWrapper(c, encoding="utf-8"))
+
+
+def audit_stdlib(tar_path, vfs):
+    with tarfile.open(tar_path, "r") as t:
+        for m in t.getmembers():
+            if m.name.endswith(".zip"):
+                with zipfile.ZipFile(t.extractfile(m)) as z:
+                    with z.open("audit/audit.csv") as c:
+                        return _agreed(io.TextIOWrapper(c, encoding="utf-8"))
+
+
+def audit_vfs(tar_path, vfs):
+    name = next(n for n in vfs.list_members(tar_path) if n.endswith(".zip"))
+    with vfs.open(f"{tar_path}!/{name}!/audit/audit.csv", "r") as c:
+        return _agreed(c)
+
+
+def _drain(f) -> int:
+    n = 0
+    while True:
+        chunk = f.read(MB)
+        if not chunk:
+            return n
+        n += len(chunk)
+
+
+def logs_stdlib(tar_path, vfs):
+    with tarfile.open(tar_path, "r") as t:
+        with zipfile.ZipFile(t.extractfile("bundle.zip")) as z:
+            with z.open("logs.txt") as f:
+                return _drain(f)
+
+
+def logs_vfs(tar_path, vfs):
+    with vfs.open(f"{tar_path}!/bundle.zip!/logs.txt") as f:
+        return _drain(f)
+
+
+def _seeks(f, size, seeks) -> str:
+    rng, n = random.Random(0), 0
+    for _ in range(seeks):
+        f.seek(rng.randrange(0, size - 4096))
+        n += len(f.read(4096)) == 4096
+    return f"{n} reads"
+
+
+def blob_stdlib(tar_path, vfs, seeks):
+    with tarfile.open(tar_path, "r") as t:
+        with zipfile.ZipFile(t.extractfile("bundle.zip")) as z:
+            with z.open("blob.bin") as f:
+                return _seeks(f, z.getinfo("blob.bin").file_size, seeks)
+
+
+def blob_vfs(tar_path, vfs, seeks):
+    path = f"{tar_path}!/bundle.zip!/blob.bin"
+    with vfs.open(path) as f:
+        return _seeks(f, vfs.getsize(path), seeks)
+
+
+def _child(conn, method, args, warm):
+    vfs = ArchiveVFS()
+    fn = globals()[method]
+    if warm:
+        fn(args[0], vfs, *args[1:])
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    t0 = time.perf_counter()
+    out = fn(args[0], vfs, *args[1:])
+    wall = time.perf_counter() - t0
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024 if resource else float("nan")
+    conn.send((out, wall, rss))
+    conn.close()
+
+
+def measure(method, args, warm=False):
+    """(result, wall s, peak RSS growth MB) of one call in a fresh process."""
+    ctx = multiprocessing.get_context("spawn")
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(send, method, args, warm))
+    proc.start()
+    send.close()
+    out = recv.recv()
+    proc.join()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size_gb", type=float, nargs="+", default=[2])
+    ap.add_argument("--log_mb", type=int, default=256, help="Uncompressed size of the deflated logs.txt")
+    ap.add_argument("--seeks", type=int, default=2000)
+    ap.add_argument("--stdlib_seeks", type=int, default=10)
+    ap.add_argument("--old_max_gb", type=float, default=4, help="Skip the materialising reader above this size")
+    ap.add_argument("--workdir", default="", help="Where to build the archives (default: a temp dir, removed after)")
+    ap.add_argument("--keep", action="store_true", help="Keep the built archives")
+    args = ap.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_vfs_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        print(f"{'GB':>4} | {'read':>9} | {'method':>8} | {'wall ms':>9} | {'peak RSS MB':>11} | {'MB/s':>7} | result")
+        print("-" * 74)
+        for size_gb in args.size_gb:
+            t0 = time.perf_counter()
+            tar_path = build(workdir, size_gb, args.log_mb)
+            print(f"[info] {os.path.getsize(tar_path) / 2**30:.2f} GB archive ready in {time.perf_counter() - t0:.0f}s")
+            runs = [("audit.csv", "old", "audit_old", (tar_path,), False),
+                    ("audit.csv", "stdlib", "audit_stdlib", (tar_path,), False),
+                    ("audit.csv", "vfs cold", "audit_vfs", (tar_path,), False),
+                    ("audit.csv", "vfs warm", "audit_vfs", (tar_path,), True),
+                    ("logs.txt", "stdlib", "logs_stdlib", (tar_path,), False),
+                    ("logs.txt", "vfs", "logs_vfs", (tar_path,), False),
+                    ("blob.bin", "stdlib", "blob_stdlib", (tar_path, args.stdlib_seeks), False),
+                    ("blob.bin", "vfs", "blob_vfs", (tar_path, args.seeks), False)]
+            for read, label, method, margs, warm in runs:
+                if method == "audit_old" and size_gb > args.old_max_gb:
+                    continue
+                out, wall, rss = measure(method, margs, warm)
+                rate = f"{out / MB / wall:>7.0f}" if read == "logs.txt" else f"{'-':>7}"
+                print(f"{size_gb:>4g} | {read:>9} | {label:>8} | {wall * 1000:>9.1f} | {rss:>11.1f} | {rate} | {out}")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: Chroma query latency with a fresh client per query vs the pooled client.
+
+  cold   - what ChromaRAGTool used to do: new client + list_collections per query
+  pooled - tools.chroma_pool client reused, collection looked up per query
+  warm   - tools.chroma_pool with the collection handle kept open
+
+Query embeddings are random, so only client/collection overhead and the
+search itself are measured.
+
+    python benchmarks/bench_chroma_pool.py --chunks 5000 --queries 200 --threads 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np  # noqa: E402
+import chromadb  # noqa: E402
+
+from tools.chroma_pool import ChromaClientPool  # noqa: E402
+
+COLLECTION = "rag_collection"
+
+
+def populate(cache_dir: str, n_chunks: int, dim: int):
+    client = chromadb.PersistentClient(path=cache_dir)
+    col = client.get_or_create_collection(COLLECTION, embedding_function=None)
+    rng = np.random.default_rng(0)
+    for start in range(0, n_chunks, 1000):
+        n = min(1000, n_chunks - start)
+        col.add(
+            ids=[f"c{start + i}" for i in range(n)],
+            documents=[f"chunk {start + i}" for i in range(n)],
+            embeddings=rng.standard_normal((n, dim)).astype(np.float32).tolist(),
+        )
+
+
+def cold_query(cache_dir, emb, k):
+    client = chromadb.PersistentClient(path=cache_dir)
+    if COLLECTION in [c.name for c in client.list_collections()]:
+        col = client.get_collection(COLLECTION, embedding_function=None)
+        return col.query(query_embeddings=[emb], n_results=k)
+
+
+def make_pool_query(pool):
+    def _query(cache_dir, emb, k):
+        col = pool.get_collection(cache_dir, COLLECTION)
+        return col.query(query_embeddings=[emb], n_results=k)
+    return _query
+
+
+def measure(fn, cache_dir, queries, k, threads):
+    latencies = []
+
+    def _one(emb):
+        t0 = time.perf_counter()
+        fn(cache_dir, emb, k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(_one, queries))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "qps": len(queries) / wall,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=5000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--threads", type=int, default=1)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_chroma_")
+    cache_dir = os.path.join(tmp, "chroma_db")
+    try:
+        populate(cache_dir, args.chunks, args.dim)
+        rng = np.random.default_rng(1)
+        queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32).tolist()
+
+        modes = {
+            "cold": cold_query,
+            "pooled": make_pool_query(ChromaClientPool(keep_collections_open=False)),
+            "warm": make_pool_query(ChromaClientPool(keep_collections_open=True)),
+        }
+        print(f"{args.chunks} chunks, {args.queries} queries, {args.threads} thread(s)\n")
+        print(f"{'mode':<7} | {'p50 ms':>8} | {'p95 ms':>8} | {'QPS':>8}")
+        print("-" * 40)
+        for name, fn in modes.items():
+            r = measure(fn, cache_dir, queries, args.top_k, args.threads)
+            print(f"{name:<7} | {r['p50']:>8.2f} | {r['p95']:>8.2f} | {r['qps']:>8.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: SQLite data registry vs the old data_registry.yaml approach.
+
+For a growing number of registered directories, measures the mean cost of a
+lookup and an upsert. The YAML baseline re-implements the previous behaviour
+(parse the whole file, linear abspath scan, rewrite the whole file).
+
+    python benchmarks/bench_data_registry.py --sizes 100 1000 10000 --yaml-max 1000
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import datetime
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools import data_registry  # noqa: E402
+
+
+def _yaml_lookup(path, data_dir):
+    with open(path) as f:
+        registry = yaml.safe_load(f) or []
+    abs_dir = os.path.abspath(data_dir)
+    return next((e for e in registry if os.path.abspath(e["data_directory"]) == abs_dir), None)
+
+
+def _yaml_upsert(path, data_dir):
+    with open(path) as f:
+        registry = yaml.safe_load(f) or []
+    abs_dir = os.path.abspath(data_dir)
+    new_entry = {"data_directory": abs_dir, "cache_file_directory": abs_dir + "/.cache", "data_format": "",
+                 "timestamp": datetime.datetime.now().isoformat(), "status": "rag_indexed",
+                 "last_data_update": time.time(), "metadata": {}}
+    for i, e in enumerate(registry):
+        if os.path.abspath(e["data_directory"]) == abs_dir:
+            registry[i] = new_entry
+            break
+    else:
+        registry.append(new_entry)
+    with open(path, "w") as f:
+        yaml.safe_dump(registry, f)
+
+
+def _timed(fn, args_list):
+    t0 = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(args_list) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--ops", type=int, default=200, help="Lookups/upserts measured per size")
+    ap.add_argument("--yaml-max", type=int, default=1000, help="Skip the YAML baseline above this size")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_registry_")
+    try:
+        print(f"{'entries':>8} | {'sqlite get us':>13} | {'sqlite upsert us':>16} | {'yaml get us':>11} | {'yaml upsert us':>14}")
+        print("-" * 75)
+        for n in args.sizes:
+            db = os.path.join(tmp, f"registry_{n}.db")
+            dirs = [f"/data/dir_{i:07d}" for i in range(n)]
+            conn = data_registry.connect(db)
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO registry (data_directory, timestamp) VALUES (?, ?)",
+                [(d, datetime.datetime.now().isoformat()) for d in dirs],
+            )
+            conn.execute("COMMIT")
+
+            sample = [(random.choice(dirs),) for _ in range(args.ops)]
+            get_us = _timed(lambda d: data_registry.get_entry(d, db_path=db), sample)
+            upsert_us = _timed(lambda d: data_registry.update_registry_entry(d, d + "/.cache", time.time(), db_path=db), sample)
+
+            yaml_get = yaml_upsert = "-"
+            if n <= args.yaml_max:
+                ypath = os.path.join(tmp, f"registry_{n}.yaml")
+                with open(ypath, "w") as f:
+                    yaml.safe_dump(data_registry.list_entries(db_path=db), f)
+                few = sample[:max(5, args.ops // 20)]
+                yaml_get = f"{_timed(lambda d: _yaml_lookup(ypath, d), few):.0f}"
+                yaml_upsert = f"{_timed(lambda d: _yaml_upsert(ypath, d), few):.0f}"
+
+            print(f"{n:>8} | {get_us:>13.0f} | {upsert_us:>16.0f} | {yaml_get:>11} | {yaml_upsert:>14}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: streaming ChromaRAGTool ingestion pipeline.
+
+Generates a synthetic corpus (or uses --data-dir), streams it through
+tools.embedding_pipeline into a collection that discards the vectors, and
+reports chunks/sec and peak RSS for each worker count.
+
+    python benchmarks/bench_embedding_pipeline.py --files 2000 --workers 0 2 4
+    python benchmarks/bench_embedding_pipeline.py --data-dir sandbox/data --model all-MiniLM-L6-v2
+
+Without --model a hashing encoder with a comparable CPU cost per chunk is
+used, so the pipeline itself can be measured without torch installed.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.embedding_pipeline import run_pipeline, load_sentence_transformer  # noqa: E402
+
+WORDS = "edge data agent local index vector query revenue sensor register clock divider".split()
+
+
+class HashEncoder:
+    """Deterministic stand-in for SentenceTransformer.encode (384-d, CPU bound)."""
+
+    def __init__(self, dim: int = 384, rounds: int = 200):
+        self.dim = dim
+        self.rounds = rounds
+
+    def encode(self, texts):
+        import numpy as np
+
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            digest = text.encode("utf-8")
+            for _ in range(self.rounds):
+                digest = hashlib.sha256(digest).digest()
+            rnd = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+            out[i] = rnd.standard_normal(self.dim)
+        return out
+
+
+def hash_encoder_factory(model_name):
+    return HashEncoder()
+
+
+class NullCollection:
+    def __init__(self):
+        self.count = 0
+
+    def add(self, ids, documents, metadatas, embeddings):
+        self.count += len(ids)
+
+
+def make_corpus(root: str, n_files: int, n_words: int):
+    os.makedirs(root, exist_ok=True)
+    for i in range(n_files):
+        rnd = random.Random(i)
+        with open(os.path.join(root, f"doc_{i:06d}.txt"), "w", encoding="utf-8") as f:
+            f.write(" ".join(rnd.choice(WORDS) for _ in range(n_words)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data-dir", default=None, help="Existing directory to ingest (default: synthetic)")
+    ap.add_argument("--files", type=int, default=1000)
+    ap.add_argument("--words", type=int, default=2000, help="Words per synthetic file")
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--model", default=None, help="SentenceTransformer model name (default: hashing encoder)")
+    args = ap.parse_args()
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.mkdtemp(prefix="bench_embed_")
+        data_dir = os.path.join(tmp, "data")
+        make_corpus(data_dir, args.files, args.words)
+
+    factory = load_sentence_transformer if args.model else hash_encoder_factory
+    model_name = args.model or "hash"
+    try:
+        print(f"{'workers':>7} | {'files':>6} | {'chunks':>7} | {'seconds':>8} | {'chunks/s':>9} | rss self MB | rss workers MB")
+        print("-" * 82)
+        for workers in args.workers:
+            t0 = time.perf_counter()
+            stats = run_pipeline(
+                data_dir,
+                NullCollection(),
+                model_name=model_name,
+                workers=workers,
+                batch_size=args.batch_size,
+                encoder_factory=factory,
+            )
+            rss = stats["peak_rss_mb"]
+            print(
+                f"{workers:>7} | {stats['files']:>6} | {stats['chunks']:>7} | {time.perf_counter() - t0:>8.2f} | "
+                f"{stats['chunks_per_sec']:>9.1f} | {rss['self']:>11.0f} | {rss['children']:>14.0f}"
+            )
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: financial metric / YoY queries, statement-table index vs page scan.
+
+Builds tools.financial_tables' SQLite index over the finance 10-Ks (cold:
+page cache and table parsing; warm: sha256 check only), then answers every
+metric and its year-over-year series --rounds times from the index. The
+baseline answers the same queries the way a tool without the index has to:
+scanning the cached page text of every filing for the statement and parsing
+it.
+
+    python benchmarks/bench_financial_tables.py --rounds 100
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.financial_tables import (  # noqa: E402
+    FinancialIndex, METRICS, RATIOS, OUTFLOWS, detect_statement, parse_statement, _item_key,
+)
+from tools.pdf_pages import extract_pages  # noqa: E402
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def scan_metric(pdfs: list, name: str) -> dict:
+    """Baseline: find the line item by parsing the statement pages of every filing."""
+    if name in RATIOS:
+        num, den = (scan_metric(pdfs, m) for m in RATIOS[name])
+        return {y: num[y] / den[y] for y in num if den.get(y)}
+    statement, patterns = METRICS[name]
+    out = {}
+    for pdf in pdfs:
+        for page in extract_pages(pdf):
+            if detect_statement(page["text"]) != statement:
+                continue
+            years, rows = parse_statement(page["text"])
+            for pattern in patterns:
+                needle = pattern.strip("%")
+                match = [r for r in rows if (needle in _item_key(r[1]) if "%" in pattern else _item_key(r[1]) == needle)]
+                if match:
+                    sign = -1.0 if name in OUTFLOWS else 1.0
+                    out.update((y, sign * v) for y, v in zip(years, match[0][2]))
+                    break
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdfs", nargs="*", default=None, help="10-K PDFs (default: sandbox/data/finance/*.pdf)")
+    ap.add_argument("--rounds", type=int, default=100)
+    args = ap.parse_args()
+
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join(REPO, "sandbox", "data", "finance", "*.pdf")))
+    metrics = sorted(METRICS) + sorted(RATIOS)
+    tmp = tempfile.mkdtemp(prefix="bench_fin_")
+    try:
+        index = FinancialIndex(os.path.join(tmp, "financial.db"))
+        t0 = time.perf_counter()
+        facts = sum(index.index_document(pdf) for pdf in pdfs)
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for pdf in pdfs:
+            index.index_document(pdf)
+        warm = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            for m in metrics:
+                index.metric(m)
+                index.yoy(m)
+        indexed = (time.perf_counter() - t0) / (args.rounds * len(metrics))
+
+        rounds = max(1, args.rounds // 20)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for m in metrics:
+                scan_metric(pdfs, m)
+        scanned = (time.perf_counter() - t0) / (rounds * len(metrics))
+
+        mismatches = [m for m in metrics if {y: round(v, 6) for y, v in scan_metric(pdfs, m).items()}
+                      != {y: round(v, 6) for y, v in index.metric(m).items()}]
+        print(f"{len(pdfs)} filings, {facts} facts, {len(metrics)} metrics\n")
+        print(f"index build (cold) : {cold * 1000:9.1f} ms")
+        print(f"index check (warm) : {warm * 1000:9.1f} ms")
+        print(f"{'query':<19}| {'ms/query':>9}")
+        print("-" * 31)
+        print(f"{'page scan':<19}| {scanned * 1000:>9.3f}")
+        print(f"{'indexed + yoy':<19}| {indexed * 1000:>9.3f}")
+        print(f"\nspeed-up: {scanned / indexed:.0f}x; metrics differing from the scan: {mismatches or 'none'}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
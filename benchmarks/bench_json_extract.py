@@ -0,0 +1,130 @@
+"""
+Benchmark: extracting JSON from LLM replies, the old shrinking-prefix
+extractor (json.loads on every prefix from the first '{') vs the single-pass
+tools.json_extract.
+
+Synthetic replies of --sizes KB, each a nested JSON answer with prose around it:
+
+  trailing  - answer followed by a paragraph of prose (the old worst case)
+  fenced    - prose, a ```json fenced answer, more prose
+  multi     - prose with several JSON blocks; extract_all() must find each
+  stream    - 'trailing' fed to JSONStream in --chunk character tokens
+
+The old extractor is only run up to --legacy_max_kb (it is quadratic);
+'match' checks that both return the same answer.
+
+    python benchmarks/bench_json_extract.py --sizes 1 10 100 1000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.json_extract import extract_json, extract_all, JSONStream  # noqa: E402
+
+PROSE = ("The figures above come from the quarterly filings; note that {braces} and [brackets] in prose "
+         "are not JSON, and \"quoted {text}\" should not confuse the scanner. ")
+
+
+def legacy_extract(text: str):
+    """providers/general_llm._extract_json before the single-pass extractor."""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        pass
+    start = None
+    for i, ch in enumerate(text):
+        if ch in '{[':
+            start = i
+            break
+    if start is not None:
+        for j in range(len(text), start, -1):
+            try:
+                return json.loads(text[start:j])
+            except Exception:
+                continue
+    return {"_raw": text}
+
+
+def make_answer(size: int, tag: int = 0) -> dict:
+    rows, n = [], 0
+    while n < size:
+        row = {"id": len(rows), "tag": tag, "name": f"item \"{len(rows)}\" {{x}}", "values": [1.5, -2, None, True],
+               "nested": {"path": "C:\\data\\file.txt", "ok": False}}
+        rows.append(row)
+        n += len(json.dumps(row))
+    return {"answer": "42", "rows": rows}
+
+
+def make_reply(kind: str, size: int):
+    """(reply text, expected extract_json value, expected number of blocks)."""
+    if kind == "multi":
+        parts, values = [], []
+        for k in range(8):
+            values.append(make_answer(size // 8, k))
+            parts.append(PROSE + json.dumps(values[-1]))
+        return "\n".join(parts) + "\n" + PROSE, values[0], len(values)
+    answer = make_answer(int(size * 0.9))
+    body = json.dumps(answer, indent=1)
+    tail = PROSE * max(1, size // 10 // len(PROSE))
+    if kind == "fenced":
+        return f"Here is the result.\n```json\n{body}\n```\n{tail}", answer, 1
+    return f"{body}\n\n{tail}", answer, 1
+
+
+def timed(fn, min_time: float = 0.2):
+    runs, t0 = 0, time.perf_counter()
+    while True:
+        out = fn()
+        runs += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return out, elapsed * 1000 / runs
+
+
+def streamed(text: str, chunk: int) -> list:
+    stream = JSONStream()
+    found = []
+    for i in range(0, len(text), chunk):
+        found += stream.feed(text[i:i + chunk])
+    return found + stream.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 100, 1000], help="Reply sizes in KB")
+    ap.add_argument("--legacy_max_kb", type=float, default=100)
+    ap.add_argument("--chunk", type=int, default=16, help="Characters per streamed token")
+    args = ap.parse_args()
+
+    print(f"{'KB':>6} | {'reply':>8} | {'old ms':>9} | {'new ms':>8} | {'speedup':>8} | {'MB/s':>7} | match")
+    print("-" * 66)
+    for kb in args.sizes:
+        size = int(kb * 1024)
+        for kind in ("trailing", "fenced", "multi", "stream"):
+            text, expected, blocks = make_reply("trailing" if kind == "stream" else kind, size)
+            if kind == "multi":
+                got, new = timed(lambda: extract_all(text))
+                ok = len(got) == blocks and got[0] == expected
+            elif kind == "stream":
+                got, new = timed(lambda: streamed(text, args.chunk))
+                ok = got == [expected]
+            else:
+                got, new = timed(lambda: extract_json(text))
+                ok = got == expected
+            old = None
+            if kb <= args.legacy_max_kb and kind != "stream":
+                legacy, old = timed(lambda: legacy_extract(text), 0)
+                ok = ok and (kind == "multi" or legacy == got)
+            old_s = f"{old:>9.2f}" if old is not None else f"{'-':>9}"
+            speedup = f"{old / new:>7.0f}x" if old is not None else f"{'-':>8}"
+            print(f"{kb:>6g} | {kind:>8} | {old_s} | {new:>8.3f} | {speedup} | {len(text) / new / 1000:>7.1f} | "
+                  f"{'yes' if ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark: LLM request throughput under a fixed server-side rate limit,
+one connection per call (the old requests.post path) vs the shared pooled
+client (tools.llm_client).
+
+Runs an in-process generateContent server that answers after --latency
+seconds and enforces --rate requests/s (token bucket, burst of one second)
+with 429 + Retry-After, counting TCP connections. --requests prompts, of
+which --duplicates are repeats of earlier ones, go through:
+
+  sequential  - requests.post per prompt, no retry (what _call_gemini_rest did)
+  threads     - the same from --concurrency threads, no rate limiting
+  pooled      - AsyncLLMClient.generate for all prompts at once, client rate = --rate
+  pooled+dup  - as pooled, with coalescing turned off (duplicates are sent)
+
+'ok/s' is successful answers per second of wall time; a client that honours
+the limit should approach --rate, plus whatever coalescing saves. Latencies
+include the time a request waits for the client's rate limiter.
+
+    python benchmarks/bench_llm_client.py --requests 200 --rate 20 --latency 0.2
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.llm_client import AsyncLLMClient  # noqa: E402
+
+MODEL = "bench-model"
+
+
+class RateLimitedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rate: float, latency: float):
+        super().__init__(("127.0.0.1", 0), RateLimitedHandler)
+        self.rate, self.latency = rate, latency
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.tokens, self.updated = self.rate, time.monotonic()
+        self.connections = self.hits = self.limited = 0
+
+    def admit(self) -> bool:
+        with self.lock:
+            self.hits += 1
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.limited += 1
+            return False
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        if not self.server.admit():
+            return self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, {"Retry-After": "1"})
+        time.sleep(self.server.latency)
+        text = body["contents"][0]["parts"][0]["text"]
+        self._send(200, {"candidates": [{"content": {"parts": [{"text": json.dumps({"echo": text})}]}}],
+                         "usageMetadata": {"promptTokenCount": len(text.split()), "candidatesTokenCount": 3}})
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in {"Content-Type": "application/json", "Content-Length": str(len(data)), **(headers or {})}.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_prompts(n: int, duplicates: int) -> list:
+    unique = [f"Return JSON for question {i}" for i in range(n - duplicates)]
+    rng = np.random.default_rng(0)
+    prompts = unique + [unique[i] for i in rng.integers(0, len(unique), duplicates)]
+    rng.shuffle(prompts)
+    return prompts
+
+
+def post_once(base: str, prompt: str) -> float:
+    """The old provider call: one requests.post (new connection), no retry; returns its latency."""
+    t0 = time.perf_counter()
+    r = requests.post(f"{base}/v1beta/models/{MODEL}:generateContent?key=bench",
+                      json={"contents": [{"parts": [{"text": prompt}]}]}, timeout=60)
+    r.raise_for_status()
+    r.json()
+    return time.perf_counter() - t0
+
+
+def run_blocking(base: str, prompts: list, workers: int) -> list:
+    def call(prompt):
+        try:
+            return post_once(base, prompt)
+        except requests.RequestException as e:
+            return e
+    if workers == 1:
+        return [call(p) for p in prompts]
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(call, prompts))
+
+
+def run_pooled(base: str, prompts: list, rate: float, concurrency: int, coalesce: bool) -> tuple:
+    async def go():
+        client = AsyncLLMClient(rate=rate, max_connections=concurrency, coalesce=coalesce, backoff_s=0.25)
+        try:
+            results = await client.gather([client.generate(MODEL, p, "bench", base) for p in prompts])
+        finally:
+            await client.aclose()
+        return results, client.stats()
+    results, stats = asyncio.run(go())
+    return [r if isinstance(r, Exception) else r["latency_s"] for r in results], stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--duplicates", type=int, default=40, help="How many of --requests repeat an earlier prompt")
+    ap.add_argument("--rate", type=float, default=20.0, help="Server rate limit, requests/s")
+    ap.add_argument("--latency", type=float, default=0.2, help="Server time per answer, seconds")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--skip_sequential", action="store_true", help="Skip the slow one-at-a-time run")
+    args = ap.parse_args()
+
+    server = RateLimitedServer(args.rate, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    prompts = make_prompts(args.requests, args.duplicates)
+
+    modes = [("threads", lambda: (run_blocking(base, prompts, args.concurrency), {})),
+             ("pooled", lambda: run_pooled(base, prompts, args.rate, args.concurrency, True)),
+             ("pooled+dup", lambda: run_pooled(base, prompts, args.rate, args.concurrency, False))]
+    if not args.skip_sequential:
+        modes.insert(0, ("sequential", lambda: (run_blocking(base, prompts, 1), {})))
+
+    print(f"{args.requests} requests ({args.duplicates} duplicates), server limit {args.rate:g}/s, "
+          f"latency {args.latency * 1000:.0f} ms, concurrency {args.concurrency}")
+    print(f"{'mode':>10} | {'ok':>4} | {'failed':>6} | {'wall s':>6} | {'ok/s':>6} | {'p50 ms':>7} | {'p95 ms':>7} | "
+          f"{'sent':>4} | {'429s':>4} | {'retries':>7} | {'coalesced':>9} | connections")
+    print("-" * 116)
+    for name, run in modes:
+        time.sleep(1.0)  # let the server's bucket refill between modes
+        server.reset()
+        t0 = time.perf_counter()
+        results, stats = run()
+        wall = time.perf_counter() - t0
+        ok = np.array([r for r in results if isinstance(r, float)]) * 1000
+        p50, p95 = (np.percentile(ok, 50), np.percentile(ok, 95)) if len(ok) else (0.0, 0.0)
+        print(f"{name:>10} | {len(ok):>4} | {len(results) - len(ok):>6} | {wall:>6.2f} | {len(ok) / wall:>6.1f} | "
+              f"{p50:>7.0f} | {p95:>7.0f} | {server.hits:>4} | {server.limited:>4} | {stats.get('retries', 0):>7} | "
+              f"{stats.get('coalesced', 0):>9} | {server.connections}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
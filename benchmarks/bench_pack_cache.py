@@ -0,0 +1,85 @@
+"""
+Benchmark: the local agent's pack artifact store
+(sandbox/local_agent_eval_harness/providers/pack_cache.py).
+
+Runs the pack 1-4 tasks of tasks.py --passes times against the sample packs
+(or --packs) with the store in each mode:
+
+  cold    - a new, memory-only store per call: every file is parsed
+            (what every call did before the store)
+  memory  - one store for all calls: files are parsed on the first pass only
+  disk    - a new store per call over a cache dir filled by a first run:
+            what an isolated agent process (--jobs, --benchmark) sees
+
+and reports the time per pass, the parse time inside it and the hit ratio.
+Answers must be identical in every mode.
+
+    python benchmarks/bench_pack_cache.py --passes 20
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sandbox", "local_agent_eval_harness")
+sys.path.insert(0, HARNESS)
+
+from tasks import TASKS  # noqa: E402
+from providers import local_agent  # noqa: E402
+from providers.pack_cache import ArtifactStore  # noqa: E402
+
+PACKS = ("pack1", "pack2", "pack3", "pack4")
+
+
+def measure(jobs, passes, mode, cache_dir):
+    """(answers of the first pass, ms per pass, ms parsing per pass, hit ratio) with the store in 'mode'."""
+    stores, first = [], None
+
+    def store_for_call():
+        if mode == "memory" and stores:
+            return stores[0]
+        stores.append(ArtifactStore(cache_dir if mode == "disk" else ""))
+        return stores[-1]
+
+    t0 = time.perf_counter()
+    for _ in range(passes):
+        answers = []
+        for pack_dir, prompt in jobs:
+            local_agent._store = store_for_call()
+            answers.append(local_agent.run(pack_dir, prompt))
+        first = first or answers
+    elapsed = time.perf_counter() - t0
+    stats = [store.stats() for store in stores]
+    found, parsed = sum(s["hits"] + s["disk_hits"] for s in stats), sum(s["misses"] for s in stats)
+    parse_s = sum(s["parse_s"] for s in stats)
+    return first, elapsed * 1000 / passes, parse_s * 1000 / passes, found / (found + parsed) if found + parsed else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--packs", default=os.path.join(HARNESS, "local_agent_eval_suite"))
+    ap.add_argument("--passes", type=int, default=20)
+    args = ap.parse_args()
+
+    jobs = [(os.path.join(args.packs, t["pack_glob"]), t["prompt"]) for t in TASKS if t["pack_glob"] in PACKS]
+    cache_dir = tempfile.mkdtemp(prefix="pack_cache_")
+    try:
+        measure(jobs, 1, "disk", cache_dir)  # fill the cache dir
+        print(f"{len(jobs)} tasks over {', '.join(PACKS)}, {args.passes} passes")
+        print(f"{'mode':>7} | {'ms/pass':>8} | {'parse ms':>8} | {'vs cold':>7} | {'hit ratio':>9} | same answers")
+        print("-" * 66)
+        reference = cold_ms = None
+        for mode in ("cold", "memory", "disk"):
+            answers, ms, parse_ms, ratio = measure(jobs, args.passes, mode, cache_dir)
+            reference = reference or answers
+            cold_ms = cold_ms or ms
+            print(f"{mode:>7} | {ms:>8.2f} | {parse_ms:>8.2f} | {cold_ms / ms:>6.1f}x | {ratio:>9.0%} | "
+                  f"{'yes' if answers == reference else 'NO'}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark: PDF page extraction, serial vs parallel, cold vs warm page cache.
+
+For every PDF under sandbox/data (or --pdfs), measures extraction into an
+empty page cache with each worker count and then the warm re-read (what a
+re-index of an unchanged PDF costs: hashing the file plus a cache lookup).
+
+    python benchmarks/bench_pdf_pages.py --workers 0 2 4
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.pdf_pages import extract_pages  # noqa: E402
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdfs", nargs="*", default=None, help="PDF files (default: sandbox/data/*/*.pdf)")
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    args = ap.parse_args()
+
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join(REPO, "sandbox", "data", "*", "*.pdf")))
+    tmp = tempfile.mkdtemp(prefix="bench_pdf_")
+    try:
+        header = " | ".join(f"{f'cold w={w}':>10}" for w in args.workers)
+        print(f"{'pdf':<36} | {'pages':>5} | {header} | {'warm':>8}")
+        print("-" * (58 + 13 * len(args.workers)))
+        for pdf in pdfs:
+            cold = []
+            for w in args.workers:
+                cache_dir = os.path.join(tmp, f"cache_{w}_{len(cold)}_{os.path.basename(pdf)}")
+                t0 = time.perf_counter()
+                pages = extract_pages(pdf, workers=w, cache_dir=cache_dir)
+                cold.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            extract_pages(pdf, cache_dir=cache_dir)
+            warm = time.perf_counter() - t0
+            cols = " | ".join(f"{c:>9.2f}s" for c in cold)
+            print(f"{os.path.basename(pdf)[:36]:<36} | {len(pages):>5} | {cols} | {warm * 1000:>6.1f}ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: query-embedding / retrieval cache on the sandbox question sets.
+
+Replays the questions from sandbox/data/*/input.txt (--rounds times, shuffled)
+against a synthetic vector store, with and without tools.query_cache. The
+second pass of the cached run restarts the cache with the same database, to
+show that level-1 embeddings survive a restart.
+
+    python benchmarks/bench_query_cache.py --rounds 5 --chunks 50000
+    python benchmarks/bench_query_cache.py --model all-MiniLM-L6-v2
+"""
+import os
+import sys
+import glob
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.query_cache import QueryCache  # noqa: E402
+from tools.vector_store import MemmapVectorStore  # noqa: E402
+from bench_embedding_pipeline import HashEncoder  # noqa: E402
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def load_questions() -> list:
+    questions = []
+    for path in sorted(glob.glob(os.path.join(REPO, "sandbox", "data", "*", "input.txt"))):
+        with open(path, encoding="utf-8") as f:
+            questions += [line.strip() for line in f if line.strip()]
+    return questions
+
+
+def run(questions, encoder, store, k, cache=None) -> float:
+    t0 = time.perf_counter()
+    for q in questions:
+        if cache is None:
+            store.query(encoder.encode(q), k)
+        else:
+            cache.results(("bench", len(store)), q, k, "vector",
+                          lambda: store.query(cache.embedding("bench", q, encoder.encode), k))
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--chunks", type=int, default=50000)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--model", default=None, help="SentenceTransformer model (default: hashing encoder)")
+    args = ap.parse_args()
+
+    base = load_questions()
+    rnd = random.Random(0)
+    questions = []
+    for _ in range(args.rounds):
+        # Same questions, reshuffled and with the small phrasing variations seen in practice.
+        questions += [rnd.choice([q, q.lower(), q.strip("“”\"") + " ", q.rstrip("?”") + "?"]) for q in rnd.sample(base, len(base))]
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(args.model)
+    else:
+        encoder = HashEncoder(rounds=2000)
+    dim = len(encoder.encode("probe"))
+
+    tmp = tempfile.mkdtemp(prefix="bench_qcache_")
+    try:
+        matrix = np.random.default_rng(0).standard_normal((args.chunks, dim)).astype(np.float32)
+        store = MemmapVectorStore.write(os.path.join(tmp, "vectors"), [str(i) for i in range(args.chunks)], matrix)
+        db = os.path.join(tmp, "query_cache.db")
+
+        uncached = run(questions, encoder, store, args.top_k)
+        cache = QueryCache(db_path=db)
+        cached = run(questions, encoder, store, args.top_k, cache)
+        stats = cache.stats()
+        restarted = QueryCache(db_path=db)
+        after_restart = run(base, encoder, store, args.top_k, restarted)
+
+        print(f"{len(questions)} queries ({len(base)} distinct questions), {args.chunks} chunks\n")
+        print(f"uncached          : {uncached * 1000 / len(questions):8.2f} ms/query")
+        print(f"cached            : {cached * 1000 / len(questions):8.2f} ms/query")
+        print(f"embedding hit rate: {stats['embedding_hit_rate']:8.1%}")
+        print(f"result hit rate   : {stats['result_hit_rate']:8.1%}")
+        print(f"saved             : {stats['saved_ms']:8.0f} ms")
+        print(f"after restart     : {after_restart * 1000 / len(base):8.2f} ms/query "
+              f"(embedding hit rate {restarted.stats()['embedding_hit_rate']:.1%})")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: incremental RAG re-indexing vs full rebuild.
+
+Builds a synthetic corpus, then for an increasing number of changed files
+compares the time of an incremental update (manifest diff + re-embed changed
+files) against rebuilding the whole index from scratch.
+
+    python benchmarks/bench_rag_reindex.py --files 200 --changed 0 1 5 20 50
+    python benchmarks/bench_rag_reindex.py --hf   # use the real MiniLM embedding
+
+Without --hf a mock embedding is used that sleeps --embed-ms per chunk to
+stand in for model cost.
+"""
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from llama_index.core import Settings, StorageContext, load_index_from_storage
+from llama_index.core.llms import MockLLM
+
+from tools.rag_index import load_manifest, scan_changes, has_changes, build_index, update_index
+
+WORDS = "edge data agent local index vector query revenue sensor register clock divider".split()
+
+
+def _slow_mock_embedding(embed_ms: float):
+    from llama_index.core.embeddings import MockEmbedding
+
+    class SlowMockEmbedding(MockEmbedding):
+        def _get_text_embedding(self, text):
+            time.sleep(embed_ms / 1000.0)
+            return super()._get_text_embedding(text)
+
+        def _get_text_embeddings(self, texts):
+            time.sleep(len(texts) * embed_ms / 1000.0)
+            return super()._get_text_embeddings(texts)
+
+    return SlowMockEmbedding(embed_dim=384)
+
+
+def _write_file(path: str, n_words: int, seed: int):
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(" ".join(rnd.choice(WORDS) for _ in range(n_words)))
+
+
+def make_corpus(data_dir: str, n_files: int, n_words: int):
+    os.makedirs(data_dir, exist_ok=True)
+    for i in range(n_files):
+        _write_file(os.path.join(data_dir, f"doc_{i:05d}.txt"), n_words, seed=i)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=200)
+    ap.add_argument("--words", type=int, default=400, help="Words per file")
+    ap.add_argument("--changed", type=int, nargs="+", default=[0, 1, 5, 20, 50])
+    ap.add_argument("--hf", action="store_true", help="Use the HuggingFace MiniLM embedding instead of a mock")
+    ap.add_argument("--embed-ms", type=float, default=5.0, help="Simulated embedding cost per chunk (mock only)")
+    args = ap.parse_args()
+
+    Settings.llm = MockLLM()
+    if args.hf:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        Settings.embed_model = HuggingFaceEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        Settings.embed_model = _slow_mock_embedding(args.embed_ms)
+
+    root = tempfile.mkdtemp(prefix="bench_reindex_")
+    data_dir = os.path.join(root, "data")
+    persist_dir = os.path.join(data_dir, ".cache", "storage")
+    try:
+        make_corpus(data_dir, args.files, args.words)
+
+        t0 = time.perf_counter()
+        build_index(data_dir, persist_dir)
+        full_s = time.perf_counter() - t0
+        print(f"corpus: {args.files} files x {args.words} words | full build: {full_s:.3f}s\n")
+        print(f"{'changed':>8} | {'incremental (s)':>15} | {'full rebuild (s)':>16} | speedup")
+        print("-" * 58)
+
+        seed = 10_000
+        for n_changed in args.changed:
+            for i in random.Random(n_changed).sample(range(args.files), min(n_changed, args.files)):
+                seed += 1
+                _write_file(os.path.join(data_dir, f"doc_{i:05d}.txt"), args.words, seed=seed)
+
+            t0 = time.perf_counter()
+            manifest = load_manifest(persist_dir)
+            changes = scan_changes(data_dir, manifest)
+            index = load_index_from_storage(StorageContext.from_defaults(persist_dir=persist_dir))
+            if has_changes(changes):
+                update_index(index, data_dir, persist_dir, manifest, changes)
+            inc_s = time.perf_counter() - t0
+
+            rebuild_dir = os.path.join(root, "rebuild")
+            t0 = time.perf_counter()
+            build_index(data_dir, rebuild_dir)
+            full_s = time.perf_counter() - t0
+            shutil.rmtree(rebuild_dir, ignore_errors=True)
+
+            print(f"{n_changed:>8} | {inc_s:>15.3f} | {full_s:>16.3f} | {full_s / inc_s:>6.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: per-query latency of keyword, vector and hybrid retrieval.
+
+Ingests a synthetic corpus (or --data-dir) into a Chroma collection and its
+FTS5 keyword index with tools.embedding_pipeline, then times each retrieval
+mode. Keyword queries skip the question embedding, which is the dominant cost
+with a real model (--model all-MiniLM-L6-v2).
+
+    python benchmarks/bench_retrieval_modes.py --files 500 --queries 200
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import chromadb  # noqa: E402
+
+from tools.embedding_pipeline import run_pipeline, load_sentence_transformer  # noqa: E402
+from tools.keyword_index import KeywordIndex, reciprocal_rank_fusion  # noqa: E402
+from bench_embedding_pipeline import HashEncoder, make_corpus, WORDS  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data-dir", default=None)
+    ap.add_argument("--files", type=int, default=500)
+    ap.add_argument("--words", type=int, default=1000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--model", default=None, help="SentenceTransformer model name (default: hashing encoder)")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_modes_")
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = os.path.join(tmp, "data")
+        make_corpus(data_dir, args.files, args.words)
+    encoder = load_sentence_transformer(args.model) if args.model else HashEncoder()
+    try:
+        client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+        collection = client.get_or_create_collection("rag_collection", embedding_function=None)
+        keywords = KeywordIndex(os.path.join(tmp, "keyword.db"))
+        stats = run_pipeline(data_dir, collection, workers=0, encoder=encoder, keyword_index=keywords)
+        print(f"{stats['chunks']} chunks indexed in {stats['seconds']:.1f}s\n")
+
+        rnd = random.Random(0)
+        questions = [" ".join(rnd.sample(WORDS, 2)) for _ in range(args.queries)]
+
+        def vector(q):
+            emb = encoder.encode(q).tolist()
+            return collection.query(query_embeddings=[emb], n_results=args.top_k)["ids"][0]
+
+        def keyword(q):
+            return [h["id"] for h in keywords.search(q, args.top_k)]
+
+        def hybrid(q):
+            return reciprocal_rank_fusion([vector(q), keyword(q)])[:args.top_k]
+
+        print(f"{'mode':<8} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 30)
+        for name, fn in (("vector", vector), ("keyword", keyword), ("hybrid", hybrid)):
+            lat = []
+            for q in questions:
+                t0 = time.perf_counter()
+                fn(q)
+                lat.append((time.perf_counter() - t0) * 1000)
+            lat.sort()
+            print(f"{name:<8} | {statistics.median(lat):>8.2f} | {lat[int(0.95 * (len(lat) - 1))]:>8.2f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
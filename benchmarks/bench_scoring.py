@@ -0,0 +1,144 @@
+"""
+Benchmark: the eval harness scorer (sandbox/local_agent_eval_harness/scoring.py)
+on large structured answers, vs the previous recursive flatten-and-compare.
+
+Shapes, at --rows rows/segments each:
+
+  csv_rows   - list of flat dicts, answer shuffled with 5% of the rows edited
+  segments   - transcript segments {start, end, text}, in order, text re-cased
+  wide       - one dict with --rows keys
+  deep       - a chain of nested dicts --rows/10 levels deep (capped at 900),
+               wrong at the bottom
+
+'old' compares positionally, so on shuffled rows it scores near 0; 'new'
+uses the default unordered matching (and "text" for segments). 'pairwise'
+is set-like matching of csv_rows without hashing, each expected row
+searching the remaining answer rows.
+
+    python benchmarks/bench_scoring.py --rows 1000 10000 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sandbox", "local_agent_eval_harness"))
+
+from scoring import score  # noqa: E402
+
+
+def old_score(expected, got):
+    """scoring.score before the iterative, policy-aware rewrite."""
+    def _norm(v):
+        return round(v, 4) if isinstance(v, float) else v
+
+    def flatten(x, prefix=''):
+        items = {}
+        if isinstance(x, dict):
+            for k, v in x.items():
+                items.update(flatten(v, prefix + '/' + str(k)))
+        elif isinstance(x, list):
+            for i, v in enumerate(x):
+                items.update(flatten(v, prefix + '/' + str(i)))
+        else:
+            items[prefix or '/'] = _norm(x)
+        return items
+
+    exp, gotf = flatten(expected), flatten(got)
+    correct = 0
+    for k, v in exp.items():
+        gv = gotf.get(k, None)
+        if isinstance(v, float) and isinstance(gv, float):
+            correct += abs(v - gv) <= 1e-2
+        else:
+            correct += v == gv
+    return correct / len(exp) if exp else 0.0
+
+
+def make_case(shape: str, n: int, rng: random.Random):
+    """(expected, answer, policies)."""
+    if shape == "csv_rows":
+        rows = [{"sku": f"SKU-{i}", "qty": str(rng.randint(1, 9)), "unit_price": f"{rng.uniform(1, 500):.2f}"}
+                for i in range(n)]
+        got = [dict(r) for r in rows]
+        for r in rng.sample(got, n // 20):
+            r["qty"] = "0"
+        rng.shuffle(got)
+        return {"csv_rows": rows}, {"csv_rows": got}, None
+    if shape == "segments":
+        segs, t = [], 0.0
+        for i in range(n):
+            end = t + rng.uniform(0.5, 4)
+            segs.append({"start": round(t, 1), "end": round(end, 1), "text": f"Segment {i} says something"})
+            t = end + 0.3
+        got = [dict(s, text=s["text"].upper()) for s in segs]
+        return segs, got, {"/": "ordered", "text": "text"}
+    if shape == "wide":
+        exp = {f"key_{i}": rng.uniform(0, 1) for i in range(n)}
+        return exp, {k: v + 0.001 for k, v in exp.items()}, None
+    depth = min(900, max(1, n // 10))
+    exp, got = {}, {}
+    leaf_e, leaf_g = exp, got
+    for i in range(depth):
+        leaf_e["v"] = leaf_g["v"] = i
+        leaf_e["next"], leaf_g["next"] = {}, {}
+        leaf_e, leaf_g = leaf_e["next"], leaf_g["next"]
+    leaf_g["v"] = -1  # one wrong leaf at the bottom
+    leaf_e["v"] = depth
+    return exp, got, None
+
+
+def pairwise_unordered(expected, got):
+    """Set-like list scoring without hashing: each expected row searches the remaining answer rows."""
+    rest, correct = list(got), 0
+    for row in expected:
+        for j, cand in enumerate(rest):
+            if cand == row:
+                del rest[j]
+                correct += 1
+                break
+    return correct / len(expected) if expected else 0.0
+
+
+def timed(fn, repeat: int = 1):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--old_max_rows", type=int, default=100000, help="Skip the old scorer above this size")
+    ap.add_argument("--pairwise_max_rows", type=int, default=10000,
+                    help="Skip the O(n^2) pairwise unordered matching (csv_rows) above this size")
+    ap.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    args = ap.parse_args()
+
+    print(f"{'rows':>7} | {'shape':>9} | {'leaves':>7} | {'old ms':>9} | {'pairwise ms':>11} | {'new ms':>9} | "
+          f"{'vs old':>7} | {'old score':>9} | {'new score':>9}")
+    print("-" * 104)
+    for n in args.rows:
+        for shape in ("csv_rows", "segments", "wide", "deep"):
+            expected, got, policies = make_case(shape, n, random.Random(n))
+            (new, details), new_ms = timed(lambda: score(expected, got, policies), args.repeat)
+            if n <= args.old_max_rows:
+                old, old_ms = timed(lambda: old_score(expected, got), args.repeat)
+                old_s, speedup, old_score_s = f"{old_ms:>9.1f}", f"{old_ms / new_ms:>6.1f}x", f"{old:>9.3f}"
+            else:
+                old_s, speedup, old_score_s = f"{'-':>9}", f"{'-':>7}", f"{'-':>9}"
+            pairwise_s = f"{'-':>11}"
+            if shape == "csv_rows" and n <= args.pairwise_max_rows:
+                _, pairwise_ms = timed(lambda: pairwise_unordered(expected["csv_rows"], got["csv_rows"]))
+                pairwise_s = f"{pairwise_ms:>11.1f}"
+            print(f"{n:>7} | {shape:>9} | {details['total']:>7} | {old_s} | {pairwise_s} | {new_ms:>9.1f} | {speedup} | "
+                  f"{old_score_s} | {new:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: streaming anomaly detection throughput (records/sec) and recall.
+
+Writes a synthetic sensor log (bench_sensor_ingest.make_log) and injects
+known anomalies: ACC spikes, a stuck LeftFoot pad, and the recording gaps
+make_log already leaves. It then measures:
+
+  detect  - StreamingDetector.update on pre-parsed chunks (detectors only)
+  poll    - StreamingDetector.poll over the whole file (parse + detect + index)
+  tail    - the log grows in --tail-steps appends with a poll after each; the
+            detector state size shows memory stays constant
+
+    python benchmarks/bench_sensor_anomaly.py --minutes 60 240
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.sensor_store import CHANNELS, iter_chunks, parse_chunk  # noqa: E402
+from tools.sensor_anomaly import StreamingDetector  # noqa: E402
+from bench_sensor_ingest import make_log  # noqa: E402
+
+
+def inject(path: str, spikes: int, seed: int = 0) -> tuple:
+    """Rewrites path with 'spikes' ACC spikes and LeftFoot pad 5 stuck at 0 in the middle third."""
+    with open(path) as f:
+        lines = f.read().splitlines()
+    rng = np.random.default_rng(seed)
+    acc = [i for i, line in enumerate(lines) if ",ACC," in line]
+    spiked = sorted(rng.choice(acc[len(acc) // 10:], spikes, replace=False).tolist())
+    for i in spiked:
+        ts = lines[i].split(",", 1)[0]
+        lines[i] = f"{ts},ACC,40.0,35.0,-30.0"
+    foot = [i for i, line in enumerate(lines) if ",LeftFoot," in line]
+    for i in foot[len(foot) // 3: 2 * len(foot) // 3]:
+        parts = lines[i].split(",")
+        parts[2 + 5] = " 0"
+        lines[i] = ",".join(parts)
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return [int(lines[i].split(",", 1)[0]) for i in spiked]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, nargs="+", default=[60, 240])
+    ap.add_argument("--spikes", type=int, default=50)
+    ap.add_argument("--tail-steps", type=int, default=20)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_anomaly_")
+    try:
+        print(f"{'minutes':>7} | {'records':>9} | {'detect rec/s':>12} | {'poll rec/s':>10} | {'tail ms/poll':>12} | "
+              f"{'state KB':>8} | {'spike recall':>12} | events")
+        print("-" * 110)
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"sensor_{minutes:g}.txt")
+            make_log(path, minutes)
+            truth = inject(path, args.spikes)
+
+            channels = dict(CHANNELS)
+            chunks = [parse_chunk(data, channels)[0] for data, _ in iter_chunks(path, 0)]
+            records = sum(len(ts) for arrays in chunks for ts, _ in arrays.values())
+            detector = StreamingDetector(path, db_path=os.path.join(tmp, f"update_{minutes:g}.db"))
+            t0 = time.perf_counter()
+            for arrays in chunks:
+                detector.update(arrays)
+            detect = time.perf_counter() - t0
+
+            detector = StreamingDetector(path, db_path=os.path.join(tmp, f"poll_{minutes:g}.db"))
+            t0 = time.perf_counter()
+            detector.poll()
+            poll = time.perf_counter() - t0
+            spikes = detector.events(channel="ACC", kind="spike", limit=100000)
+            found = sum(any(e["start_ms"] <= t <= e["end_ms"] for e in spikes) for t in truth)
+            counts = detector.counts()
+
+            # Tail: the same file growing step by step.
+            with open(path, "rb") as f:
+                data = f.read()
+            grow = os.path.join(tmp, f"grow_{minutes:g}.txt")
+            open(grow, "wb").close()
+            tail = StreamingDetector(grow)
+            step = len(data) // args.tail_steps
+            elapsed, sizes = 0.0, []
+            for i in range(args.tail_steps):
+                with open(grow, "ab") as f:
+                    f.write(data[i * step:(i + 1) * step if i < args.tail_steps - 1 else len(data)])
+                t0 = time.perf_counter()
+                tail.poll()
+                elapsed += time.perf_counter() - t0
+                sizes.append(len(tail._state_json()))
+            summary = ", ".join(f"{c} {k} {n}" for (c, k), n in sorted(counts.items()))
+            print(f"{minutes:>7g} | {records:>9} | {records / detect:>12,.0f} | {records / poll:>10,.0f} | "
+                  f"{elapsed * 1000 / args.tail_steps:>12.1f} | {max(sizes) / 1024:>8.1f} | "
+                  f"{found:>5}/{len(truth):<6} | {summary}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
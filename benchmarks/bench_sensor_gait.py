@@ -0,0 +1,110 @@
+"""
+Benchmark: gait / stillness analysis (tools.sensor_analysis) on long logs.
+
+Writes a synthetic log of ACC (3 x float) and LeftFoot (18 pressure pads) at
+--rate Hz with jittered timestamps, alternating walking bouts (1.6-2.0
+steps/s) with standing still, and a few recording gaps. It ingests the log
+(tools.sensor_store) and times analyze() per channel on the cached arrays,
+comparing against the generator's ground truth:
+
+  steps    - ACC steps vs true steps; LeftFoot contacts vs true strides
+  walking  - seconds classified as walking vs truth
+  still    - seconds in still segments vs truth
+
+    python benchmarks/bench_sensor_gait.py --hours 1 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.sensor_store import ingest, SensorStore, sensor_cache_dir  # noqa: E402
+from tools.sensor_analysis import analyze  # noqa: E402
+
+
+def make_gait_log(path: str, hours: float, rate: float = 100.0, seed: int = 0,
+                  start_ms: int = 1705991914500) -> dict:
+    """Writes the synthetic log; returns the ground truth."""
+    rng = np.random.default_rng(seed)
+    n = int(hours * 3600 * rate)
+    step_ms = 1000.0 / rate
+    ts = start_ms + np.round(np.arange(n) * step_ms + rng.uniform(-0.2, 0.2, n) * step_ms).astype(np.int64)
+    t = (ts - start_ms) / 1000.0
+
+    # Alternating bouts: still, walking, still, ... of 30 s to 5 min.
+    bounds = np.cumsum(rng.uniform(30, 300, int(hours * 3600 / 30) + 2))
+    bout = np.searchsorted(bounds, t, side="right")
+    walking = bout % 2 == 1
+    freq = rng.uniform(1.6, 2.0, len(bounds) + 1)[bout]
+    cycles = np.cumsum(np.where(walking, freq, 0.0)) / rate       # steps taken so far
+    step_phase = 2 * np.pi * cycles
+
+    acc = np.empty((n, 3))
+    acc[:, 0] = 0.3 + walking * 0.6 * np.sin(step_phase / 2) + rng.normal(0, 0.03, n)
+    acc[:, 1] = 0.5 + walking * 0.4 * np.cos(step_phase) + rng.normal(0, 0.03, n)
+    acc[:, 2] = 9.7 + walking * 2.0 * np.sin(step_phase) + rng.normal(0, 0.03, n)
+    # Foot contact while the stride (two steps) is in its first half; standing loads the foot steadily.
+    stride = np.sin(step_phase / 2)
+    load = np.where(walking, np.where(stride > 0, 900 * stride, 0.0), 300.0)
+    pads = np.maximum(load[:, None] / 18 * rng.uniform(0.5, 1.5, 18) + rng.normal(0, 2, (n, 18)), 0).astype(int)
+
+    # Recording gaps: drop a few 20 s stretches.
+    keep = np.ones(n, dtype=bool)
+    for g in rng.integers(0, n, max(1, int(hours * 2))):
+        keep[g:g + int(20 * rate)] = False
+
+    peaks = np.floor(cycles - 0.25)   # sin(step_phase) peaks at a quarter cycle
+    contacts = np.floor(cycles / 2)   # stride starts: sin(step_phase / 2) turns positive
+    truth = {
+        "steps": int((np.diff(peaks) > 0)[keep[1:] & keep[:-1]].sum()),
+        "strides": int((np.diff(contacts) > 0)[keep[1:] & keep[:-1]].sum()),
+        "walking_s": float((walking & keep).sum()) / rate,
+        "still_s": float((~walking & keep).sum()) / rate,
+    }
+    rows = [(int(x), f"{x},ACC,{a:.7g},{b:.7g},{c:.7g}") for x, (a, b, c) in zip(ts[keep].tolist(), acc[keep].tolist())]
+    rows += [(int(x) + 1, f"{x + 1},LeftFoot,{', '.join(map(str, p))}")
+             for x, p in zip(ts[keep].tolist(), pads[keep].tolist())]
+    rows.sort(key=lambda r: r[0])
+    with open(path, "w") as f:
+        f.write("\n".join(line for _, line in rows) + "\n")
+    return truth
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, nargs="+", default=[1, 4])
+    ap.add_argument("--rate", type=float, default=100.0)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_gait_")
+    try:
+        print(f"{'hours':>5} | {'channel':>8} | {'samples':>9} | {'analyze ms':>10} | {'steps (truth)':>15} | "
+              f"{'cadence Hz':>10} | {'walking s (truth)':>17} | {'still s (truth)':>15} | Msamples/s")
+        print("-" * 124)
+        for hours in args.hours:
+            path = os.path.join(tmp, f"gait_{hours:g}.txt")
+            truth = make_gait_log(path, hours, args.rate)
+            store = SensorStore(sensor_cache_dir(path), ingest(path))
+            for channel in ("ACC", "LeftFoot"):
+                ts, values = store.window(channel)
+                t0 = time.perf_counter()
+                result = analyze(ts, values, channel)
+                elapsed = (time.perf_counter() - t0) * 1000
+                expected = truth["steps"] if channel == "ACC" else truth["strides"]
+                cad = f"{result['cadence_hz']:.2f}" if result["cadence_hz"] else "-"
+                print(f"{hours:>5g} | {channel:>8} | {len(ts):>9} | {elapsed:>10.1f} | "
+                      f"{result['steps']:>6} ({expected:>6}) | {cad:>10} | "
+                      f"{result['walking_s']:>7.0f} ({truth['walking_s']:>7.0f}) | "
+                      f"{result['still_s']:>6.0f} ({truth['still_s']:>6.0f}) | {len(ts) / elapsed / 1000:.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: sensor log ingestion and queries, line-by-line parsing vs the
+vectorised columnar cache (tools.sensor_store).
+
+Writes a synthetic sensor_log.txt-style file with the channel mix and rates of
+sandbox/data/sensor_data (ACC ~60 Hz, MAG 50 Hz, LeftFoot ~20 Hz, GYRO ~7.5 Hz,
+plus a few recording gaps) and measures:
+
+  parse   - a csv-style per-line Python parse into per-channel lists
+  ingest  - tools.sensor_store.ingest into an empty cache
+  tail    - re-ingest after appending --append-minutes of data
+  queries - sample rates, gaps, magnitude and nearest lookups on the memmap
+
+    python benchmarks/bench_sensor_ingest.py --minutes 60 240
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.sensor_store import ingest, SensorStore, sensor_cache_dir  # noqa: E402
+
+RATES_HZ = {"ACC": 60.0, "MAG": 50.0, "LeftFoot": 19.2, "GYRO": 7.5}
+
+
+def make_log(path: str, minutes: float, start_ms: int = 1705991914500, seed: int = 0, mode: str = "w",
+             rates: dict = RATES_HZ) -> int:
+    """Appends 'minutes' of interleaved synthetic records to path; returns the last timestamp."""
+    rng = np.random.default_rng(seed)
+    span = int(minutes * 60000)
+    rows = []
+    for tag, hz in rates.items():
+        n = int(span / 1000.0 * hz)
+        ts = start_ms + np.sort(rng.integers(0, span, n))
+        # A few recording gaps, as in the sandbox log.
+        for g in rng.integers(0, span, max(1, int(minutes // 30))):
+            ts = ts[(ts < start_ms + g) | (ts > start_ms + g + 20000)]
+        t = (ts - start_ms) / 1000.0
+        if tag == "LeftFoot":
+            phase = np.sin(2 * np.pi * 0.9 * t)[:, None] + rng.normal(0, 0.1, (len(ts), 18))
+            values = np.where(phase > 0.3, (phase * 800).astype(int), 0)
+            text = [",".join(map(str, v)) for v in values.tolist()]
+            text = [s.replace(",", ", ") for s in text]
+        else:
+            base = {"ACC": (0.0, 0.0, 9.8), "MAG": (-8.0, -24.0, -44.0), "GYRO": (0.0, 0.0, 0.0)}[tag]
+            values = np.array(base) + np.sin(2 * np.pi * 1.8 * t)[:, None] * 1.5 + rng.normal(0, 0.2, (len(ts), 3))
+            text = [f"{a:.7g},{b:.7g},{c:.7g}" for a, b, c in values.tolist()]
+        rows += [(int(x), f"{x},{tag},{v}") for x, v in zip(ts.tolist(), text)]
+    rows.sort(key=lambda r: r[0])
+    with open(path, mode) as f:
+        f.write("\n".join(line for _, line in rows) + "\n")
+    return start_ms + span
+
+
+def parse_lines(path: str) -> dict:
+    """Baseline: what a straightforward script does with the log."""
+    channels = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) < 3:
+                continue
+            channels.setdefault(parts[1], []).append((int(parts[0]), [float(p) for p in parts[2:]]))
+    return {tag: (np.array([t for t, _ in rows]), np.array([v for _, v in rows])) for tag, rows in channels.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, nargs="+", default=[60, 240])
+    ap.add_argument("--append-minutes", type=float, default=1)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_sensor_")
+    try:
+        print(f"{'minutes':>7} | {'MB':>6} | {'rows':>9} | {'parse s':>8} | {'ingest s':>8} | {'MB/s':>6} | "
+              f"{'tail ms':>8} | {'queries ms':>10}")
+        print("-" * 86)
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"sensor_{minutes:g}.txt")
+            end = make_log(path, minutes)
+            mb = os.path.getsize(path) / 1e6
+
+            t0 = time.perf_counter()
+            parse_lines(path)
+            parse = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            meta = ingest(path)
+            build = time.perf_counter() - t0
+            rows = sum(c["count"] for c in meta["channels"].values())
+
+            make_log(path, args.append_minutes, start_ms=end + 1, seed=1, mode="a")
+            t0 = time.perf_counter()
+            meta = ingest(path)
+            tail = time.perf_counter() - t0
+
+            store = SensorStore(sensor_cache_dir(path), meta)
+            t0 = time.perf_counter()
+            for tag in store.channels:
+                store.sample_rate(tag)
+                store.gaps(tag)
+            store.magnitude("ACC")
+            probe = np.random.default_rng(2).integers(meta["channels"]["ACC"]["first"], end, 1000)
+            for t in probe.tolist():
+                store.nearest("GYRO", t)
+            queries = time.perf_counter() - t0
+            print(f"{minutes:>7g} | {mb:>6.1f} | {rows:>9} | {parse:>8.2f} | {build:>8.2f} | {mb / build:>6.1f} | "
+                  f"{tail * 1000:>8.1f} | {queries * 1000:>10.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
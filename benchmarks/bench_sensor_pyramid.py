@@ -0,0 +1,138 @@
+"""
+Benchmark: range and plot queries over the sensor cache, full scans of the
+memmapped samples vs the aggregation pyramid (tools.sensor_pyramid).
+
+Writes a synthetic log (bench_sensor_ingest.make_log), ingests it, and times:
+
+  mean    - mean ACC magnitude over the whole log
+  range   - --queries random [start, end) aggregates of ACC (mean/std/min/max)
+  series  - LeftFoot total pressure per second over a random 10 minutes (plot)
+  peaks   - top 3 ACC magnitude spikes over the whole log
+
+Answers are compared with the full scans; 'build' is the time to build the
+pyramid from the cached columns, i.e. its share of the ingest.
+
+    python benchmarks/bench_sensor_pyramid.py --minutes 60 240
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.sensor_store import ingest, SensorStore, sensor_cache_dir  # noqa: E402
+from tools.sensor_pyramid import Pyramid, signal_column  # noqa: E402
+from bench_sensor_ingest import make_log  # noqa: E402
+
+
+def scan_aggregate(store: SensorStore, channel: str, start: int, end: int) -> tuple:
+    _, values = store.window(channel, start, end)
+    signal = signal_column(values)
+    return len(signal), signal.mean(), signal.std(), signal.min(), signal.max()
+
+
+def scan_series(store: SensorStore, channel: str, start: int, end: int) -> tuple:
+    ts, values = store.window(channel, start, end)
+    buckets, index = np.unique(ts // 1000, return_inverse=True)
+    return buckets * 1000, np.bincount(index, weights=signal_column(values)) / np.bincount(index)
+
+
+def scan_peaks(store: SensorStore, channel: str, k: int) -> list:
+    ts, values = store.window(channel)
+    signal = signal_column(values)
+    order = np.argsort(-signal)
+    found, seconds = [], set()
+    for i in order.tolist():
+        if ts[i] // 1000 not in seconds:
+            seconds.add(ts[i] // 1000)
+            found.append((int(ts[i]), float(signal[i])))
+            if len(found) == k:
+                break
+    return found
+
+
+def timed(fn, repeat: int = 1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) * 1000 / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, nargs="+", default=[60, 240])
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_pyramid_")
+    try:
+        print(f"{'minutes':>7} | {'ACC rows':>9} | {'build s':>7} | {'query':>6} | {'scan ms':>8} | {'pyramid ms':>10} | "
+              f"{'speedup':>7} | {'buckets+raw read':>16} | mismatches")
+        print("-" * 108)
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"sensor_{minutes:g}.txt")
+            end_ms = make_log(path, minutes)
+            t0 = time.perf_counter()
+            meta = ingest(path)
+            build = time.perf_counter() - t0
+            cache = sensor_cache_dir(path)
+            store = SensorStore(cache, meta)
+            t0 = time.perf_counter()
+            pyramid = Pyramid(cache, writable=True)
+            pyramid.rebuild({tag: (store.timestamps(tag), store.values(tag)) for tag in store.channels})
+            pyramid.save(meta["offset"])
+            rebuild = time.perf_counter() - t0
+            first = meta["channels"]["ACC"]["first"]
+            rows = meta["channels"]["ACC"]["count"]
+
+            rng = np.random.default_rng(3)
+            bounds = np.sort(rng.integers(first, end_ms, (args.queries, 2)), axis=1).tolist()
+            results = []
+
+            truth, scan = timed(lambda: scan_aggregate(store, "ACC", None, None))
+            got, fast = timed(lambda: store.aggregate("ACC"))
+            m = got["columns"]["magnitude"]
+            bad = int(got["count"] != truth[0] or not np.allclose((m["mean"], m["std"], m["min"], m["max"]), truth[1:]))
+            results.append(("mean", scan, fast, f"{got['buckets_read']}+{got['samples_read']}", bad))
+
+            truths, scan = timed(lambda: [scan_aggregate(store, "ACC", a, b) for a, b in bounds])
+            gots, fast = timed(lambda: [store.aggregate("ACC", a, b) for a, b in bounds])
+            bad, read = 0, [0, 0]
+            for t, g in zip(truths, gots):
+                m = g["columns"]["magnitude"]
+                read[0] += g["buckets_read"]
+                read[1] += g["samples_read"]
+                if g["count"] != t[0] or (t[0] and not np.allclose((m["mean"], m["std"], m["min"], m["max"]), t[1:])):
+                    bad += 1
+            results.append(("range", scan / len(bounds), fast / len(bounds),
+                            f"{read[0] // len(bounds)}+{read[1] // len(bounds)}", bad))
+
+            a = int(rng.integers(first, end_ms - 600000))
+            (t_scan, mean_scan), scan = timed(lambda: scan_series(store, "LeftFoot", a, a + 600000), 5)
+            series, fast = timed(lambda: store.series("LeftFoot", a, a + 600000, level="1s"), 5)
+            # Whole seconds only: the scan clips the edge seconds to [a, a + 10 min).
+            inner = (series["t"] >= a) & (series["t"] + 1000 <= a + 600000)
+            keep = np.isin(t_scan, series["t"][inner])
+            bad = int(not np.allclose(series["mean"][inner, -1], mean_scan[keep]))
+            results.append(("series", scan, fast, f"{len(series['t'])}+0", bad))
+
+            truth, scan = timed(lambda: scan_peaks(store, "ACC", 3))
+            got, fast = timed(lambda: store.peaks("ACC", 3))
+            bad = int([t for t, _ in got] != [t for t, _ in truth])
+            results.append(("peaks", scan, fast, "-", bad))
+
+            for i, (name, scan, fast, read, bad) in enumerate(results):
+                lead = (f"{minutes:>7g} | {rows:>9} | {rebuild:>7.2f}" if i == 0 else f"{'':>7} | {'':>9} | {'':>7}")
+                print(f"{lead} | {name:>6} | {scan:>8.2f} | {fast:>10.3f} | {scan / fast:>6.0f}x | {read:>16} | {bad}")
+            print(f"{'':>7}   ingest incl. pyramid {build:.2f} s, of which pyramid ~{rebuild:.2f} s")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
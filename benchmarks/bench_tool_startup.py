@@ -0,0 +1,105 @@
+"""
+Benchmark: cold start to first tool call, for every tool in tools.TOOL_REGISTRY.
+
+Each tool is measured in a fresh interpreter:
+  import   - importing the tool module (smolagents included)
+  init     - constructing the tool
+  forward  - the first forward call with a small sample input
+  heavy    - heavy dependencies already in sys.modules after construction
+             (should be empty: they are only imported on first forward)
+
+    python benchmarks/bench_tool_startup.py
+    python benchmarks/bench_tool_startup.py --tools sqlite_tool rag_tool --no-forward
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+DATA_DIR = os.path.join(REPO_ROOT, "sandbox", "data")
+
+sys.path.insert(0, SRC_DIR)
+from tools import TOOL_REGISTRY  # noqa: E402  (light: only the registry table)
+
+HEAVY_MODULES = ["torch", "llama_index", "chromadb", "sentence_transformers", "transformers"]
+
+CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+import tools
+obj = tools.get_tool_class({name!r})
+t1 = time.perf_counter()
+tool = tools.load_tool({name!r})
+t2 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+result = dict(import_s=t1 - t0, init_s=t2 - t1, heavy=heavy, forward_s=None, error=None)
+kwargs = {kwargs!r}
+if kwargs is not None:
+    try:
+        tool(**kwargs)
+        result["forward_s"] = time.perf_counter() - t2
+    except Exception as e:
+        result["error"] = f"{{type(e).__name__}}: {{e}}"[:120]
+print("@@" + json.dumps(result))
+"""
+
+
+def sample_inputs(work_dir: str) -> dict:
+    """Small forward() inputs per tool; None means the tool is only imported/constructed."""
+    corpus = os.path.join(work_dir, "notes")
+    if not os.path.exists(corpus):
+        shutil.copytree(os.path.join(DATA_DIR, "notes"), corpus)
+    return {
+        "rag_tool": dict(data_dir=corpus, question="What medication was prescribed?", similarity_top_k="2"),
+        "chroma_rag_tool": dict(data_dir=corpus, question="What medication was prescribed?", top_k=2),
+        "sqlite_tool": dict(db_path=os.path.join(DATA_DIR, "sql_data", "receipts.db"), sql="SELECT COUNT(*) FROM receipts"),
+        "directory_analyzer": dict(directory_path=corpus),
+        "file_reader": dict(filename=os.path.join(corpus, "doctor_note_1.txt")),
+        "file_writer": dict(filename=os.path.join(work_dir, "out.py"), scripts="print('hi')\n"),
+        "tool_pip_install": None,  # would hit the network
+        "tool_registry_manager": dict(action="list"),
+        "api_setup": dict(MODEL_API_KEY_NAME="EDA_BENCH_KEY", API_KEY="x"),
+    }
+
+
+def run_one(name: str, kwargs, work_dir: str) -> dict:
+    code = CHILD.format(src=SRC_DIR, name=name, heavy=HEAVY_MODULES, kwargs=kwargs)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=work_dir, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@"):
+            return json.loads(line[2:])
+    return dict(import_s=None, init_s=None, heavy=[], forward_s=None, error=(proc.stderr.strip().splitlines() or ["failed"])[-1][:120])
+
+
+def _fmt(v):
+    return f"{v:8.3f}" if isinstance(v, float) else f"{'-':>8}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tools", nargs="+", default=sorted(TOOL_REGISTRY))
+    ap.add_argument("--no-forward", action="store_true", help="Only measure import + construction")
+    args = ap.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        inputs = sample_inputs(work_dir)
+        print(f"{'tool':<22} | {'import s':>8} | {'init s':>8} | {'fwd s':>8} | heavy after init / error")
+        print("-" * 90)
+        for name in args.tools:
+            kwargs = None if args.no_forward else inputs.get(name)
+            r = run_one(name, kwargs, work_dir)
+            note = r["error"] or (",".join(r["heavy"]) or "none")
+            print(f"{name:<22} | {_fmt(r['import_s'])} | {_fmt(r['init_s'])} | {_fmt(r['forward_s'])} | {note}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
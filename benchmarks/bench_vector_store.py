@@ -0,0 +1,129 @@
+"""
+Benchmark: memory-mapped float16/int8 vector store vs llama_index JSON persistence.
+
+For each corpus (default: every directory under sandbox/data), the documents
+are split into nodes exactly as RAGTool does and embedded. Reported per format:
+on-disk size, load time, query latency and recall@k against exact float32
+search. The JSON baseline is default__vector_store.json as written by
+llama_index's SimpleVectorStore.
+
+    python benchmarks/bench_vector_store.py
+    python benchmarks/bench_vector_store.py --model sentence-transformers/all-MiniLM-L6-v2
+    python benchmarks/bench_vector_store.py --synthetic 200000    # random 384-d rows
+
+Without --model a hashing encoder is used: absolute recall is then only a
+measure of quantisation error, which is what this store changes.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tools.vector_store import MemmapVectorStore, _normalize  # noqa: E402
+from bench_embedding_pipeline import HashEncoder  # noqa: E402
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def corpus_texts(data_dir: str) -> list:
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.node_parser import SentenceSplitter
+
+    documents = SimpleDirectoryReader(data_dir, filename_as_id=True).load_data()
+    return [n.get_content() for n in SentenceSplitter().get_nodes_from_documents(documents)]
+
+
+def embed(texts: list, model: str | None) -> np.ndarray:
+    if model:
+        from sentence_transformers import SentenceTransformer
+        return np.asarray(SentenceTransformer(model).encode(texts, batch_size=64), dtype=np.float32)
+    return HashEncoder(rounds=1).encode(texts)
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = _normalize(queries) @ _normalize(matrix).T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def run_corpus(name: str, ids: list, matrix: np.ndarray, args, tmp: str):
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = matrix[picks] + rng.normal(scale=0.5 * matrix.std(), size=(len(picks), matrix.shape[1]))
+    truth = exact_top_k(matrix, queries, args.top_k)
+    index_of = {node_id: i for i, node_id in enumerate(ids)}
+
+    # llama_index SimpleVectorStore persistence (float32 as JSON)
+    json_path = os.path.join(tmp, f"{name}.json")
+    with open(json_path, "w") as f:
+        json.dump({"embedding_dict": dict(zip(ids, matrix.tolist())), "text_id_to_ref_doc_id": {}, "metadata_dict": {}}, f)
+    t0 = time.perf_counter()
+    with open(json_path) as f:
+        data = json.load(f)
+    np.array(list(data["embedding_dict"].values()), dtype=np.float32)
+    rows = [("json f32", os.path.getsize(json_path), (time.perf_counter() - t0) * 1000, None, 1.0)]
+
+    for dtype in ("float16", "int8"):
+        path = os.path.join(tmp, f"{name}_{dtype}")
+        MemmapVectorStore.write(path, ids, matrix, dtype=dtype)
+        t0 = time.perf_counter()
+        store = MemmapVectorStore.open(path)
+        load_ms = (time.perf_counter() - t0) * 1000
+        lat, hits = [], 0
+        for q, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            got = store.query(q, args.top_k)
+            lat.append((time.perf_counter() - t0) * 1000)
+            hits += len({index_of[i] for i, _ in got} & expected)
+        rows.append((f"memmap {dtype}", dir_size(path), load_ms, statistics.median(lat), hits / (len(truth) * args.top_k)))
+
+    print(f"\n{name}: {len(ids)} chunks x {matrix.shape[1]}d")
+    print(f"{'format':<15} | {'size MB':>8} | {'load ms':>9} | {'query ms':>8} | recall@{args.top_k}")
+    print("-" * 62)
+    for fmt, size, load_ms, query_ms, recall in rows:
+        q = f"{query_ms:.2f}" if query_ms is not None else "-"
+        print(f"{fmt:<15} | {size / 1e6:>8.2f} | {load_ms:>9.2f} | {q:>8} | {recall:.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data-dirs", nargs="*", default=None, help="Corpora (default: sandbox/data/*)")
+    ap.add_argument("--model", default=None, help="SentenceTransformer model (default: hashing encoder)")
+    ap.add_argument("--synthetic", type=int, default=0, help="Also run on N random 384-d rows")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--top-k", type=int, default=5)
+    args = ap.parse_args()
+
+    data_dirs = args.data_dirs
+    if data_dirs is None:
+        data_dirs = sorted(d for d in glob.glob(os.path.join(REPO, "sandbox", "data", "*")) if os.path.isdir(d))
+
+    tmp = tempfile.mkdtemp(prefix="bench_vectors_")
+    try:
+        for data_dir in data_dirs:
+            texts = corpus_texts(data_dir)
+            if len(texts) < args.top_k:
+                continue
+            ids = [f"node-{i}" for i in range(len(texts))]
+            run_corpus(os.path.basename(os.path.normpath(data_dir)), ids, embed(texts, args.model), args, tmp)
+        if args.synthetic:
+            matrix = np.random.default_rng(1).standard_normal((args.synthetic, 384)).astype(np.float32)
+            run_corpus("synthetic", [f"node-{i}" for i in range(args.synthetic)], matrix, args, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
-import os, sys, json, glob, argparse, importlib, traceback
+import os, sys, json, glob, time, argparse, importlib, threading, traceback, multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 from tasks import TASKS
-from scoring import score
+from scoring import score, Policies
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+from tools.json_extract import extract_json
 
 def json_pointer(d: Dict[str, Any], path):
     cur = d
@@ -18,11 +26,8 @@ def maybe_parse_json(x):
     if isinstance(x, (dict, list)):
         return x
     if isinstance(x, str):
-        try:
-            return json.loads(x)
-        except Exception:
-            # try to recover simple dict-likes
-            return dict(_raw=x)
+        # whole text, fenced block or first {...}/[...] block; {"_raw": x} if there is none
+        return extract_json(x)
     return dict(_raw=str(x))
 
 def print_results_table(results):
@@ -69,25 +74,166 @@ def print_results_table(results):
     print(f"{'AVERAGE':<{max_task_len}} | {g_avg:>5.2f} | {a_avg:>5.2f} | {'LLM wins' if g_avg > a_avg else 'Agent wins' if a_avg > g_avg else 'Tie'}")
     print(separator)
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--packs", required=True, help="Directory containing the unzipped packs")
-    ap.add_argument("--out", required=True, help="Path to write a JSON report")
-    ap.add_argument("--runs_dir", default="runs", help="Where to save per-task outputs")
-    args = ap.parse_args()
+class ProviderTimeout(Exception):
+    pass
 
-    # Load providers
-    gllm = importlib.import_module("providers.general_llm")
-    agent = importlib.import_module("providers.local_agent")
+def _rusage():
+    """(CPU seconds, peak RSS in MB) of this process; (None, None) where the resource module is unavailable."""
+    if resource is None:
+        return None, None
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return ru.ru_utime + ru.ru_stime, ru.ru_maxrss * scale / 2**20
 
-    os.makedirs(args.runs_dir, exist_ok=True)
-    report = {"results": [], "summary": {}}
+def _measured(fn, *args):
+    """Call fn in this thread; return (result, metrics) with wall/CPU time and the process's peak RSS."""
+    t0, cpu0 = time.perf_counter(), time.thread_time()
+    result = fn(*args)
+    return result, {"wall_s": time.perf_counter() - t0, "cpu_s": time.thread_time() - cpu0,
+                    "peak_rss_mb": _rusage()[1]}
+
+CACHE_COUNTERS = ("hits", "disk_hits", "misses")
+
+def _cache_counts(agent):
+    """The agent's pack artifact cache counters (providers.local_agent.cache_stats), zeros if it has none."""
+    stats = getattr(agent, "cache_stats", dict)()
+    return [stats.get(k, 0) for k in CACHE_COUNTERS]
+
+def _cache_delta(before, after):
+    return {k: a - b for k, b, a in zip(CACHE_COUNTERS, before, after)}
+
+def _agent_worker(conn, pack_dir, prompt):
+    """Child-process entry point: run the local agent and send back ("ok", result, metrics) or ("error", traceback, {})."""
+    try:
+        agent = importlib.import_module("providers.local_agent")
+        cpu0, _ = _rusage()
+        cache0 = _cache_counts(agent)
+        t0 = time.perf_counter()
+        result = agent.run(pack_dir, prompt)
+        wall = time.perf_counter() - t0
+        cpu1, rss = _rusage()
+        conn.send(("ok", result, {"wall_s": wall, "cpu_s": None if cpu0 is None else cpu1 - cpu0, "peak_rss_mb": rss,
+                                  "pack_cache": _cache_delta(cache0, _cache_counts(agent))}))
+    except BaseException:
+        conn.send(("error", traceback.format_exc(), {}))
+    finally:
+        conn.close()
 
+class Runner:
+    """
+    Calls the two providers with separate concurrency limits and per-call timeouts.
+
+    - General LLM (network-bound): runs in a thread. On timeout the call is abandoned
+      (its result is discarded; the thread cannot be killed) and its slot is freed.
+    - Local agent (CPU-bound): with isolate=True each call runs in its own process, so
+      several agents use several cores, and a timeout or cancel() terminates it.
+      Without isolation it runs in the calling thread, exactly as the serial harness did.
+
+    Both return (result, metrics): wall and CPU seconds of the call and peak RSS in MB
+    (of the agent's own process when isolated, else of the harness), plus whatever
+    request latency / token counts the LLM provider reports via last_call_stats(). Local agent
+    metrics also carry the call's pack cache hits/misses, which are totalled in pack_cache.
+    """
+    def __init__(self, gllm, agent, llm_jobs=1, agent_jobs=1, timeout=0, isolate=False):
+        self.gllm, self.agent = gllm, agent
+        self.llm_slots = threading.BoundedSemaphore(max(1, llm_jobs))
+        self.agent_slots = threading.BoundedSemaphore(max(1, agent_jobs))
+        self.timeout = timeout or None
+        self.isolate = isolate
+        methods = multiprocessing.get_all_start_methods()
+        # Not "fork": forking a process with running threads can deadlock the child.
+        self.ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.cancelled = threading.Event()
+        self._procs = set()
+        self._lock = threading.Lock()
+        self.pack_cache = dict.fromkeys(CACHE_COUNTERS, 0)
+
+    def _call_llm(self, prompt):
+        result, metrics = _measured(self.gllm.run, prompt)
+        stats = getattr(self.gllm, "last_call_stats", None)  # thread-local in the provider, so read it here
+        if stats:
+            metrics.update(stats())
+        return result, metrics
+
+    def llm(self, prompt):
+        with self.llm_slots:
+            if self.cancelled.is_set():
+                raise ProviderTimeout("cancelled")
+            if not self.timeout:
+                return self._call_llm(prompt)
+            box = {}
+            def target():
+                try:
+                    box["result"] = self._call_llm(prompt)
+                except BaseException as e:
+                    box["error"] = e
+            t = threading.Thread(target=target, name="general_llm", daemon=True)
+            t.start()
+            t.join(self.timeout)
+            if t.is_alive():
+                raise ProviderTimeout(f"general_llm timed out after {self.timeout:g}s")
+            if "error" in box:
+                raise box["error"]
+            return box["result"]
+
+    def local_agent(self, pack_dir, prompt):
+        result, metrics = self._call_agent(pack_dir, prompt)
+        with self._lock:
+            for k, n in metrics.get("pack_cache", {}).items():
+                self.pack_cache[k] += n
+        return result, metrics
+
+    def _call_agent(self, pack_dir, prompt):
+        with self.agent_slots:
+            if self.cancelled.is_set():
+                raise ProviderTimeout("cancelled")
+            if not self.isolate:
+                cache0 = _cache_counts(self.agent)
+                result, metrics = _measured(self.agent.run, pack_dir, prompt)
+                metrics["pack_cache"] = _cache_delta(cache0, _cache_counts(self.agent))
+                return result, metrics
+            recv, send = self.ctx.Pipe(duplex=False)
+            proc = self.ctx.Process(target=_agent_worker, args=(send, pack_dir, prompt), name="local_agent")
+            proc.start()
+            send.close()
+            with self._lock:
+                self._procs.add(proc)
+            try:
+                if not recv.poll(self.timeout):
+                    raise ProviderTimeout(f"local_agent timed out after {self.timeout:g}s")
+                status, payload, metrics = recv.recv()
+            except EOFError:
+                proc.join(5)
+                raise RuntimeError("cancelled" if self.cancelled.is_set()
+                                   else f"local agent process exited with code {proc.exitcode}")
+            finally:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+                recv.close()
+                with self._lock:
+                    self._procs.discard(proc)
+            if status == "error":
+                raise RuntimeError(payload)
+            return payload, metrics
+
+    def cancel(self):
+        """Stop starting new calls and terminate running local agent processes."""
+        self.cancelled.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+
+def prepare_tasks(packs):
+    """Resolve each task's pack and expected answer; tasks that cannot run are reported and skipped."""
+    jobs = []
     for task in TASKS:
         name = task["name"]
-        pack_matches = glob.glob(os.path.join(args.packs, task["pack_glob"]))
+        pack_matches = glob.glob(os.path.join(packs, task["pack_glob"]))
         if not pack_matches:
-            print(f"[warn] Task {name}: no pack matched {task['pack_glob']} under {args.packs}")
+            print(f"[warn] Task {name}: no pack matched {task['pack_glob']} under {packs}")
             continue
         pack_dir = max(pack_matches, key=len)  # choose the longest path (most specific) if multiple
         answers_path = os.path.join(pack_dir, task["answer_path"])
@@ -99,47 +245,280 @@ def main():
         except Exception as e:
             print(f"[error] Task {name}: failed loading expected answers: {e}")
             continue
+        jobs.append(dict(task=task, pack_dir=pack_dir, expected=expected))
+    return jobs
 
-        prompt = task["prompt"]
-        extractor = task.get("extractor", lambda x: x)
+def _evaluate(call, expected, extractor, policies=None):
+    try:
+        raw = call()
+        got = extractor(maybe_parse_json(raw))
+        s, details = score(expected, got, policies)
+    except ProviderTimeout as e:
+        got, s, details = dict(_error=str(e)), 0.0, {"error": str(e)}
+    except Exception as e:
+        got, s, details = dict(_error=str(e)), 0.0, {"error": traceback.format_exc()}
+    return got, s, details
 
-        # --- Run General LLM baseline ---
-        try:
-            g_raw = gllm.run(prompt)
-            g_json = extractor(maybe_parse_json(g_raw))
-            g_score, g_details = score(expected, g_json)
-        except Exception as e:
-            g_json, g_score, g_details = dict(_error=str(e)), 0.0, {"error": traceback.format_exc()}
+def run_task(job, runner, runs_dir, overlap=False):
+    """Run one task against both providers (concurrently if overlap), save artifacts, return its report entry."""
+    task, pack_dir, expected = job["task"], job["pack_dir"], job["expected"]
+    name = task["name"]
+    prompt = task["prompt"]
+    extractor = task.get("extractor", lambda x: x)
+    policies = Policies(task.get("policies"))
 
-        # --- Run Local Agent ---
-        try:
-            a_raw = agent.run(pack_dir, prompt)
-            a_json = extractor(maybe_parse_json(a_raw))
-            a_score, a_details = score(expected, a_json)
-        except Exception as e:
-            a_json, a_score, a_details = dict(_error=str(e)), 0.0, {"error": traceback.format_exc()}
-
-        # Save artifacts
-        out_dir = os.path.join(args.runs_dir, name)
-        os.makedirs(out_dir, exist_ok=True)
-        with open(os.path.join(out_dir, "expected.json"), "w", encoding="utf-8") as f:
-            json.dump(expected, f, indent=2, ensure_ascii=False)
-        with open(os.path.join(out_dir, "general_llm.json"), "w", encoding="utf-8") as f:
-            json.dump(a_json if False else g_json, f, indent=2, ensure_ascii=False)  # keep var for clarity
-        with open(os.path.join(out_dir, "local_agent.json"), "w", encoding="utf-8") as f:
-            json.dump(a_json, f, indent=2, ensure_ascii=False)
-
-        report["results"].append({
-            "task": name,
-            "pack_dir": pack_dir,
-            "prompt": prompt,
-            "expected_keys": task["answer_key_path"],
-            "general_llm": {"score": g_score, "details": g_details},
-            "local_agent": {"score": a_score, "details": a_details},
-            "artifacts_dir": out_dir
-        })
-
-        print(f"[task] {name} → LLM {g_score:.2f} | Agent {a_score:.2f}")
+    # --- Run General LLM baseline (in the background when overlapping) ---
+    llm = {}
+    def run_llm():
+        llm["out"] = _evaluate(lambda: runner.llm(prompt)[0], expected, extractor, policies)
+    if overlap:
+        t = threading.Thread(target=run_llm, name=f"task-{name}")
+        t.start()
+    else:
+        run_llm()
+
+    # --- Run Local Agent ---
+    a_json, a_score, a_details = _evaluate(lambda: runner.local_agent(pack_dir, prompt)[0], expected, extractor, policies)
+    if overlap:
+        t.join()
+    g_json, g_score, g_details = llm["out"]
+
+    # Save artifacts
+    out_dir = os.path.join(runs_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "expected.json"), "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(out_dir, "general_llm.json"), "w", encoding="utf-8") as f:
+        json.dump(g_json, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(out_dir, "local_agent.json"), "w", encoding="utf-8") as f:
+        json.dump(a_json, f, indent=2, ensure_ascii=False)
+
+    print(f"[task] {name} → LLM {g_score:.2f} | Agent {a_score:.2f}")
+    return {
+        "task": name,
+        "pack_dir": pack_dir,
+        "prompt": prompt,
+        "expected_keys": task["answer_key_path"],
+        "general_llm": {"score": g_score, "details": g_details},
+        "local_agent": {"score": a_score, "details": a_details},
+        "artifacts_dir": out_dir
+    }
+
+def run_all(jobs, runner, runs_dir, workers=1):
+    """
+    Run every job; with workers > 1, up to that many tasks at once, each overlapping
+    its two providers. Results keep the TASKS order whatever order tasks finish in.
+    """
+    if workers <= 1:
+        return [run_task(job, runner, runs_dir) for job in jobs]
+    results = [None] * len(jobs)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task")
+    futures = {pool.submit(run_task, job, runner, runs_dir, True): i for i, job in enumerate(jobs)}
+    try:
+        for fut, i in futures.items():
+            results[i] = fut.result()
+    except KeyboardInterrupt:
+        print("\n[warn] Interrupted: cancelling pending tasks and running agents...")
+        runner.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
+
+# ---------------------- benchmark mode ----------------------
+
+BENCH_METRICS = ("wall_s", "cpu_s", "peak_rss_mb", "latency_s", "prompt_tokens", "output_tokens", "total_tokens")
+# Compared against the baseline; changes smaller than these are noise, whatever the ratio.
+REGRESSION_FLOOR = {"wall_s": 0.005, "cpu_s": 0.005, "peak_rss_mb": 1.0, "latency_s": 0.005, "total_tokens": 1}
+
+def percentile(values, q):
+    """q-th percentile (0-100) with linear interpolation between closest ranks."""
+    xs = sorted(values)
+    if not xs:
+        return None
+    k = (len(xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+def summarize(values):
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "p99": percentile(values, 99),
+            "mean": sum(values) / len(values), "min": min(values), "max": max(values), "n": len(values)}
+
+def _fmt_ms(stats, q="p50"):
+    return f"{stats[q] * 1000:.1f} ms" if stats else "-"
+
+def benchmark_task(job, runner, repeats):
+    """Call each provider 'repeats' times, one call at a time; return per-provider score and metric summaries."""
+    task, pack_dir, expected = job["task"], job["pack_dir"], job["expected"]
+    prompt = task["prompt"]
+    extractor = task.get("extractor", lambda x: x)
+    policies = Policies(task.get("policies"))
+    calls = (("general_llm", lambda: runner.llm(prompt)), ("local_agent", lambda: runner.local_agent(pack_dir, prompt)))
+    out = {}
+    for provider, call in calls:
+        scores, samples, errors = [], {}, []
+        for _ in range(repeats):
+            try:
+                raw, metrics = call()
+                got = maybe_parse_json(raw)
+                # Providers report failures (missing key, HTTP error, replay miss) as {"_error": ...}
+                # instead of raising; such a call is an error, and its timing is not a sample.
+                if isinstance(got, dict) and "_error" in got:
+                    errors.append(f"provider error: {str(got['_error']).strip()[:200]}")
+                    continue
+                scores.append(score(expected, extractor(got), policies)[0])
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {str(e).strip().splitlines()[-1] if str(e).strip() else ''}")
+                continue
+            for k in BENCH_METRICS:
+                if isinstance(metrics.get(k), (int, float)):
+                    samples.setdefault(k, []).append(metrics[k])
+        out[provider] = {"runs": repeats, "errors": len(errors), "error_samples": errors[:3],
+                         "score_mean": sum(scores) / len(scores) if scores else 0.0}
+        out[provider].update({k: summarize(v) for k, v in samples.items()})
+    print(f"[bench] {task['name']} → LLM {_fmt_ms(out['general_llm'].get('wall_s'))} | "
+          f"Agent {_fmt_ms(out['local_agent'].get('wall_s'))} (p50 wall, {repeats} runs)")
+    return out
+
+def run_benchmark(jobs, runner, repeats, workers=1):
+    """benchmark_task for every job (up to 'workers' tasks at once); keyed by task name in TASKS order."""
+    if workers <= 1:
+        outs = [benchmark_task(job, runner, repeats) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench") as pool:
+            outs = list(pool.map(lambda job: benchmark_task(job, runner, repeats), jobs))
+    return {"repeats": repeats, "tasks": {job["task"]["name"]: out for job, out in zip(jobs, outs)}}
+
+def compare_benchmark(current, baseline, threshold):
+    """
+    Metrics whose p50 or p95 grew by more than 'threshold' (a fraction) over the baseline
+    report's benchmark section, ignoring changes below REGRESSION_FLOOR.
+    """
+    rows = []
+    for task, providers in current["tasks"].items():
+        for provider, stats in providers.items():
+            old = baseline.get("tasks", {}).get(task, {}).get(provider)
+            if not old:
+                continue
+            for metric, floor in REGRESSION_FLOOR.items():
+                for q in ("p50", "p95"):
+                    new_v = (stats.get(metric) or {}).get(q)
+                    old_v = (old.get(metric) or {}).get(q)
+                    if new_v is None or old_v is None:
+                        continue
+                    rows.append({"task": task, "provider": provider, "metric": metric, "stat": q,
+                                 "baseline": old_v, "current": new_v,
+                                 "change": (new_v - old_v) / old_v if old_v else None,
+                                 "regressed": new_v - old_v > floor and new_v > old_v * (1 + threshold)})
+    return {"threshold": threshold, "compared": len(rows), "regressions": [r for r in rows if r["regressed"]]}
+
+def print_benchmark_table(bench):
+    name_len = max([len(t) for t in bench["tasks"]] + [4])
+    header = (f"{'Task':<{name_len}} | {'Provider':<11} | {'wall p50':>9} | {'p95':>9} | {'p99':>9} | "
+              f"{'CPU p50':>9} | {'RSS MB':>7} | {'latency p50':>11} | {'tokens':>7} | errors")
+    separator = "-" * len(header)
+    print(f"\n{separator}\n{header}\n{separator}")
+    for task, providers in bench["tasks"].items():
+        for provider, st in providers.items():
+            rss = f"{st['peak_rss_mb']['max']:.0f}" if st.get("peak_rss_mb") else "-"
+            tokens = f"{st['total_tokens']['p50']:.0f}" if st.get("total_tokens") else "-"
+            print(f"{task:<{name_len}} | {provider:<11} | {_fmt_ms(st.get('wall_s')):>9} | "
+                  f"{_fmt_ms(st.get('wall_s'), 'p95'):>9} | {_fmt_ms(st.get('wall_s'), 'p99'):>9} | "
+                  f"{_fmt_ms(st.get('cpu_s')):>9} | {rss:>7} | "
+                  f"{_fmt_ms(st.get('latency_s')):>11} | {tokens:>7} | "
+                  f"{st['errors']}/{st['runs']}")
+    print(separator)
+    comparison = bench.get("comparison")
+    if comparison:
+        regressions = comparison["regressions"]
+        print(f"Baseline {comparison['baseline']}: {comparison['compared']} metrics compared, "
+              f"{len(regressions)} regressed by more than {comparison['threshold']:.0%}")
+        for r in regressions:
+            print(f"  [regression] {r['task']} {r['provider']} {r['metric']} {r['stat']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g}" + (f" ({r['change']:+.0%})" if r["change"] is not None else ""))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--packs", required=True, help="Directory containing the unzipped packs")
+    ap.add_argument("--out", required=True, help="Path to write a JSON report")
+    ap.add_argument("--runs_dir", default="runs", help="Where to save per-task outputs")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Tasks to run at once; with >1 the two providers of a task also overlap (default 1: serial)")
+    ap.add_argument("--llm_jobs", type=int, default=0, help="Max concurrent General LLM calls (default: --jobs)")
+    ap.add_argument("--agent_jobs", type=int, default=0,
+                    help="Max concurrent Local Agent processes (default: min(--jobs, CPU count))")
+    ap.add_argument("--timeout", type=float, default=0,
+                    help="Per-task timeout in seconds for each provider call (default 0: none)")
+    ap.add_argument("--benchmark", type=int, default=0, metavar="N",
+                    help="After scoring, call each provider N more times per task and report wall/CPU time, "
+                         "peak RSS, LLM latency and tokens (p50/p95/p99) under 'benchmark' in the report")
+    ap.add_argument("--baseline", default="", help="Earlier report.json with a 'benchmark' section to compare against")
+    ap.add_argument("--regression_threshold", type=float, default=0.2,
+                    help="Relative increase of a p50/p95 metric over the baseline that counts as a regression (default 0.2)")
+    ap.add_argument("--llm_cache", choices=("passthrough", "record", "replay"), default="",
+                    help="General LLM response cache: record responses, replay them offline, or bypass (default: "
+                         "$GEMINI_CACHE_MODE or passthrough)")
+    ap.add_argument("--llm_cache_dir", default="", help="Response cache directory (default: $GEMINI_CACHE_DIR or ./llm_cache)")
+    ap.add_argument("--llm_standin", action="store_true",
+                    help="Serve the recorded responses from a local generateContent stand-in and send the General LLM's "
+                         "REST calls there instead of to Google")
+    ap.add_argument("--pack_cache_dir", default="",
+                    help="Persist the local agent's parsed pack files here so later calls and runs skip parsing "
+                         "(default: $EDA_PACK_CACHE_DIR; else <runs_dir>/pack_cache when the agent runs in its own "
+                         "processes (--jobs > 1, --timeout, --benchmark), which start with an empty memory cache; "
+                         "else in memory only)")
+    ap.add_argument("--llm_rate", type=float, default=0,
+                    help="Rate limit for General LLM requests per second (SDK and REST), shared by all --jobs "
+                         "(default: $EDA_LLM_RATE or none); 429s are retried with backoff either way")
+    args = ap.parse_args()
+
+    # Shared LLM client (src/tools/llm_client.py) reads its limits when the provider is imported
+    if args.llm_rate > 0:
+        os.environ["EDA_LLM_RATE"] = str(args.llm_rate)
+
+    # A timeout can only stop the agent if it runs in its own process; benchmarks
+    # also isolate it so CPU time and peak RSS are the agent's own.
+    workers = max(1, args.jobs)
+    isolate = workers > 1 or args.timeout > 0 or args.benchmark > 0
+
+    # Local agent pack cache (read when the agent is imported, also in agent processes). Isolated
+    # agent processes each start with an empty in-memory store, so they share parses through disk.
+    if args.pack_cache_dir:
+        os.environ["EDA_PACK_CACHE_DIR"] = os.path.abspath(args.pack_cache_dir)
+    elif isolate and not os.environ.get("EDA_PACK_CACHE_DIR", "").strip():
+        os.environ["EDA_PACK_CACHE_DIR"] = os.path.abspath(os.path.join(args.runs_dir, "pack_cache"))
+
+    # General LLM cache / stand-in (read by the provider per call, also in agent processes)
+    if args.llm_cache:
+        os.environ["GEMINI_CACHE_MODE"] = args.llm_cache
+    if args.llm_cache_dir:
+        os.environ["GEMINI_CACHE_DIR"] = os.path.abspath(args.llm_cache_dir)
+    if args.llm_standin:
+        from providers.llm_cache import from_env
+        from providers.llm_standin import start_standin
+        cache_dir = from_env().dir
+        standin, base = start_standin(cache_dir)
+        os.environ["GEMINI_API_BASE"] = base
+        os.environ["GEMINI_CACHE_MODE"] = "passthrough"  # the stand-in replays; the provider just calls it
+        print(f"[info] General LLM stand-in on {base} serving {cache_dir}")
+
+    # Load providers
+    gllm = importlib.import_module("providers.general_llm")
+    agent = importlib.import_module("providers.local_agent")
+
+    os.makedirs(args.runs_dir, exist_ok=True)
+    report = {"results": [], "summary": {}}
+
+    jobs = prepare_tasks(args.packs)
+    runner = Runner(gllm, agent,
+                    llm_jobs=args.llm_jobs or workers,
+                    agent_jobs=args.agent_jobs or min(workers, os.cpu_count() or 1),
+                    timeout=args.timeout,
+                    isolate=isolate)
+    t0 = time.perf_counter()
+    report["results"] = run_all(jobs, runner, args.runs_dir, workers)
+    wall = time.perf_counter() - t0
 
     # Summary
     if report["results"]:
@@ -149,14 +528,41 @@ def main():
         g_avg = a_avg = 0.0
     report["summary"] = {"general_llm_avg": g_avg, "local_agent_avg": a_avg, "num_tasks": len(report["results"])}
 
+    regressed = False
+    if args.benchmark > 0:
+        if workers > 1:
+            print("[warn] Benchmarking with --jobs > 1: concurrent tasks compete for CPU and skew timings.")
+        report["benchmark"] = run_benchmark(jobs, runner, args.benchmark, workers)
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("benchmark") or {}
+            comparison = compare_benchmark(report["benchmark"], baseline, args.regression_threshold)
+            comparison["baseline"] = args.baseline
+            report["benchmark"]["comparison"] = comparison
+            regressed = bool(comparison["regressions"])
+
     with open(args.out, "w", encoding="utf-8") as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
 
     # Display results table
     print_results_table(report["results"])
-    
+    if "benchmark" in report:
+        print_benchmark_table(report["benchmark"])
+
     print(f"\n[done] Wrote report to {args.out}")
-    print(f"General LLM avg: {g_avg:.2f} | Local Agent avg: {a_avg:.2f}")
+    print(f"General LLM avg: {g_avg:.2f} | Local Agent avg: {a_avg:.2f} | wall time {wall:.1f}s with --jobs {workers}")
+    client_stats = getattr(gllm, "client_stats", dict)()
+    if client_stats.get("sent"):
+        s = client_stats
+        print(f"[info] LLM client: {s['requests']} requests, {s['sent']} sent, {s['retries']} retries "
+              f"({s['throttled']} rate-limited), {s['coalesced']} coalesced, {s['failed']} failed")
+    c = runner.pack_cache
+    lookups = sum(c.values())
+    if lookups:
+        print(f"[info] Pack cache: {lookups} file loads, {c['hits']} from memory, {c['disk_hits']} from disk, "
+              f"{c['misses']} parsed (hit ratio {(c['hits'] + c['disk_hits']) / lookups:.0%})")
+    if regressed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
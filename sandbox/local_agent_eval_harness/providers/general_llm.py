@@ -12,60 +12,76 @@ Usage:
 
 Notes:
 - We strongly encourage you to prompt Gemini to return STRICT JSON.
-- If the model replies with text, we attempt to extract the first {...} JSON block.
+- If the model replies with text, we extract the JSON from it in one pass (src/tools/json_extract.py):
+  a ```json fenced block if there is one, else the first {...} or [...] block.
+- last_call_stats() returns the request latency and token counts of the calling
+  thread's last run() (used by `harness.py --benchmark`).
+- GEMINI_CACHE_MODE=record|replay|passthrough records responses to / replays them
+  from a content-addressed cache (providers/llm_cache.py); replay needs no network
+  or API key.
+- The SDK is tried first and REST is the fallback, as before. Both go through the shared
+  client (src/tools/llm_client.py): EDA_LLM_RATE rate limiting, retries with backoff on
+  429/5xx, and one request for identical prompts in flight from several threads; REST
+  calls also reuse its keep-alive connections, and SDK calls run on its bounded pool of
+  worker threads.
+- GEMINI_API_BASE points the REST call at another server speaking generateContent,
+  e.g. the local stand-in (python -m providers.llm_standin); the SDK is then skipped.
 """
 
-import os, json, re, logging
-from typing import Any, Dict, Union
+import os, sys, json, time, logging, threading
+from typing import Any, Dict
+
+from .llm_cache import from_env as _response_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "src"))
+from tools import llm_client  # noqa: E402
+from tools.json_extract import extract_json  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-pro")
 API_KEY_ENV = "GEMINI_API_KEY"
+API_BASE_ENV = "GEMINI_API_BASE"
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com"
+SYSTEM_INSTRUCTION = (
+    "You are a data extraction engine. "
+    "Always respond with STRICT JSON only, no markdown or prose."
+)
 
-def _extract_json(text: str) -> Union[dict, list, str]:
-    """Try to parse JSON; if mixed text, extract the first {...} or [...] block."""
-    text = text.strip()
-    # Direct parse first
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-
-    # Greedy search for first balanced JSON-looking block
-    # Simple heuristic: find first '{' or '[' and last matching '}' or ']'
-    start = None
-    for i, ch in enumerate(text):
-        if ch in '{[':
-            start = i
-            break
-    if start is not None:
-        # Try progressively shrinking the end to the last brace/bracket
-        for j in range(len(text), start, -1):
-            chunk = text[start:j]
-            try:
-                return json.loads(chunk)
-            except Exception:
-                continue
-
-    # As a last resort, return raw text
-    return {"_raw": text}
+_stats = threading.local()
+
+def last_call_stats() -> Dict[str, Any]:
+    """Latency and token usage of this thread's last run(); empty if no request was made."""
+    return dict(getattr(_stats, "last", None) or {})
+
+def _record(transport: str, latency_s: float, prompt_tokens=None, output_tokens=None, total_tokens=None):
+    stats = {"transport": transport, "latency_s": latency_s}
+    for key, value in (("prompt_tokens", prompt_tokens), ("output_tokens", output_tokens), ("total_tokens", total_tokens)):
+        if isinstance(value, int):
+            stats[key] = value
+    _stats.last = stats
 
 def _call_gemini_with_sdk(prompt: str, api_key: str) -> str:
     import google.generativeai as genai
     genai.configure(api_key=api_key)
     model = genai.GenerativeModel(DEFAULT_MODEL)
     # Use a JSON-focused prompt to improve structure
-    sys_inst = (
-        "You are a data extraction engine. "
-        "Always respond with STRICT JSON only, no markdown or prose."
-    )
-    # SDK supports system_instruction in newer versions; fall back if not present
-    try:
-        resp = model.generate_content([{"role":"user","parts":[sys_inst + "\n\n" + prompt]}])
-    except TypeError:
-        # older SDKs
-        resp = model.generate_content(sys_inst + "\n\n" + prompt)
+    text = SYSTEM_INSTRUCTION + "\n\n" + prompt
+
+    def generate():
+        # SDK supports system_instruction in newer versions; fall back if not present
+        try:
+            return model.generate_content([{"role":"user","parts":[text]}])
+        except TypeError:
+            # older SDKs
+            return model.generate_content(text)
+
+    # Under the shared client's rate limit and retries, like the REST path
+    started = time.perf_counter()
+    resp = llm_client.call_limited(generate, llm_client.request_key("sdk:" + DEFAULT_MODEL, {"text": text}))
+    usage = getattr(resp, "usage_metadata", None)
+    _record("sdk", time.perf_counter() - started, getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None), getattr(usage, "total_token_count", None))
     # Handle candidates
     if hasattr(resp, "text") and resp.text:
         return resp.text
@@ -78,52 +94,74 @@ def _call_gemini_with_sdk(prompt: str, api_key: str) -> str:
     except Exception as e:
         return ""
 
+def _rest_base() -> str:
+    return os.environ.get(API_BASE_ENV, "").strip().rstrip("/") or DEFAULT_API_BASE
+
+def _rest_text(result: Dict[str, Any]) -> str:
+    usage = result["usage"]
+    _record("rest", result["latency_s"], usage["prompt_tokens"], usage["output_tokens"], usage["total_tokens"])
+    if result["text"] or result["response"].get("candidates"):
+        return result["text"]
+    return json.dumps({"_raw_api_response": result["response"]})
+
 def _call_gemini_rest(prompt: str, api_key: str) -> str:
-    import requests
-    # Using the "generateContent" endpoint for 1.5 models.
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{DEFAULT_MODEL}:generateContent?key={api_key}"
-    sys_inst = (
-        "You are a data extraction engine. "
-        "Always respond with STRICT JSON only, no markdown or prose."
-    )
-    payload = {
-        "contents": [
-            {"parts": [{"text": sys_inst + "\n\n" + prompt}]}  # single user message
-        ]
-    }
-    r = requests.post(url, json=payload, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    # Parse the first text part
-    try:
-        candidates = data.get("candidates", [])
-        if candidates:
-            parts = candidates[0]["content"].get("parts", [])
-            texts = [p.get("text","") for p in parts if "text" in p]
-            return "\n".join(texts).strip()
-    except Exception:
-        pass
-    return json.dumps({"_raw_api_response": data})
+    # generateContent on the shared pooled client; the system instruction leads the single user message.
+    return _rest_text(llm_client.generate_sync(DEFAULT_MODEL, SYSTEM_INSTRUCTION + "\n\n" + prompt, api_key, _rest_base()))
 
-def run(prompt: str) -> Any:
-    """Call Gemini WITHOUT local file access and return a Python object (dict/list/scalars)."""
+def _replay(cache, prompt: str) -> Any:
+    started = time.perf_counter()
+    entry = cache.get(DEFAULT_MODEL, SYSTEM_INSTRUCTION, prompt)
+    if entry is None:
+        return {"_error": f"No recorded {DEFAULT_MODEL} response for this prompt in {cache.dir} (replay mode)."}
+    usage = entry.get("usage") or {}
+    _record("replay", time.perf_counter() - started, usage.get("prompt_tokens"), usage.get("output_tokens"), usage.get("total_tokens"))
+    return extract_json(entry["text"]) if entry["text"] else {"_error": "Gemini returned empty response."}
+
+def _credentials():
+    """(api key, custom base?, error dict or None)."""
     api_key = os.environ.get(API_KEY_ENV, "").strip()
+    custom_base = bool(os.environ.get(API_BASE_ENV, "").strip())
+    if not api_key and custom_base:
+        api_key = "local"  # stand-in servers ignore the key
     if not api_key:
         # Return a helpful error as JSON
-        return {"_error": f"Missing {API_KEY_ENV}. Please export your Gemini API key."}
+        return None, custom_base, {"_error": f"Missing {API_KEY_ENV}. Please export your Gemini API key."}
+    return api_key, custom_base, None
 
-    # Try SDK first, then REST fallback
-    text = ""
+def _call_gemini(prompt: str, api_key: str, custom_base: bool) -> str:
+    # SDK first, then REST fallback (REST only when pointed at another server)
+    if custom_base:
+        return _call_gemini_rest(prompt, api_key)
     try:
-        text = _call_gemini_with_sdk(prompt, api_key)
+        return _call_gemini_with_sdk(prompt, api_key)
     except Exception as e:
-        logger.warning("Gemini SDK call failed, falling back to REST: %s", e)
-        try:
-            text = _call_gemini_rest(prompt, api_key)
-        except Exception as e2:
-            return {"_error": f"REST call failed: {e2.__class__.__name__}: {e2}"}
+        if not isinstance(e, ImportError):
+            logger.warning("Gemini SDK call failed, falling back to REST: %s", e)
+        return _call_gemini_rest(prompt, api_key)
 
+def _finish(cache, prompt: str, text: str) -> Any:
+    if cache.mode == "record":
+        cache.put(DEFAULT_MODEL, SYSTEM_INSTRUCTION, prompt, text, last_call_stats())
     if not text:
         return {"_error": "Gemini returned empty response."}
+    return extract_json(text)
+
+def run(prompt: str) -> Any:
+    """Call Gemini WITHOUT local file access and return a Python object (dict/list/scalars)."""
+    _stats.last = None
+    cache = _response_cache()
+    if cache.mode == "replay":
+        return _replay(cache, prompt)
+    api_key, custom_base, error = _credentials()
+    if error:
+        return error
+
+    try:
+        text = _call_gemini(prompt, api_key, custom_base)
+    except Exception as e2:
+        return {"_error": f"REST call failed: {e2.__class__.__name__}: {e2}"}
+    return _finish(cache, prompt, text)
 
-    return _extract_json(text)
\ No newline at end of file
+def client_stats() -> Dict[str, int]:
+    """Counters of the shared LLM client (requests, sent, retries, throttled, coalesced, failed)."""
+    return llm_client.shared_stats()
@@ -0,0 +1,66 @@
+"""
+Content-addressed record/replay cache for General LLM responses.
+
+Each response is stored under the SHA-256 of (model, system instruction,
+prompt) as <cache_dir>/<key[:2]>/<key>.json, holding the raw response text
+and its token usage. Modes (GEMINI_CACHE_MODE, or harness.py --llm_cache):
+
+  passthrough - no cache; every call goes to the model (default)
+  record      - call the model and save every response (overwriting)
+  replay      - answer from the cache only, never touching the network;
+                a prompt that was not recorded returns an error
+
+The same files back the local stand-in server (providers/llm_standin.py),
+so a recorded run can be replayed in-process or over HTTP.
+"""
+
+import os, json, time, hashlib, tempfile
+from typing import Any, Dict, Optional
+
+MODES = ("passthrough", "record", "replay")
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "llm_cache")
+
+def cache_key(model: str, system: str, prompt: str) -> str:
+    blob = json.dumps([model, system, prompt], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, cache_dir: str = DEFAULT_DIR, mode: str = "passthrough"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'. Use one of: {', '.join(MODES)}")
+        self.dir = cache_dir
+        self.mode = mode
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], key + ".json")
+
+    def get(self, model: str, system: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """The recorded entry ({text, usage, ...}) or None."""
+        try:
+            with open(self._path(cache_key(model, system, prompt)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, model: str, system: str, prompt: str, text: str, usage: Optional[Dict[str, Any]] = None) -> str:
+        """Store a response atomically; returns its key."""
+        key = cache_key(model, system, prompt)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"model": model, "system": system, "prompt": prompt, "text": text,
+                 "usage": usage or {}, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+        return key
+
+    def count(self) -> int:
+        if not os.path.isdir(self.dir):
+            return 0
+        return sum(1 for _, _, files in os.walk(self.dir) for name in files if name.endswith(".json"))
+
+def from_env() -> ResponseCache:
+    """The cache configured by GEMINI_CACHE_MODE / GEMINI_CACHE_DIR (read per call, so the harness can set them)."""
+    mode = os.environ.get("GEMINI_CACHE_MODE", "passthrough").strip().lower() or "passthrough"
+    return ResponseCache(os.environ.get("GEMINI_CACHE_DIR", "").strip() or DEFAULT_DIR, mode)
@@ -0,0 +1,119 @@
+"""
+Local stand-in for the Gemini REST API, serving recorded responses.
+
+Speaks the generateContent shape used by general_llm._call_gemini_rest:
+
+  POST /v1beta/models/<model>:generateContent?key=...
+       {"contents": [{"parts": [{"text": "<system instruction>\n\n<prompt>"}]}]}
+  ->   {"candidates": [{"content": {"parts": [{"text": ...}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {...}}
+
+Responses come from the record/replay cache (providers/llm_cache.py): record a
+run once with GEMINI_CACHE_MODE=record, then point any client at this server
+with GEMINI_API_BASE=http://127.0.0.1:<port>. A prompt that was not recorded
+gets a 404 in Google's error format. A "systemInstruction" field is honoured
+if a client sends one; otherwise the leading SYSTEM_INSTRUCTION is split off
+the text.
+
+  python -m providers.llm_standin --cache_dir llm_cache --port 8765
+"""
+
+import re, json, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from .llm_cache import ResponseCache, DEFAULT_DIR
+from .general_llm import SYSTEM_INSTRUCTION
+
+_ROUTE = re.compile(r"^/v1beta/models/([^/:]+):generateContent$")
+
+def _texts(content) -> str:
+    parts = (content or {}).get("parts") or []
+    return "\n".join(p.get("text", "") for p in parts if isinstance(p, dict) and "text" in p)
+
+def split_request(body: dict) -> Tuple[str, str]:
+    """(system instruction, prompt) of a generateContent request body."""
+    text = "\n".join(_texts(c) for c in body.get("contents") or [])
+    system = _texts(body.get("systemInstruction") or body.get("system_instruction"))
+    if not system and text.startswith(SYSTEM_INSTRUCTION + "\n\n"):
+        system, text = SYSTEM_INSTRUCTION, text[len(SYSTEM_INSTRUCTION) + 2:]
+    return system, text
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "gemini-standin/1"
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse their connections
+    cache: ResponseCache = None  # set by make_server
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, reason: str, message: str):
+        self._send(status, {"error": {"code": status, "message": message, "status": reason}})
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/healthz":
+            return self._send(200, {"status": "ok", "entries": self.cache.count(), "cache_dir": self.cache.dir})
+        self._error(404, "NOT_FOUND", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        m = _ROUTE.match(self.path.split("?")[0])
+        if not m:
+            return self._error(404, "NOT_FOUND", f"Unknown path {self.path}")
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError as e:
+            return self._error(400, "INVALID_ARGUMENT", f"Invalid JSON payload: {e}")
+        model = m.group(1)
+        system, prompt = split_request(body)
+        entry = self.cache.get(model, system, prompt)
+        if entry is None:
+            return self._error(404, "NOT_FOUND", f"No recorded response for this {model} prompt in {self.cache.dir}")
+        usage = entry.get("usage") or {}
+        metadata = {k: usage[u] for k, u in (("promptTokenCount", "prompt_tokens"),
+                                             ("candidatesTokenCount", "output_tokens"),
+                                             ("totalTokenCount", "total_tokens")) if u in usage}
+        self._send(200, {
+            "candidates": [{"content": {"parts": [{"text": entry["text"]}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": metadata,
+            "modelVersion": model,
+        })
+
+    def log_message(self, format, *args):  # keep harness output clean
+        pass
+
+def make_server(cache_dir: str = DEFAULT_DIR, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    handler = type("Handler", (StandinHandler,), {"cache": ResponseCache(cache_dir, "replay")})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_standin(cache_dir: str = DEFAULT_DIR, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a background thread; returns (server, base URL). Call server.shutdown() to stop."""
+    server = make_server(cache_dir, host, port)
+    threading.Thread(target=server.serve_forever, name="gemini-standin", daemon=True).start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--cache_dir", default=DEFAULT_DIR, help="Recorded responses (GEMINI_CACHE_DIR of the recording run)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    server = make_server(args.cache_dir, args.host, args.port)
+    print(f"[standin] Serving {server.RequestHandlerClass.cache.count()} recorded responses from {args.cache_dir} "
+          f"on http://{args.host}:{server.server_address[1]} (export GEMINI_API_BASE to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -7,34 +7,47 @@ Capabilities (no network):
 - Simple log parsing & correlation
 - Basic audio transcript merging (JSONL)
 - SQLite queries
-- TAR/ZIP nested archive extraction
+- Nested TAR/ZIP archive members, read in place through src/tools/archive_vfs.py
 - .eml (email) parsing with attachment decoding
 - Minimal XLSX XML parsing and formula evaluation (for the simple sheet structure in Pack 4)
 - Heuristic "OCR" fallback by reading cross_artifact_hints.md in Pack 3
 
+Pack files are parsed through providers/pack_cache.py, once per (path, size,
+mtime): repeated calls reuse the parsed CSV rows, JSON, log records, emails
+and sheets, and with EDA_PACK_CACHE_DIR set so do later processes and runs.
+Parsed results are shared, so handlers must not modify them.
+
 NOTE: This is pragmatic—not a full framework. It just solves the harness tasks reliably.
 """
 
-import os, re, io, csv, json, math, sqlite3, tarfile, zipfile
+import os, re, io, sys, csv, json, math, sqlite3, zipfile
 from typing import Any, Dict, List
 from datetime import datetime, timedelta
 from email import policy
 from email.parser import BytesParser
 from xml.etree import ElementTree as ET
 
+from .pack_cache import parser, from_env as _artifact_store
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "src"))
+from tools.archive_vfs import vfs_open, list_members  # noqa: E402
+
+_store = _artifact_store()
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters of this process's pack artifact store (hits, disk_hits, misses, hit_ratio, ...)."""
+    return _store.stats()
+
 # ---------------------- utils ----------------------
 
 def _read_csv(fp: str) -> List[Dict[str,str]]:
-    with open(fp, "r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+    return _store.load(fp, "csv")
 
 def _read_text(fp: str) -> str:
-    with open(fp, "r", encoding="utf-8") as f:
-        return f.read()
+    return _store.load(fp, "text")
 
 def _read_json(fp: str) -> Any:
-    with open(fp, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _store.load(fp, "json")
 
 def _to_float(s: str) -> float:
     s = s.strip().replace(",", "").replace("$", "")
@@ -51,13 +64,7 @@ def _parse_dt(dt_str: str, fmt: str) -> datetime:
     return datetime.strptime(dt_str, fmt)
 
 def _jsonl_load(fp: str) -> List[Dict[str, Any]]:
-    out = []
-    with open(fp, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line: continue
-            out.append(json.loads(line))
-    return out
+    return _store.load(fp, "jsonl")
 
 # ---------------------- task routers ----------------------
 
@@ -134,9 +141,23 @@ def _p1_hr_post_termination(pack_dir: str):
                 out["events"].append(line)
     return out or {}
 
+_NGINX_LINE = re.compile(r"\[(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+\-]\d{4})\] \"(\w+) ([^ ]+) [^\"]+\" (\d{3})")
+
+@parser("nginx_5xx")
+def _nginx_5xx(fp: str) -> List[tuple]:
+    """(hh, mm, zone, YYYY-MM-DD, path) of every 5xx request in an nginx access log."""
+    out = []
+    with open(fp, "r", encoding="utf-8") as f:
+        for line in f:
+            m = _NGINX_LINE.search(line)
+            if not m: continue
+            day_num, mon, year, hh, mm, ss, zone, method, path, status = m.groups()
+            if status.startswith("5"):
+                out.append((int(hh), int(mm), zone, f"{year}-{_month_num(mon):02d}-{int(day_num):02d}", path))
+    return out
+
 def _p1_ops_spike(pack_dir: str):
     # Parse nginx log; detect 5xx burst window and top endpoint
-    import re
     nginx_path = os.path.join(pack_dir, "ops", "nginx.log")
     syslog_path = os.path.join(pack_dir, "ops", "system.log")
     five_errors = []
@@ -144,16 +165,11 @@ def _p1_ops_spike(pack_dir: str):
     tz = "-0700"
     day = "2025-07-28"
 
-    with open(nginx_path, "r", encoding="utf-8") as f:
-        for line in f:
-            m = re.search(r"\[(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+\-]\d{4})\] \"(\w+) ([^ ]+) [^\"]+\" (\d{3})", line)
-            if not m: continue
-            day_num, mon, year, hh, mm, ss, zone, method, path, status = m.groups()
-            if status.startswith("5"):
-                five_errors.append((int(hh), int(mm)))
-                paths.append(path)
-                tz = zone
-                day = f"{year}-{_month_num(mon):02d}-{int(day_num):02d}"
+    for hh, mm, zone, date, path in _store.load(nginx_path, "nginx_5xx"):
+        five_errors.append((hh, mm))
+        paths.append(path)
+        tz = zone
+        day = date
     if not five_errors:
         return {}
     # Determine a window (min minute to last minute within 10-min span)
@@ -170,11 +186,10 @@ def _p1_ops_spike(pack_dir: str):
 
     # System log for root-cause hint
     root_hint = ""
-    with open(syslog_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if "deadlock" in line.lower():
-                root_hint = "DB deadlocks on payments workers"
-                break
+    for line in _store.load(syslog_path, "lines"):
+        if "deadlock" in line.lower():
+            root_hint = "DB deadlocks on payments workers"
+            break
     return {"500_spike_window": window, "top_endpoint": top_endpoint, "root_cause_hint": root_hint}
 
 def _month_num(mon_str: str) -> int:
@@ -209,9 +224,8 @@ def _p2_emails_discount_thread(pack_dir: str):
 def _p2_audio_merge(pack_dir: str):
     # Merge contiguous segments, leaving the silence gap as a boundary
     fp = os.path.join(pack_dir, "audio", "sample_transcript.jsonl")
-    segs = _jsonl_load(fp)
+    segs = sorted(_jsonl_load(fp), key=lambda x: x["start"])
     if not segs: return []
-    segs.sort(key=lambda x: x["start"])
     clusters = []
     cur = {"start": segs[0]["start"], "end": segs[0]["end"], "text": segs[0]["text"]}
     for s in segs[1:]:
@@ -280,21 +294,16 @@ def _p3_sql_recon(pack_dir: str):
     if not row: return {}
     qty, unit_db = int(row[0]), float(row[1])
 
-    # Read agreed price from nested archive: tar -> zip -> audit/audit.csv
+    # Read agreed price from nested archive: tar -> zip -> audit/audit.csv, streamed in place
     tarp = os.path.join(pack_dir, "archives", "audit_bundle.tar")
     agreed = None
-    with tarfile.open(tarp, "r") as t:
-        for m in t.getmembers():
-            if m.name.endswith(".zip"):
-                f = t.extractfile(m)
-                data = f.read()
-                with zipfile.ZipFile(io.BytesIO(data)) as z:
-                    with z.open("audit/audit.csv") as c:
-                        rdr = csv.DictReader(io.TextIOWrapper(c, encoding="utf-8"))
-                        for r in rdr:
-                            if r["order_id"] == "O-2007" and r["sku"] == "SKU-B":
-                                agreed = float(r["agreed_unit_price_usd"])
-                                break
+    for name in list_members(tarp):
+        if name.endswith(".zip"):
+            with vfs_open(f"{tarp}!/{name}!/audit/audit.csv", "r", encoding="utf-8") as c:
+                for r in csv.DictReader(c):
+                    if r["order_id"] == "O-2007" and r["sku"] == "SKU-B":
+                        agreed = float(r["agreed_unit_price_usd"])
+                        break
     if agreed is None:
         return {}
     total_diff = (unit_db - agreed) * qty
@@ -316,16 +325,19 @@ def _p3_sql_recon(pack_dir: str):
 
 # ---------------------- Pack 4 ----------------------
 
-def _p4_eml_attachments(pack_dir: str):
-    fp = os.path.join(pack_dir, "emails", "inv3001_with_attachments.eml")
+@parser("eml_attachments")
+def _eml_attachments(fp: str) -> List[tuple]:
+    """(filename, content type, decoded payload) of every attachment of an .eml message."""
     with open(fp, "rb") as f:
         msg = BytesParser(policy=policy.default).parse(f)
+    return [(part.get_filename(), part.get_content_type(), part.get_payload(decode=True))
+            for part in msg.iter_attachments()]
+
+def _p4_eml_attachments(pack_dir: str):
+    fp = os.path.join(pack_dir, "emails", "inv3001_with_attachments.eml")
     rows = []
     pdf_name = None
-    for part in msg.iter_attachments():
-        fn = part.get_filename()
-        ctype = part.get_content_type()
-        payload = part.get_payload(decode=True)
+    for fn, ctype, payload in _store.load(fp, "eml_attachments"):
         if not fn: continue
         if fn.endswith(".csv"):
             rdr = csv.DictReader(io.StringIO(payload.decode("utf-8")))
@@ -334,25 +346,37 @@ def _p4_eml_attachments(pack_dir: str):
             pdf_name = fn
     return {"csv_rows": rows, "attached_pdf": pdf_name}
 
+_XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+@parser("xlsx_cells")
+def _xlsx_cells(fp: str) -> Dict[str, Dict[str, Any]]:
+    """{worksheet file name: {cell ref: cached value}} with numbers as floats."""
+    sheets = {}
+    with zipfile.ZipFile(fp, "r") as z:
+        for name in z.namelist():
+            if not (name.startswith("xl/worksheets/") and name.endswith(".xml")):
+                continue
+            cells = sheets[os.path.basename(name)] = {}
+            for c in ET.fromstring(z.read(name)).iter(_XLSX_NS + "c"):
+                # find <c r="B2"><v>...</v></c>
+                v = c.find(_XLSX_NS + "v")
+                ref = c.attrib.get("r")
+                if ref in cells or v is None or v.text is None: continue
+                try:
+                    cells[ref] = float(v.text)
+                except:
+                    cells[ref] = v.text
+    return sheets
+
 def _p4_xlsx_summary(pack_dir: str):
     # Parse sheet XML and compute the few formulas we expect.
     xlsx = os.path.join(pack_dir, "xlsx", "ops_finance.xlsx")
-    with zipfile.ZipFile(xlsx, "r") as z:
-        s1 = ET.fromstring(z.read("xl/worksheets/sheet1.xml"))
-        s2 = ET.fromstring(z.read("xl/worksheets/sheet2.xml"))
+    sheets = _store.load(xlsx, "xlsx_cells")
+    s1 = sheets.get("sheet1.xml", {})
     # Extract values from Inputs sheet: 
     # A2 SKU-A, B2=2, C2=210, E2=0.12; A3 SKU-B, B3=4, C3=150, E3=0.12
     def cell_val(sheet, ref):
-        # find <c r="B2"><v>...</v></c>
-        for c in sheet.findall(".//{http://schemas.openxmlformats.org/spreadsheetml/2006/main}c"):
-            if c.attrib.get("r") == ref:
-                v = c.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v")
-                if v is not None and v.text is not None:
-                    try:
-                        return float(v.text)
-                    except:
-                        return v.text
-        return None
+        return sheet.get(ref)
 
     B2, C2, E2 = cell_val(s1, "B2"), cell_val(s1, "C2"), cell_val(s1, "E2")
     B3, C3, E3 = cell_val(s1, "B3"), cell_val(s1, "C3"), cell_val(s1, "E3")
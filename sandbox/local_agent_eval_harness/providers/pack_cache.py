@@ -0,0 +1,169 @@
+"""
+Parse-once store for the pack files the local agent reads.
+
+Pack 1 backs three tasks and packs 2-4 two or three each, and every handler
+used to reopen and reparse its CSVs, JSON, logs and emails on every call.
+ArtifactStore.load(path, kind) parses a file once per (path, size, mtime)
+and hands back the typed result:
+
+  - results are kept in memory in an LRU bounded by entry count and by the
+    source files' total size (EDA_PACK_CACHE_ENTRIES, EDA_PACK_CACHE_MB);
+  - with a cache dir (EDA_PACK_CACHE_DIR, or harness.py --pack_cache_dir)
+    they are also pickled to <cache_dir>/<key[:2]>/<key>.pkl, so the next
+    process or run loads them without parsing. The harness runs the agent in
+    a fresh process per call when it isolates it, so across calls only the
+    disk entries help, and it then defaults to <runs_dir>/pack_cache;
+  - a file that changed (size or mtime) gets a new key and is parsed again.
+
+Parsers are registered per kind with @parser(kind, version); "csv", "text",
+"json", "jsonl" and "lines" are built in and handlers add their own (parsed
+log records, email attachments, ...). Bump a parser's version when its output
+changes so old disk entries are ignored. Results are shared between callers:
+treat them as read-only.
+
+The cache dir holds pickles, so only point it at a directory you trust.
+"""
+
+import os, csv, json, time, pickle, hashlib, tempfile, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+MAX_ENTRIES = int(os.environ.get("EDA_PACK_CACHE_ENTRIES", "512"))
+MAX_MB = float(os.environ.get("EDA_PACK_CACHE_MB", "256"))
+
+PARSERS: Dict[str, tuple] = {}  # kind -> (version, fn(path) -> value)
+
+def parser(kind: str, version: int = 1):
+    """Register fn(path) as the parser for 'kind'."""
+    def register(fn: Callable[[str], Any]):
+        PARSERS[kind] = (version, fn)
+        return fn
+    return register
+
+# ---------------------- built-in parsers ----------------------
+
+@parser("csv")
+def _csv(fp: str):
+    with open(fp, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+@parser("text")
+def _text(fp: str):
+    with open(fp, "r", encoding="utf-8") as f:
+        return f.read()
+
+@parser("json")
+def _json(fp: str):
+    with open(fp, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@parser("jsonl")
+def _jsonl(fp: str):
+    with open(fp, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@parser("lines")
+def _lines(fp: str):
+    with open(fp, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+# ---------------------- store ----------------------
+
+class ArtifactStore:
+    """Thread-safe LRU of parsed files keyed by (kind, path, size, mtime), optionally backed by a cache dir."""
+
+    def __init__(self, cache_dir: str = "", max_entries: int = MAX_ENTRIES, max_bytes: int = int(MAX_MB * 1024 * 1024)):
+        self.dir = cache_dir
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, source size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self.parse_s = 0.0
+
+    def load(self, path: str, kind: str) -> Any:
+        """The parsed contents of 'path'; parsed by the 'kind' parser only if no cached copy is current."""
+        if kind not in PARSERS:
+            raise ValueError(f"Unknown artifact kind '{kind}'. Registered: {', '.join(sorted(PARSERS))}")
+        version, fn = PARSERS[kind]
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = hashlib.sha256(json.dumps([kind, version, path, st.st_size, st.st_mtime_ns]).encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        found = self._read_disk(key)
+        if found is not None:
+            value = found[0]
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            t0 = time.perf_counter()
+            value = fn(path)
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.misses += 1
+                self.parse_s += elapsed
+            self._write_disk(key, value)
+        self._remember(key, value, st.st_size)
+        return value
+
+    def _remember(self, key: str, value: Any, size: int):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], key + ".pkl")
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        """(value,) stored under 'key', or None; a missing or unreadable entry is a miss."""
+        if not self.dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return (pickle.load(f),)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        if not self.dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[warn] pack cache: could not write {path}: {e}")
+
+    def clear(self):
+        """Drop the in-memory entries (the cache dir is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "entries": len(self._entries), "bytes": self._bytes,
+                    "parse_s": self.parse_s, "cache_dir": self.dir}
+
+def from_env() -> ArtifactStore:
+    """A store persisting to EDA_PACK_CACHE_DIR if set (in memory only otherwise)."""
+    cache_dir = os.environ.get("EDA_PACK_CACHE_DIR", "").strip()
+    return ArtifactStore(os.path.abspath(cache_dir) if cache_dir else "")
@@ -1,38 +1,250 @@
-import math
+"""
+Scores a model's JSON answer against the expected one.
 
-def _norm(v):
-    if isinstance(v, float):
-        return round(v, 4)
-    return v
+Score = share of the expected leaf values (scalars) that the answer matches.
+The answer is walked once, iteratively, alongside the expected value, so deep
+or wide answers (thousands of csv_rows or transcript segments) score in
+linear time.
 
-def score(expected, got):
-    """Return (score_float, details_dict). Compares dict/list scalars with tolerant floats."""
-    def flatten(x, prefix=''):
-        items = {}
+How values compare is set per key with 'policies' (a task's "policies" in
+tasks.py). Keys are key paths below the task's answer with '*' for any list
+position ("/merged_transcript/*/text", "/" for the answer itself), fnmatch
+patterns over those paths, or bare key names ("amount", matching that key anywhere). A policy is one of
+
+  "ordered"     lists compare position by position
+  "unordered"   lists compare as multisets (the default)
+  "text"        strings compare case- and whitespace-insensitively
+  "exact"       numbers must be equal, strings verbatim
+  <number>      absolute tolerance for any two numbers, ints included
+
+or a dict combining them: {"list": "ordered", "abs_tol": 0.5, "rel_tol": 0.01,
+"text": True}; a dict with a tolerance applies it to ints too unless it sets
+"int_tol": False. By default, as before policies existed, only two floats
+compare within 0.01; other numbers must be equal after rounding floats to 4
+places, so 100 vs 100.005 is a miss. A policy applies to everything below its
+key unless a deeper key overrides it.
+
+Unordered lists are matched by hashing each element's canonical form (floats
+rounded, strings normalised under "text"); identical elements pair up in
+O(n). A leftover dict pairs with the leftover answer element that shares
+most of its fields (found through an inverted index, not by comparing all
+pairs), so a nearly-right row still earns credit for the leaves it gets
+right; other leftovers pair up in order.
+"""
+
+import re, json, fnmatch
+from collections import defaultdict, deque
+
+DEFAULT_POLICY = {"list": "unordered", "abs_tol": 1e-2, "rel_tol": 0.0, "text": False, "int_tol": False}
+SHORTHANDS = {
+    "ordered": {"list": "ordered"},
+    "unordered": {"list": "unordered"},
+    "text": {"text": True},
+    "exact": {"abs_tol": 0.0, "rel_tol": 0.0, "text": False, "int_tol": True},
+}
+MAX_POSTINGS = 64  # fields shared by more leftover elements than this don't help pair them
+_MISSING = object()
+_SPACES = re.compile(r"\s+")
+
+def _policy(spec):
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        return {"abs_tol": float(spec), "int_tol": True}
+    if isinstance(spec, str):
+        if spec not in SHORTHANDS:
+            raise ValueError(f"Unknown scoring policy '{spec}'. Use one of: {', '.join(SHORTHANDS)}, a tolerance or a dict")
+        return SHORTHANDS[spec]
+    if isinstance(spec, dict):
+        unknown = set(spec) - set(DEFAULT_POLICY)
+        if unknown:
+            raise ValueError(f"Unknown scoring policy fields {sorted(unknown)}; expected {sorted(DEFAULT_POLICY)}")
+        if "abs_tol" in spec or "rel_tol" in spec:
+            return {"int_tol": True, **spec}
+        return spec
+    raise ValueError(f"Bad scoring policy {spec!r}")
+
+class Policies:
+    """Resolves the policy in force at a key path ('*' for list positions), cached per path."""
+    def __init__(self, policies=None):
+        self.exact, self.names, self.patterns = {}, {}, []
+        root = dict(DEFAULT_POLICY)
+        for key, spec in (policies or {}).items():
+            key, spec = str(key), _policy(spec)
+            if key.strip("/") == "":  # "/" is the answer itself
+                root.update(spec)
+            elif any(c in key for c in "*?["):
+                self.patterns.append(("/" + key.lstrip("/"), spec))
+            elif "/" in key:
+                self.exact["/" + key.strip("/")] = spec
+            else:
+                self.names[key] = spec
+        self._cache = {"": root}
+        self._children = {}
+
+    def at(self, path, parent):
+        """Policy at 'path', whose parent path is 'parent'."""
+        pol = self._cache.get(path)
+        if pol is None:
+            pol = self._cache[parent] if parent in self._cache else self.at(parent, parent.rpartition("/")[0])
+            if self.names or self.patterns or self.exact:
+                name = path.rpartition("/")[2]
+                overrides = [spec for pattern, spec in self.patterns if fnmatch.fnmatchcase(path, pattern)]
+                for spec in [self.names.get(name)] + overrides + [self.exact.get(path)]:
+                    if spec:
+                        pol = {**pol, **spec}
+            self._cache[path] = pol
+        return pol
+
+    def child(self, parent, name):
+        """(path, policy) of key 'name' under the path 'parent'; (None, None) is the answer itself."""
+        found = self._children.get((parent, name))
+        if found is None:
+            path = "" if parent is None else f"{parent}/{name}"
+            found = self._children[(parent, name)] = (path, self.at(path, parent or ""))
+        return found
+
+def _text(s):
+    return _SPACES.sub(" ", s).strip().casefold()
+
+def _is_number(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+def _rounded(x):
+    return round(x, 4) if isinstance(x, float) else x
+
+def leaf_matches(expected, got, pol):
+    if _is_number(expected) and _is_number(got):
+        if pol["int_tol"] or (isinstance(expected, float) and isinstance(got, float)):
+            return abs(expected - got) <= max(pol["abs_tol"], pol["rel_tol"] * abs(expected))
+        return _rounded(expected) == _rounded(got)
+    if pol["text"] and isinstance(expected, str) and isinstance(got, str):
+        return _text(expected) == _text(got)
+    return expected == got
+
+def canonical(x, pol):
+    """Hashable form of a value under 'pol': floats rounded to 4 places, text normalised, unordered lists sorted.
+    Dicts of hashable values are taken as they are unless strings need normalising."""
+    if isinstance(x, dict):
+        if not pol["text"]:
+            try:
+                return frozenset(x.items())  # flat rows: hashed as is (floats then pair up as leftovers)
+            except TypeError:
+                pass
+        return ("d",) + tuple(sorted((str(k), canonical(v, pol)) for k, v in x.items()))
+    if isinstance(x, list):
+        items = [canonical(v, pol) for v in x]
+        return ("l",) + tuple(sorted(items, key=repr) if pol["list"] == "unordered" else items)
+    if isinstance(x, float):
+        return round(x, 4) + 0.0  # -0.0 -> 0.0
+    if pol["text"] and isinstance(x, str):
+        return _text(x)
+    if isinstance(x, (str, int, bool)) or x is None:
+        return x
+    return json.dumps(x, default=str)
+
+def _fields(x, pol):
+    if isinstance(x, dict):
+        return [(str(k), canonical(v, pol)) for k, v in x.items()]
+    return []
+
+def pair_unordered(expected, got, pol):
+    """(expected index, got element or _MISSING) for each expected element. Equal elements pair first, via
+    hashing; each remaining dict then takes the remaining got element sharing most of its fields (an inverted
+    index over fields held by at most MAX_POSTINGS elements), and whatever is left pairs up in order."""
+    pool = defaultdict(deque)
+    for j, g in enumerate(got):
+        pool[canonical(g, pol)].append(j)
+    pairs, left = [None] * len(expected), []
+    for i, e in enumerate(expected):
+        bucket = pool.get(canonical(e, pol))
+        if bucket:
+            pairs[i] = (i, got[bucket.popleft()])
+        else:
+            left.append(i)
+    if not left:
+        return pairs
+    spare = sorted(j for bucket in pool.values() for j in bucket)
+    postings = defaultdict(list)
+    for j in spare:
+        for field in _fields(got[j], pol):
+            postings[field].append(j)
+    taken, rest = set(), []
+    for i in left:
+        votes = defaultdict(int)
+        for field in _fields(expected[i], pol):
+            js = postings.get(field, ())
+            if len(js) <= MAX_POSTINGS:
+                for j in js:
+                    if j not in taken:
+                        votes[j] += 1
+        if votes:
+            j = max(votes, key=lambda j: (votes[j], -j))
+            taken.add(j)
+            pairs[i] = (i, got[j])
+        else:
+            rest.append(i)
+    spare = iter([j for j in spare if j not in taken])
+    for i in rest:
+        j = next(spare, None)
+        pairs[i] = (i, _MISSING if j is None else got[j])
+    return pairs
+
+def _leaves(x):
+    n, stack = 0, [x]
+    while stack:
+        x = stack.pop()
         if isinstance(x, dict):
-            for k, v in x.items():
-                items.update(flatten(v, prefix + '/' + str(k)))
+            values = x.values()
+            if not any(isinstance(v, (dict, list)) for v in values):
+                n += len(values)
+                continue
+            stack.extend(values)
         elif isinstance(x, list):
-            for i, v in enumerate(x):
-                items.update(flatten(v, prefix + '/' + str(i)))
+            stack.extend(x)
         else:
-            items[prefix or '/'] = _norm(x)
-        return items
+            n += 1
+    return n
 
-    exp = flatten(expected)
-    gotf = flatten(got)
-    total = len(exp)
-    correct = 0
+def _path(node):
+    parts = []
+    while node is not None:
+        node, name = node
+        parts.append(str(name))
+    return "/" + "/".join(reversed(parts)) if parts else "/"
+
+def score(expected, got, policies=None):
+    """Return (score_float, details_dict). Compares dict/list scalars with tolerant floats, lists as multisets
+    unless a policy says otherwise."""
+    rules = policies if isinstance(policies, Policies) else Policies(policies)
+    total = correct = 0
     diffs = {}
-    for k, v in exp.items():
-        gv = gotf.get(k, None)
-        ok = False
-        if isinstance(v, float) and isinstance(gv, float):
-            ok = abs(v - gv) <= 1e-2
-        else:
-            ok = (v == gv)
-        if ok:
-            correct += 1
+    # (diff path node, parent policy path, policy name, expected, got); popped in document order.
+    # Path nodes are (parent node, key) chains, turned into strings only for diffs.
+    stack = [(None, None, None, expected, got)]
+    while stack:
+        node, parent, name, e, g = stack.pop()
+        container = isinstance(e, (dict, list))
+        # Equal means equal under every policy: count the leaves and move on. Containers are compared whole
+        # only as list elements (and the answer itself), so a chain of dicts isn't re-compared at every level.
+        if (not container or name == "*" or name is None) and e == g:
+            n = _leaves(e) if container else 1
+            total += n
+            correct += n
+            continue
+        key, pol = rules.child(parent, name)
+        if isinstance(e, dict):
+            gd = g if isinstance(g, dict) else {}
+            stack.extend(((node, k), key, k, v, gd.get(k, _MISSING)) for k, v in reversed(e.items()))
+        elif isinstance(e, list):
+            gl = g if isinstance(g, list) else []
+            if pol["list"] == "ordered":
+                pairs = [(i, gl[i] if i < len(gl) else _MISSING) for i in range(len(e))]
+            else:
+                pairs = pair_unordered(e, gl, rules.child(key, "*")[1])
+            stack.extend(((node, i), key, "*", e[i], gv) for i, gv in reversed(pairs))
         else:
-            diffs[k] = dict(expected=v, got=gv)
+            total += 1
+            if g is not _MISSING and leaf_matches(e, g, pol):
+                correct += 1
+            else:
+                diffs[_path(node)] = dict(expected=e, got=None if g is _MISSING else g)
     return (correct/total if total else 0.0, dict(total=total, correct=correct, diffs=diffs))
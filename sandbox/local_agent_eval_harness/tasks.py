@@ -6,6 +6,7 @@ import os, json, glob
 # - answer_key_path: list for drilling into the JSON (e.g., ['finance', 'invoice_to_bank_match'])
 # - prompt: the instruction sent to providers; providers should return JSON
 # - extractor: function(model_json) -> comparable object (defaults to identity)
+# - policies: optional per-key scoring policies, e.g. {"segments": "ordered", "text": "text"} (see scoring.py)
 
 def _id(x): return x
 
@@ -51,7 +52,8 @@ TASKS = [
         answer_path="answers_pack2.json",
         answer_key_path=["audio", "merged_transcript"],
         prompt="Merge transcript segments across silence. Return a list of {start, end, text} segments preserving cluster start times.",
-        extractor=_id
+        extractor=_id,
+        policies={"/": "ordered", "text": "text"}
     ),
     dict(
         name="p2_finance_fx",
@@ -87,7 +89,8 @@ TASKS = [
         answer_path="answers_pack4.json",
         answer_key_path=["eml_attachments"],
         prompt="Parse inv3001_with_attachments.eml. Return JSON with csv_rows (as list of dicts) and attached_pdf filename.",
-        extractor=_id
+        extractor=_id,
+        policies={"csv_rows": "unordered"}
     ),
     dict(
         name="p4_xlsx_summary",
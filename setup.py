@@ -21,7 +21,14 @@ setup(
         "openai",
         "langchain",
         "langchain-community",
+        "numpy",
+        "pypdf",
+        "httpx",
     ],
+    extras_require={
+        "hnsw": ["hnswlib"],        # EDA_VECTOR_STORE=hnsw
+        "parquet": ["pyarrow"],     # sensor store Parquet export
+    },
     python_requires='>=3.12',
     author="Your Name",
     author_email="your.email@example.com",
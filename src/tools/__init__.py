@@ -0,0 +1,51 @@
+"""
+Lazy registry of the EDA tools.
+
+Tools are referenced by their smolagents name and their module is only imported
+when the tool is requested. Heavy dependencies (torch, llama_index, chromadb,
+sentence_transformers) are imported inside the tools on their first forward,
+so building a tool list for an agent stays cheap.
+
+    from tools import load_tools
+    tools = load_tools(["sqlite_tool", "rag_tool"])
+"""
+import importlib
+
+# tool name -> (module under tools/, attribute)
+TOOL_REGISTRY = {
+    "rag_tool": ("tool_rag", "RAGTool"),
+    "chroma_rag_tool": ("tool_chroma_rag", "ChromaRAGTool"),
+    "sqlite_tool": ("tool_sqlite", "SQLiteTool"),
+    "financial_tables": ("tool_financial_tables", "FinancialTables"),
+    "sensor_query": ("tool_sensor", "SensorQuery"),
+    "directory_analyzer": ("tool_directory_analyzer", "DirectoryAnalyzer"),
+    "file_reader": ("tool_file_reader", "FileReader"),
+    "file_writer": ("tool_file_writer", "FileWriter"),
+    "tool_pip_install": ("tool_pip", "PipInstall"),
+    "tool_registry_manager": ("tool_registry_manager", "RegistryManager"),
+    "api_setup": ("tool_api_setup", "api_setup"),
+}
+
+
+def available_tools() -> list:
+    return sorted(TOOL_REGISTRY)
+
+
+def get_tool_class(name: str):
+    """Imports and returns the tool class (or @tool instance) registered under 'name'."""
+    if name not in TOOL_REGISTRY:
+        raise KeyError(f"Unknown tool '{name}'. Available: {', '.join(available_tools())}")
+    module_name, attr = TOOL_REGISTRY[name]
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    return getattr(module, attr)
+
+
+def load_tool(name: str, **kwargs):
+    """Returns a ready-to-use tool instance for 'name'."""
+    obj = get_tool_class(name)
+    # Function tools decorated with @tool are already instances.
+    return obj(**kwargs) if isinstance(obj, type) else obj
+
+
+def load_tools(names: list) -> list:
+    return [load_tool(name) for name in names]
@@ -0,0 +1,298 @@
+"""
+Approximate nearest-neighbour indexes for RAGTool.
+
+Exact search (llama_index, or the memmap store) costs O(chunks) per query.
+With EDA_VECTOR_STORE set to one of these backends, RAGTool searches an ANN
+index kept in <persist_dir>/ann/ next to the llama_index files:
+
+    ivf  - inverted file index in NumPy (no extra dependency). Spherical
+           k-means over sqrt(N) lists; a query scans the EDA_ANN_NPROBE
+           closest lists. Vectors are stored float16, grouped by list, and
+           memory-mapped.
+    hnsw - hnswlib graph (pip install hnswlib), searched with EDA_ANN_EF.
+
+Both support incremental inserts and deletes: the index is updated with the
+nodes of added/changed/deleted files instead of being rebuilt. Saves write
+new files and commit them through the backend's manifest (ivf.json,
+hnsw.json) like the memmap store. Chunk texts and metadata come from the
+keyword index, as for the memmap store.
+"""
+import os
+
+import numpy as np
+
+from .vector_store import _normalize, commit_files, read_manifest
+
+ANN_DIR = "ann"
+ANN_BACKENDS = ("ivf", "hnsw")
+DEFAULT_NPROBE = int(os.environ.get("EDA_ANN_NPROBE", "8"))
+DEFAULT_EF = int(os.environ.get("EDA_ANN_EF", "64"))
+HNSW_M = int(os.environ.get("EDA_ANN_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("EDA_ANN_EF_CONSTRUCTION", "200"))
+
+
+def _top_k(ids, scores, k: int) -> list:
+    if len(scores) == 0:
+        return []
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(ids[i], float(scores[i])) for i in top]
+
+
+# ------------------------------------------------------------------------------
+# IVF (NumPy)
+# ------------------------------------------------------------------------------
+def spherical_kmeans(matrix: np.ndarray, n_lists: int, iterations: int = 10, sample: int = 256, seed: int = 0):
+    """Cosine k-means on a sample of at most sample * n_lists normalised rows; returns the centroids."""
+    rng = np.random.default_rng(seed)
+    if len(matrix) > sample * n_lists:
+        matrix = matrix[rng.choice(len(matrix), sample * n_lists, replace=False)]
+    centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(matrix @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, matrix)
+        empty = np.bincount(assign, minlength=n_lists) == 0
+        sums[empty] = matrix[rng.choice(len(matrix), int(empty.sum()))]  # re-seed empty lists
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, offsets: np.ndarray, ids: list,
+                 trained_size: int, nprobe: int = DEFAULT_NPROBE):
+        self.centroids = centroids
+        self.vectors = vectors        # float16 rows grouped by list: list i is rows offsets[i]:offsets[i+1]
+        self.offsets = offsets
+        self.ids = ids
+        self.trained_size = trained_size
+        self.nprobe = nprobe
+        self._pending_ids, self._pending = [], []   # inserted since the last save
+        self._deleted = set()
+
+    def __len__(self) -> int:
+        return sum(1 for node_id in self.ids if node_id not in self._deleted) + len(self._pending_ids)
+
+    @classmethod
+    def build(cls, ids: list, embeddings, n_lists: int = None, nprobe: int = DEFAULT_NPROBE) -> "IVFIndex":
+        matrix = _normalize(embeddings)
+        n_lists = n_lists or max(1, min(4096, int(np.sqrt(len(matrix)))))
+        centroids = spherical_kmeans(matrix, n_lists) if len(matrix) else np.zeros((0, matrix.shape[-1]), np.float32)
+        return cls._grouped(centroids, matrix, list(ids), len(matrix), nprobe)
+
+    @classmethod
+    def _grouped(cls, centroids, matrix, ids, trained_size, nprobe) -> "IVFIndex":
+        assign = np.argmax(matrix @ centroids.T, axis=1) if len(matrix) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))]).astype(np.int64)
+        return cls(centroids, matrix[order].astype(np.float16), offsets, [ids[i] for i in order], trained_size, nprobe)
+
+    def add(self, ids: list, embeddings):
+        if len(ids):
+            self.remove(ids)  # re-inserted ids replace their old vector
+            self._pending_ids.extend(ids)
+            self._pending.append(_normalize(embeddings))
+
+    def remove(self, ids: list):
+        """Deletes ids: stored rows are masked until the next save(), pending ones dropped right away."""
+        ids = set(ids)
+        self._deleted.update(ids)
+        if self._pending_ids and ids.intersection(self._pending_ids):
+            keep = [i for i, node_id in enumerate(self._pending_ids) if node_id not in ids]
+            pending = np.concatenate(self._pending)[keep]
+            self._pending_ids = [self._pending_ids[i] for i in keep]
+            self._pending = [pending] if keep else []
+
+    def search(self, query, k: int, nprobe: int = None) -> list:
+        q = _normalize(query).ravel()
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        ids, scores = [], []
+        if nprobe:
+            probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+            for lst in probe:
+                start, end = self.offsets[lst], self.offsets[lst + 1]
+                if end > start:
+                    scores.append(np.asarray(self.vectors[start:end], dtype=np.float32) @ q)
+                    ids.extend(self.ids[start:end])
+        if self._deleted and ids:
+            keep = np.array([node_id not in self._deleted for node_id in ids])
+            ids = [node_id for node_id, kept in zip(ids, keep) if kept]
+            scores = [np.concatenate(scores)[keep]]
+        if self._pending:
+            # Not yet assigned to lists: scanned exactly until the next save().
+            scores.append(np.concatenate(self._pending) @ q)
+            ids.extend(self._pending_ids)
+        if not ids:
+            return []
+        return _top_k(ids, np.concatenate(scores), k)
+
+    def save(self, path: str) -> "IVFIndex":
+        """Merges pending inserts/deletes (retraining once the index quadrupled) and writes it to 'path'."""
+        rows = [i for i, node_id in enumerate(self.ids) if node_id not in self._deleted]
+        matrix = np.asarray(self.vectors, dtype=np.float32)[rows]
+        ids = [self.ids[i] for i in rows]
+        if self._pending:
+            pending = np.concatenate(self._pending)
+            matrix = np.concatenate([matrix.reshape(-1, pending.shape[1]), pending])
+            ids += self._pending_ids
+        if len(ids) > 4 * max(self.trained_size, 1) or not len(self.centroids):
+            merged = IVFIndex.build(ids, matrix, nprobe=self.nprobe)
+        else:
+            merged = IVFIndex._grouped(self.centroids, matrix, ids, self.trained_size, self.nprobe)
+
+        commit_files(path, "ivf.json", {
+            "centroids": (".npy", lambda fp: np.save(fp, merged.centroids)),
+            "offsets": (".npy", lambda fp: np.save(fp, merged.offsets)),
+            "ivf_vectors": (".npy", lambda fp: np.save(fp, merged.vectors)),
+        }, {"ids": merged.ids, "trained_size": merged.trained_size})
+        return IVFIndex.load(path, self.nprobe)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = DEFAULT_NPROBE) -> "IVFIndex":
+        meta = read_manifest(path, "ivf.json")
+        files = meta.get("files") or {name: name + ".npy" for name in ("centroids", "offsets", "ivf_vectors")}
+        return cls(
+            np.load(os.path.join(path, files["centroids"])),
+            np.load(os.path.join(path, files["ivf_vectors"]), mmap_mode="r"),
+            np.load(os.path.join(path, files["offsets"])),
+            meta["ids"],
+            meta["trained_size"],
+            nprobe,
+        )
+
+
+# ------------------------------------------------------------------------------
+# HNSW (hnswlib, optional)
+# ------------------------------------------------------------------------------
+class HNSWIndex:
+    def __init__(self, graph, ids: list, ef: int = DEFAULT_EF):
+        self.graph = graph                              # None until the first vector (dim unknown)
+        self.ids = ids                                  # label -> node id (None once deleted)
+        self.labels = {node_id: label for label, node_id in enumerate(ids) if node_id is not None}
+        self.ef = ef
+        if graph is not None:
+            graph.set_ef(ef)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("The 'hnsw' backend needs hnswlib: pip install hnswlib") from e
+        return hnswlib
+
+    @classmethod
+    def build(cls, ids: list, embeddings, ef: int = DEFAULT_EF) -> "HNSWIndex":
+        index = cls(None, [], ef)
+        index.add(ids, embeddings)
+        return index
+
+    def add(self, ids: list, embeddings):
+        if not len(ids):
+            return
+        if self.graph is None:
+            dim = _normalize(embeddings).shape[1]
+            self.graph = self._hnswlib().Index(space="cosine", dim=dim)
+            self.graph.init_index(max_elements=max(len(ids), 1024), M=HNSW_M,
+                                  ef_construction=HNSW_EF_CONSTRUCTION, allow_replace_deleted=False)
+            self.graph.set_ef(self.ef)
+        self.remove([i for i in ids if i in self.labels])
+        start = len(self.ids)
+        needed = start + len(ids)
+        if needed > self.graph.get_max_elements():
+            self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+        self.graph.add_items(_normalize(embeddings), np.arange(start, needed))
+        for label, node_id in enumerate(ids, start=start):
+            self.ids.append(node_id)
+            self.labels[node_id] = label
+
+    def remove(self, ids: list):
+        for node_id in ids:
+            label = self.labels.pop(node_id, None)
+            if label is not None:
+                self.graph.mark_deleted(label)
+                self.ids[label] = None
+
+    def search(self, query, k: int, ef: int = None) -> list:
+        if not self.labels:
+            return []
+        self.graph.set_ef(max(ef or self.ef, k))
+        labels, distances = self.graph.knn_query(_normalize(query).reshape(1, -1), k=min(k, len(self.labels)))
+        return [(self.ids[label], 1.0 - float(d)) for label, d in zip(labels[0], distances[0])]
+
+    def save(self, path: str) -> "HNSWIndex":
+        if self.graph is None:  # empty: a manifest without a graph file
+            commit_files(path, "hnsw.json", {}, {"ids": self.ids, "dim": None})
+        else:
+            commit_files(path, "hnsw.json", {"hnsw": (".bin", self.graph.save_index)},
+                         {"ids": self.ids, "dim": self.graph.dim})
+        return self
+
+    @classmethod
+    def load(cls, path: str, ef: int = DEFAULT_EF) -> "HNSWIndex":
+        meta = read_manifest(path, "hnsw.json")
+        if meta["dim"] is None:
+            return cls(None, meta["ids"], ef)
+        files = meta.get("files") or {"hnsw": "hnsw.bin"}
+        graph = cls._hnswlib().Index(space="cosine", dim=meta["dim"])
+        graph.load_index(os.path.join(path, files["hnsw"]), max_elements=len(meta["ids"]))
+        return cls(graph, meta["ids"], ef)
+
+
+# ------------------------------------------------------------------------------
+# Persistence next to the llama_index storage
+# ------------------------------------------------------------------------------
+_BACKENDS = {"ivf": (IVFIndex, "ivf.json"), "hnsw": (HNSWIndex, "hnsw.json")}
+_open_indexes = {}
+
+
+def ann_index_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, ANN_DIR)
+
+
+def has_ann_index(persist_dir: str, backend: str) -> bool:
+    return os.path.exists(os.path.join(ann_index_path(persist_dir), _BACKENDS[backend][1]))
+
+
+def open_ann_index(persist_dir: str, backend: str):
+    """Returns the process-wide ANN index of 'backend' in 'persist_dir' (re-opened when rewritten), or None."""
+    cls, meta_file = _BACKENDS[backend]
+    path = ann_index_path(persist_dir)
+    try:
+        stamp = os.stat(os.path.join(path, meta_file)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _open_indexes.get((path, backend))
+    if cached is None or cached[0] != stamp:
+        cached = _open_indexes[(path, backend)] = (stamp, cls.load(path))
+    return cached[1]
+
+
+def _embeddings(index, node_ids: list):
+    embedding_dict = index.vector_store.data.embedding_dict
+    node_ids = [i for i in node_ids if i in embedding_dict]
+    return node_ids, np.array([embedding_dict[i] for i in node_ids], dtype=np.float32)
+
+
+def sync_llama_index(index, persist_dir: str, backend: str, removed_ids: list = None, added_ids: list = None):
+    """
+    Brings the ANN index in 'persist_dir' in line with a llama_index index:
+    removes/inserts the given node ids, or builds it from every embedding when
+    there is no ANN index yet (or no ids are given). An index without
+    embeddings is saved empty, so it is not rebuilt on every query.
+    """
+    cls, _ = _BACKENDS[backend]
+    ann = open_ann_index(persist_dir, backend)
+    if ann is None or added_ids is None:
+        ann = cls.build(*_embeddings(index, list(index.vector_store.data.embedding_dict)))
+    else:
+        ann.remove(removed_ids or [])
+        ann.add(*_embeddings(index, added_ids))
+    path = ann_index_path(persist_dir)
+    saved = ann.save(path)
+    _open_indexes[(path, backend)] = (os.stat(os.path.join(path, _BACKENDS[backend][1])).st_mtime_ns, saved)
+    return saved
@@ -0,0 +1,451 @@
+"""
+Read-only virtual filesystem over nested tar and zip archives.
+
+A path names a member inside an archive with '!/', nested as deep as the
+archives are:
+
+    archives/audit_bundle.tar!/bundle.zip!/audit/audit.csv
+
+    from tools.archive_vfs import vfs_open, list_members
+    list_members("archives/audit_bundle.tar")                   # ['bundle.zip']
+    with vfs_open("archives/audit_bundle.tar!/bundle.zip!/audit/audit.csv", "r") as f:
+        rows = csv.DictReader(f)
+
+Paths without '!/' are plain files, so callers can route every read through
+here. Nothing is extracted or read whole:
+
+  - an uncompressed tar member and a stored zip member are contiguous byte
+    ranges of their container; they are opened as seekable windows over the
+    outer file, so a zip inside a tar is read in place;
+  - a deflated zip member is inflated as it is read, in bounded chunks, and
+    its CRC is checked at the end;
+  - only a nested container that cannot be addressed in place (inside a
+    compressed tar, or a deflated zip member) is copied, to a temporary file
+    that stays in memory up to EDA_VFS_SPOOL_MB and spills to disk beyond it.
+
+Each container's member index (names, offsets, sizes) is built once and kept
+in an LRU of EDA_VFS_INDEX_ENTRIES containers, keyed by the outer file's
+path, size and mtime and the path inside it; a changed file is re-indexed.
+stats() reports index hits and misses and the bytes copied to spool files.
+"""
+import io
+import os
+import errno
+import shutil
+import struct
+import tarfile
+import zipfile
+import zlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+SEP = "!/"
+INDEX_ENTRIES = int(os.environ.get("EDA_VFS_INDEX_ENTRIES", "128"))
+SPOOL_MB = float(os.environ.get("EDA_VFS_SPOOL_MB", "32"))
+CHUNK = 1 << 20
+INFLATE_CHUNK = 1 << 16  # compressed bytes per inflate step; output is bounded by the caller's read size
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # signature ... file name length, extra field length
+_COMPRESSED_TAR_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+
+def split_path(path: str):
+    """('outer file path', [member path in each nested archive])."""
+    parts = path.split(SEP)
+    return parts[0], [_member_name(p) for p in parts[1:]]
+
+
+def _member_name(name: str) -> str:
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+# ------------------------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------------------------
+class _Window(io.RawIOBase):
+    """Seekable read-only view of bytes [offset, offset + size) of a seekable file. A window over a
+    window reads the underlying file directly; all windows over one file share its lock."""
+
+    def __init__(self, base, offset: int, size: int, lock=None, owned=()):
+        super().__init__()
+        if isinstance(base, _Window):
+            offset, lock, base = base.offset + offset, base.lock, base.base
+        self.base, self.offset, self.size = base, offset, size
+        self.lock = lock or threading.Lock()
+        self.owned = list(owned)
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self.size - self.pos)
+        if n <= 0:
+            return 0
+        with self.lock:
+            self.base.seek(self.offset + self.pos)
+            got = self.base.readinto(memoryview(b)[:n])
+        self.pos += got
+        return got
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self.pos
+        elif whence == io.SEEK_END:
+            pos += self.size
+        if pos < 0:
+            # OSError like a real file: zipfile's end-record probe expects it on short members
+            raise OSError(errno.EINVAL, f"negative seek position {pos}")
+        self.pos = pos
+        return pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        if not self.closed:
+            _close_all(self.owned)
+        super().close()
+
+
+class _Inflater(io.RawIOBase):
+    """Streams a raw-deflate zip member out of its compressed bytes, checking size and CRC at the end."""
+
+    def __init__(self, raw, info: zipfile.ZipInfo, owned=()):
+        super().__init__()
+        self.raw, self.info = raw, info
+        self.owned = [raw] + list(owned)
+        self._z = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._crc = self._done = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = len(b)
+        while True:
+            if self._z.unconsumed_tail:
+                data = self._z.decompress(self._z.unconsumed_tail, n)
+            elif self._z.eof:
+                data = b""
+            else:
+                chunk = self.raw.read(INFLATE_CHUNK)
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated data for {self.info.filename!r}")
+                data = self._z.decompress(chunk, n)
+            if data or self._z.eof:
+                break
+        if not data:
+            if self._done != self.info.file_size or self._crc != self.info.CRC:
+                raise zipfile.BadZipFile(f"Bad CRC-32 or size for {self.info.filename!r}")
+            return 0
+        self._crc = zlib.crc32(data, self._crc)
+        self._done += len(data)
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            _close_all(self.owned)
+        super().close()
+
+
+class _Owned(io.RawIOBase):
+    """A reader that closes the files it depends on (tar stream, ZipFile, spool file) when closed."""
+
+    def __init__(self, f, owned=()):
+        super().__init__()
+        self.f = f
+        self.owned = [f] + list(owned)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.f.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seekable(self):
+        return self.f.seekable()
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        return self.f.seek(pos, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+    def close(self):
+        if not self.closed:
+            _close_all(self.owned)
+        super().close()
+
+
+def _close_all(files):
+    for f in reversed(files):
+        try:
+            f.close()
+        except Exception:
+            pass
+
+
+# ------------------------------------------------------------------------------
+# Container indexes
+# ------------------------------------------------------------------------------
+def _container_kind(f, path: str) -> str:
+    f.seek(0)
+    head = f.read(512)
+    f.seek(0)
+    if head[:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+        return "zip"
+    if head[257:262] == b"ustar":
+        return "tar"
+    if head.startswith(_COMPRESSED_TAR_MAGIC):
+        return "tar_stream"
+    if zipfile.is_zipfile(f):  # zip with a prefix (self-extracting)
+        return "zip"
+    raise NotADirectoryError(f"Not a tar or zip archive: {path}")
+
+
+def _build_index(f, path: str) -> dict:
+    """{"kind": zip | tar | tar_stream, "members": {name: entry}} for the container in seekable file 'f'.
+    Entries: ZipInfo for zip, (data offset, size, is file) for tar, (None, size, is file) for tar_stream."""
+    kind = _container_kind(f, path)
+    members = {}
+    if kind == "zip":
+        with zipfile.ZipFile(f) as z:
+            for info in z.infolist():
+                members[_member_name(info.filename)] = info
+    else:
+        # "r:" reads only the headers and seeks over the data; "r|*" has to stream the whole archive once
+        with tarfile.open(fileobj=f, mode="r:" if kind == "tar" else "r|*") as t:
+            for m in t:
+                members[_member_name(m.name)] = (m.offset_data if kind == "tar" else None, m.size, m.isreg())
+    f.seek(0)
+    return {"kind": kind, "members": members}
+
+
+# ------------------------------------------------------------------------------
+# VFS
+# ------------------------------------------------------------------------------
+class ArchiveVFS:
+    """Opens plain files and (nested) archive members; thread-safe, member indexes cached per container."""
+
+    def __init__(self, max_indexes: int = INDEX_ENTRIES, spool_bytes: int = int(SPOOL_MB * 1024 * 1024)):
+        self.max_indexes = max(1, max_indexes)
+        self.spool_bytes = spool_bytes
+        self._indexes = OrderedDict()  # (outer path, size, mtime_ns, member chain) -> index
+        self._lock = threading.Lock()
+        self.index_hits = 0
+        self.index_misses = 0
+        self.spooled_bytes = 0
+
+    # --- public API ---
+
+    def open(self, path: str, mode: str = "rb", encoding: str = "utf-8", newline=None):
+        """A read-only file object for 'path'; "rb" (default) or "r" for text. Close it (or use 'with')."""
+        if mode not in ("r", "rb", "rt"):
+            raise ValueError(f"archive VFS is read-only; mode {mode!r} is not supported")
+        outer, chain = split_path(path)
+        if not chain:
+            return open(outer, mode, encoding=None if mode == "rb" else encoding, newline=newline)
+        raw = self._open_chain(outer, chain)
+        reader = io.BufferedReader(raw, CHUNK)
+        return reader if mode == "rb" else io.TextIOWrapper(reader, encoding=encoding, newline=newline)
+
+    def read_bytes(self, path: str) -> bytes:
+        with self.open(path, "rb") as f:
+            return f.read()
+
+    def read_text(self, path: str, encoding: str = "utf-8") -> str:
+        with self.open(path, "r", encoding=encoding) as f:
+            return f.read()
+
+    def list_members(self, path: str, files_only: bool = True) -> list:
+        """Member names of the archive at 'path' (itself a file or a nested archive member), in archive order."""
+        outer, chain = split_path(path)
+        with self._resolve(outer, chain) as (_, index):
+            return [name for name, entry in index["members"].items()
+                    if not files_only or self._is_file(index["kind"], entry)]
+
+    def getsize(self, path: str) -> int:
+        """Uncompressed size of a file or archive member."""
+        outer, chain = split_path(path)
+        if not chain:
+            return os.path.getsize(outer)
+        with self._resolve(outer, chain[:-1]) as (_, index):
+            entry = self._entry(index, chain[-1], path)
+            return entry.file_size if index["kind"] == "zip" else entry[1]
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.getsize(path)
+            return True
+        except (OSError, zipfile.BadZipFile, tarfile.TarError):
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.index_hits + self.index_misses
+            return {"index_hits": self.index_hits, "index_misses": self.index_misses,
+                    "index_hit_rate": self.index_hits / lookups if lookups else 0.0,
+                    "indexes": len(self._indexes), "spooled_bytes": self.spooled_bytes}
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    # --- internals ---
+
+    @staticmethod
+    def _is_file(kind, entry) -> bool:
+        return not entry.is_dir() if kind == "zip" else entry[2]
+
+    @staticmethod
+    def _entry(index, name, path):
+        entry = index["members"].get(name)
+        if entry is None:
+            raise FileNotFoundError(f"No member {name!r} in archive: {path}")
+        return entry
+
+    def _index(self, key, f, path: str) -> dict:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                self.index_hits += 1
+                return index
+        index = _build_index(f, path)
+        with self._lock:
+            self.index_misses += 1
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    @contextmanager
+    def _resolve(self, outer: str, chain: list):
+        """(seekable container file, index) of the archive at outer!/chain, closed on exit."""
+        owned = []
+        try:
+            yield self._container(outer, chain, owned)
+        finally:
+            _close_all(owned)
+
+    def _container(self, outer: str, chain: list, owned: list):
+        """(seekable file, index) of the archive at outer!/chain; files to close are appended to 'owned'."""
+        outer = os.path.abspath(outer)
+        st = os.stat(outer)
+        f = open(outer, "rb")
+        owned.append(f)
+        key = (outer, st.st_size, st.st_mtime_ns)
+        index = self._index(key + ((),), f, outer)
+        for depth, name in enumerate(chain):
+            path = SEP.join([outer] + chain[:depth + 1])
+            member = self._open_member(f, index, name, path, owned)
+            f = member if isinstance(member, _Window) else self._spool(member, owned)
+            index = self._index(key + (tuple(chain[:depth + 1]),), f, path)
+        return f, index
+
+    def _open_chain(self, outer: str, chain: list) -> io.RawIOBase:
+        owned = []
+        try:
+            f, index = self._container(outer, chain[:-1], owned)
+            member = self._open_member(f, index, chain[-1], outer + SEP + SEP.join(chain), owned)
+        except BaseException:
+            _close_all(owned)
+            raise
+        if isinstance(member, (_Window, _Inflater)):
+            member.owned += owned
+            return member
+        return _Owned(member, owned)
+
+    def _open_member(self, f, index, name: str, path: str, owned: list):
+        """A reader for member 'name' of the container in 'f': a _Window where the bytes are stored
+        in place, an _Inflater for deflated zip members, else a forward-only stream."""
+        entry = self._entry(index, name, path)
+        kind = index["kind"]
+        if not self._is_file(kind, entry):
+            raise IsADirectoryError(f"Not a file: {path}")
+        if kind == "tar":
+            return _Window(f, entry[0], entry[1])
+        if kind == "tar_stream":
+            t = tarfile.open(fileobj=_Window(f, 0, _size(f)), mode="r|*")
+            for m in t:
+                if _member_name(m.name) == name:
+                    owned.append(t)
+                    return t.extractfile(m)
+            t.close()
+            raise FileNotFoundError(f"No member {name!r} in archive: {path}")
+        info = entry
+        if info.flag_bits & 0x1 or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            z = zipfile.ZipFile(_Window(f, 0, _size(f)))  # encrypted, bzip2, lzma: let zipfile do it
+            owned.append(z)
+            return z.open(info)
+        header = _Window(f, info.header_offset, _ZIP_LOCAL_HEADER.size).read(_ZIP_LOCAL_HEADER.size)
+        fields = _ZIP_LOCAL_HEADER.unpack(header)
+        if fields[0] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local file header for {path}")
+        start = info.header_offset + _ZIP_LOCAL_HEADER.size + fields[-2] + fields[-1]
+        data = _Window(f, start, info.compress_size)
+        return data if info.compress_type == zipfile.ZIP_STORED else _Inflater(data, info)
+
+    def _spool(self, member, owned: list):
+        """Copies a member that cannot be addressed in place to a seekable temporary file."""
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        owned.append(spool)
+        if member not in owned:
+            owned.append(member)
+        shutil.copyfileobj(member, spool, CHUNK)
+        with self._lock:
+            self.spooled_bytes += spool.tell()
+        spool.seek(0)
+        return spool
+
+
+def _size(f) -> int:
+    if isinstance(f, _Window):
+        return f.size
+    pos = f.tell()
+    end = f.seek(0, io.SEEK_END)
+    f.seek(pos)
+    return end
+
+
+# ------------------------------------------------------------------------------
+# Shared instance
+# ------------------------------------------------------------------------------
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_vfs() -> ArchiveVFS:
+    """The process-wide VFS, so every caller shares one index cache."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ArchiveVFS()
+        return _default
+
+
+def vfs_open(path: str, mode: str = "rb", encoding: str = "utf-8", newline=None):
+    return default_vfs().open(path, mode, encoding, newline)
+
+
+def read_bytes(path: str) -> bytes:
+    return default_vfs().read_bytes(path)
+
+
+def read_text(path: str, encoding: str = "utf-8") -> str:
+    return default_vfs().read_text(path, encoding)
+
+
+def list_members(path: str, files_only: bool = True) -> list:
+    return default_vfs().list_members(path, files_only)
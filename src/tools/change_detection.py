@@ -0,0 +1,292 @@
+"""
+Cheap change detection for data directories.
+
+Each data directory gets a snapshot of its tree built with os.scandir. Hidden
+entries are skipped, including the '.cache' folders the tools write
+themselves. The snapshot is persisted to <data_dir>/.cache/snapshot.json.
+A directory whose mtime is unchanged is not listed again, because its set of
+entries cannot have changed. Its known files are still stat'ed, since an
+in-place write does not touch the directory mtime. Set
+EDA_SNAPSHOT_VERIFY_FILES=0 to trust directory mtimes alone, which costs one
+stat per directory.
+
+Every detected change bumps a "generation" token. Consumers remember the
+token they indexed at and only rescan when it differs.
+
+On Linux an inotify watcher (ctypes, no extra dependency; EDA_INOTIFY=0
+disables it) watches the tree once it has been snapshotted. While it reports
+no events, generation() is O(1) and does not touch the disk. On the first
+event it marks the registry entry dirty, and the next call refreshes the
+snapshot.
+"""
+import os
+import sys
+import json
+import uuid
+import struct
+import threading
+
+from .data_registry import mark_dirty
+
+SNAPSHOT_FILE = "snapshot.json"
+VERIFY_FILES = os.environ.get("EDA_SNAPSHOT_VERIFY_FILES", "1") not in ("0", "false", "no")
+USE_INOTIFY = sys.platform.startswith("linux") and os.environ.get("EDA_INOTIFY", "1") not in ("0", "false", "no")
+
+
+# ------------------------------------------------------------------------------
+# Snapshots
+# ------------------------------------------------------------------------------
+def scan_tree(data_dir: str, previous: dict = None, verify_files: bool = VERIFY_FILES) -> dict:
+    """
+    Returns {relative dir: {"mtime_ns", "files": {name: [size, mtime_ns]}, "dirs": [names]}}
+    for every non-hidden directory under 'data_dir', reusing the listing of
+    directories whose mtime matches 'previous'.
+    """
+    previous = previous or {}
+    tree = {}
+    stack = [(data_dir, ".")]
+    while stack:
+        path, rel = stack.pop()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        old = previous.get(rel)
+        if old is not None and old["mtime_ns"] == mtime_ns:
+            dirs = old["dirs"]
+            if verify_files:
+                files = {}
+                for name in old["files"]:
+                    try:
+                        st = os.stat(os.path.join(path, name))
+                    except FileNotFoundError:
+                        continue
+                    files[name] = [st.st_size, st.st_mtime_ns]
+            else:
+                files = old["files"]
+        else:
+            files, dirs = {}, []
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files[entry.name] = [st.st_size, st.st_mtime_ns]
+        tree[rel] = {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+        for name in dirs:
+            stack.append((os.path.join(path, name), name if rel == "." else f"{rel}/{name}"))
+    return tree
+
+
+def _contents(tree: dict | None) -> dict | None:
+    """A tree without directory mtimes, which change when e.g. a '.cache' folder is created."""
+    if tree is None:
+        return None
+    return {rel: (node["files"], sorted(node["dirs"])) for rel, node in tree.items()}
+
+
+def latest_mtime(tree: dict) -> float:
+    """Newest file mtime (seconds) in a snapshot tree."""
+    latest = 0
+    for node in tree.values():
+        for _, mtime_ns in node["files"].values():
+            latest = max(latest, mtime_ns)
+    return latest / 1e9
+
+
+def _snapshot_path(data_dir: str) -> str:
+    return os.path.join(data_dir, ".cache", SNAPSHOT_FILE)
+
+
+def _load_snapshot(data_dir: str) -> dict | None:
+    try:
+        with open(_snapshot_path(data_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_snapshot(data_dir: str, state: dict):
+    path = _snapshot_path(data_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"epoch": state["epoch"], "generation": state["generation"], "tree": state["tree"]}, f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass  # read-only data dir: keep the snapshot in memory only
+
+
+# ------------------------------------------------------------------------------
+# inotify watcher
+# ------------------------------------------------------------------------------
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x040, 0x080, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x4000, 0x8000, 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Recursive inotify watches on data dirs; calls on_change(data_dir) for every relevant event."""
+
+    def __init__(self, on_change):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._on_change = on_change
+        self._wds = {}  # wd -> (data_dir, path)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._loop, name="eda-inotify", daemon=True).start()
+
+    def watch(self, data_dir: str) -> bool:
+        """Adds watches for every non-hidden directory under data_dir. False if the watch limit was hit."""
+        for root, dirs, _ in os.walk(data_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            if not self._add(data_dir, root):
+                self.unwatch(data_dir)
+                return False
+        return True
+
+    def unwatch(self, data_dir: str):
+        with self._lock:
+            wds = [wd for wd, (d, _) in self._wds.items() if d == data_dir]
+            for wd in wds:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._wds[wd]
+
+    def _add(self, data_dir: str, path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            return False
+        with self._lock:
+            self._wds[wd] = (data_dir, path)
+        return True
+
+    def _loop(self):
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except OSError:
+                return
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+                name = buf[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += _EVENT_HEADER.size + length
+                self._handle(wd, mask, os.fsdecode(name))
+
+    def _handle(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped: everything we watch may have changed.
+            with self._lock:
+                roots = {d for d, _ in self._wds.values()}
+            for data_dir in roots:
+                self._on_change(data_dir)
+            return
+        with self._lock:
+            target = self._wds.get(wd)
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+        if target is None or name.startswith("."):
+            return
+        data_dir, path = target
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            self.watch_subtree(data_dir, os.path.join(path, name))
+        self._on_change(data_dir)
+
+    def watch_subtree(self, data_dir: str, path: str):
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            self._add(data_dir, root)
+
+
+# ------------------------------------------------------------------------------
+# Change detector
+# ------------------------------------------------------------------------------
+class ChangeDetector:
+    def __init__(self, use_inotify: bool = USE_INOTIFY):
+        self._states = {}  # abs data dir -> {"epoch", "generation", "tree", "watched", "dirty"}
+        self._lock = threading.RLock()
+        self._use_inotify = use_inotify
+        self._watcher = None
+
+    def _ensure_watcher(self):
+        # Started on first use so importing the tools does not spawn a thread.
+        if self._use_inotify and self._watcher is None:
+            self._use_inotify = False
+            try:
+                self._watcher = InotifyWatcher(self._on_change)
+            except (OSError, AttributeError) as e:
+                print(f"[WARN] inotify unavailable, falling back to snapshots: {e}")
+
+    def _on_change(self, data_dir: str):
+        state = self._states.get(data_dir)
+        if state is not None and not state["dirty"]:
+            state["dirty"] = True
+            try:
+                mark_dirty(data_dir)
+            except Exception as e:
+                print(f"[WARN] Could not mark {data_dir} dirty in the registry: {e}")
+
+    def generation(self, data_dir: str) -> str:
+        """
+        Returns a token that changes whenever the contents of data_dir change.
+        O(1) while an inotify watch on the directory has seen no events.
+        """
+        key = os.path.abspath(data_dir)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and state["watched"] and not state["dirty"]:
+                return f"{state['epoch']}:{state['generation']}"
+
+            if state is None:
+                stored = _load_snapshot(key) or {}
+                state = {
+                    "epoch": stored.get("epoch") or uuid.uuid4().hex,
+                    "generation": stored.get("generation", 0),
+                    "tree": stored.get("tree"),
+                    "watched": False,
+                    "dirty": False,
+                }
+                self._states[key] = state
+
+            # Reset the flag *before* scanning: events that race with the scan re-dirty it.
+            state["dirty"] = False
+            self._ensure_watcher()
+            if self._watcher is not None and not state["watched"]:
+                state["watched"] = self._watcher.watch(key)
+
+            tree = scan_tree(key, state["tree"])
+            if tree != state["tree"]:
+                if state["tree"] is not None and _contents(tree) != _contents(state["tree"]):
+                    state["generation"] += 1
+                state["tree"] = tree
+                _save_snapshot(key, state)
+            return f"{state['epoch']}:{state['generation']}"
+
+    def latest_mtime(self, data_dir: str) -> float:
+        """Newest file mtime under data_dir (hidden/cache dirs excluded), from the current snapshot."""
+        key = os.path.abspath(data_dir)
+        self.generation(key)
+        with self._lock:
+            return latest_mtime(self._states[key]["tree"])
+
+    def forget(self, data_dir: str):
+        key = os.path.abspath(data_dir)
+        with self._lock:
+            self._states.pop(key, None)
+        if self._watcher is not None:
+            self._watcher.unwatch(key)
+
+
+CHANGE_DETECTOR = ChangeDetector()
@@ -0,0 +1,121 @@
+"""
+Long-lived Chroma clients and collection handles, pooled per cache dir.
+
+Creating a client and listing collections on every query dominates
+ChromaRAGTool latency. The pool keeps one PersistentClient per cache dir and
+(optionally) the open collection handles, health-checks a client with
+heartbeat() at most every HEALTH_CHECK_INTERVAL seconds, and reconnects if the
+check fails. All methods are safe to call from several threads.
+"""
+import os
+import time
+import threading
+
+HEALTH_CHECK_INTERVAL = float(os.environ.get("EDA_CHROMA_HEALTH_CHECK_S", "30"))
+
+# Chroma collections are HNSW indexes already; these tune new collections
+# (unset = Chroma defaults). Same variables as the RAGTool ANN backends.
+HNSW_CONFIG = {
+    key: int(os.environ[var])
+    for key, var in (("ef_search", "EDA_ANN_EF"), ("ef_construction", "EDA_ANN_EF_CONSTRUCTION"), ("max_neighbors", "EDA_ANN_M"))
+    if os.environ.get(var)
+}
+
+
+class ChromaClientPool:
+    def __init__(self, keep_collections_open: bool = True):
+        self.keep_collections_open = keep_collections_open
+        self._clients = {}       # abs cache dir -> {"client", "checked_at"}
+        self._collections = {}   # (abs cache dir, name) -> collection
+        self._dir_locks = {}
+        self._lock = threading.Lock()
+        self.reconnects = 0
+
+    def lock_for(self, cache_dir: str) -> threading.RLock:
+        """Per-cache-dir lock; hold it while (re)building a collection."""
+        key = os.path.abspath(cache_dir)
+        with self._lock:
+            return self._dir_locks.setdefault(key, threading.RLock())
+
+    def client(self, cache_dir: str):
+        """Returns the pooled client for 'cache_dir', creating or reconnecting it as needed."""
+        key = os.path.abspath(cache_dir)
+        with self.lock_for(key):
+            slot = self._clients.get(key)
+            now = time.monotonic()
+            if slot is not None and now - slot["checked_at"] > HEALTH_CHECK_INTERVAL:
+                try:
+                    slot["client"].heartbeat()
+                    slot["checked_at"] = now
+                except Exception as e:
+                    print(f"[WARN] Chroma client for {key} failed health check ({e}); reconnecting.")
+                    self._drop(key)
+                    self.reconnects += 1
+                    slot = None
+            if slot is None:
+                import chromadb
+
+                os.makedirs(key, exist_ok=True)
+                slot = {"client": chromadb.PersistentClient(path=key), "checked_at": now}
+                self._clients[key] = slot
+            return slot["client"]
+
+    def get_collection(self, cache_dir: str, name: str):
+        """Returns the collection 'name', or None if it does not exist."""
+        key = os.path.abspath(cache_dir)
+        with self.lock_for(key):
+            collection = self._collections.get((key, name))
+            if collection is not None:
+                return collection
+            try:
+                collection = self.client(key).get_collection(name, embedding_function=None)
+            except Exception:
+                # chromadb raises NotFoundError (ValueError in older releases) for a missing collection.
+                return None
+            if self.keep_collections_open:
+                self._collections[(key, name)] = collection
+            return collection
+
+    def is_open(self, cache_dir: str, name: str) -> bool:
+        """True if a handle for 'name' is already held open by this pool."""
+        return (os.path.abspath(cache_dir), name) in self._collections
+
+    def reset_collection(self, cache_dir: str, name: str):
+        """Drops 'name' if it exists and returns a new, empty collection."""
+        key = os.path.abspath(cache_dir)
+        with self.lock_for(key):
+            client = self.client(key)
+            self._collections.pop((key, name), None)
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass
+            collection = client.create_collection(
+                name, embedding_function=None, configuration={"hnsw": HNSW_CONFIG} if HNSW_CONFIG else None
+            )
+            if self.keep_collections_open:
+                self._collections[(key, name)] = collection
+            return collection
+
+    def release(self, cache_dir: str, name: str):
+        """Forgets an open collection handle (the client stays pooled)."""
+        with self.lock_for(cache_dir):
+            self._collections.pop((os.path.abspath(cache_dir), name), None)
+
+    def close(self, cache_dir: str = None):
+        """Drops the client and handles for one cache dir, or for all of them."""
+        with self._lock:
+            keys = [os.path.abspath(cache_dir)] if cache_dir else list(self._clients)
+        for key in keys:
+            with self.lock_for(key):
+                self._drop(key)
+
+    def _drop(self, key: str):
+        self._clients.pop(key, None)
+        for col_key in [k for k in self._collections if k[0] == key]:
+            del self._collections[col_key]
+
+
+CHROMA_POOL = ChromaClientPool(
+    keep_collections_open=os.environ.get("EDA_CHROMA_KEEP_OPEN", "1") not in ("0", "false", "no")
+)
@@ -0,0 +1,242 @@
+"""
+Shared data registry, backed by SQLite.
+
+One row per absolute data directory (primary key), so lookups and upserts are
+indexed instead of re-parsing a YAML file, and every write is a single
+transaction: concurrent agents update their own rows instead of overwriting
+each other's copy of the whole registry. The database runs in WAL mode so
+readers never block the writer.
+
+An existing data_registry.yaml is migrated on first use and renamed to
+data_registry.yaml.migrated.
+"""
+import os
+import json
+import sqlite3
+import datetime
+import threading
+
+import yaml
+
+REGISTRY_DB = os.environ.get("EDA_REGISTRY_DB", "data_registry.db")
+LEGACY_REGISTRY_FILE = "data_registry.yaml"
+
+_COLUMNS = ("data_directory", "cache_file_directory", "data_format", "timestamp",
+            "status", "last_data_update", "metadata", "dirty")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registry (
+    data_directory       TEXT PRIMARY KEY,
+    cache_file_directory TEXT NOT NULL DEFAULT '',
+    data_format          TEXT NOT NULL DEFAULT '',
+    timestamp            TEXT NOT NULL,
+    status               TEXT NOT NULL DEFAULT '',
+    last_data_update     REAL NOT NULL DEFAULT 0,
+    metadata             TEXT NOT NULL DEFAULT '{}',
+    dirty                INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+_local = threading.local()
+
+
+# ------------------------------------------------------------------------------
+# Connection handling
+# ------------------------------------------------------------------------------
+def connect(db_path: str = None) -> sqlite3.Connection:
+    """Returns this thread's connection to the registry, creating/migrating the database once."""
+    path = os.path.abspath(db_path or REGISTRY_DB)
+    conns = getattr(_local, "conns", None)
+    if conns is None or getattr(_local, "pid", None) != os.getpid():
+        # Connections must not be shared across threads or forked processes.
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(_SCHEMA)
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(registry)")}
+        if "dirty" not in columns:
+            # Databases created before change detection existed.
+            conn.execute("ALTER TABLE registry ADD COLUMN dirty INTEGER NOT NULL DEFAULT 0")
+        _migrate_yaml(conn, os.path.join(os.path.dirname(path), LEGACY_REGISTRY_FILE))
+        conns[path] = conn
+    return conn
+
+
+def _migrate_yaml(conn: sqlite3.Connection, yaml_path: str):
+    if not os.path.exists(yaml_path):
+        return
+    # Read, import and rename the file while holding the write lock: another process may have
+    # migrated it since the check above, and must not import it again over newer updates.
+    conn.execute("BEGIN IMMEDIATE")
+    renamed = False
+    try:
+        try:
+            with open(yaml_path, "r") as f:
+                entries = yaml.safe_load(f) or []
+        except FileNotFoundError:
+            conn.execute("ROLLBACK")
+            return
+        for e in entries:
+            if not e.get("data_directory"):
+                continue
+            # Later duplicates win, as with the old linear scan + replace.
+            conn.execute(
+                "INSERT OR REPLACE INTO registry VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    os.path.abspath(e["data_directory"]),
+                    os.path.abspath(e["cache_file_directory"]) if e.get("cache_file_directory") else "",
+                    e.get("data_format") or "",
+                    e.get("timestamp") or datetime.datetime.now().isoformat(),
+                    e.get("status") or "",
+                    float(e.get("last_data_update") or 0.0),
+                    json.dumps(e.get("metadata") or {}),
+                ),
+            )
+        try:
+            os.replace(yaml_path, yaml_path + ".migrated")
+            renamed = True
+        except FileNotFoundError:
+            pass  # renamed by hand meanwhile; the rows are imported either way
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        if renamed:
+            os.replace(yaml_path + ".migrated", yaml_path)
+        raise
+    print(f"[INFO] Migrated {len(entries)} registry entries from {yaml_path}")
+
+
+def _row_to_entry(row) -> dict:
+    entry = dict(row)
+    entry["metadata"] = json.loads(entry["metadata"] or "{}")
+    entry["dirty"] = bool(entry.get("dirty"))
+    return entry
+
+
+# ------------------------------------------------------------------------------
+# Registry API
+# ------------------------------------------------------------------------------
+def get_entry(data_directory: str, db_path: str = None) -> dict | None:
+    """Returns the entry for 'data_directory' (matched by absolute path), or None."""
+    row = connect(db_path).execute(
+        "SELECT * FROM registry WHERE data_directory = ?", (os.path.abspath(data_directory),)
+    ).fetchone()
+    return _row_to_entry(row) if row else None
+
+
+def list_entries(db_path: str = None) -> list:
+    rows = connect(db_path).execute("SELECT * FROM registry ORDER BY data_directory").fetchall()
+    return [_row_to_entry(r) for r in rows]
+
+
+def update_registry_entry(
+    data_directory: str,
+    cache_file_directory: str,
+    last_data_update: float,
+    status: str = "rag_indexed",
+    data_format: str = "",
+    metadata: dict = None,
+    db_path: str = None,
+) -> dict:
+    """
+    Inserts or updates the entry for 'data_directory' in one transaction and
+    returns it. 'metadata' is merged into the existing metadata, so keys other
+    tools stored on the same entry are preserved. Clears the dirty flag.
+    """
+    abs_data_dir = os.path.abspath(data_directory)
+    conn = connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT metadata FROM registry WHERE data_directory = ?", (abs_data_dir,)).fetchone()
+        merged = json.loads(row["metadata"]) if row else {}
+        merged.update(metadata or {})
+        entry = {
+            "data_directory": abs_data_dir,
+            "cache_file_directory": os.path.abspath(cache_file_directory) if cache_file_directory else abs_data_dir + "/.cache",
+            "data_format": data_format,
+            "timestamp": datetime.datetime.now().isoformat(),  # When this registry entry was updated
+            "status": status,
+            "last_data_update": float(last_data_update),       # float -> last mod time in seconds
+            "metadata": merged,
+            "dirty": False,                                    # the index is in sync with the data again
+        }
+        conn.execute(
+            "INSERT OR REPLACE INTO registry VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            tuple(json.dumps(entry[c]) if c == "metadata" else entry[c] for c in _COLUMNS),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return entry
+
+
+def update_entry_metadata(data_directory: str, key: str, value, db_path: str = None) -> dict:
+    """
+    Sets metadata[key] on the entry for 'data_directory' (creating a bare entry
+    if needed) without touching the other columns, so e.g. the RAGTool
+    fingerprint (last_data_update, timestamp) is not invalidated.
+    """
+    abs_data_dir = os.path.abspath(data_directory)
+    conn = connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT * FROM registry WHERE data_directory = ?", (abs_data_dir,)).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO registry (data_directory, timestamp, metadata) VALUES (?, ?, ?)",
+                (abs_data_dir, datetime.datetime.now().isoformat(), json.dumps({key: value})),
+            )
+        else:
+            metadata = json.loads(row["metadata"])
+            metadata[key] = value
+            conn.execute(
+                "UPDATE registry SET metadata = ? WHERE data_directory = ?", (json.dumps(metadata), abs_data_dir)
+            )
+        row = conn.execute("SELECT * FROM registry WHERE data_directory = ?", (abs_data_dir,)).fetchone()
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return _row_to_entry(row)
+
+
+def mark_dirty(data_directory: str, db_path: str = None) -> bool:
+    """Flags the entry as out of date (e.g. from a file watcher); cleared by the next update_registry_entry."""
+    cur = connect(db_path).execute(
+        "UPDATE registry SET dirty = 1 WHERE data_directory = ? AND dirty = 0", (os.path.abspath(data_directory),)
+    )
+    return cur.rowcount > 0
+
+
+def delete_entry(data_directory: str, db_path: str = None) -> bool:
+    cur = connect(db_path).execute(
+        "DELETE FROM registry WHERE data_directory = ?", (os.path.abspath(data_directory),)
+    )
+    return cur.rowcount > 0
+
+
+def clear_entries(db_path: str = None) -> list:
+    """Removes every entry and returns the removed entries."""
+    conn = connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        entries = [_row_to_entry(r) for r in conn.execute("SELECT * FROM registry").fetchall()]
+        conn.execute("DELETE FROM registry")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return entries
+
+
+def registry_fingerprint(entry: dict | None) -> tuple | None:
+    """Identifies the indexed state of a data directory; changes whenever its entry is updated."""
+    if not entry:
+        return None
+    return (entry.get("last_data_update"), entry.get("timestamp"))
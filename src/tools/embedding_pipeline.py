@@ -0,0 +1,238 @@
+"""
+Streaming ingestion pipeline for ChromaRAGTool.
+
+Files are read in fixed-size blocks, split into token-bounded overlapping chunks
+as the blocks arrive and embedded in fixed-size batches by a pool of worker processes. Every batch is
+written to the Chroma collection as soon as it is embedded and the number of
+batches in flight is bounded, so peak memory grows with neither corpus nor file size.
+
+Tokens are approximated by whitespace-separated words; the default of 200
+words stays under the 256 word-piece limit of all-MiniLM-L6-v2 for English text.
+"""
+import os
+import sys
+import time
+import itertools
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_CHUNK_TOKENS = 200
+DEFAULT_CHUNK_OVERLAP = 30
+DEFAULT_BATCH_SIZE = 64
+READ_BLOCK_CHARS = 1 << 16
+
+
+# ------------------------------------------------------------------------------
+# Reading and chunking
+# ------------------------------------------------------------------------------
+def iter_text_files(data_dir: str):
+    """Yields the path of every non-PDF file, skipping hidden files and dirs such as '.cache'."""
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or name.lower().endswith(".pdf"):
+                continue
+            yield os.path.join(root, name)
+
+
+def read_blocks(path: str, block_chars: int = READ_BLOCK_CHARS):
+    """Yields the UTF-8 text of 'path' in blocks of at most 'block_chars' characters."""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            block = f.read(block_chars)
+            if not block:
+                return
+            yield block
+
+
+def chunk_blocks(blocks, max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap: int = DEFAULT_CHUNK_OVERLAP):
+    """
+    Yields (word_offset, chunk_text) windows of at most 'max_tokens' words over
+    a stream of text blocks, each window starting 'max_tokens - overlap' words
+    after the previous one. Only the current window is held: a word cut by a
+    block boundary is carried into the next block, and a window is emitted as
+    soon as a word past its end arrives (the last one when the stream ends).
+    """
+    step = max(1, max_tokens - overlap)
+    window, offset, partial = [], 0, ""
+    for block in itertools.chain(blocks, [" "]):  # the trailing space flushes the last partial word
+        words = (partial + block).split()
+        partial = words.pop() if words and not block[-1:].isspace() else ""
+        window.extend(words)
+        while len(window) > max_tokens:
+            yield offset, " ".join(window[:max_tokens])
+            del window[:step]
+            offset += step
+    if window:
+        yield offset, " ".join(window)
+
+
+def chunk_text(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap: int = DEFAULT_CHUNK_OVERLAP):
+    """Yields (word_offset, chunk_text) windows of at most 'max_tokens' words."""
+    return chunk_blocks([text], max_tokens, overlap)
+
+
+def iter_pdf_files(data_dir: str):
+    """Yields (path, pages) for every PDF, pages coming from the shared page cache (see pdf_pages.py)."""
+    from .pdf_pages import extract_pages
+
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or not name.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                yield path, extract_pages(path)
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
+
+
+def iter_chunks(data_dir: str, max_tokens: int = DEFAULT_CHUNK_TOKENS, overlap: int = DEFAULT_CHUNK_OVERLAP):
+    """Yields chunk records {id, text, metadata} for the whole directory, one block of one file in memory at a time."""
+    for path in iter_text_files(data_dir):
+        try:
+            # A file that stops decoding part-way keeps the chunks read before the error.
+            for i, (offset, chunk) in enumerate(chunk_blocks(read_blocks(path), max_tokens, overlap)):
+                yield {
+                    "id": f"{path}#{i}",
+                    "text": chunk,
+                    "metadata": {"file_path": path, "chunk": i, "word_offset": offset},
+                }
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+    # PDFs are chunked page by page so every chunk carries its page number.
+    for path, pages in iter_pdf_files(data_dir):
+        i = 0
+        for page in pages:
+            for offset, chunk in chunk_text(page["text"], max_tokens, overlap):
+                yield {
+                    "id": f"{path}#{i}",
+                    "text": chunk,
+                    "metadata": {"file_path": path, "chunk": i, "page": page["page"] + 1, "word_offset": offset},
+                }
+                i += 1
+
+
+def iter_batches(items, batch_size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ------------------------------------------------------------------------------
+# Embedding workers
+# ------------------------------------------------------------------------------
+_worker_encoder = None
+
+
+def load_sentence_transformer(model_name: str = DEFAULT_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _init_worker(encoder_factory, model_name: str, torch_threads: int):
+    global _worker_encoder
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)  # avoid oversubscribing cores across workers
+    except ImportError:
+        pass
+    _worker_encoder = encoder_factory(model_name)
+
+
+def _embed_batch(texts: list) -> list:
+    return _worker_encoder.encode(texts).tolist()
+
+
+def peak_rss_mb() -> dict:
+    """Peak resident set size of this process and of its (finished) children, in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------------------------
+def run_pipeline(
+    data_dir: str,
+    collection,
+    model_name: str = DEFAULT_MODEL,
+    workers: int = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+    encoder_factory=load_sentence_transformer,
+    encoder=None,
+    keyword_index=None,
+) -> dict:
+    """
+    Streams 'data_dir' into 'collection' (anything with a Chroma-style add()),
+    and into 'keyword_index' (a keyword_index.KeywordIndex) when given.
+
+    workers=0 embeds in this process with 'encoder' (or one built by
+    'encoder_factory'); otherwise a pool of 'workers' processes (default: CPU
+    count) each loads its own encoder. At most 2 * workers batches are in
+    flight at any time.
+
+    Returns ingestion stats: files, chunks, batches, seconds, chunks_per_sec, peak_rss_mb.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    stats = {"files": 0, "chunks": 0, "batches": 0}
+
+    def _write(batch, embeddings):
+        collection.add(
+            ids=[c["id"] for c in batch],
+            documents=[c["text"] for c in batch],
+            metadatas=[c["metadata"] for c in batch],
+            embeddings=embeddings,
+        )
+        if keyword_index is not None:
+            keyword_index.add([c["id"] for c in batch], [c["text"] for c in batch], [c["metadata"] for c in batch])
+        stats["chunks"] += len(batch)
+        stats["batches"] += 1
+
+    def _batches():
+        for batch in iter_batches(iter_chunks(data_dir, max_tokens, overlap), batch_size):
+            stats["files"] += sum(1 for c in batch if c["metadata"]["chunk"] == 0)
+            yield batch
+
+    t0 = time.perf_counter()
+    if workers == 0:
+        encoder = encoder or encoder_factory(model_name)
+        for batch in _batches():
+            _write(batch, encoder.encode([c["text"] for c in batch]).tolist())
+    else:
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = multiprocessing.get_context("spawn")  # torch is not fork-safe
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(encoder_factory, model_name, torch_threads),
+        ) as pool:
+            pending = {}
+            for batch in _batches():
+                pending[pool.submit(_embed_batch, [c["text"] for c in batch])] = batch
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        _write(pending.pop(fut), fut.result())
+            for fut in list(pending):
+                _write(pending.pop(fut), fut.result())
+
+    stats["seconds"] = time.perf_counter() - t0
+    stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return stats
@@ -0,0 +1,362 @@
+"""
+Financial statement tables extracted from 10-K PDFs into SQLite.
+
+Questions like "compare revenue and net income in 2023 and 2024" or "did R&D
+spending increase" used to go through retrieval over the whole filing and
+leave the model to read numbers out of flattened page text. This module
+detects the consolidated statements (balance sheet, operations,
+comprehensive income, cash flows) in each PDF, parses their line items and
+fiscal-year columns, and stores one row per value in a table keyed by
+(document, statement, line item, period):
+
+    facts(document, statement, line_item, period, fiscal_year, value, ...)
+
+Metric and year-over-year lookups are then indexed queries. Pages come from
+tools.pdf_pages, so an already parsed filing is indexed without re-parsing,
+and a document is only re-indexed when its sha256 changes.
+
+The database lives in <data_dir>/.cache/financial.db, next to the
+change-detection snapshot.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+
+from .pdf_pages import extract_pages
+from .rag_index import file_sha256
+from .change_detection import CHANGE_DETECTOR
+
+# Statement titles, matched against the first lines of a page.
+STATEMENTS = {
+    "balance_sheet": re.compile(r"^consolidated balance sheets?$"),
+    "operations": re.compile(r"^consolidated statements? of operations$"),
+    "comprehensive_income": re.compile(r"^consolidated statements? of comprehensive income"),
+    "cash_flows": re.compile(r"^consolidated statements? of cash flows$"),
+}
+
+# Canonical metric -> (statement, SQL LIKE patterns on the normalised line item, in order of preference).
+METRICS = {
+    "revenue": ("operations", ["total revenues"]),
+    "cost_of_revenue": ("operations", ["total cost of revenues"]),
+    "gross_profit": ("operations", ["gross profit"]),
+    "research_and_development": ("operations", ["%research and development"]),
+    "sga": ("operations", ["%selling, general and administrative"]),
+    "operating_expenses": ("operations", ["total operating expenses"]),
+    "operating_income": ("operations", ["income from operations", "income (loss) from operations"]),
+    "net_income": ("operations", ["net income attributable to common stockholders", "net income"]),
+    "capex": ("cash_flows", ["%purchases of property and equipment%"]),
+    "operating_cash_flow": ("cash_flows", ["net cash provided by operating activities"]),
+    "cash": ("balance_sheet", ["%cash and cash equivalents"]),
+    "total_assets": ("balance_sheet", ["total assets"]),
+    "total_liabilities": ("balance_sheet", ["total liabilities"]),
+}
+METRIC_ALIASES = {
+    "revenues": "revenue", "total_revenue": "revenue", "sales": "revenue",
+    "r&d": "research_and_development", "rd": "research_and_development",
+    "net_profit": "net_income", "earnings": "net_income",
+    "capital_expenditure": "capex", "capital_expenditures": "capex",
+    "operating_profit": "operating_income",
+}
+# Metrics reported as cash outflows (negative) but quoted as positive spending.
+OUTFLOWS = {"capex"}
+# Margin metric -> (numerator metric, denominator metric)
+RATIOS = {
+    "gross_margin": ("gross_profit", "revenue"),
+    "operating_margin": ("operating_income", "revenue"),
+    "net_margin": ("net_income", "revenue"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document   TEXT PRIMARY KEY,
+    sha256     TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    document    TEXT NOT NULL,
+    statement   TEXT NOT NULL,
+    line_item   TEXT NOT NULL,
+    period      TEXT NOT NULL,
+    fiscal_year INTEGER NOT NULL,
+    value       REAL,
+    section     TEXT NOT NULL DEFAULT '',
+    item_key    TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    PRIMARY KEY (document, statement, line_item, period)
+);
+CREATE INDEX IF NOT EXISTS idx_facts_item ON facts(statement, item_key, fiscal_year);
+"""
+
+_YEAR = re.compile(r"^(?:(?:year ended )?(?:january|february|march|april|may|june|july|august|september|"
+                   r"october|november|december) \d{1,2}, )?((?:19|20)\d\d)$", re.I)
+_NUMBER = re.compile(r"^\(?\s*-?[\d,]*\.?\d+\s*\)?$")
+_DASHES = {"—", "–", "-"}
+
+
+def _clean(line: str) -> str:
+    return re.sub(r"\s+", " ", line.replace("’", "'")).strip()
+
+
+def _item_key(label: str) -> str:
+    return _clean(label).lower().rstrip(":")
+
+
+def _tokens(text: str) -> list:
+    """Page text as a list of non-empty lines, with '(', number, ')' folded into one negative token."""
+    lines = [_clean(line) for line in text.split("\n")]
+    lines = [line for line in lines if line and line != "$"]
+    out = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line == "(" and i + 2 < len(lines) and _NUMBER.match(lines[i + 1]) and lines[i + 2] == ")":
+            out.append("(" + lines[i + 1] + ")")
+            i += 3
+            continue
+        out.append(line)
+        i += 1
+    return out
+
+
+def _value(token: str):
+    """Numeric value of a table cell token, None if it is not a cell."""
+    if token in _DASHES:
+        return 0.0
+    if not _NUMBER.match(token):
+        return None
+    negative = token.startswith("(") or token.startswith("-")
+    number = float(token.strip("()- ").replace(",", ""))
+    return -number if negative else number
+
+
+# ------------------------------------------------------------------------------
+# Table parsing
+# ------------------------------------------------------------------------------
+def detect_statement(text: str) -> str | None:
+    """Statement name if the page starts with a known consolidated statement title."""
+    for line in [_clean(line).lower() for line in text.split("\n")[:4]]:
+        for name, pattern in STATEMENTS.items():
+            if pattern.match(line):
+                return name
+    return None
+
+
+def parse_statement(text: str) -> tuple:
+    """
+    Parses a statement page into (fiscal years, rows). Each row is
+    (section, label, [value per year]). The fiscal years are the column
+    headers found before the first line item.
+    """
+    tokens = _tokens(text)
+    years = []
+    i = 0
+    while i < len(tokens) and (not years or _YEAR.match(tokens[i]) or tokens[i].lower().startswith(("year ended", "december"))):
+        m = _YEAR.match(tokens[i])
+        if m:
+            years.append(int(m.group(1)))
+        i += 1
+    n = len(years)
+    if n == 0:
+        return [], []
+
+    rows = []
+    section = ""
+    label, values, inline = "", [], False
+    for token in tokens[i:]:
+        value = _value(token)
+        if value is not None and label:
+            values.append(value)
+            if len(values) == n:
+                item = label.rstrip(":")
+                rows.append((section, item, values))
+                if section and item.lower() == f"total {section.lower()}":
+                    section = ""
+                label, values, inline = "", [], False
+            continue
+        if value is not None:
+            continue  # stray number (page number, footnote)
+        if label and (values or inline):
+            # Numbers inside a label ("par value; 6,000 shares authorized"): the label goes on.
+            label += " " + token
+            values, inline = [], True
+        elif label and token[:1].islower():
+            label += " " + token  # wrapped label
+        else:
+            if label and "(note" not in label.lower():
+                section = label.rstrip(":")  # a label without values heads the rows below it
+            label = token
+    return years, rows
+
+
+def parse_document(path: str) -> list:
+    """Every statement fact in a PDF as (statement, line_item, section, label, fiscal_year, value, page)."""
+    facts = []
+    for page in extract_pages(path):
+        statement = detect_statement(page["text"])
+        if statement is None:
+            continue
+        years, rows = parse_statement(page["text"])
+        seen = {}
+        for section, label, values in rows:
+            line_item = f"{section} / {label}" if section else label
+            seen[line_item] = seen.get(line_item, 0) + 1
+            if seen[line_item] > 1:
+                line_item += f" ({seen[line_item]})"
+            for year, value in zip(years, values):
+                facts.append((statement, line_item, section, label, year, value, page["page"]))
+    return facts
+
+
+# ------------------------------------------------------------------------------
+# Index
+# ------------------------------------------------------------------------------
+class FinancialIndex:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def index_document(self, path: str, force: bool = False) -> int:
+        """(Re-)indexes one PDF unless its sha256 is unchanged. Returns the number of facts written."""
+        document = os.path.basename(path)
+        digest = file_sha256(path)
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM documents WHERE document = ?", (document,)).fetchone()
+        if row and row[0] == digest and not force:
+            return 0
+        facts = parse_document(path)
+        rows = [
+            (document, statement, line_item, f"FY{year}", year, value, section, _item_key(label), page)
+            for statement, line_item, section, label, year, value, page in facts
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM facts WHERE document = ?", (document,))
+                self._conn.executemany("INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (document, digest, time.time()))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"[INFO] Indexed {len(rows)} financial facts from {document}.")
+        return len(rows)
+
+    def index_directory(self, data_dir: str) -> int:
+        """Indexes every PDF directly under data_dir and drops documents that are gone."""
+        pdfs = sorted(
+            os.path.join(data_dir, name) for name in os.listdir(data_dir)
+            if name.lower().endswith(".pdf") and not name.startswith(".")
+        )
+        written = sum(self.index_document(path) for path in pdfs)
+        present = {os.path.basename(path) for path in pdfs}
+        with self._lock:
+            for (document,) in self._conn.execute("SELECT document FROM documents").fetchall():
+                if document not in present:
+                    self._conn.execute("DELETE FROM facts WHERE document = ?", (document,))
+                    self._conn.execute("DELETE FROM documents WHERE document = ?", (document,))
+        return written
+
+    # ----- lookups -----
+    def line_item(self, statement: str, patterns: list, fiscal_year: int = None, document: str = None) -> dict:
+        """
+        {fiscal_year: (value, document, line_item)} for the first pattern that
+        matches. When several filings report the same year, the latest filing
+        (which carries any restatement) wins.
+        """
+        for pattern in patterns:
+            sql = ("SELECT fiscal_year, value, document, line_item FROM facts "
+                   "WHERE statement = ? AND item_key LIKE ?")
+            params = [statement, pattern]
+            if fiscal_year is not None:
+                sql += " AND fiscal_year = ?"
+                params.append(int(fiscal_year))
+            if document:
+                sql += " AND document = ?"
+                params.append(document)
+            sql += " ORDER BY document, section = '' DESC"
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            out = {}
+            for year, value, doc, item in rows:
+                if year not in out or doc > out[year][1]:
+                    out[year] = (value, doc, item)
+            if out:
+                return out
+        return {}
+
+    def metric(self, name: str, fiscal_year: int = None, document: str = None) -> dict:
+        """{fiscal_year: value} for a canonical metric (see METRICS and RATIOS)."""
+        name = normalize_metric(name)
+        if name in RATIOS:
+            num, den = (self.metric(m, fiscal_year, document) for m in RATIOS[name])
+            return {y: num[y] / den[y] for y in sorted(num) if den.get(y)}
+        statement, patterns = METRICS[name]
+        found = self.line_item(statement, patterns, fiscal_year, document)
+        sign = -1.0 if name in OUTFLOWS else 1.0
+        return {year: sign * found[year][0] for year in sorted(found)}
+
+    def yoy(self, name: str, fiscal_year: int = None) -> list:
+        """[(fiscal_year, value, previous value, change, relative change)] for a metric."""
+        series = self.metric(name)
+        out = []
+        for year in sorted(series):
+            if year - 1 not in series or (fiscal_year is not None and year != int(fiscal_year)):
+                continue
+            prev, cur = series[year - 1], series[year]
+            out.append((year, cur, prev, cur - prev, (cur - prev) / abs(prev) if prev else None))
+        return out
+
+    def search(self, text: str, statement: str = None, limit: int = 50) -> list:
+        """Facts whose line item contains 'text', as dict rows."""
+        sql = "SELECT document, statement, line_item, period, value, page FROM facts WHERE item_key LIKE ?"
+        params = [f"%{_item_key(text)}%"]
+        if statement:
+            sql += " AND statement = ?"
+            params.append(statement)
+        sql += " ORDER BY statement, line_item, fiscal_year LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("document", "statement", "line_item", "period", "value", "page")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+
+def normalize_metric(name: str) -> str:
+    key = re.sub(r"[\s\-]+", "_", name.strip().lower())
+    key = METRIC_ALIASES.get(key, key)
+    if key not in METRICS and key not in RATIOS:
+        raise ValueError(f"Unknown metric '{name}'. Available: {', '.join(sorted(list(METRICS) + list(RATIOS)))}")
+    return key
+
+
+_indexes = {}
+_generations = {}
+_indexes_lock = threading.Lock()
+
+
+def open_financial_index(data_dir: str, refresh: bool = True) -> FinancialIndex:
+    """
+    Process-wide FinancialIndex for data_dir. With 'refresh', its PDFs are
+    re-checked whenever the change-detection generation of data_dir moves.
+    """
+    db_path = os.path.join(os.path.abspath(data_dir), ".cache", "financial.db")
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = FinancialIndex(db_path)
+    if refresh:
+        generation = CHANGE_DETECTOR.generation(data_dir)
+        if _generations.get(db_path) != generation:
+            index.index_directory(data_dir)
+            _generations[db_path] = generation
+    return index
@@ -0,0 +1,117 @@
+"""
+Process-wide LRU cache of loaded vector indexes and their query engines.
+
+Entries are keyed by persist dir and a data fingerprint (RAGTool uses the
+registry's last_data_update/timestamp pair). A lookup with a different
+fingerprint is a miss and drops the stale entry, so a registry update made by
+any process invalidates the cached index automatically.
+
+The memory budget is approximated by the on-disk size of the persisted index
+(the JSON docstore/vector store is roughly what ends up in memory) and can be
+set with EDA_INDEX_CACHE_MB.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET_MB = float(os.environ.get("EDA_INDEX_CACHE_MB", "512"))
+
+
+def dir_size(path: str) -> int:
+    """Total size in bytes of the files directly under 'path'."""
+    total = 0
+    if os.path.isdir(path):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file():
+                    total += entry.stat().st_size
+    return total
+
+
+class IndexCache:
+    """Thread-safe LRU of {persist_dir: (fingerprint, index, query engines per top_k)}."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, persist_dir: str, fingerprint):
+        """Returns the cached index for (persist_dir, fingerprint), or None on a miss."""
+        key = os.path.abspath(persist_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["index"]
+            if entry is not None:
+                # The data changed since this index was cached.
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, persist_dir: str, fingerprint, index, size_bytes: int = None):
+        """Caches 'index' and evicts least-recently-used entries beyond the budget."""
+        key = os.path.abspath(persist_dir)
+        if size_bytes is None:
+            size_bytes = dir_size(key)
+        with self._lock:
+            self._entries[key] = {
+                "fingerprint": fingerprint,
+                "index": index,
+                "query_engines": {},
+                "size": size_bytes,
+            }
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def query_engine(self, persist_dir: str, similarity_top_k: int, index):
+        """Returns the query engine for 'index' and top_k, built once while 'index' is the cached entry.
+
+        'index' is the object the caller got from get()/put(): if another thread evicted or replaced the
+        entry in between, the engine is built from it without being cached."""
+        key = os.path.abspath(persist_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+            engines = entry["query_engines"] if entry is not None and entry["index"] is index else {}
+            engine = engines.get(similarity_top_k)
+            if engine is None:
+                engine = index.as_query_engine(similarity_top_k=similarity_top_k)
+                engines[similarity_top_k] = engine
+            return engine
+
+    def invalidate(self, persist_dir: str = None):
+        """Drops one entry, or the whole cache when no persist_dir is given."""
+        with self._lock:
+            if persist_dir is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(persist_dir), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._entries.values())
+        # Always keep the most recently used entry, even if it alone exceeds the budget.
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry["size"]
+            self.evictions += 1
+
+
+INDEX_CACHE = IndexCache(max_bytes=int(DEFAULT_BUDGET_MB * 1024 * 1024))
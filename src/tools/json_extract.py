@@ -0,0 +1,186 @@
+"""
+Single-pass JSON extraction from LLM output.
+
+Models wrap their JSON in prose, markdown fences or several separate blocks,
+and the old extractor found the first '{' and then tried json.loads on every
+shrinking prefix of the text: O(n^2), seconds on a few hundred KB of answer
+with trailing prose. JSONStream scans the text once instead:
+
+  - outside a block it jumps (regex) to the next '{' or '[';
+  - at a block start it first tries the C decoder (raw_decode), which takes
+    a complete, valid block in one step;
+  - otherwise it walks the block's structural characters only, tracking
+    nesting, strings and backslash escapes, so braces inside strings don't
+    count. A balanced span is handed to json.loads; a mismatched closer or
+    a span that does not parse is skipped and the scan goes on after it.
+
+State carries over between feed() calls, so text can be fed while tokens are
+still streaming in: every call returns the values completed by that chunk and
+only the unfinished block is buffered.
+
+    from tools.json_extract import extract_json, extract_all, JSONStream
+    extract_json('Sure! {"a": 1} Hope that helps.')      # {'a': 1}
+    extract_all('{"a": 1} and then [2, 3]')              # [{'a': 1}, [2, 3]]
+    stream = JSONStream()
+    for token in tokens:
+        for value in stream.feed(token):
+            ...
+"""
+import re
+import json
+
+_OPEN = re.compile(r"[\[{]")
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING = re.compile(r'["\\]')
+_FENCE = re.compile(r"```[ \t]*([\w+.-]*)[^\n]*\n(.*?)```", re.DOTALL)
+_CLOSER = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder()
+
+MAX_RESCANS = 8
+# raw_decode's error counts the lines before the failure from the start of the string, so
+# candidates are first decoded from a window of this many characters (see _decode)
+DECODE_WINDOW = 4096
+
+
+def _decode(text: str, start: int):
+    """raw_decode at 'start' in time proportional to the value, not to 'start'."""
+    window = text[start:start + DECODE_WINDOW]
+    try:
+        value, end = _decoder.raw_decode(window)
+        return value, start + end
+    except json.JSONDecodeError as e:
+        # Failing well inside the window: not JSON. Near its end: maybe just cut off, try it all.
+        if len(window) < DECODE_WINDOW or e.pos < DECODE_WINDOW - 256:
+            raise
+    value, end = _decoder.raw_decode(text[start:])
+    return value, start + end
+
+
+class JSONStream:
+    """Incremental extractor: feed() text chunks, get back the JSON values they complete."""
+
+    def __init__(self):
+        self._stack = []          # closers expected by the open block
+        self._parts = []          # text of the open block from earlier chunks
+        self._in_string = False
+        self._escape = False      # a backslash ended the previous chunk
+        self._fed = 0             # characters fed before the current chunk
+        self.block_start = None   # offset of the open block in the whole stream, None if none is open
+        self.skipped = 0          # balanced spans that were not valid JSON, and mismatched blocks
+
+    def feed(self, chunk: str) -> list:
+        found = []
+        i, n = 0, len(chunk)
+        start = 0                 # where the open block starts in this chunk
+        while i < n:
+            if not self._stack:
+                m = _OPEN.search(chunk, i)
+                if m is None:
+                    break
+                start = m.start()
+                try:
+                    value, end = _decode(chunk, start)
+                except ValueError:  # incomplete (more to come) or not JSON: scan it
+                    self._stack.append(_CLOSER[m.group()])
+                    self.block_start = self._fed + start
+                    i = m.end()
+                    continue
+                found.append(value)
+                i = end
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _STRING.search(chunk, i)
+                if m is None:
+                    break
+                if m.group() == "\\":
+                    if m.end() == n:
+                        self._escape = True
+                    i = m.end() + 1
+                else:
+                    self._in_string = False
+                    i = m.end()
+                continue
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            c, i = m.group(), m.end()
+            if c == '"':
+                self._in_string = True
+            elif c in _CLOSER:
+                self._stack.append(_CLOSER[c])
+            elif c != self._stack[-1]:
+                self._reset()     # "{ ... ]": not a block after all, look again after it
+                self.skipped += 1
+            else:
+                self._stack.pop()
+                if not self._stack:
+                    self.block_start = None
+                    text = "".join(self._parts) + chunk[start:i]
+                    self._parts = []
+                    try:
+                        found.append(json.loads(text))
+                    except ValueError:
+                        self.skipped += 1
+        if self._stack:
+            self._parts.append(chunk[start:])
+        self._fed += n
+        return found
+
+    def close(self) -> list:
+        """Ends the stream; an unterminated block is dropped. Returns [] (for symmetry with feed)."""
+        if self._stack:
+            self.skipped += 1
+        self._reset()
+        return []
+
+    def _reset(self):
+        self._stack, self._parts = [], []
+        self._in_string = self._escape = False
+        self.block_start = None
+
+
+def fenced_blocks(text: str) -> list:
+    """(language, body) of every ``` fenced code block, in order."""
+    if "```" not in text:
+        return []
+    return [(m.group(1).lower(), m.group(2)) for m in _FENCE.finditer(text)]
+
+
+def _scan(text: str, first: bool = False) -> list:
+    # A block left open at the end may be a stray '{' in prose ("... :-{ ... {"a": 1}"): scan again
+    # from just after it, a bounded number of times so "{{{{..." stays linear.
+    values, pos = [], 0
+    for _ in range(MAX_RESCANS + 1):
+        stream = JSONStream()
+        values += stream.feed(text[pos:] if pos else text)
+        if stream.block_start is None or (first and values):
+            break
+        pos += stream.block_start + 1
+    return values
+
+
+def extract_all(text: str) -> list:
+    """Every JSON object/array in 'text', in order (blocks nested in a found block are not repeated)."""
+    return _scan(text)
+
+
+def extract_json(text: str):
+    """The JSON answer in a model reply: the whole text if it parses, else the first json/untagged
+    fenced block that parses, else the first JSON object/array; {"_raw": text} if there is none."""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    for lang, body in fenced_blocks(text):
+        if lang in ("", "json", "jsonc", "json5"):
+            try:
+                return json.loads(body)
+            except ValueError:
+                pass
+    values = _scan(text, first=True)
+    return values[0] if values else {"_raw": text}
@@ -0,0 +1,172 @@
+"""
+Keyword (BM25) index stored next to a vector index.
+
+A SQLite FTS5 table holds the same chunks as the vector store, with their
+file/page/offset metadata. Exact-term questions ("Robotaxi", "SPI3 clock
+divider") are answered from it without embedding the question. Hybrid
+retrieval merges both rankings with reciprocal-rank fusion.
+
+Retrieval modes accepted by the RAG tools:
+    vector  - dense search only (the previous behaviour)
+    keyword - FTS5/BM25 only; the question is never embedded
+    hybrid  - both, fused with reciprocal-rank fusion
+"""
+import os
+import re
+import json
+import sqlite3
+import threading
+
+KEYWORD_DB = "keyword.db"
+RETRIEVAL_MODES = ("vector", "keyword", "hybrid")
+DEFAULT_RETRIEVAL_MODE = os.environ.get("EDA_RETRIEVAL_MODE", "vector")
+RRF_K = 60
+
+# Dropped from the MATCH expression so phrasing like "List all references to ..." does not dilute BM25.
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the this to was what when where which who why "
+    "with all any list find show me tell give does do did there their its".split()
+)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Chunks live in a plain table (indexed by chunk id and file); the FTS5 table
+# indexes its text as external content and is kept in sync by triggers.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_data (
+    id        INTEGER PRIMARY KEY,
+    chunk_id  TEXT NOT NULL UNIQUE,
+    file_path TEXT NOT NULL DEFAULT '',
+    page      TEXT NOT NULL DEFAULT '',
+    offset    TEXT NOT NULL DEFAULT '',
+    metadata  TEXT NOT NULL DEFAULT '{}',
+    text      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunk_data_file ON chunk_data(file_path);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    text, content = 'chunk_data', content_rowid = 'id', tokenize = 'porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS chunk_data_ai AFTER INSERT ON chunk_data BEGIN
+    INSERT INTO chunks (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunk_data_ad AFTER DELETE ON chunk_data BEGIN
+    INSERT INTO chunks (chunks, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def normalize_mode(mode: str | None) -> str:
+    mode = (mode or DEFAULT_RETRIEVAL_MODE).strip().lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval_mode '{mode}', expected one of {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+
+def match_expression(question: str) -> str:
+    """Turns a free-text question into an FTS5 OR-query of quoted terms (stopwords dropped)."""
+    tokens = [t for t in _TOKEN_RE.findall(question.lower())]
+    terms = [t for t in tokens if t not in _STOPWORDS] or tokens
+    # Quoting keeps FTS5 operators/column filters in the question from being interpreted.
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """Fuses ranked id lists into [(id, score)], best first (score = sum of 1 / (k + rank))."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class KeywordIndex:
+    """FTS5 chunk table at 'path'; safe to share between threads."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # REPLACE of an existing chunk id must fire the delete trigger too.
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        tables = {r[0] for r in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "chunks" in tables and "chunk_data" not in tables:
+            # Self-contained FTS table from an earlier version; it is refilled from the vector index.
+            self._conn.execute("DROP TABLE chunks")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, ids: list, texts: list, metadatas: list):
+        rows = []
+        for chunk_id, text, meta in zip(ids, texts, metadatas):
+            meta = meta or {}
+            page = meta.get("page_label", meta.get("page", ""))
+            offset = meta.get("start_char_idx", meta.get("word_offset", ""))
+            rows.append((chunk_id, meta.get("file_path", ""), str(page), str(offset), json.dumps(meta, default=str), text))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_data (chunk_id, file_path, page, offset, metadata, text) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_files(self, file_paths: list):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunk_data WHERE file_path = ?", [(p,) for p in file_paths])
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_data")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM chunk_data").fetchone()[0]
+
+    def get(self, ids: list) -> dict:
+        """Returns {id: {id, text, metadata}} for the stored chunks among 'ids'."""
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT chunk_id, text, metadata FROM chunk_data WHERE chunk_id IN ({', '.join('?' * len(ids))})", list(ids)
+            ).fetchall()
+        return {r[0]: {"id": r[0], "text": r[1], "metadata": json.loads(r[2])} for r in rows}
+
+    def search(self, question: str, k: int) -> list:
+        """Returns up to k hits {id, text, metadata, score}, best first (score = -bm25, higher is better)."""
+        expr = match_expression(question)
+        if not expr:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.chunk_id, d.text, d.metadata, bm25(chunks) AS r FROM chunks "
+                "JOIN chunk_data d ON d.id = chunks.rowid WHERE chunks MATCH ? ORDER BY r LIMIT ?",
+                (expr, k),
+            ).fetchall()
+        return [{"id": r[0], "text": r[1], "metadata": json.loads(r[2]), "score": -r[3]} for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_keyword_index(index_dir: str) -> KeywordIndex:
+    """Returns the process-wide KeywordIndex stored in 'index_dir'."""
+    path = os.path.join(os.path.abspath(index_dir), KEYWORD_DB)
+    with _indexes_lock:
+        kw = _indexes.get(path)
+        if kw is None:
+            kw = _indexes[path] = KeywordIndex(path)
+        return kw
+
+
+def close_keyword_index(index_dir: str):
+    """Closes and forgets the process-wide KeywordIndex of 'index_dir' (e.g. before deleting the dir)."""
+    path = os.path.join(os.path.abspath(index_dir), KEYWORD_DB)
+    with _indexes_lock:
+        kw = _indexes.pop(path, None)
+    if kw is not None:
+        kw.close()
@@ -0,0 +1,417 @@
+"""
+Shared async HTTP client for LLM APIs.
+
+Every LLM call used to open its own connection (requests.post in the harness
+provider, litellm.completion in the workflow runner), with a fixed timeout,
+no retry and no notion of the provider's rate limit. AsyncLLMClient puts all
+of them behind one set of limits:
+
+  pooling    - keep-alive connections, at most EDA_LLM_MAX_CONNECTIONS open
+               (httpx requests; litellm keeps its own client pool).
+  rate limit - a token bucket (EDA_LLM_RATE requests/s, bursts of
+               EDA_LLM_BURST); 0 disables it. A 429 pauses the whole bucket
+               for the server's Retry-After, so concurrent callers back off
+               together instead of each burning a retry.
+  retries    - 408/429/5xx and transport errors are retried up to
+               EDA_LLM_RETRIES times with jittered exponential backoff
+               (EDA_LLM_BACKOFF_S doubling, capped at EDA_LLM_MAX_BACKOFF_S).
+  coalescing - an identical request (same URL and payload) that is already
+               in flight is not sent again; the callers share its response.
+  batching   - generate_batch() / chat_batch() send many prompts at once under
+               the same limits and return the results in input order, with
+               the exception in place of a failed item.
+
+Three kinds of call go through these limits. generate* sends Gemini
+generateContent requests on the pooled httpx client. chat* sends chat
+completions through litellm.acompletion, so every model string litellm can
+route works as before; the limiter, retries and coalescing wrap each litellm
+call (which does no retrying of its own). call_limited() runs any blocking
+call (a vendor SDK's generate_content) on a worker thread, at most
+EDA_LLM_MAX_CONNECTIONS at a time, under the same limiter and retries. Without litellm, or with
+EDA_LLM_TRANSPORT=http, chat* falls back to a built-in OpenAI-compatible
+client that knows "xai/<model>" and "openai/<model>", or any provider given
+EDA_LLM_API_BASE.
+
+The coroutines run on one event loop. Threaded callers (the eval harness,
+the workflow runner) use the *_sync / *_batch wrappers, which submit to the
+process-wide shared_client() on a background loop thread, so every thread
+shares its connections, rate limit and in-flight requests.
+
+    from tools.llm_client import chat_sync, chat_batch
+    reply = chat_sync("xai/grok-3-latest", [{"role": "user", "content": "hi"}])
+    replies = chat_batch("xai/grok-3-latest", [messages_a, messages_b])
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_CONNECTIONS = int(os.environ.get("EDA_LLM_MAX_CONNECTIONS", "16"))
+RATE = float(os.environ.get("EDA_LLM_RATE", "0"))             # requests per second, 0 = unlimited
+BURST = int(os.environ.get("EDA_LLM_BURST", "0"))             # 0 = one second's worth of requests
+RETRIES = int(os.environ.get("EDA_LLM_RETRIES", "5"))
+BACKOFF_S = float(os.environ.get("EDA_LLM_BACKOFF_S", "0.5"))
+MAX_BACKOFF_S = float(os.environ.get("EDA_LLM_MAX_BACKOFF_S", "30"))
+TIMEOUT_S = float(os.environ.get("EDA_LLM_TIMEOUT_S", "120"))
+COALESCE = os.environ.get("EDA_LLM_COALESCE", "1") not in ("0", "false", "no")
+
+RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com"
+# model prefix -> (base URL, API key variable) for the built-in OpenAI-compatible chat transport
+CHAT_PROVIDERS = {
+    "xai": ("https://api.x.ai/v1", "XAI_API_KEY"),
+    "openai": ("https://api.openai.com/v1", "OPENAI_API_KEY"),
+}
+
+
+class LLMError(RuntimeError):
+    """An LLM request that failed for good (non-retryable status, or out of retries)."""
+
+    def __init__(self, message: str, status: int = None, body: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Async token bucket: 'rate' tokens per second, holding at most 'burst'."""
+
+    def __init__(self, rate: float, burst: int = 0):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst or rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = None  # created on first use, inside the loop
+
+    def pause(self, seconds: float):
+        """Hands out no tokens for 'seconds' (a 429 with Retry-After) and drains the bucket."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def request_key(url: str, payload: dict) -> str:
+    blob = json.dumps([url, payload], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _retry_after(response) -> float:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("Retry-After", "")))
+    except ValueError:
+        return 0.0
+
+
+class AsyncLLMClient:
+    def __init__(self, rate: float = RATE, burst: int = BURST, max_connections: int = MAX_CONNECTIONS,
+                 retries: int = RETRIES, backoff_s: float = BACKOFF_S, max_backoff_s: float = MAX_BACKOFF_S,
+                 timeout_s: float = TIMEOUT_S, coalesce: bool = COALESCE):
+        self.limiter = TokenBucket(rate, burst) if rate > 0 else None
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.timeout_s = timeout_s
+        self.coalesce = coalesce
+        self._http = None
+        self._pool = None  # worker threads for call()
+        self._inflight = {}  # request key -> task
+        self._stats = {"requests": 0, "sent": 0, "retries": 0, "throttled": 0, "coalesced": 0, "failed": 0}
+
+    def _client(self):
+        if self._http is None:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError("tools.llm_client needs httpx: pip install httpx") from e
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout_s, connect=min(self.timeout_s, 10.0)),
+            )
+        return self._http
+
+    def stats(self) -> dict:
+        """Counters since start: requests asked for, HTTP requests sent, retries, 429s, coalesced, failed."""
+        return dict(self._stats)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff_s, self.backoff_s * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def post_json(self, url: str, payload: dict, headers: dict = None) -> dict:
+        """POSTs 'payload' and returns the decoded JSON response (shared with coalesced callers: don't mutate it)."""
+        return await self._request(request_key(url, payload), lambda: self._http_attempt(url, payload, headers))
+
+    async def _request(self, key: str, attempt):
+        """Runs 'attempt' (a coroutine function) with retries; callers asking for the same key while it is
+        in flight share its result (no sharing when key is None)."""
+        self._stats["requests"] += 1
+        if not self.coalesce or key is None:
+            return await self._retrying(attempt)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._retrying(attempt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+        # shield: one caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _retrying(self, attempt):
+        for n in range(self.retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            self._stats["sent"] += 1
+            try:
+                return await attempt()
+            except _Retryable as e:
+                if n == self.retries:
+                    self._stats["failed"] += 1
+                    raise LLMError(f"{e} after {n + 1} attempts", e.status, e.body) from e.__cause__
+                delay = max(self._backoff(n), e.retry_after)
+                if e.status == 429:
+                    self._stats["throttled"] += 1
+                    if self.limiter is not None:
+                        self.limiter.pause(delay)
+            except LLMError:
+                self._stats["failed"] += 1
+                raise
+            self._stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def _http_attempt(self, url: str, payload: dict, headers: dict = None) -> dict:
+        import httpx
+        try:
+            response = await self._client().post(url, json=payload, headers=headers)
+        except httpx.TransportError as e:
+            raise _Retryable(f"{e.__class__.__name__}: {e}") from e
+        if response.status_code < 400:
+            return response.json()
+        message = f"HTTP {response.status_code}: {response.text[:500]}"
+        if response.status_code in RETRY_STATUSES:
+            raise _Retryable(message, response.status_code, response.text, _retry_after(response))
+        raise LLMError(message, response.status_code, response.text)
+
+    # -- Gemini generateContent ---------------------------------------------
+
+    async def generate(self, model: str, prompt: str, api_key: str, base: str = GEMINI_API_BASE) -> dict:
+        """One generateContent call: {"text", "usage", "latency_s", "response"}."""
+        started = time.perf_counter()
+        url = f"{(base or GEMINI_API_BASE).rstrip('/')}/v1beta/models/{model}:generateContent?key={api_key}"
+        data = await self.post_json(url, {"contents": [{"parts": [{"text": prompt}]}]})
+        usage = data.get("usageMetadata") or {}
+        texts = []
+        for candidate in (data.get("candidates") or [])[:1]:
+            texts = [p.get("text", "") for p in (candidate.get("content") or {}).get("parts", []) if "text" in p]
+        return {"text": "\n".join(texts).strip(), "latency_s": time.perf_counter() - started, "response": data,
+                "usage": {"prompt_tokens": usage.get("promptTokenCount"),
+                          "output_tokens": usage.get("candidatesTokenCount"),
+                          "total_tokens": usage.get("totalTokenCount")}}
+
+    # -- Chat completions ------------------------------------------------------
+
+    async def chat(self, model: str, messages: list, **params) -> dict:
+        """One chat completion: {"text", "usage", "latency_s", "response"}. Sent through litellm, so any model
+        string litellm routes works; without litellm (or with EDA_LLM_TRANSPORT=http) over the built-in
+        OpenAI-compatible client (see chat_endpoint)."""
+        started = time.perf_counter()
+        if _use_litellm():
+            data = await self._litellm_chat(model, messages, params)
+        else:
+            url, model_name, headers = chat_endpoint(model)
+            data = await self.post_json(url, {"model": model_name, "messages": messages, **params}, headers)
+        usage = _get(data, "usage") or {}
+        choices = _get(data, "choices") or [{}]
+        text = (_get(_get(choices[0], "message") or {}, "content") or "").strip()
+        return {"text": text, "latency_s": time.perf_counter() - started, "response": data,
+                "usage": {"prompt_tokens": _get(usage, "prompt_tokens"),
+                          "output_tokens": _get(usage, "completion_tokens"),
+                          "total_tokens": _get(usage, "total_tokens")}}
+
+    async def _litellm_chat(self, model: str, messages: list, params: dict):
+        import litellm
+        params = dict(params)
+        base, key = os.environ.get("EDA_LLM_API_BASE", "").strip(), os.environ.get("EDA_LLM_API_KEY", "").strip()
+        if base:
+            params.setdefault("api_base", base)
+        if key:
+            params.setdefault("api_key", key)
+
+        async def attempt():
+            try:
+                return await litellm.acompletion(model=model, messages=messages, **params)
+            except Exception as e:
+                # litellm maps provider errors to exceptions carrying the HTTP status
+                # (RateLimitError 429, Timeout 408, APIConnectionError / ServiceUnavailableError 5xx)
+                raise _classify(e) from e
+
+        return await self._request(request_key("litellm:" + model, {"messages": messages, **params}), attempt)
+
+    # -- Blocking calls ----------------------------------------------------------
+
+    async def call(self, fn, key: str = None):
+        """Runs the blocking 'fn()' on one of max_connections worker threads under the limiter and retries;
+        an exception carrying a retryable HTTP status (status_code, or code as in google.api_core) is retried.
+        Callers passing the same key while it is in flight share the result."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="llm-call")
+        loop = asyncio.get_running_loop()
+
+        async def attempt():
+            try:
+                return await loop.run_in_executor(self._pool, fn)
+            except Exception as e:
+                raise _classify(e) from e
+
+        return await self._request(key, attempt)
+
+    async def gather(self, calls) -> list:
+        """Awaits the coroutines concurrently; results in input order, exceptions in place of failures."""
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+
+class _Retryable(Exception):
+    """A failed attempt worth retrying: 408/429/5xx or a transport error."""
+
+    def __init__(self, message: str, status: int = None, body: str = "", retry_after: float = 0.0):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+
+
+def _classify(e: Exception) -> Exception:
+    """A provider exception as _Retryable (retryable HTTP status) or LLMError."""
+    status = getattr(e, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(e, "code", None)
+        status = status if isinstance(status, int) else None
+    if status in RETRY_STATUSES:
+        return _Retryable(f"{type(e).__name__}: {e}", status, str(e), _retry_after(getattr(e, "response", None)))
+    return LLMError(f"{type(e).__name__}: {e}", status, str(e))
+
+
+def _get(obj, name):
+    """obj[name] for dicts, obj.name for litellm's response objects."""
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def _use_litellm() -> bool:
+    if os.environ.get("EDA_LLM_TRANSPORT", "").strip().lower() == "http":
+        return False
+    try:
+        import litellm  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def chat_endpoint(model: str) -> tuple:
+    """(URL, model name, headers) for an OpenAI-compatible "provider/model" on the built-in HTTP transport
+    (EDA_LLM_API_BASE/_KEY override)."""
+    prefix, _, name = model.partition("/")
+    if not name:
+        prefix, name = "openai", model
+    base, key_env = CHAT_PROVIDERS.get(prefix, (None, f"{prefix.upper()}_API_KEY"))
+    base = os.environ.get("EDA_LLM_API_BASE", "").strip() or base
+    if not base:
+        raise LLMError(f"No API base known for '{model}' without litellm. Install litellm, set EDA_LLM_API_BASE "
+                       f"or use one of: {', '.join(p + '/<model>' for p in CHAT_PROVIDERS)}")
+    key = os.environ.get("EDA_LLM_API_KEY", "").strip() or os.environ.get(key_env, "").strip()
+    headers = {"Authorization": f"Bearer {key}"} if key else {}
+    return f"{base.rstrip('/')}/chat/completions", name, headers
+
+
+# ---------------------------------------------------------------------------
+# Shared client on a background loop, for threaded callers
+# ---------------------------------------------------------------------------
+
+_shared = None
+_loop = None
+_lock = threading.Lock()
+
+
+def shared_client() -> AsyncLLMClient:
+    """The process-wide client, running on its own event loop thread."""
+    global _shared, _loop
+    with _lock:
+        if _shared is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client", daemon=True).start()
+            _shared = AsyncLLMClient()
+        return _shared
+
+
+def shared_stats() -> dict:
+    """stats() of the shared client; empty if it was never used."""
+    return _shared.stats() if _shared is not None else {}
+
+
+def run_sync(coro):
+    """Runs a coroutine on the shared client's loop and waits for its result."""
+    shared_client()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+def generate_sync(model: str, prompt: str, api_key: str, base: str = GEMINI_API_BASE) -> dict:
+    return run_sync(shared_client().generate(model, prompt, api_key, base))
+
+
+def generate_batch(model: str, prompts: list, api_key: str, base: str = GEMINI_API_BASE) -> list:
+    client = shared_client()
+    return run_sync(client.gather([client.generate(model, p, api_key, base) for p in prompts]))
+
+
+def call_limited(fn, key: str = None):
+    """AsyncLLMClient.call on the shared client: fn() under the process-wide limits, from any thread."""
+    return run_sync(shared_client().call(fn, key))
+
+
+def chat_sync(model: str, messages: list, **params) -> dict:
+    return run_sync(shared_client().chat(model, messages, **params))
+
+
+def chat_batch(model: str, conversations: list, **params) -> list:
+    client = shared_client()
+    return run_sync(client.gather([client.chat(model, m, **params) for m in conversations]))
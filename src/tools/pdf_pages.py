@@ -0,0 +1,161 @@
+"""
+Parallel, cached PDF page extraction.
+
+The sandbox corpora (10-Ks, datasheets, the childbook) are dominated by PDF
+parsing. This module extracts a PDF page by page with pypdf in a pool of
+worker processes. Each page's text and layout (page size, rotation) is stored
+in a content-addressed cache keyed by (file sha256, page number). The RAG
+tools, the file_reader tool and the workflow runner all read through it, so a
+PDF that has been parsed once by any of them, under any path, is never parsed
+again. Re-indexing an unchanged PDF only costs hashing the file.
+
+The cache is a SQLite database in EDA_PAGE_CACHE_DIR (default
+~/.cache/eda/pages), safe to share between processes.
+"""
+import os
+import json
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .rag_index import file_sha256
+
+PAGE_CACHE_DIR = os.environ.get("EDA_PAGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "eda", "pages"))
+PDF_WORKERS = os.environ.get("EDA_PDF_WORKERS")
+MIN_PAGES_PER_WORKER = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    sha256  TEXT PRIMARY KEY,
+    n_pages INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    sha256 TEXT NOT NULL,
+    page   INTEGER NOT NULL,
+    text   TEXT NOT NULL,
+    layout TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (sha256, page)
+);
+"""
+
+_local = threading.local()
+
+
+def _connect(cache_dir: str = None) -> sqlite3.Connection:
+    path = os.path.join(cache_dir or PAGE_CACHE_DIR, "pages.db")
+    conns = getattr(_local, "conns", None)
+    if conns is None or getattr(_local, "pid", None) != os.getpid():
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    conn = conns.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conns[path] = conn
+    return conn
+
+
+# ------------------------------------------------------------------------------
+# Extraction (runs in worker processes)
+# ------------------------------------------------------------------------------
+def _page_layout(page) -> dict:
+    box = page.mediabox
+    return {"width": float(box.width), "height": float(box.height), "rotation": int(page.rotation or 0)}
+
+
+def _extract_range(path: str, start: int, end: int) -> list:
+    """Extracts pages [start, end) of 'path' as [(page number, text, layout)]."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    out = []
+    for i in range(start, min(end, len(reader.pages))):
+        page = reader.pages[i]
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            print(f"[WARN] Could not extract page {i + 1} of {path}: {e}")
+            text = ""
+        out.append((i, text, _page_layout(page)))
+    return out
+
+
+def _count_pages(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+# ------------------------------------------------------------------------------
+# Cached access
+# ------------------------------------------------------------------------------
+def extract_pages(path: str, workers: int = None, cache_dir: str = None, sha256: str = None) -> list:
+    """
+    Returns [{"page": n (0-based), "text", "layout"}] for every page of the PDF,
+    from the page cache where possible. Missing pages are extracted in
+    parallel by 'workers' processes (default EDA_PDF_WORKERS or one per core;
+    small documents are extracted in-process) and stored.
+    """
+    digest = sha256 or file_sha256(path)
+    conn = _connect(cache_dir)
+    row = conn.execute("SELECT n_pages FROM files WHERE sha256 = ?", (digest,)).fetchone()
+    n_pages = row[0] if row else _count_pages(path)
+    cached = {
+        r[0]: (r[1], r[2])
+        for r in conn.execute("SELECT page, text, layout FROM pages WHERE sha256 = ?", (digest,))
+    }
+    missing = [i for i in range(n_pages) if i not in cached]
+
+    if missing:
+        if workers is None:
+            workers = int(PDF_WORKERS) if PDF_WORKERS is not None else (os.cpu_count() or 1)
+        workers = max(0, min(workers, len(missing) // MIN_PAGES_PER_WORKER))
+        # Contiguous ranges, a few per worker, so each worker parses the file once per range.
+        n_ranges = max(1, workers * 2)
+        step = -(-len(missing) // n_ranges)
+        ranges = [(missing[i], missing[min(i + step, len(missing)) - 1] + 1) for i in range(0, len(missing), step)]
+        if workers <= 1:
+            results = [_extract_range(path, start, end) for start, end in ranges]
+        else:
+            ctx = multiprocessing.get_context("spawn")  # callers may have torch loaded, which is not fork-safe
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                results = list(pool.map(_extract_range, [path] * len(ranges), *zip(*ranges)))
+
+        rows = [(digest, i, text, json.dumps(layout)) for result in results for i, text, layout in result]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (digest, n_pages))
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for _, i, text, layout in rows:
+            cached[i] = (text, layout)
+
+    return [{"page": i, "text": cached[i][0], "layout": json.loads(cached[i][1])} for i in range(n_pages) if i in cached]
+
+
+def pdf_text(path: str, page_separator: str = "\n\n", **kwargs) -> str:
+    """Whole-document text of a PDF, through the page cache."""
+    return page_separator.join(p["text"] for p in extract_pages(path, **kwargs))
+
+
+def llama_pdf_reader():
+    """A llama_index file reader (for SimpleDirectoryReader's file_extractor) backed by the page cache."""
+    from llama_index.core import Document
+    from llama_index.core.readers.base import BaseReader
+
+    class CachedPDFReader(BaseReader):
+        def load_data(self, file, extra_info: dict = None, fs=None) -> list:
+            path = str(file)
+            return [
+                Document(text=p["text"], metadata=dict(extra_info or {}, page_label=str(p["page"] + 1)))
+                for p in extract_pages(path)
+            ]
+
+    return CachedPDFReader()
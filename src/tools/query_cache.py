@@ -0,0 +1,157 @@
+"""
+Two-level cache for RAG queries.
+
+Agents ask the same questions again and again (see sandbox/data/*/input.txt),
+and each time the question was embedded and the search re-run.
+
+  Level 1 - normalised question text -> query embedding, per embedding model.
+            An in-memory LRU in front of a SQLite table (EDA_QUERY_CACHE_DB),
+            so embeddings survive restarts.
+  Level 2 - (index fingerprint, question, top_k, mode) -> retrieved hits.
+            An in-memory LRU. The key contains the registry fingerprint of
+            the data directory, so results from an outdated index are never
+            served; stale entries simply age out.
+
+Every miss records how long the computation took. Hits add that time to
+'saved_ms', which stats() reports together with the hit rates.
+EDA_QUERY_CACHE=0 disables both levels.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+QUERY_CACHE_DB = os.environ.get("EDA_QUERY_CACHE_DB", "query_cache.db")
+QUERY_CACHE_ENABLED = os.environ.get("EDA_QUERY_CACHE", "1") not in ("0", "false", "no")
+MAX_EMBEDDINGS = int(os.environ.get("EDA_QUERY_CACHE_EMBEDDINGS", "10000"))
+MAX_RESULTS = int(os.environ.get("EDA_QUERY_CACHE_RESULTS", "2048"))
+
+_EDGE_PUNCT = " \t\n\"'“”‘’`?!.,;:"
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases, collapses whitespace and strips surrounding quotes/punctuation."""
+    return re.sub(r"\s+", " ", question.strip(_EDGE_PUNCT).lower()).strip(_EDGE_PUNCT)
+
+
+class QueryCache:
+    def __init__(self, db_path: str = QUERY_CACHE_DB, max_embeddings: int = MAX_EMBEDDINGS,
+                 max_results: int = MAX_RESULTS, enabled: bool = QUERY_CACHE_ENABLED):
+        self.db_path = db_path
+        self.max_embeddings = max_embeddings
+        self.max_results = max_results
+        self.enabled = enabled
+        self._embeddings = OrderedDict()   # (model, question) -> (vector, cost_ms)
+        self._results = OrderedDict()      # (fingerprint, question, top_k, mode) -> (hits, cost_ms)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._inserts = 0
+        self._stats = {"embedding_hits": 0, "embedding_misses": 0, "result_hits": 0, "result_misses": 0, "saved_ms": 0.0}
+
+    def _db(self) -> sqlite3.Connection | None:
+        if self._conn is None and self.db_path:
+            try:
+                self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (model TEXT, question TEXT, vector BLOB, "
+                    "cost_ms REAL, used REAL, PRIMARY KEY (model, question))"
+                )
+            except sqlite3.Error as e:
+                print(f"[WARN] Query cache database unavailable, caching in memory only: {e}")
+                self.db_path = None
+        return self._conn
+
+    # ----- level 1: question embeddings -----
+    def embedding(self, model: str, question: str, embed_fn):
+        """Returns embed_fn(question) as a float32 vector, cached per model and normalised question."""
+        import numpy as np
+
+        if not self.enabled:
+            return np.asarray(embed_fn(question), dtype=np.float32)
+        key = (model, normalize_question(question))
+        with self._lock:
+            cached = self._embeddings.get(key)
+            if cached is None and self._db() is not None:
+                row = self._conn.execute(
+                    "SELECT vector, cost_ms FROM embeddings WHERE model = ? AND question = ?", key
+                ).fetchone()
+                if row is not None:
+                    cached = (np.frombuffer(row[0], dtype=np.float32), row[1])
+                    self._conn.execute("UPDATE embeddings SET used = ? WHERE model = ? AND question = ?",
+                                       (time.time(), *key))
+                    self._remember(self._embeddings, key, cached, self.max_embeddings)
+            if cached is not None:
+                self._embeddings.move_to_end(key)
+                self._stats["embedding_hits"] += 1
+                self._stats["saved_ms"] += cached[1]
+                return cached[0]
+
+        t0 = time.perf_counter()
+        vector = np.asarray(embed_fn(question), dtype=np.float32).ravel()
+        cost_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self._stats["embedding_misses"] += 1
+            self._remember(self._embeddings, key, (vector, cost_ms), self.max_embeddings)
+            if self._db() is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                    (*key, vector.tobytes(), cost_ms, time.time()),
+                )
+                self._inserts += 1
+                if self._inserts % 100 == 0:
+                    # Keep the table to the most recently used max_embeddings rows.
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid NOT IN "
+                        "(SELECT rowid FROM embeddings ORDER BY used DESC LIMIT ?)", (self.max_embeddings,)
+                    )
+        return vector
+
+    # ----- level 2: retrieval results -----
+    def results(self, fingerprint, question: str, top_k: int, mode: str, search_fn) -> list:
+        """Returns search_fn() for this index state and query, cached in memory."""
+        if not self.enabled or fingerprint is None:
+            return search_fn()
+        key = (fingerprint, normalize_question(question), int(top_k), mode)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self._stats["result_hits"] += 1
+                self._stats["saved_ms"] += cached[1]
+                return cached[0]
+
+        t0 = time.perf_counter()
+        hits = search_fn()
+        cost_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self._stats["result_misses"] += 1
+            self._remember(self._results, key, (hits, cost_ms), self.max_results)
+        return hits
+
+    @staticmethod
+    def _remember(lru: OrderedDict, key, value, capacity: int):
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > capacity:
+            lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._embeddings.clear()
+            self._results.clear()
+            if self._db() is not None:
+                self._conn.execute("DELETE FROM embeddings")
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        for level in ("embedding", "result"):
+            total = s[f"{level}_hits"] + s[f"{level}_misses"]
+            s[f"{level}_hit_rate"] = s[f"{level}_hits"] / total if total else 0.0
+        return s
+
+
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,206 @@
+"""
+Incremental maintenance of the persisted llama_index vector index.
+
+A per-file manifest (``manifest.json``) is stored next to the persisted index.
+For every source file it records the size, mtime, content hash and the
+document / node ids the file produced, so that a refresh only re-embeds the
+files that were added or changed and drops the nodes of deleted files.
+
+The same nodes are mirrored into a keyword (FTS5) index in the same directory,
+see keyword_index.py.
+"""
+import os
+import json
+import hashlib
+
+from .keyword_index import open_keyword_index
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+# ------------------------------------------------------------------------------
+# Manifest helpers
+# ------------------------------------------------------------------------------
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the hex sha256 of a file, read in fixed-size chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(persist_dir: str) -> dict:
+    """Loads the manifest stored in 'persist_dir', or an empty one."""
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(persist_dir: str, files: dict):
+    """Atomically writes the manifest next to the persisted index."""
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f)
+    os.replace(tmp_path, path)
+
+
+def list_data_files(data_dir: str) -> list:
+    """
+    Lists the files that make up the corpus of 'data_dir'.
+    Mirrors the SimpleDirectoryReader defaults: top-level files only, hidden
+    files (and therefore the '.cache' folder) excluded.
+    """
+    files = []
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_file():
+                files.append(os.path.abspath(entry.path))
+    return sorted(files)
+
+
+def scan_changes(data_dir: str, manifest: dict) -> dict:
+    """
+    Compares the files on disk against the manifest.
+    Files whose size and mtime are unchanged are trusted without hashing; the
+    content hash is only computed for files whose stat changed, so a 'touch'
+    without a content change does not trigger re-embedding.
+
+    Returns a dict with 'added', 'changed', 'deleted' and 'unchanged' path lists
+    plus 'stats' (the fresh size/mtime/sha256 per current file).
+    """
+    changes = {"added": [], "changed": [], "deleted": [], "unchanged": [], "stats": {}}
+    current = list_data_files(data_dir)
+
+    for path in current:
+        st = os.stat(path)
+        old = manifest.get(path)
+        if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+            changes["unchanged"].append(path)
+            changes["stats"][path] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": old["sha256"]}
+            continue
+
+        digest = file_sha256(path)
+        changes["stats"][path] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": digest}
+        if old is None:
+            changes["added"].append(path)
+        elif old["sha256"] != digest:
+            changes["changed"].append(path)
+        else:
+            changes["unchanged"].append(path)
+
+    current_set = set(current)
+    changes["deleted"] = [p for p in manifest if p not in current_set]
+    return changes
+
+
+def has_changes(changes: dict) -> bool:
+    return bool(changes["added"] or changes["changed"] or changes["deleted"])
+
+
+# ------------------------------------------------------------------------------
+# Index build / refresh
+# ------------------------------------------------------------------------------
+def _load_documents(paths: list) -> list:
+    from llama_index.core import SimpleDirectoryReader
+    from .pdf_pages import llama_pdf_reader
+
+    if not paths:
+        return []
+    # PDFs go through the shared page cache, so unchanged PDFs are never parsed twice.
+    reader = SimpleDirectoryReader(input_files=paths, filename_as_id=True, file_extractor={".pdf": llama_pdf_reader()})
+    return reader.load_data()
+
+
+def _manifest_entries(index, documents: list, stats: dict) -> dict:
+    """Builds manifest entries (doc ids + node ids per file) for freshly inserted documents."""
+    ref_doc_info = index.ref_doc_info
+    entries = {}
+    for doc in documents:
+        path = os.path.abspath(doc.metadata.get("file_path", doc.id_))
+        entry = entries.setdefault(path, dict(stats[path], doc_ids=[], node_ids=[]))
+        entry["doc_ids"].append(doc.id_)
+        info = ref_doc_info.get(doc.id_)
+        if info is not None:
+            entry["node_ids"].extend(info.node_ids)
+    return entries
+
+
+def index_keywords(index, persist_dir: str, files: dict):
+    """Adds the nodes of the manifest entries in 'files' to the keyword index in 'persist_dir'."""
+    kw = open_keyword_index(persist_dir)
+    for path, entry in files.items():
+        nodes = index.docstore.get_nodes(entry.get("node_ids", []), raise_error=False)
+        nodes = [n for n in nodes if n is not None]
+        if not nodes:
+            continue
+        kw.add(
+            [n.node_id for n in nodes],
+            [n.get_content() for n in nodes],
+            [dict(n.metadata, file_path=path, start_char_idx=n.start_char_idx) for n in nodes],
+        )
+
+
+def build_index(data_dir: str, persist_dir: str):
+    """
+    Builds the vector index for 'data_dir' from scratch, persists it together
+    with a fresh manifest, and returns the index.
+    """
+    from llama_index.core import VectorStoreIndex
+
+    changes = scan_changes(data_dir, {})
+    documents = _load_documents(changes["added"])
+    index = VectorStoreIndex.from_documents(documents)
+    index.storage_context.persist(persist_dir=persist_dir)
+
+    files = _manifest_entries(index, documents, changes["stats"])
+    # Files that produced no documents (e.g. empty) are still tracked so they are not re-read.
+    for path in changes["added"]:
+        files.setdefault(path, dict(changes["stats"][path], doc_ids=[], node_ids=[]))
+    open_keyword_index(persist_dir).clear()
+    index_keywords(index, persist_dir, files)
+    save_manifest(persist_dir, files)
+    return index
+
+
+def update_index(index, data_dir: str, persist_dir: str, manifest: dict, changes: dict):
+    """
+    Applies 'changes' (from scan_changes) to an already loaded index:
+    nodes of deleted/changed files are removed, added/changed files are
+    re-read and inserted, unchanged nodes are kept as they are.
+    Persists the index and the updated manifest. Returns the index.
+    """
+    files = dict(manifest)
+
+    for path in changes["deleted"] + changes["changed"]:
+        for doc_id in files.pop(path, {}).get("doc_ids", []):
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+
+    open_keyword_index(persist_dir).delete_files(changes["deleted"] + changes["changed"])
+
+    to_read = changes["added"] + changes["changed"]
+    documents = _load_documents(to_read)
+    for doc in documents:
+        index.insert(doc)
+    new_entries = _manifest_entries(index, documents, changes["stats"])
+    index_keywords(index, persist_dir, new_entries)
+    files.update(new_entries)
+    for path in to_read:
+        files.setdefault(path, dict(changes["stats"][path], doc_ids=[], node_ids=[]))
+
+    # Refresh size/mtime of files that were touched but whose content hash did not change.
+    for path in changes["unchanged"]:
+        files[path].update(changes["stats"][path])
+
+    index.storage_context.persist(persist_dir=persist_dir)
+    save_manifest(persist_dir, files)
+    return index
@@ -0,0 +1,353 @@
+"""
+Gait and activity patterns in sensor channels: walking steps, cadence and
+stillness.
+
+Every function works on whole NumPy arrays of one channel, so
+multi-hour recordings are processed with no per-sample Python loop:
+
+  resample     - linear interpolation of (timestamps, values) onto a uniform
+                 grid laid over the recorded stretches only (gaps are cut).
+  periodicity  - dominant period of a signal from its FFT autocorrelation;
+                 cadence() does the same for every window of a long signal in
+                 one batched FFT.
+  find_peaks   - local maxima at least 'distance' samples apart, using an
+                 O(n) running-maximum filter.
+  count_steps  - foot contacts of a pressure channel (hysteresis threshold on
+                 total pressure), or peaks of the high-passed magnitude of an
+                 IMU channel inside walking (periodic) windows.
+  stillness    - segments where the rolling std of the signal stays below a
+                 per-channel threshold for at least EDA_STILL_MIN_S.
+
+analyze() runs all of them on a channel's signal (tools.sensor_pyramid:
+magnitude for ACC/GYRO/MAG, total pressure for LeftFoot).
+"""
+import os
+
+import numpy as np
+
+from .sensor_pyramid import is_pressure, signal_column, signal_name
+from .sensor_anomaly import GAP_FACTOR, MIN_GAP_MS
+
+RESAMPLE_HZ = float(os.environ.get("EDA_SENSOR_RESAMPLE_HZ", "0"))  # 0: the channel's median rate
+WINDOW_S = float(os.environ.get("EDA_GAIT_WINDOW_S", "10"))
+CADENCE_BAND_HZ = (0.4, 3.5)
+MIN_PERIODICITY = float(os.environ.get("EDA_GAIT_MIN_PERIODICITY", "0.4"))
+MIN_STEP_S = 0.25
+STEP_HEIGHT = 0.5  # IMU step peaks must exceed this many robust stds of the high-passed signal
+STILL_WINDOW_S = 1.0
+MIN_STILL_S = float(os.environ.get("EDA_STILL_MIN_S", "2"))
+# Rolling std of the signal below which a channel counts as still; pressure
+# channels use STILL_PRESSURE x their 99th-percentile total load instead.
+STILL_STD = {"ACC": 0.2, "GYRO": 0.15, "MAG": 0.5}
+STILL_PRESSURE = 0.05
+STILL_RELATIVE = 0.02
+
+
+# ----------------------------------------------------------------------
+# Array primitives
+# ----------------------------------------------------------------------
+def median_rate(ts: np.ndarray) -> float:
+    """Sample rate in Hz from the median positive interval of epoch-ms timestamps."""
+    d = np.diff(np.asarray(ts))
+    d = d[d > 0]
+    return 1000.0 / float(np.median(d)) if len(d) else 0.0
+
+
+def resample(ts: np.ndarray, values: np.ndarray, rate_hz: float, max_gap_ms: float = None) -> tuple:
+    """
+    Values linearly interpolated onto a uniform grid, as (grid_ms float64,
+    values float64, valid bool). values may be 1-D or (n, columns);
+    timestamps must be sorted. With max_gap_ms, recording gaps longer than
+    that are cut out of the grid instead of interpolated across: each
+    stretch gets its own grid, and the first point after a cut is marked
+    invalid so windows spanning it can be skipped.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    v = np.asarray(values, dtype=np.float64)
+    step = 1000.0 / rate_hz
+    cuts = np.flatnonzero(np.diff(ts) > max_gap_ms) + 1 if max_gap_ms else np.empty(0, np.int64)
+    first = ts[np.concatenate(([0], cuts))]
+    last = ts[np.concatenate((cuts, [len(ts)])) - 1]
+    counts = ((last - first) // step).astype(np.int64) + 1
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    grid = np.repeat(first, counts) + (np.arange(counts.sum()) - np.repeat(offsets, counts)) * step
+    valid = np.ones(len(grid), dtype=bool)
+    valid[offsets[1:]] = False
+    if len(ts) < 2:
+        return grid, v[:len(grid)], valid
+    right = np.searchsorted(ts, grid, side="right").clip(1, len(ts) - 1)
+    left = right - 1
+    span = (ts[right] - ts[left]).astype(np.float64)
+    w = np.divide(grid - ts[left], span, out=np.zeros_like(grid), where=span > 0).clip(0.0, 1.0)
+    if v.ndim > 1:
+        w = w[:, None]
+    return grid, v[left] * (1.0 - w) + v[right] * w, valid
+
+
+def moving_average(x: np.ndarray, width: int) -> np.ndarray:
+    """Centred moving average over 'width' samples (shorter at the edges), via a cumulative sum."""
+    n = len(x)
+    width = max(int(width), 1)
+    c = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    i = np.arange(n)
+    lo = np.clip(i - width // 2, 0, n)
+    hi = np.clip(i - width // 2 + width, 0, n)
+    return (c[hi] - c[lo]) / (hi - lo)
+
+
+def moving_std(x: np.ndarray, width: int) -> np.ndarray:
+    x = x - x.mean() if len(x) else x
+    mean = moving_average(x, width)
+    return np.sqrt(np.maximum(moving_average(x * x, width) - mean * mean, 0.0))
+
+
+def max_filter(x: np.ndarray, radius: int) -> np.ndarray:
+    """max(x[i - radius .. i + radius]) for every i in O(n) (van Herk / Gil-Werman)."""
+    n, w = len(x), 2 * radius + 1
+    pad = np.full(radius, -np.inf)
+    y = np.concatenate((pad, np.asarray(x, dtype=np.float64), pad, np.full(-(n + 2 * radius) % w, -np.inf)))
+    blocks = y.reshape(-1, w)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:n], prefix[w - 1:w - 1 + n])
+
+
+def find_peaks(x: np.ndarray, distance: int = 1, height: float = -np.inf) -> np.ndarray:
+    """
+    Indices of local maxima of x that are >= height and the highest sample
+    within 'distance' on either side; of equal maxima closer than 'distance'
+    the first is kept.
+    """
+    if len(x) < 3:
+        return np.empty(0, dtype=np.int64)
+    mid = x[1:-1]
+    idx = np.flatnonzero((mid > x[:-2]) & (mid >= x[2:]) & (mid >= height)) + 1
+    if distance > 1 and len(idx):
+        idx = idx[x[idx] >= max_filter(x, int(distance))[idx]]
+        while len(idx) > 1:
+            close = np.flatnonzero(np.diff(idx) < distance) + 1
+            if not len(close):
+                break
+            # Drop a too-close peak only when its predecessor is kept, so chains thin out evenly.
+            idx = np.delete(idx, close[~np.isin(close - 1, close)])
+    return idx
+
+
+def hysteresis(x: np.ndarray, low: float, high: float) -> np.ndarray:
+    """On above 'high', off below 'low', otherwise the previous state (initially off)."""
+    mark = np.where(x > high, 1, np.where(x < low, 0, -1)).astype(np.int8)
+    last = np.where(mark >= 0, np.arange(len(x)), 0)
+    np.maximum.accumulate(last, out=last)
+    state = mark[last]
+    return state > 0
+
+
+def runs(mask: np.ndarray) -> tuple:
+    """(starts, ends) of the runs of True in mask, ends exclusive."""
+    d = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+    return np.flatnonzero(d == 1), np.flatnonzero(d == -1)
+
+
+# ----------------------------------------------------------------------
+# Periodicity
+# ----------------------------------------------------------------------
+def _autocorrelation(x: np.ndarray) -> np.ndarray:
+    """Normalised (biased) autocorrelation along the last axis, via zero-padded FFTs."""
+    x = x - x.mean(axis=-1, keepdims=True)
+    n = x.shape[-1]
+    nfft = 1 << (2 * n - 1).bit_length()
+    f = np.fft.rfft(x, nfft, axis=-1)
+    acf = np.fft.irfft(f.real ** 2 + f.imag ** 2, nfft, axis=-1)[..., :n]
+    zero = acf[..., :1]
+    return np.divide(acf, zero, out=np.zeros_like(acf), where=zero > 0)
+
+
+def _lag_band(rate_hz: float, n: int, band: tuple) -> tuple:
+    # At least 3 samples per period, so slow channels do not report noise at the Nyquist rate.
+    lo = max(int(np.floor(rate_hz / band[1])), 3)
+    hi = min(int(np.ceil(rate_hz / band[0])), n - 2)
+    return lo, hi
+
+
+def _refine(acf: np.ndarray, lag: np.ndarray) -> np.ndarray:
+    """Sub-sample lag from a parabola through the autocorrelation peak and its neighbours."""
+    rows = np.arange(acf.shape[0])
+    a, b, c = acf[rows, lag - 1], acf[rows, lag], acf[rows, lag + 1]
+    denom = a - 2 * b + c
+    shift = np.divide(0.5 * (a - c), denom, out=np.zeros_like(b), where=denom < 0)
+    return lag + shift.clip(-0.5, 0.5)
+
+
+def periodicity(x: np.ndarray, rate_hz: float, band: tuple = CADENCE_BAND_HZ) -> dict:
+    """
+    Dominant period of x within band (Hz): the highest autocorrelation peak
+    over the band's lags, with the FFT spectral peak for comparison.
+    strength is the normalised autocorrelation at that lag (1 = perfectly
+    periodic).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    lo, hi = _lag_band(rate_hz, len(x), band)
+    if len(x) < 4 or hi <= lo:
+        return {"frequency_hz": None, "period_s": None, "strength": 0.0, "spectral_peak_hz": None}
+    acf = _autocorrelation(x)[None, :]
+    lag = lo + np.argmax(acf[:, lo:hi + 1], axis=1)
+    period = float(_refine(acf, lag)[0]) / rate_hz
+    power = np.abs(np.fft.rfft(x - x.mean())) ** 2
+    freqs = np.fft.rfftfreq(len(x), 1.0 / rate_hz)
+    in_band = (freqs >= band[0]) & (freqs <= band[1])
+    spectral = float(freqs[in_band][np.argmax(power[in_band])]) if in_band.any() else None
+    return {"frequency_hz": 1.0 / period, "period_s": period, "strength": float(acf[0, lag[0]]),
+            "spectral_peak_hz": spectral}
+
+
+def cadence(x: np.ndarray, rate_hz: float, window_s: float = WINDOW_S, valid: np.ndarray = None,
+            band: tuple = CADENCE_BAND_HZ) -> dict:
+    """
+    periodicity() for consecutive windows of window_s seconds, all windows in
+    one batched FFT. Returns arrays start (sample index), frequency_hz and
+    strength; windows with invalid samples get strength 0 and NaN frequency.
+    """
+    w = int(round(window_s * rate_hz))
+    m = len(x) // w if w >= 4 else 0
+    lo, hi = _lag_band(rate_hz, w, band)
+    if m == 0 or hi <= lo:
+        return {"start": np.empty(0, np.int64), "frequency_hz": np.empty(0), "strength": np.empty(0), "window": w}
+    windows = np.asarray(x[:m * w], dtype=np.float64).reshape(m, w)
+    acf = _autocorrelation(windows)
+    lag = lo + np.argmax(acf[:, lo:hi + 1], axis=1)
+    strength = acf[np.arange(m), lag]
+    freq = rate_hz / _refine(acf, lag)
+    if valid is not None:
+        ok = valid[:m * w].reshape(m, w).all(axis=1)
+        strength = np.where(ok, strength, 0.0)
+        freq = np.where(ok, freq, np.nan)
+    return {"start": np.arange(m) * w, "frequency_hz": freq, "strength": strength, "window": w}
+
+
+# ----------------------------------------------------------------------
+# Steps and stillness
+# ----------------------------------------------------------------------
+def still_threshold(channel: str, signal: np.ndarray, pressure: bool) -> float:
+    if pressure:
+        return STILL_PRESSURE * float(np.percentile(signal, 99)) if len(signal) else 0.0
+    for tag, threshold in STILL_STD.items():
+        if channel.upper().startswith(tag):
+            return threshold
+    return STILL_RELATIVE * float(np.median(np.abs(signal))) if len(signal) else 0.0
+
+
+def stillness(signal: np.ndarray, rate_hz: float, threshold: float, valid: np.ndarray = None,
+              window_s: float = STILL_WINDOW_S, min_s: float = MIN_STILL_S) -> tuple:
+    """(starts, ends) sample indices of runs of at least min_s where the rolling std stays <= threshold."""
+    still = moving_std(signal, window_s * rate_hz) <= threshold
+    if valid is not None:
+        still &= valid
+    starts, ends = runs(still)
+    keep = ends - starts >= min_s * rate_hz
+    return starts[keep], ends[keep]
+
+
+def count_steps(signal: np.ndarray, rate_hz: float, pressure: bool, walking: np.ndarray = None,
+                valid: np.ndarray = None) -> np.ndarray:
+    """
+    Sample indices of steps. Pressure: onsets of foot contact, by hysteresis
+    between 20% and 40% of the 5th..95th percentile load. IMU: peaks of the
+    high-passed, smoothed signal above STEP_HEIGHT robust stds and MIN_STEP_S apart,
+    kept only where 'walking' is set.
+    """
+    if len(signal) < 3:
+        return np.empty(0, dtype=np.int64)
+    distance = max(int(MIN_STEP_S * rate_hz), 1)
+    if pressure:
+        lo, hi = np.percentile(signal[valid] if valid is not None and valid.any() else signal, [5, 95])
+        if hi - lo <= 0:
+            return np.empty(0, dtype=np.int64)
+        contact = hysteresis(signal, lo + 0.2 * (hi - lo), lo + 0.4 * (hi - lo))
+        onsets = np.flatnonzero(np.diff(contact.astype(np.int8)) == 1) + 1
+        # Debounce: onsets closer than MIN_STEP_S are one contact.
+        while len(onsets) > 1:
+            close = np.flatnonzero(np.diff(onsets) < distance) + 1
+            if not len(close):
+                break
+            onsets = np.delete(onsets, close[~np.isin(close - 1, close)])
+        steps = onsets
+    else:
+        smooth = moving_average(signal - moving_average(signal, rate_hz), 0.1 * rate_hz)
+        region = walking if walking is not None else np.ones(len(signal), dtype=bool)
+        if valid is not None:
+            region = region & valid
+        if not region.any():
+            return np.empty(0, dtype=np.int64)
+        active = smooth[region]
+        spread = 1.4826 * float(np.median(np.abs(active - np.median(active))))
+        steps = find_peaks(smooth, distance, height=STEP_HEIGHT * spread)
+    if valid is not None:
+        steps = steps[valid[steps]]
+    if walking is not None:
+        steps = steps[walking[steps]]
+    return steps
+
+
+# ----------------------------------------------------------------------
+# Channel analysis
+# ----------------------------------------------------------------------
+def analyze(ts: np.ndarray, values: np.ndarray, channel: str = "", rate_hz: float = None,
+            window_s: float = WINDOW_S) -> dict:
+    """
+    Walking and stillness of one channel over sorted timestamps/values.
+
+    The channel's signal is resampled to rate_hz (default EDA_SENSOR_RESAMPLE_HZ,
+    or the channel's own median rate). Windows of window_s seconds whose
+    autocorrelation peak in CADENCE_BAND_HZ reaches EDA_GAIT_MIN_PERIODICITY
+    and that are not still count as walking. Steps of a single-foot pressure
+    channel are that foot's contacts, i.e. strides.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    pressure = is_pressure(values.shape[1], values.dtype)
+    result = {"channel": channel, "signal": signal_name(values.shape[1], values.dtype), "samples": len(ts),
+              "pressure": pressure}
+    native = median_rate(ts)
+    rate = rate_hz or RESAMPLE_HZ or native
+    if len(ts) < 4 or not rate:
+        return dict(result, rate_hz=rate, duration_s=0.0, recorded_s=0.0, steps=0, step_times=np.empty(0, np.int64),
+                    cadence_hz=None, periodicity=0.0, walking_s=0.0, walking_windows=[], still_s=0.0, still_segments=[])
+    max_gap = max(GAP_FACTOR * 1000.0 / native, MIN_GAP_MS) if native else None
+    grid, signal, valid = resample(ts, signal_column(values), rate, max_gap)
+
+    threshold = still_threshold(channel, signal[valid], pressure)
+    s_starts, s_ends = stillness(signal, rate, threshold, valid)
+    edges = np.zeros(len(signal) + 1, dtype=np.int64)
+    np.add.at(edges, s_starts, 1)
+    np.add.at(edges, s_ends, -1)
+    still = np.cumsum(edges[:-1]) > 0
+
+    windows = cadence(signal, rate, window_s, valid)
+    w = windows["window"]
+    periodic = windows["strength"] >= MIN_PERIODICITY
+    if len(periodic):
+        moving_share = 1.0 - still[:len(periodic) * w].reshape(-1, w).mean(axis=1)
+        periodic &= moving_share >= 0.5
+    walking = np.zeros(len(signal), dtype=bool)
+    walking[:len(periodic) * w] = np.repeat(periodic, w)
+
+    steps = count_steps(signal, rate, pressure, walking=None if pressure else walking, valid=valid)
+    freqs = windows["frequency_hz"][periodic]
+    return dict(
+        result,
+        rate_hz=float(rate),
+        native_rate_hz=native,
+        duration_s=(int(ts[-1]) - int(ts[0])) / 1000.0,
+        recorded_s=len(grid) / rate,
+        steps=int(len(steps)),
+        step_times=np.round(grid[steps]).astype(np.int64),
+        cadence_hz=float(np.median(freqs)) if len(freqs) else None,
+        periodicity=float(np.median(windows["strength"][periodic])) if len(freqs) else 0.0,
+        walking_s=float(periodic.sum()) * w / rate,
+        walking_windows=[(int(round(grid[a])), int(round(grid[min(b, len(grid) - 1)])))
+                         for a, b in zip(*runs(walking))],
+        still_threshold=threshold,
+        still_s=float((s_ends - s_starts).sum()) / rate,
+        still_segments=[(int(round(grid[a])), int(round(grid[b - 1]))) for a, b in zip(s_starts, s_ends)],
+    )
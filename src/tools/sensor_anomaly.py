@@ -0,0 +1,334 @@
+"""
+Streaming anomaly detection over growing sensor logs.
+
+StreamingDetector tails a sensor_log.txt-style file: every poll() parses only
+the bytes appended since the last one (tools.sensor_store.iter_chunks /
+parse_chunk) and runs vectorised detectors over each chunk, carrying a small,
+fixed-size state per channel between chunks:
+
+  spike  - |x - mean| / std above EDA_ANOMALY_Z, where mean/std are taken over
+           the preceding EDA_ANOMALY_WINDOW samples of the channel's signal
+           (vector magnitude). Consecutive spiky samples within
+           EDA_ANOMALY_MERGE_MS form one event.
+  gap    - consecutive samples further apart than EDA_ANOMALY_GAP_FACTOR x the
+           channel's expected interval (learnt from the data as it streams)
+           and at least EDA_ANOMALY_MIN_GAP_MS, so sampling jitter is ignored.
+  stuck  - a pressure pad (integer channels such as LeftFoot) that reads 0 for
+           EDA_ANOMALY_STUCK_SAMPLES consecutive samples while the foot is
+           loaded (other pads non-zero). Z-score spikes are not computed for
+           pressure channels, whose steps are bursts by nature.
+
+Memory does not grow with the log: per channel the state is the last WINDOW
+signal values, the last timestamp, the learnt interval and per-pad run
+counters. Events go to an append-only SQLite table next to the sensor cache
+(<log dir>/.cache/sensor/<log>/anomalies.db), committed in the same
+transaction as the detector state and byte offset, so each record is
+processed exactly once even if the process dies mid-stream, and readers can
+query events at any time.
+"""
+import os
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+from .sensor_store import CHANNELS, CHUNK_BYTES, iter_chunks, parse_chunk, sensor_cache_dir, _head_digest
+from .sensor_pyramid import is_pressure, signal_column
+
+WINDOW = int(os.environ.get("EDA_ANOMALY_WINDOW", "256"))
+MIN_HISTORY = 32
+Z_THRESHOLD = float(os.environ.get("EDA_ANOMALY_Z", "6"))
+MERGE_MS = int(os.environ.get("EDA_ANOMALY_MERGE_MS", "1000"))
+GAP_FACTOR = float(os.environ.get("EDA_ANOMALY_GAP_FACTOR", "5"))
+MIN_GAP_MS = float(os.environ.get("EDA_ANOMALY_MIN_GAP_MS", "1000"))
+STUCK_SAMPLES = int(os.environ.get("EDA_ANOMALY_STUCK_SAMPLES", "100"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel     TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    start_ms    INTEGER NOT NULL,
+    end_ms      INTEGER NOT NULL,
+    value       REAL,
+    score       REAL,
+    detail      TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events(start_ms);
+CREATE INDEX IF NOT EXISTS idx_events_channel ON events(channel, kind, start_ms);
+CREATE TABLE IF NOT EXISTS state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# ------------------------------------------------------------------------------
+# Vectorised detectors (one channel, one chunk)
+# ------------------------------------------------------------------------------
+def detect_spikes(x: np.ndarray, history: np.ndarray, window: int, z: float) -> tuple:
+    """
+    Z-scores of x against the preceding 'window' values of history + x.
+    Returns (indices into x of spikes, their z-scores).
+    """
+    h = len(history)
+    arr = np.concatenate((history, x)).astype(np.float64)
+    if len(arr) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    arr -= arr[0]   # better conditioned running sums
+    cs = np.concatenate(([0.0], np.cumsum(arr)))
+    cs2 = np.concatenate(([0.0], np.cumsum(arr * arr)))
+    p = h + np.arange(len(x))
+    lo = np.maximum(p - window, 0)
+    cnt = p - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs[p] - cs[lo]) / cnt
+        var = np.maximum((cs2[p] - cs2[lo]) / cnt - mean * mean, 0.0)
+        score = np.abs(arr[p] - mean) / np.maximum(np.sqrt(var), 1e-9)
+    hit = np.flatnonzero((cnt >= MIN_HISTORY) & (var > 0) & (score > z))
+    return hit, score[hit]
+
+
+def _merge(ts: np.ndarray, idx: np.ndarray, merge_ms: int) -> list:
+    """Groups sorted spike indices whose timestamps are within merge_ms: [(start, end)] positions into idx."""
+    if len(idx) == 0:
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ts[idx]) > merge_ms) + 1))
+    ends = np.concatenate((starts[1:], [len(idx)]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def detect_gaps(ts: np.ndarray, last_ts, interval, factor: float, min_gap_ms: float = MIN_GAP_MS) -> tuple:
+    """Returns (gap starts, gap ends, updated expected interval) for a chunk of timestamps."""
+    full = ts if last_ts is None else np.concatenate(([last_ts], ts))
+    dt = np.diff(full)
+    positive = dt[dt > 0]
+    if len(positive) >= 8:
+        median = float(np.median(positive))
+        interval = median if interval is None else 0.9 * interval + 0.1 * median
+    if interval is None or len(dt) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), interval
+    hit = np.flatnonzero(dt > max(factor * interval, min_gap_ms))
+    return full[hit], full[hit + 1], interval
+
+
+def detect_stuck(ts: np.ndarray, values: np.ndarray, run: np.ndarray, start: np.ndarray, limit: int) -> tuple:
+    """
+    Per-pad runs of zero readings over loaded samples (some pad non-zero);
+    unloaded samples neither extend nor break a run. 'run'/'start' carry the
+    run length and run start per pad from the previous chunk. Returns
+    ([(pad, run start ms, detected at ms)], new run, new start).
+    """
+    loaded = values.sum(axis=1) > 0
+    t = ts[loaded]
+    zero = values[loaded] == 0
+    m = len(t)
+    if m == 0:
+        return [], run, start
+    idx = np.arange(m)[:, None]
+    last_break = np.maximum.accumulate(np.where(~zero, idx, -1), axis=0)
+    length = np.where(zero, idx - last_break, 0) + np.where(zero & (last_break < 0), run[None, :], 0)
+    events = []
+    rows, pads = np.nonzero(length == limit)
+    for r, k in zip(rows.tolist(), pads.tolist()):
+        first = r - limit + 1
+        events.append((k, int(t[first]) if first >= 0 else int(start[k]), int(t[r])))
+    new_run = length[-1].astype(np.int64)
+    lb = last_break[-1]
+    new_start = np.where(lb >= 0, t[np.minimum(lb + 1, m - 1)], np.where(run > 0, start, t[0]))
+    new_start = np.where(new_run > 0, new_start, 0)
+    return events, new_run, new_start.astype(np.int64)
+
+
+# ------------------------------------------------------------------------------
+# Streaming detector
+# ------------------------------------------------------------------------------
+class StreamingDetector:
+    def __init__(self, log_path: str, db_path: str = None, window: int = WINDOW, z: float = Z_THRESHOLD,
+                 gap_factor: float = GAP_FACTOR, min_gap_ms: float = MIN_GAP_MS, stuck_samples: int = STUCK_SAMPLES,
+                 merge_ms: int = MERGE_MS, chunk_bytes: int = CHUNK_BYTES):
+        self.log_path = os.path.abspath(log_path)
+        self.db_path = db_path or os.path.join(sensor_cache_dir(self.log_path), "anomalies.db")
+        self.window, self.z, self.gap_factor, self.min_gap_ms = window, z, gap_factor, min_gap_ms
+        self.stuck_samples, self.merge_ms, self.chunk_bytes = stuck_samples, merge_ms, chunk_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._load_state()
+
+    # ----- state -----
+    def _load_state(self):
+        row = self._conn.execute("SELECT value FROM state WHERE key = 'detector'").fetchone()
+        state = json.loads(row[0]) if row else {}
+        self.offset = state.get("offset", 0)
+        self.head = state.get("head")
+        self.records = state.get("records", 0)
+        self.channels = {tag: tuple(spec) for tag, spec in state.get("channels", {}).items()} or dict(CHANNELS)
+        self.state = {}
+        for tag, s in state.get("state", {}).items():
+            s = dict(s)
+            s["ring"] = np.asarray(s["ring"], dtype=np.float64)
+            if "run" in s:
+                s["run"] = np.asarray(s["run"], dtype=np.int64)
+                s["start"] = np.asarray(s["start"], dtype=np.int64)
+            self.state[tag] = s
+
+    def _state_json(self) -> str:
+        def plain(s):
+            return {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in s.items()}
+        return json.dumps({
+            "offset": self.offset, "head": self.head, "records": self.records,
+            "channels": {tag: list(spec) for tag, spec in self.channels.items()},
+            "state": {tag: plain(s) for tag, s in self.state.items()},
+        })
+
+    def reset(self):
+        """Forgets all events and state (the log was replaced or truncated)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM events")
+            self._conn.execute("DELETE FROM state")
+            self._conn.execute("COMMIT")
+            self.offset, self.head, self.records, self.state = 0, None, 0, {}
+            self.channels = dict(CHANNELS)
+
+    # ----- detection -----
+    def update(self, arrays: dict) -> list:
+        """
+        Runs the detectors over one parsed chunk ({tag: (timestamps, values)})
+        and returns the new events as (channel, kind, start_ms, end_ms, value, score, detail).
+        """
+        events = []
+        for tag, (ts, values) in arrays.items():
+            if len(ts) == 0:
+                continue
+            width, dtype = self.channels.get(tag, (values.shape[1], str(values.dtype)))
+            pressure = is_pressure(width, dtype)
+            s = self.state.setdefault(tag, {"ring": np.empty(0), "last_ts": None, "interval": None, "n": 0})
+            self.records += len(ts)
+            s["n"] += len(ts)
+
+            signal = signal_column(values)
+            if pressure:
+                if "run" not in s:
+                    s["run"], s["start"] = np.zeros(width, np.int64), np.zeros(width, np.int64)
+                stuck, s["run"], s["start"] = detect_stuck(ts, values, s["run"], s["start"], self.stuck_samples)
+                events += [(tag, "stuck", start, at, 0.0, float(self.stuck_samples), f"pad {pad}")
+                           for pad, start, at in stuck]
+            else:
+                hit, score = detect_spikes(signal, s["ring"], self.window, self.z)
+                for a, b in _merge(ts, hit, self.merge_ms):
+                    peak = a + int(np.argmax(score[a:b]))
+                    events.append((tag, "spike", int(ts[hit[a]]), int(ts[hit[b - 1]]),
+                                   float(signal[hit[peak]]), float(score[peak]), f"{b - a} samples"))
+
+            starts, ends, s["interval"] = detect_gaps(ts, s["last_ts"], s["interval"], self.gap_factor, self.min_gap_ms)
+            events += [(tag, "gap", int(a), int(b), float(b - a), float(b - a) / s["interval"], "")
+                       for a, b in zip(starts.tolist(), ends.tolist())]
+            s["last_ts"] = int(ts[-1])
+            s["ring"] = np.concatenate((s["ring"], signal))[-self.window:]
+        return events
+
+    def poll(self) -> int:
+        """Processes everything appended to the log since the last poll. Returns the number of new events."""
+        if not os.path.exists(self.log_path):
+            return 0
+        size = os.path.getsize(self.log_path)
+        head = _head_digest(self.log_path)
+        if self.head is not None and (head != self.head or size < self.offset):
+            print(f"[INFO] {os.path.basename(self.log_path)} was replaced or truncated; restarting anomaly detection.")
+            self.reset()
+        if self.head is None:
+            self.head = head
+        new = 0
+        for data, offset in iter_chunks(self.log_path, self.offset, self.chunk_bytes):
+            arrays, _ = parse_chunk(data, self.channels)
+            events = self.update(arrays)
+            self.offset = offset
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO events (channel, kind, start_ms, end_ms, value, score, detail) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+                    self._conn.execute("INSERT OR REPLACE INTO state VALUES ('detector', ?)", (self._state_json(),))
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            new += len(events)
+        return new
+
+    def follow(self, interval_s: float = 1.0, stop: threading.Event = None, on_events=None):
+        """Polls the log every interval_s until 'stop' is set, calling on_events(n) when events were added."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            n = self.poll()
+            if n and on_events is not None:
+                on_events(n)
+            stop.wait(interval_s)
+
+    # ----- queries -----
+    def events(self, channel: str = None, kind: str = None, start_ms: int = None, end_ms: int = None,
+               limit: int = 100, order: str = "start_ms") -> list:
+        """Events as dicts, filtered by channel/kind/time range, ordered by 'start_ms' or 'score' (descending)."""
+        sql = "SELECT id, channel, kind, start_ms, end_ms, value, score, detail FROM events WHERE 1 = 1"
+        params = []
+        if channel:
+            sql += " AND channel = ? COLLATE NOCASE"
+            params.append(channel)
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if start_ms is not None:
+            sql += " AND start_ms >= ?"
+            params.append(int(start_ms))
+        if end_ms is not None:
+            sql += " AND start_ms < ?"
+            params.append(int(end_ms))
+        sql += " ORDER BY score DESC" if order == "score" else " ORDER BY start_ms"
+        sql += " LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("id", "channel", "kind", "start_ms", "end_ms", "value", "score", "detail")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def counts(self) -> dict:
+        """{(channel, kind): number of events}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT channel, kind, COUNT(*) FROM events GROUP BY channel, kind").fetchall()
+        return {(channel, kind): n for channel, kind, n in rows}
+
+    def stats(self) -> dict:
+        """Current rolling statistics per channel (window mean/variance of the signal, expected interval)."""
+        out = {}
+        for tag, s in self.state.items():
+            ring = s["ring"]
+            out[tag] = {
+                "samples": s["n"],
+                "window_mean": float(ring.mean()) if len(ring) else None,
+                "window_var": float(ring.var()) if len(ring) else None,
+                "interval_ms": s["interval"],
+                "last_ms": s["last_ts"],
+            }
+        return out
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def open_detector(log_path: str, poll: bool = True) -> StreamingDetector:
+    """Process-wide StreamingDetector for log_path, caught up with the log when 'poll'."""
+    log_path = os.path.abspath(log_path)
+    with _detectors_lock:
+        detector = _detectors.get(log_path)
+        if detector is None:
+            detector = _detectors[log_path] = StreamingDetector(log_path)
+    if poll:
+        detector.poll()
+    return detector
@@ -0,0 +1,280 @@
+"""
+Multi-resolution aggregation pyramid over sensor channels.
+
+For every channel of an ingested log (tools.sensor_store), buckets of 1 s,
+10 s, 1 min and 1 h hold count / sum / sum of squares / min / max for each
+value column plus the channel's signal (vector magnitude for IMU channels,
+total pressure for pressure pads). Buckets are sparse: recording gaps cost
+nothing.
+
+The pyramid is built by sensor_store.ingest from the same parsed chunks as
+the columnar cache, so it follows the log as it grows. Closed buckets are
+appended to one binary file per channel and level
+(<cache>/pyramid/<channel>.<level>.bin); the still-open last bucket of each
+level lives in pyramid.json, so the files are append-only and a crashed
+ingest is rolled back by truncating them to the recorded counts.
+
+Range queries decompose [start, end) into the coarsest whole buckets that fit
+and only read raw samples for the sub-second edges, so they cost O(buckets)
+instead of O(samples) while count, mean, min, max and variance stay exact.
+"""
+import os
+import json
+
+import numpy as np
+
+LEVELS = (("1s", 1000), ("10s", 10000), ("1min", 60000), ("1h", 3600000))
+FORMAT_VERSION = 1
+
+
+def is_pressure(width: int, dtype) -> bool:
+    return width > 3 and np.dtype(dtype).kind in "iu"
+
+
+def signal_column(values: np.ndarray) -> np.ndarray:
+    """The channel's one-dimensional signal: total pressure for pressure pads, vector magnitude otherwise."""
+    if is_pressure(values.shape[1], values.dtype):
+        return values.sum(axis=1, dtype=np.float64)
+    v = np.asarray(values, dtype=np.float64)
+    return np.sqrt(np.einsum("ij,ij->i", v, v))
+
+
+def signal_name(width: int, dtype) -> str:
+    return "total" if is_pressure(width, dtype) else "magnitude"
+
+
+def columns_of(values: np.ndarray) -> np.ndarray:
+    """Value columns plus the signal as the last column, float64."""
+    return np.column_stack((np.asarray(values, dtype=np.float64), signal_column(values)))
+
+
+def record_dtype(columns: int) -> np.dtype:
+    return np.dtype([("t", "<i8"), ("count", "<i8"), ("sum", "<f8", (columns,)), ("sumsq", "<f8", (columns,)),
+                     ("min", "<f8", (columns,)), ("max", "<f8", (columns,))])
+
+
+def aggregate_buckets(ts: np.ndarray, cols: np.ndarray, width_ms: int) -> np.ndarray:
+    """Buckets of width_ms over sorted timestamps, as records of record_dtype."""
+    b = ts // width_ms
+    starts = np.flatnonzero(np.concatenate(([True], b[1:] != b[:-1])))
+    out = np.empty(len(starts), dtype=record_dtype(cols.shape[1]))
+    out["t"] = b[starts] * width_ms
+    out["count"] = np.diff(np.concatenate((starts, [len(ts)])))
+    out["sum"] = np.add.reduceat(cols, starts, axis=0)
+    out["sumsq"] = np.add.reduceat(cols * cols, starts, axis=0)
+    out["min"] = np.minimum.reduceat(cols, starts, axis=0)
+    out["max"] = np.maximum.reduceat(cols, starts, axis=0)
+    return out
+
+
+def _merge_into(rec, other):
+    """Adds bucket 'other' into bucket 'rec' (same start)."""
+    rec["count"] += other["count"]
+    rec["sum"] += other["sum"]
+    rec["sumsq"] += other["sumsq"]
+    rec["min"] = np.minimum(rec["min"], other["min"])
+    rec["max"] = np.maximum(rec["max"], other["max"])
+
+
+def _record_to_json(rec) -> dict:
+    return {name: (rec[name].tolist() if np.ndim(rec[name]) else rec[name].item()) for name in rec.dtype.names}
+
+
+def _record_from_json(data: dict, dtype: np.dtype) -> np.ndarray:
+    rec = np.zeros(1, dtype=dtype)
+    for name in dtype.names:
+        rec[name] = data[name]
+    return rec
+
+
+class Accumulator:
+    """Running count / sum / sumsq / min / max over buckets and raw samples."""
+
+    def __init__(self, columns: int):
+        self.count = 0
+        self.sum = np.zeros(columns)
+        self.sumsq = np.zeros(columns)
+        self.min = np.full(columns, np.inf)
+        self.max = np.full(columns, -np.inf)
+        self.buckets_read = 0
+        self.samples_read = 0
+
+    def add_records(self, recs: np.ndarray):
+        if len(recs) == 0:
+            return
+        self.count += int(recs["count"].sum())
+        self.sum += recs["sum"].sum(axis=0)
+        self.sumsq += recs["sumsq"].sum(axis=0)
+        self.min = np.minimum(self.min, recs["min"].min(axis=0))
+        self.max = np.maximum(self.max, recs["max"].max(axis=0))
+        self.buckets_read += len(recs)
+
+    def add_samples(self, cols: np.ndarray):
+        if len(cols) == 0:
+            return
+        self.count += len(cols)
+        self.sum += cols.sum(axis=0)
+        self.sumsq += (cols * cols).sum(axis=0)
+        self.min = np.minimum(self.min, cols.min(axis=0))
+        self.max = np.maximum(self.max, cols.max(axis=0))
+        self.samples_read += len(cols)
+
+    def result(self, names: list) -> dict:
+        n = self.count
+        mean = self.sum / n if n else np.full(len(names), np.nan)
+        var = np.maximum(self.sumsq / n - mean * mean, 0.0) if n else np.full(len(names), np.nan)
+        return {
+            "count": n,
+            "columns": {name: {"mean": float(mean[i]), "std": float(np.sqrt(var[i])),
+                               "min": float(self.min[i]) if n else None, "max": float(self.max[i]) if n else None}
+                        for i, name in enumerate(names)},
+            "buckets_read": self.buckets_read,
+            "samples_read": self.samples_read,
+        }
+
+
+class Pyramid:
+    def __init__(self, cache_dir: str, writable: bool = False):
+        self.dir = os.path.join(cache_dir, "pyramid")
+        self.meta = self._load() or {"version": FORMAT_VERSION, "offset": 0, "channels": {}}
+        self._maps = {}
+        if writable:
+            os.makedirs(self.dir, exist_ok=True)
+            # Roll back records appended after the last saved pyramid.json.
+            for tag, c in self.meta["channels"].items():
+                itemsize = record_dtype(c["columns"]).itemsize
+                for level, _ in LEVELS:
+                    path = self._path(tag, level)
+                    n = c["levels"][level]["count"]
+                    if os.path.exists(path) and os.path.getsize(path) != n * itemsize:
+                        os.truncate(path, n * itemsize)
+
+    def _load(self) -> dict | None:
+        try:
+            with open(os.path.join(self.dir, "pyramid.json"), "r") as f:
+                meta = json.load(f)
+            return meta if meta.get("version") == FORMAT_VERSION else None
+        except (OSError, ValueError):
+            return None
+
+    def _path(self, tag: str, level: str) -> str:
+        return os.path.join(self.dir, f"{tag}.{level}.bin")
+
+    @property
+    def offset(self) -> int:
+        return self.meta["offset"]
+
+    def reset(self):
+        if os.path.isdir(self.dir):
+            for name in os.listdir(self.dir):
+                os.remove(os.path.join(self.dir, name))
+        self.meta = {"version": FORMAT_VERSION, "offset": 0, "channels": {}}
+        self._maps = {}
+
+    # ----- building -----
+    def update(self, arrays: dict) -> bool:
+        """
+        Adds a parsed chunk ({tag: (timestamps, values)}). Returns False when
+        the chunk cannot be appended (timestamps going backwards); the caller
+        then rebuilds the pyramid from the complete arrays.
+        """
+        for tag, (ts, values) in arrays.items():
+            if len(ts) == 0:
+                continue
+            if np.any(np.diff(ts) < 0):
+                return False
+            c = self.meta["channels"].setdefault(tag, {
+                "columns": values.shape[1] + 1, "signal": signal_name(values.shape[1], values.dtype),
+                "levels": {level: {"count": 0, "open": None} for level, _ in LEVELS},
+            })
+            dtype = record_dtype(c["columns"])
+            cols = columns_of(values)
+            for level, width in LEVELS:
+                state = c["levels"][level]
+                recs = aggregate_buckets(ts, cols, width)
+                if state["open"] is not None:
+                    open_rec = _record_from_json(state["open"], dtype)
+                    if recs["t"][0] < open_rec["t"][0]:
+                        return False
+                    if recs["t"][0] == open_rec["t"][0]:
+                        _merge_into(recs[:1], open_rec)
+                    else:
+                        recs = np.concatenate((open_rec, recs))
+                closed, state["open"] = recs[:-1], _record_to_json(recs[-1])
+                if len(closed):
+                    with open(self._path(tag, level), "ab") as f:
+                        f.write(closed.tobytes())
+                    state["count"] += len(closed)
+        return True
+
+    def rebuild(self, channels: dict, block: int = 1 << 20):
+        """Rebuilds every level from complete per-channel arrays ({tag: (timestamps, values)})."""
+        self.reset()
+        os.makedirs(self.dir, exist_ok=True)
+        for tag, (ts, values) in channels.items():
+            if len(ts) and np.any(np.diff(ts) < 0):
+                order = np.argsort(ts, kind="stable")
+                ts, values = ts[order], values[order]
+            for start in range(0, len(ts), block):
+                self.update({tag: (np.asarray(ts[start:start + block]), np.asarray(values[start:start + block]))})
+
+    def save(self, offset: int):
+        self.meta["offset"] = offset
+        tmp = os.path.join(self.dir, "pyramid.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.dir, "pyramid.json"))
+
+    # ----- reading -----
+    def has(self, tag: str) -> bool:
+        return tag in self.meta["channels"]
+
+    def signal_name(self, tag: str, width: int, dtype) -> str:
+        c = self.meta["channels"].get(tag)
+        return c["signal"] if c else signal_name(width, dtype)
+
+    def _closed(self, tag: str, level: str) -> np.ndarray:
+        c = self.meta["channels"][tag]
+        n = c["levels"][level]["count"]
+        key = (tag, level, n)
+        if key not in self._maps:
+            dtype = record_dtype(c["columns"])
+            self._maps[key] = (np.memmap(self._path(tag, level), dtype=dtype, mode="r", shape=(n,)) if n
+                               else np.empty(0, dtype))
+        return self._maps[key]
+
+    def buckets(self, tag: str, level: str, start: int = None, end: int = None) -> np.ndarray:
+        """Buckets of a level with start <= t < end, the open last bucket included."""
+        c = self.meta["channels"][tag]
+        closed = self._closed(tag, level)
+        t = closed["t"]
+        lo = 0 if start is None else int(np.searchsorted(t, start))
+        hi = len(closed) if end is None else int(np.searchsorted(t, end))
+        part = closed[lo:hi]
+        open_rec = c["levels"][level]["open"]
+        if open_rec is not None and (start is None or open_rec["t"] >= start) and (end is None or open_rec["t"] < end):
+            part = np.concatenate((np.asarray(part), _record_from_json(open_rec, closed.dtype)))
+        return part
+
+    def cover(self, tag: str, start: int, end: int, acc: Accumulator, raw) -> Accumulator:
+        """
+        Accumulates [start, end) from whole buckets, coarsest first; the
+        sub-second edges come from raw(start, end) -> value columns.
+        """
+        stack = [(start, end, len(LEVELS) - 1)]
+        while stack:
+            lo, hi, li = stack.pop()
+            if lo >= hi:
+                continue
+            if li < 0:
+                acc.add_samples(raw(lo, hi))
+                continue
+            level, width = LEVELS[li]
+            a, b = -(-lo // width) * width, hi // width * width
+            if a >= b:
+                stack.append((lo, hi, li - 1))
+                continue
+            acc.add_records(self.buckets(tag, level, a, b))
+            stack.append((lo, a, li - 1))
+            stack.append((b, hi, li - 1))
+        return acc
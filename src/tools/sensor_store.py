@@ -0,0 +1,516 @@
+"""
+Columnar, memory-mapped cache of sensor logs.
+
+sensor_log.txt-style files interleave record types keyed by epoch-ms:
+
+    1705991914500,GYRO,-0.048258353,0.25977045,-0.124311075
+    1705991914576,LeftFoot,0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0
+
+ingest() splits a log by record type into per-channel typed arrays in one
+vectorised pass over each chunk (no per-line Python loop): newline and comma
+positions are located with NumPy, every row's tag is mapped to a channel id,
+the tag bytes are blanked and all numbers are parsed at once. Each channel is
+persisted as two raw binary files next to the log,
+
+    <log dir>/.cache/sensor/<log name>/<channel>.ts.bin      int64 epoch-ms (the timestamp index)
+    <log dir>/.cache/sensor/<log name>/<channel>.values.bin  float32 / int32, (n, width)
+
+described by meta.json (byte offset consumed, row counts, dtypes). SensorStore
+opens them with np.memmap, so queries only touch the pages they need. When
+the log grows, only the appended tail is parsed and appended; a log that was
+truncated or replaced is rebuilt from scratch.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+import numpy as np
+
+from .sensor_pyramid import Pyramid, Accumulator, LEVELS, columns_of
+
+# Known record types: tag -> (values per row, dtype). Unknown tags are picked
+# up automatically as float32 channels with the width of their first row.
+CHANNELS = {
+    "ACC": (3, "float32"),
+    "GYRO": (3, "float32"),
+    "MAG": (3, "float32"),
+    "LeftFoot": (18, "int32"),
+}
+CHUNK_BYTES = int(os.environ.get("EDA_SENSOR_CHUNK_BYTES", str(16 << 20)))
+HEAD_BYTES = 4096   # hashed to recognise a replaced log
+FORMAT_VERSION = 1
+
+_NL, _COMMA, _CR, _SPACE, _ZERO = 10, 44, 13, 32, 48
+
+
+def sensor_cache_dir(log_path: str) -> str:
+    log_path = os.path.abspath(log_path)
+    return os.path.join(os.path.dirname(log_path), ".cache", "sensor", os.path.basename(log_path))
+
+
+def _head_digest(log_path: str) -> str:
+    with open(log_path, "rb") as f:
+        return hashlib.sha1(f.read(HEAD_BYTES)).hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# Vectorised chunk parser
+# ------------------------------------------------------------------------------
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated np.arange(start, start + length) for every pair, without a Python loop."""
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = starts - np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.repeat(shift, lengths) + np.arange(total)
+
+
+def parse_chunk(data: bytes, channels: dict) -> tuple:
+    """
+    Parses complete lines of 'data' into {tag: (timestamps int64, values (n, width))}.
+    'channels' ({tag: (width, dtype)}) is extended in place with tags seen for
+    the first time. Returns (arrays, number of malformed rows skipped).
+    """
+    buf = np.frombuffer(data, dtype=np.uint8).copy()
+    size = len(buf)
+    ends = np.flatnonzero(buf == _NL)
+    if len(ends) == 0 or ends[-1] != size - 1:
+        ends = np.append(ends, size)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    commas = np.flatnonzero(buf == _COMMA)
+    first = np.searchsorted(commas, starts)
+    n_commas = np.searchsorted(commas, ends) - first
+
+    # Lines without a timestamp and a tag (blank lines, fragments) are blanked out.
+    ok = n_commas >= 2
+    bad = int((~ok & (ends - starts > 0)).sum())
+    drop = np.flatnonzero(~ok)
+    blank = _ranges(starts[drop], np.minimum(ends[drop] + 1, size) - starts[drop])
+    buf[blank] = _SPACE
+    starts, ends, first, n_commas = starts[ok], ends[ok], first[ok], n_commas[ok]
+    if len(starts) == 0:
+        return {}, bad
+    c1, c2 = commas[first], commas[first + 1]
+    tag_len = c2 - c1 - 1
+
+    # Tag id: its first 7 bytes and its length packed into a uint64.
+    key = np.minimum(tag_len, 255).astype(np.uint64) << np.uint64(56)
+    for j in range(7):
+        byte = np.where(tag_len > j, buf[np.minimum(c1 + 1 + j, size - 1)], 0).astype(np.uint64)
+        key |= byte << np.uint64(8 * j)
+    unique_keys, inverse = np.unique(key, return_inverse=True)
+    tags = []
+    for u in range(len(unique_keys)):
+        rows = np.flatnonzero(inverse == u)
+        i, n = int(rows[0]), int(tag_len[rows[0]])
+        if n > 7:
+            # Longer tags only share their first 7 bytes: compare them in full.
+            full = buf[c1[rows][:, None] + 1 + np.arange(n)]
+            if not np.all(full == full[0]):
+                return _parse_lines(data, channels)
+        tags.append(bytes(buf[c1[i] + 1:c2[i]]).decode("ascii", "replace").strip())
+
+    # Blank the tag text so the chunk becomes one comma-separated number stream.
+    buf[_ranges(c1 + 1, tag_len)] = _SPACE
+    buf[c2[tag_len > 0] - 1] = _ZERO
+    buf[ends[ends < size]] = _COMMA
+    buf[buf == _CR] = _SPACE
+    n_fields = n_commas + 1
+    try:
+        flat = np.fromstring(buf.tobytes().rstrip(b", "), dtype=np.float64, sep=",")
+    except ValueError:
+        flat = None
+    if flat is None or len(flat) != int(n_fields.sum()):
+        return _parse_lines(data, channels)
+
+    row_start = np.concatenate(([0], np.cumsum(n_fields)[:-1]))
+    out = {}
+    for u, tag in enumerate(tags):
+        rows = inverse == u
+        if tag not in channels:
+            channels[tag] = (int(n_fields[rows][0]) - 2, "float32")
+        width, dtype = channels[tag]
+        good = rows & (n_fields == width + 2)
+        bad += int(rows.sum() - good.sum())
+        if not good.any():
+            continue
+        block = flat[row_start[good][:, None] + np.arange(width + 2)]
+        out[tag] = (block[:, 0].astype(np.int64), block[:, 2:].astype(dtype))
+    return out, bad
+
+
+def _parse_lines(data: bytes, channels: dict) -> tuple:
+    """Fallback for chunks with non-numeric garbage: row-by-row, skipping bad rows."""
+    rows, bad = {}, 0
+    for line in data.splitlines():
+        parts = line.split(b",")
+        if len(parts) < 3:
+            bad += line.strip() != b""
+            continue
+        tag = parts[1].decode("ascii", "replace").strip()
+        if tag not in channels:
+            channels[tag] = (len(parts) - 2, "float32")
+        width, _ = channels[tag]
+        try:
+            if len(parts) != width + 2:
+                raise ValueError
+            rows.setdefault(tag, []).append((int(parts[0]), [float(p) for p in parts[2:]]))
+        except ValueError:
+            bad += 1
+    out = {}
+    for tag, items in rows.items():
+        width, dtype = channels[tag]
+        out[tag] = (np.array([t for t, _ in items], dtype=np.int64),
+                    np.array([v for _, v in items], dtype=np.float64).reshape(-1, width).astype(dtype))
+    return out, bad
+
+
+# ------------------------------------------------------------------------------
+# Ingestion
+# ------------------------------------------------------------------------------
+def _load_meta(cache_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+        return meta if meta.get("version") == FORMAT_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(cache_dir: str, meta: dict):
+    tmp = os.path.join(cache_dir, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, "meta.json"))
+
+
+def _channel_files(cache_dir: str, tag: str) -> tuple:
+    return os.path.join(cache_dir, f"{tag}.ts.bin"), os.path.join(cache_dir, f"{tag}.values.bin")
+
+
+def iter_chunks(log_path: str, offset: int, chunk_bytes: int = CHUNK_BYTES):
+    """
+    Yields (data, end offset) for the complete lines of log_path after
+    'offset', about chunk_bytes at a time. A partial last line (a writer in
+    the middle of a record) is left for the next call.
+    """
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                return
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                if len(data) < chunk_bytes:
+                    return         # partial last line: wait for its newline
+                cut = len(data)    # a single line longer than a chunk
+            offset += cut
+            f.seek(offset)
+            yield data[:cut], offset
+
+
+def ingest(log_path: str, cache_dir: str = None, chunk_bytes: int = CHUNK_BYTES, on_chunk=None) -> dict:
+    """
+    Brings the columnar cache of 'log_path' up to date and returns its meta.
+    Only bytes after the last consumed offset are parsed; a partial last line
+    is left for the next call. 'on_chunk(arrays)' is called with every parsed
+    chunk ({tag: (timestamps, values)}), so derived indexes can follow along;
+    the aggregation pyramid (tools.sensor_pyramid) is maintained here.
+    """
+    log_path = os.path.abspath(log_path)
+    cache_dir = cache_dir or sensor_cache_dir(log_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    size = os.path.getsize(log_path)
+    head = _head_digest(log_path)
+    meta = _load_meta(cache_dir)
+    if meta is None or meta["source"] != log_path or meta["head"] != head or size < meta["offset"]:
+        if meta is not None:
+            print(f"[INFO] {os.path.basename(log_path)} was replaced or truncated; rebuilding its sensor cache.")
+        for name in os.listdir(cache_dir):
+            if name.endswith(".bin"):
+                os.remove(os.path.join(cache_dir, name))
+        meta = {"version": FORMAT_VERSION, "source": log_path, "head": head, "offset": 0,
+                "size": 0, "skipped": 0, "channels": {}, "rebuilt": True}
+    else:
+        meta["rebuilt"] = False
+    pyramid = Pyramid(cache_dir, writable=True)
+    if meta["rebuilt"]:
+        pyramid.reset()
+    in_sync = pyramid.offset == meta["offset"]
+    if size == meta["offset"] and in_sync:
+        return meta
+
+    channels = {tag: (c["width"], c["dtype"]) for tag, c in meta["channels"].items()}
+    for tag, spec in CHANNELS.items():
+        channels.setdefault(tag, spec)
+    # Drop bytes written after the last saved meta (an interrupted ingest).
+    for tag, c in meta["channels"].items():
+        ts_path, val_path = _channel_files(cache_dir, tag)
+        for path, itemsize in ((ts_path, 8), (val_path, np.dtype(c["dtype"]).itemsize * c["width"])):
+            if os.path.exists(path) and os.path.getsize(path) != c["count"] * itemsize:
+                os.truncate(path, c["count"] * itemsize)
+
+    t0 = time.perf_counter()
+    offset, parsed = meta["offset"], 0
+    for data, offset in iter_chunks(log_path, offset, chunk_bytes):
+        parsed += len(data)
+        arrays, bad = parse_chunk(data, channels)
+        for tag, (ts, values) in arrays.items():
+            ts_path, val_path = _channel_files(cache_dir, tag)
+            with open(ts_path, "ab") as out:
+                out.write(np.ascontiguousarray(ts).tobytes())
+            with open(val_path, "ab") as out:
+                out.write(np.ascontiguousarray(values).tobytes())
+            width, dtype = channels[tag]
+            c = meta["channels"].setdefault(tag, {"width": width, "dtype": dtype, "count": 0,
+                                                  "first": int(ts[0]), "last": int(ts[0]), "sorted": True})
+            c["sorted"] = c["sorted"] and int(ts[0]) >= c["last"] and bool(np.all(np.diff(ts) >= 0))
+            c["count"] += len(ts)
+            c["last"] = int(ts[-1])
+        if in_sync and arrays:
+            in_sync = pyramid.update(arrays)
+        if on_chunk is not None and arrays:
+            on_chunk(arrays)
+        meta["skipped"] += bad
+    meta.update(offset=offset, size=max(size, offset), updated_at=time.time())
+    if not in_sync:
+        # Out-of-order timestamps, or a cache from before the pyramid existed.
+        store = SensorStore(cache_dir, meta)
+        pyramid.rebuild({tag: (store.timestamps(tag), store.values(tag)) for tag in store.channels})
+        print(f"[INFO] Rebuilt the aggregation pyramid of {os.path.basename(log_path)}.")
+    pyramid.save(offset)
+    _save_meta(cache_dir, meta)
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] Ingested {parsed / 1e6:.1f} MB of {os.path.basename(log_path)} in {elapsed:.2f}s "
+          f"({sum(c['count'] for c in meta['channels'].values())} rows cached).")
+    return meta
+
+
+# ------------------------------------------------------------------------------
+# Queries
+# ------------------------------------------------------------------------------
+class SensorStore:
+    """Read-only, memory-mapped view of an ingested log with vectorised queries."""
+
+    def __init__(self, cache_dir: str, meta: dict):
+        self.cache_dir = cache_dir
+        self.meta = meta
+        self._pyramid = None
+        self._ts, self._values = {}, {}
+        for tag, c in meta["channels"].items():
+            ts_path, val_path = _channel_files(cache_dir, tag)
+            n = c["count"]
+            self._ts[tag] = np.memmap(ts_path, dtype=np.int64, mode="r", shape=(n,)) if n else np.empty(0, np.int64)
+            self._values[tag] = (np.memmap(val_path, dtype=c["dtype"], mode="r", shape=(n, c["width"]))
+                                 if n else np.empty((0, c["width"]), c["dtype"]))
+            if not c.get("sorted", True):
+                order = np.argsort(self._ts[tag], kind="stable")
+                self._ts[tag], self._values[tag] = self._ts[tag][order], self._values[tag][order]
+
+    @property
+    def channels(self) -> list:
+        return sorted(self._ts)
+
+    def _channel(self, channel: str) -> str:
+        for tag in self._ts:
+            if tag.lower() == channel.lower():
+                return tag
+        raise KeyError(f"Unknown channel '{channel}'. Available: {', '.join(self.channels)}")
+
+    def timestamps(self, channel: str) -> np.ndarray:
+        return self._ts[self._channel(channel)]
+
+    def values(self, channel: str) -> np.ndarray:
+        return self._values[self._channel(channel)]
+
+    def window(self, channel: str, start_ms: int = None, end_ms: int = None) -> tuple:
+        """(timestamps, values) with start_ms <= t < end_ms, by binary search on the timestamp index."""
+        ts, values = self.timestamps(channel), self.values(channel)
+        lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+        hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="left"))
+        return ts[lo:hi], values[lo:hi]
+
+    def magnitude(self, channel: str, start_ms: int = None, end_ms: int = None) -> tuple:
+        """(timestamps, Euclidean norm of each row) for the time range."""
+        ts, values = self.window(channel, start_ms, end_ms)
+        v = np.asarray(values, dtype=np.float64)
+        return ts, np.sqrt(np.einsum("ij,ij->i", v, v))
+
+    def sample_rate(self, channel: str) -> dict:
+        """Sample count, duration and rate (Hz, from the median and mean interval) of a channel."""
+        ts = self.timestamps(channel)
+        if len(ts) < 2:
+            return {"count": len(ts), "duration_s": 0.0, "median_hz": 0.0, "mean_hz": 0.0}
+        dt = np.diff(ts)
+        median = float(np.median(dt))
+        duration = (int(ts[-1]) - int(ts[0])) / 1000.0
+        return {
+            "count": len(ts),
+            "duration_s": duration,
+            "median_interval_ms": median,
+            "median_hz": 1000.0 / median if median > 0 else float("inf"),
+            "mean_hz": (len(ts) - 1) / duration if duration > 0 else float("inf"),
+        }
+
+    def gaps(self, channel: str, min_gap_ms: float = None, factor: float = 5.0) -> list:
+        """
+        [(gap start ms, gap end ms, duration ms)] where consecutive samples are
+        further apart than min_gap_ms (default: 'factor' x the median interval).
+        """
+        ts = self.timestamps(channel)
+        if len(ts) < 2:
+            return []
+        dt = np.diff(ts)
+        threshold = min_gap_ms if min_gap_ms is not None else factor * float(np.median(dt))
+        idx = np.flatnonzero(dt > threshold)
+        return [(int(ts[i]), int(ts[i + 1]), int(dt[i])) for i in idx]
+
+    def nearest(self, channel: str, timestamp_ms: int) -> tuple:
+        """(index, timestamp, values) of the sample closest to timestamp_ms."""
+        ts = self.timestamps(channel)
+        if len(ts) == 0:
+            raise ValueError(f"Channel '{channel}' has no samples.")
+        i = int(np.searchsorted(ts, timestamp_ms))
+        if i == len(ts) or (i > 0 and timestamp_ms - ts[i - 1] <= ts[i] - timestamp_ms):
+            i -= 1
+        return i, int(ts[i]), np.asarray(self.values(channel)[i])
+
+    def export(self, channel: str, path: str, fmt: str = None, start_ms: int = None, end_ms: int = None) -> int:
+        """Writes a channel (optionally a time range) as CSV or Parquet. Returns the number of rows."""
+        tag = self._channel(channel)
+        ts, values = self.window(tag, start_ms, end_ms)
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "csv").lower()
+        columns = ["timestamp"] + [f"{tag}_{i}" for i in range(values.shape[1])]
+        if fmt == "parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+            table = pa.table([np.asarray(ts)] + [np.asarray(values[:, i]) for i in range(values.shape[1])], names=columns)
+            pq.write_table(table, path)
+        elif fmt == "csv":
+            is_int = np.issubdtype(values.dtype, np.integer)
+            with open(path, "w") as f:
+                f.write(",".join(columns) + "\n")
+                for start in range(0, len(ts), 100000):
+                    block = np.column_stack([ts[start:start + 100000], values[start:start + 100000]])
+                    np.savetxt(f, block, delimiter=",", fmt="%d" if is_int else ["%d"] + ["%.7g"] * values.shape[1])
+        else:
+            raise ValueError(f"Unsupported export format '{fmt}' (csv or parquet)")
+        return len(ts)
+
+    def summary(self) -> dict:
+        return {tag: dict(self.meta["channels"][tag], **self.sample_rate(tag)) for tag in self.channels}
+
+    # ----- aggregation pyramid -----
+    @property
+    def pyramid(self) -> Pyramid:
+        if self._pyramid is None:
+            self._pyramid = Pyramid(self.cache_dir)
+        return self._pyramid
+
+    def _raw_columns(self, tag: str):
+        width = self.meta["channels"][tag]["width"]
+
+        def raw(start_ms: int, end_ms: int) -> np.ndarray:
+            _, values = self.window(tag, start_ms, end_ms)
+            return columns_of(values) if len(values) else np.empty((0, width + 1))
+        return raw
+
+    def _range(self, tag: str, start_ms: int = None, end_ms: int = None) -> tuple:
+        ts = self._ts[tag]
+        start = int(ts[0]) if start_ms is None else int(start_ms)
+        end = int(ts[-1]) + 1 if end_ms is None else int(end_ms)
+        return start, end
+
+    def aggregate(self, channel: str, start_ms: int = None, end_ms: int = None) -> dict:
+        """
+        Exact count / mean / std / min / max of every value column and of the
+        signal (magnitude or total pressure) over [start_ms, end_ms), from
+        whole pyramid buckets plus raw samples at the sub-second edges.
+        """
+        tag = self._channel(channel)
+        width = self.meta["channels"][tag]["width"]
+        acc = Accumulator(width + 1)
+        if len(self._ts[tag]) and self.pyramid.has(tag):
+            start, end = self._range(tag, start_ms, end_ms)
+            self.pyramid.cover(tag, start, end, acc, self._raw_columns(tag))
+        elif len(self._ts[tag]):
+            acc.add_samples(self._raw_columns(tag)(*self._range(tag, start_ms, end_ms)))
+        names = [f"{tag}_{i}" for i in range(width)] + [self.pyramid.signal_name(tag, width, self.meta["channels"][tag]["dtype"])]
+        return acc.result(names)
+
+    def series(self, channel: str, start_ms: int = None, end_ms: int = None, max_points: int = 1000,
+               level: str = None) -> dict:
+        """
+        Bucketed series for plotting: the finest pyramid level with at most
+        max_points buckets in the range (or 'level'), as arrays t (bucket start
+        ms), count, and mean/min/max of every column; the signal is the last
+        column.
+        """
+        tag = self._channel(channel)
+        if not len(self._ts[tag]):
+            return {"level": level, "t": np.empty(0, np.int64)}
+        start, end = self._range(tag, start_ms, end_ms)
+        levels = [(name, width) for name, width in LEVELS if level is None or name == level]
+        if not levels:
+            raise ValueError(f"Unknown level '{level}'. Available: {', '.join(name for name, _ in LEVELS)}")
+        for name, width in levels:
+            recs = self.pyramid.buckets(tag, name, start // width * width, end)
+            if len(recs) <= max_points:
+                break
+        count = recs["count"].astype(np.float64)
+        return {
+            "level": name, "t": np.asarray(recs["t"]), "count": np.asarray(recs["count"]),
+            "mean": recs["sum"] / count[:, None], "min": np.asarray(recs["min"]), "max": np.asarray(recs["max"]),
+        }
+
+    def peaks(self, channel: str, k: int = 3, start_ms: int = None, end_ms: int = None) -> list:
+        """
+        The k highest signal samples in distinct seconds, as [(timestamp, value)]:
+        candidate seconds come from the 1 s buckets' maxima, and only those
+        seconds are read from the raw samples.
+        """
+        tag = self._channel(channel)
+        if not len(self._ts[tag]):
+            return []
+        start, end = self._range(tag, start_ms, end_ms)
+        recs = self.pyramid.buckets(tag, "1s", start // 1000 * 1000, end)
+        top = recs["max"][:, -1]
+        candidates = np.argsort(-top)[:k] if len(top) <= 4 * k else np.argpartition(-top, 2 * k)[:2 * k]
+        found = []
+        for i in candidates.tolist():
+            t = int(recs["t"][i])
+            ts, values = self.window(tag, max(t, start), min(t + 1000, end))
+            if len(ts):
+                signal = columns_of(values)[:, -1]
+                j = int(np.argmax(signal))
+                found.append((int(ts[j]), float(signal[j])))
+        return sorted(found, key=lambda p: -p[1])[:k]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_sensor_store(log_path: str, refresh: bool = True) -> SensorStore:
+    """
+    SensorStore for log_path. With 'refresh', the cache is first brought up to
+    date (parsing only the appended tail); the store is reused while the log
+    has not grown.
+    """
+    log_path = os.path.abspath(log_path)
+    cache_dir = sensor_cache_dir(log_path)
+    with _stores_lock:
+        store = _stores.get(log_path)
+        if store is not None and (not refresh or os.path.getsize(log_path) == store.meta["size"]):
+            return store
+        meta = ingest(log_path, cache_dir) if refresh else _load_meta(cache_dir)
+        if meta is None:
+            raise FileNotFoundError(f"No sensor cache for {log_path}; ingest it first.")
+        store = _stores[log_path] = SensorStore(cache_dir, meta)
+        return store
@@ -6,6 +6,10 @@ from smolagents import tool
 def api_setup(MODEL_API_KEY_NAME: str, API_KEY: str) -> str:
     """
     Sets an environment variable for the API key.
+
+    Args:
+        MODEL_API_KEY_NAME: Name of the environment variable, e.g. XAI_API_KEY.
+        API_KEY: The API key value.
     """
     try:
         os.environ[MODEL_API_KEY_NAME] = API_KEY
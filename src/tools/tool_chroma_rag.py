@@ -1,23 +1,45 @@
 import os
-import yaml
 import datetime
-import chromadb
-from chromadb.config import Settings as ChromaSettings
 from smolagents import Tool
-from sentence_transformers import SentenceTransformer
 
-# Registry helper functions
-REGISTRY_FILE = "data_registry.yaml"
+from .data_registry import get_entry, update_entry_metadata
+from .embedding_pipeline import run_pipeline
+from .chroma_pool import CHROMA_POOL
+from .change_detection import CHANGE_DETECTOR
+from .keyword_index import open_keyword_index, normalize_mode, reciprocal_rank_fusion
+from .query_cache import QUERY_CACHE
 
-def load_registry():
-    if os.path.exists(REGISTRY_FILE):
-        with open(REGISTRY_FILE, "r") as f:
-            return yaml.safe_load(f) or []
-    return []
+# chromadb and sentence_transformers (torch) are imported on the first query only.
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+_embedding_models = {}
 
-def find_entry(data_dir, registry):
-    abs_data_dir = os.path.abspath(data_dir)
-    return next((e for e in registry if os.path.abspath(e["data_directory"]) == abs_data_dir), None)
+def get_embedding_model(model_name: str = EMBED_MODEL_NAME):
+    """Loads a SentenceTransformer once per process and shares it between tool instances."""
+    if model_name not in _embedding_models:
+        from sentence_transformers import SentenceTransformer
+        _embedding_models[model_name] = SentenceTransformer(model_name)
+    return _embedding_models[model_name]
+
+# Worker processes for indexing; unset = in-process for small corpora, one per core otherwise.
+EMBED_WORKERS = os.environ.get("EDA_EMBED_WORKERS")
+SMALL_CORPUS_BYTES = 8 * 1024 * 1024
+
+def _backfill_keywords(collection, keywords, page_size: int = 1000):
+    """Copies the chunks of a collection built before keyword search existed into its keyword index."""
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return
+        keywords.add(page["ids"], page["documents"], page["metadatas"])
+        offset += len(page["ids"])
+
+def _corpus_bytes(data_dir):
+    total = 0
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
 
 class ChromaRAGTool(Tool):
     name = "chroma_rag_tool"
@@ -26,65 +48,112 @@ class ChromaRAGTool(Tool):
     inputs = {
         "data_dir": {"type": "string", "description": "Directory with data files."},
         "question": {"type": "string", "description": "Query question."},
-        "top_k": {"type": "integer", "description": "Number of similar docs to retrieve."}
+        "top_k": {"type": "integer", "description": "Number of similar docs to retrieve."},
+        "retrieval_mode": {
+            "type": "string",
+            "description": "'vector', 'keyword' (BM25, no question embedding) or 'hybrid' (rank-fused).",
+            "default": "",
+            "nullable": True
+        }
     }
     output_type = "string"
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
 
-    def forward(self, data_dir: str, question: str, top_k: int) -> str:
-        # Load registry and check for an existing entry
-        registry = load_registry()
-        entry = find_entry(data_dir, registry)
-        
+    @property
+    def embedding_model(self):
+        return get_embedding_model()
+
+    def forward(self, data_dir: str, question: str, top_k: int, retrieval_mode: str = "") -> str:
+        try:
+            mode = normalize_mode(retrieval_mode)
+        except ValueError as e:
+            return str(e)
+
+        # Load the registry entry; Chroma state lives under metadata["chroma"] so it
+        # does not clash with the llama_index cache RAGTool keeps for the same directory.
+        entry = get_entry(data_dir)
+        chroma_info = (entry or {}).get("metadata", {}).get("chroma")
+        generation = CHANGE_DETECTOR.generation(data_dir)
+
         # Determine cache directory: use registry entry if exists; otherwise, create one.
-        cache_dir = entry["cache_file_directory"] if entry else os.path.join(data_dir, ".cache/chroma_db")
+        cache_dir = chroma_info["cache_file_directory"] if chroma_info else os.path.abspath(os.path.join(data_dir, ".cache/chroma_db"))
         os.makedirs(cache_dir, exist_ok=True)
-
-        # Initialize Chroma client with local persistence.
-        client = chromadb.Client(ChromaSettings(persist_directory=cache_dir))
         collection_name = "rag_collection"
 
-        # If no registry entry or the collection doesn't exist, build a new index.
-        if not entry or collection_name not in [c.name for c in client.list_collections()]:
-            if collection_name in [c.name for c in client.list_collections()]:
-                client.delete_collection(collection_name)
-            collection = client.create_collection(collection_name)
-
-            documents = []
-            doc_ids = []
-            for root, _, files in os.walk(data_dir):
-                for file in files:
-                    path = os.path.join(root, file)
-                    try:
-                        with open(path, "r", encoding="utf-8") as f:
-                            text = f.read()
-                            documents.append(text)
-                            doc_ids.append(path)
-                    except Exception as e:
-                        print(f"Error reading {path}: {e}")
-                        continue
-
-            if documents:
-                embeddings = self.embedding_model.encode(documents).tolist()
-                collection.add(documents=documents, embeddings=embeddings, ids=doc_ids)
-            else:
-                return "No valid text documents found to index."
-        else:
-            collection = client.get_collection(collection_name)
-
-        # Encode the query and retrieve results.
-        query_embedding = self.embedding_model.encode(question).tolist()
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            include=["documents", "distances"]
-        )
+        # The client and collection handle come from a process-wide pool, so warm
+        # queries skip client start-up and collection lookups entirely.
+        with CHROMA_POOL.lock_for(cache_dir):
+            collection = CHROMA_POOL.get_collection(cache_dir, collection_name)
+            keywords = open_keyword_index(cache_dir)
+
+            # If the registry has no Chroma entry (never built, or cleared), the collection
+            # doesn't exist, or the data changed since it was built, build a new index.
+            stale = chroma_info is not None and chroma_info.get("generation") != generation
+            if collection is None or stale or not chroma_info:
+                collection = CHROMA_POOL.reset_collection(cache_dir, collection_name)
+                keywords.clear()
+
+                # Stream files -> chunks -> batched embeddings -> collection, with bounded memory.
+                if EMBED_WORKERS is not None:
+                    workers = int(EMBED_WORKERS)
+                else:
+                    workers = 0 if _corpus_bytes(data_dir) < SMALL_CORPUS_BYTES else None
+                stats = run_pipeline(
+                    data_dir,
+                    collection,
+                    workers=workers,
+                    encoder=self.embedding_model if workers == 0 else None,
+                    keyword_index=keywords,
+                )
+                print(
+                    f"[INFO] Indexed {stats['chunks']} chunks from {stats['files']} files in {stats['seconds']:.2f}s "
+                    f"({stats['chunks_per_sec']:.1f} chunks/s, peak RSS {stats['peak_rss_mb']['self']:.0f} MB)"
+                )
+                if not stats["chunks"]:
+                    return "No valid text documents found to index."
+                entry = update_entry_metadata(data_dir, "chroma", {
+                    "cache_file_directory": cache_dir,
+                    "collection": collection_name,
+                    "indexed_at": datetime.datetime.now().isoformat(),
+                    "chunks": stats["chunks"],
+                    "generation": generation,
+                })
+                chroma_info = entry["metadata"]["chroma"]
+            elif mode != "vector" and keywords.count() == 0:
+                _backfill_keywords(collection, keywords)
+
+        # Retrieve results; the question is only embedded for vector/hybrid search. Question
+        # embeddings and results are cached; results are keyed by the build of the collection.
+        def _retrieve():
+            hits = []
+            if mode != "keyword":
+                query_embedding = QUERY_CACHE.embedding(EMBED_MODEL_NAME, question, self.embedding_model.encode)
+                results = collection.query(
+                    query_embeddings=[query_embedding.tolist()],
+                    n_results=top_k,
+                    include=["documents", "distances"]
+                )
+                hits = [
+                    {"id": i, "text": doc, "score": dist}
+                    for i, doc, dist in zip(results["ids"][0], results["documents"][0], results["distances"][0])
+                ]
+            if mode != "vector":
+                keyword_hits = keywords.search(question, top_k)
+                if mode == "hybrid":
+                    by_id = {h["id"]: h for h in keyword_hits + hits}
+                    fused = reciprocal_rank_fusion([[h["id"] for h in hits], [h["id"] for h in keyword_hits]])
+                    hits = [dict(by_id[i], score=score) for i, score in fused[:top_k]]
+                else:
+                    hits = keyword_hits
+            return hits
+
+        fingerprint = (cache_dir, chroma_info["indexed_at"], chroma_info.get("generation"))
+        hits = QUERY_CACHE.results(fingerprint, question, top_k, mode, _retrieve)
 
         # Format the output.
         output = "RAG Query Results:\n"
-        for doc, dist in zip(results["documents"][0], results["distances"][0]):
-            output += f"Doc (score {dist:.3f}): {doc[:150]}...\n\n"
+        for hit in hits:
+            output += f"Doc (score {hit['score']:.3f}): {hit['text'][:150]}...\n\n"
         return output
@@ -1,12 +1,16 @@
 from smolagents import Tool
 
+from .pdf_pages import pdf_text
+from .archive_vfs import SEP, read_text
+
 class FileReader(Tool):
     name = "file_reader"
     description = "Read the content from a file."
     inputs = {
         "filename": {
             "type": "string",
-            "description": "the filename to read from."
+            "description": "the filename to read from (text or PDF); a file inside tar/zip archives "
+                           "is named like 'bundle.tar!/inner.zip!/dir/file.csv'."
         }
     }
     
@@ -16,7 +20,11 @@ class FileReader(Tool):
         super().__init__(**kwargs)
 
     def forward(self, filename: str) -> str:
-        # Read the content of the file and return it.
+        # PDFs are read through the shared page cache; archive members through the VFS; anything else as text.
+        if filename.lower().endswith(".pdf") and SEP not in filename:
+            return pdf_text(filename)
+        if SEP in filename:
+            return read_text(filename)
         with open(filename, "r") as file:
             content = file.read()
         return content
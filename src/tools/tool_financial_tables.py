@@ -0,0 +1,80 @@
+from smolagents import Tool
+
+from .financial_tables import open_financial_index, normalize_metric, METRICS, RATIOS
+
+
+class FinancialTables(Tool):
+    name = "financial_tables"
+    description = (
+        "Look up figures from the consolidated financial statements (operations, balance sheet, "
+        "comprehensive income, cash flows) of the 10-K PDFs in a data directory, with year-over-year "
+        f"changes. Metrics: {', '.join(sorted(list(METRICS) + list(RATIOS)))}. "
+        "Alternatively pass 'line_item' to search any statement line (e.g. 'automotive sales')."
+    )
+    inputs = {
+        "data_directory": {
+            "type": "string",
+            "description": "Directory containing the 10-K PDF filings."
+        },
+        "metric": {
+            "type": "string",
+            "description": "Metric name, e.g. 'revenue', 'net_income', 'research_and_development', 'capex', 'gross_margin'.",
+            "default": "",
+            "nullable": True
+        },
+        "fiscal_year": {
+            "type": "string",
+            "description": "Optional fiscal year (e.g. '2024'); all years when empty.",
+            "default": "",
+            "nullable": True
+        },
+        "line_item": {
+            "type": "string",
+            "description": "Optional free-text line item to search instead of a metric.",
+            "default": "",
+            "nullable": True
+        }
+    }
+    output_type = "string"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def forward(self, data_directory: str, metric: str = "", fiscal_year: str = "", line_item: str = "") -> str:
+        try:
+            index = open_financial_index(data_directory)
+            year = int(fiscal_year) if fiscal_year else None
+            if line_item:
+                rows = index.search(line_item)
+                if year is not None:
+                    rows = [r for r in rows if r["period"] == f"FY{year}"]
+                if not rows:
+                    return f"No statement line matching '{line_item}'."
+                return "\n".join(
+                    f"{r['statement']} | {r['line_item']} | {r['period']} | {r['value']:,.0f} | {r['document']} p.{r['page'] + 1}"
+                    for r in rows
+                )
+            if not metric:
+                return "Error: pass either 'metric' or 'line_item'."
+            name = normalize_metric(metric)
+            series = index.metric(name)
+            if not series:
+                return f"No values found for '{name}'."
+            ratio = name in RATIOS
+            lines = [f"{name} (USD millions)" if not ratio else name]
+            for y, value, prev, change, rel in index.yoy(name, year):
+                if ratio:
+                    lines.append(f"FY{y}: {value:.1%} (FY{y - 1}: {prev:.1%}, change {change * 100:+.1f} pts)")
+                else:
+                    pct = f", {rel:+.1%}" if rel is not None else ""
+                    lines.append(f"FY{y}: {value:,.0f} (FY{y - 1}: {prev:,.0f}, change {change:+,.0f}{pct})")
+            reported = [y for y in series if year is None or y == year]
+            first = min(series)
+            if first in reported:
+                value = series[first]
+                lines.insert(1, f"FY{first}: {value:.1%}" if ratio else f"FY{first}: {value:,.0f}")
+            if len(lines) == 1:
+                return f"No values found for '{name}' in FY{year}."
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error reading financial tables: {e}"
@@ -3,106 +3,71 @@ pip install llama-index
 pip install llama-index-embeddings-huggingface
 """
 import os
-import datetime
-import yaml
 from smolagents import Tool
 
-from llama_index.core import (
-    SimpleDirectoryReader,
-    VectorStoreIndex,
-    StorageContext,
-    load_index_from_storage,
-    Settings,
-)
-from llama_index.core.llms import MockLLM
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from .data_registry import get_entry, update_registry_entry, registry_fingerprint
+from .rag_index import load_manifest, scan_changes, has_changes, build_index, update_index, index_keywords
+from .keyword_index import open_keyword_index, normalize_mode, reciprocal_rank_fusion
+from .index_cache import INDEX_CACHE
+from .change_detection import CHANGE_DETECTOR
+from .query_cache import QUERY_CACHE
 
 # ------------------------------------------------------------------------------
-# Configure LlamaIndex
+# Configure LlamaIndex (lazily: llama_index and torch are only imported, and the
+# embedding model only loaded, on the first RAG query)
 # ------------------------------------------------------------------------------
-Settings.llm = MockLLM()
-Settings.embed_model = HuggingFaceEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-# ------------------------------------------------------------------------------
-# Registry utility functions
-# ------------------------------------------------------------------------------
-REGISTRY_FILE = "data_registry.yaml"
-
-def load_registry() -> list:
-    """Loads the registry from a YAML file or returns an empty list if it doesn't exist."""
-    if os.path.exists(REGISTRY_FILE):
-        with open(REGISTRY_FILE, "r") as f:
-            data = yaml.safe_load(f)
-        return data if data else []
-    return []
-
-def save_registry(registry: list):
-    """Saves the registry back to the YAML file."""
-    with open(REGISTRY_FILE, "w") as f:
-        yaml.safe_dump(registry, f)
-
-def find_registry_entry(data_directory: str, registry: list) -> dict | None:
-    """
-    Looks for a registry entry matching 'data_directory' (by absolute path).
-    Returns the entry if found, else None.
-    """
-    abs_data_dir = os.path.abspath(data_directory)
-    for entry in registry:
-        if os.path.abspath(entry.get("data_directory", "")) == abs_data_dir:
-            return entry
-    return None
-
-def update_registry_entry(
-    data_directory: str,
-    cache_file_directory: str,
-    last_data_update: float,
-    status: str = "rag_indexed",
-    data_format: str = "",
-):
-    """
-    Inserts or updates a registry entry for this data_directory. 
-    Also stores the last_data_update (timestamp in seconds).
-    """
-    registry = load_registry()
-    abs_data_dir = os.path.abspath(data_directory)
-    abs_cache_dir = abs_data_dir + "/.cache"
-
-    # Minimal new/updated entry
-    new_entry = {
-        "data_directory": abs_data_dir,
-        "cache_file_directory": abs_cache_dir,
-        "data_format": data_format,
-        "timestamp": datetime.datetime.now().isoformat(),  # When this registry entry was updated
-        "status": status,
-        "last_data_update": last_data_update,             # float -> last mod time in seconds
-        "metadata": {},  # Optionally fill with more details
-    }
-
-    updated = False
-    for i, entry in enumerate(registry):
-        if os.path.abspath(entry.get("data_directory", "")) == abs_data_dir:
-            registry[i] = new_entry
-            updated = True
-            break
-
-    if not updated:
-        registry.append(new_entry)
-
-    save_registry(registry)
-
-def get_latest_mod_time(data_directory: str) -> float:
-    """
-    Returns the most recent (max) last-modified time (in seconds) 
-    of all files under data_directory.
-    """
-    latest_time = 0.0
-    for root, _, files in os.walk(data_directory):
-        for f in files:
-            filepath = os.path.join(root, f)
-            mtime = os.path.getmtime(filepath)
-            if mtime > latest_time:
-                latest_time = mtime
-    return latest_time
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+_llama_index_configured = False
+
+def configure_llama_index():
+    """Sets the global LlamaIndex LLM/embedding settings once per process."""
+    global _llama_index_configured
+    if _llama_index_configured:
+        return
+    from llama_index.core import Settings
+    from llama_index.core.llms import MockLLM
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    Settings.llm = MockLLM()
+    Settings.embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
+    _llama_index_configured = True
+
+# 'llama' queries the llama_index vector store. The other stores are kept in sync
+# with it and queried instead, so unchanged indexes are never parsed:
+#   'memmap'      - compact float16/int8 exact search (vector_store.py)
+#   'ivf', 'hnsw' - approximate nearest-neighbour search (ann_index.py)
+VECTOR_STORES = ("llama", "memmap", "ivf", "hnsw")
+VECTOR_STORE = os.environ.get("EDA_VECTOR_STORE", "llama")
+
+def has_external_store(persist_dir: str) -> bool:
+    if VECTOR_STORE == "memmap":
+        from .vector_store import has_vector_store
+        return has_vector_store(persist_dir)
+    from .ann_index import has_ann_index
+    return has_ann_index(persist_dir, VECTOR_STORE)
+
+def sync_external_store(index, persist_dir: str, removed_ids: list = None, added_ids: list = None):
+    """Mirrors the llama_index embeddings into VECTOR_STORE (ANN indexes are updated incrementally)."""
+    if VECTOR_STORE == "memmap":
+        from .vector_store import export_llama_index
+        export_llama_index(index, persist_dir)
+    else:
+        from .ann_index import sync_llama_index
+        sync_llama_index(index, persist_dir, VECTOR_STORE, removed_ids, added_ids)
+
+def search_external_store(persist_dir: str, query_embedding, k: int) -> list:
+    if VECTOR_STORE == "memmap":
+        from .vector_store import open_vector_store
+        return open_vector_store(persist_dir).query(query_embedding, k)
+    from .ann_index import open_ann_index
+    return open_ann_index(persist_dir, VECTOR_STORE).search(query_embedding, k)
+
+def load_persisted_index(persist_dir: str):
+    from llama_index.core import StorageContext, load_index_from_storage
+
+    print(f"[INFO] Loading existing index from {persist_dir} ...")
+    storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+    return load_index_from_storage(storage_context)
 
 # ------------------------------------------------------------------------------
 # RAGTool with data update checks
@@ -123,6 +88,12 @@ class RAGTool(Tool):
         "similarity_top_k": {
             "type": "string",
             "description": "Number of top similar docs to retrieve (string -> int)."
+        },
+        "retrieval_mode": {
+            "type": "string",
+            "description": "'vector' (dense), 'keyword' (BM25, best for exact terms) or 'hybrid' (both, rank-fused).",
+            "default": "",
+            "nullable": True
         }
     }
     output_type = "string"
@@ -130,16 +101,26 @@ class RAGTool(Tool):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def forward(self, data_dir: str, question: str, similarity_top_k: str) -> str:
+    def forward(self, data_dir: str, question: str, similarity_top_k: str, retrieval_mode: str = "") -> str:
         """
         Main entry point for the RAG tool.
         1. Determine the cache directory from the registry (or create it).
-        2. Check if raw data is updated (compare directory's last mod time to registry).
-        3. Load or rebuild the vector index accordingly.
-        4. Query with 'similarity_top_k' and return result text.
+        2. Diff the raw files against the per-file manifest stored with the index,
+           unless the directory's change-detection generation is the one the
+           index was built at (O(1) while an inotify watch is active).
+        3. Take the index from the in-process cache, or load it from disk, and
+           re-embed only added/changed files (full build if no index yet).
+        4. Query with 'similarity_top_k' in 'retrieval_mode' and return result text.
+           Keyword-only queries never embed the question.
         """
-        registry = load_registry()
-        entry = find_registry_entry(data_dir, registry)
+        try:
+            mode = normalize_mode(retrieval_mode)
+        except ValueError as e:
+            return str(e)
+        if VECTOR_STORE not in VECTOR_STORES:
+            return f"EDA_VECTOR_STORE must be one of {', '.join(VECTOR_STORES)}, got '{VECTOR_STORE}'"
+        configure_llama_index()
+        entry = get_entry(data_dir)
 
         # 1. Determine the relevant cache directory
         if entry and "cache_file_directory" in entry and entry["cache_file_directory"]:
@@ -151,50 +132,107 @@ class RAGTool(Tool):
             os.makedirs(persist_dir, exist_ok=True)
             print(f"No registry entry found for {data_dir}. Created new cache folder: {persist_dir}")
 
-        # 2. Check if raw data is updated
-        latest_data_mtime = get_latest_mod_time(data_dir)  # in seconds
-        registry_last_data_update = entry["last_data_update"] if entry else 0.0
-
-        need_rebuild = False
-        reason = ""
+        # 2. Check which raw files were added, changed or deleted since the last index
+        generation = CHANGE_DETECTOR.generation(data_dir)
+        manifest = load_manifest(persist_dir)
+        indexed_generation = (entry or {}).get("metadata", {}).get("rag_generation")
+        if manifest and entry and not entry["dirty"] and indexed_generation == generation:
+            changes = {"added": [], "changed": [], "deleted": [], "unchanged": list(manifest), "stats": {}}
+        else:
+            changes = scan_changes(data_dir, manifest)
 
-        # If no index folder, or raw data has new modifications, we must rebuild
-        if not os.path.exists(persist_dir) or not os.listdir(persist_dir):
-            reason = "No existing index found"
-            need_rebuild = True
-        elif latest_data_mtime > registry_last_data_update:
-            reason = "Data directory has been updated"
-            need_rebuild = True
+        # 3. Reuse the in-process index if the registry fingerprint still matches,
+        #    otherwise load, incrementally update, or rebuild it
+        fingerprint = registry_fingerprint(entry)
+        external = VECTOR_STORE != "llama"
+        removed_ids = added_ids = None
+        index = INDEX_CACHE.get(persist_dir, fingerprint) if fingerprint and manifest else None
 
-        if need_rebuild:
+        if index is None and (not os.path.exists(persist_dir) or not os.listdir(persist_dir) or not manifest):
+            reason = "No file manifest found" if os.path.isdir(persist_dir) and os.listdir(persist_dir) else "No existing index found"
             print(f"[INFO] Rebuilding index because: {reason}")
-            documents = SimpleDirectoryReader(data_dir).load_data()
-            index = VectorStoreIndex.from_documents(documents)
-            index.storage_context.persist(persist_dir=persist_dir)
-
-            # Update the registry
-            update_registry_entry(
+            index = build_index(data_dir, persist_dir)
+            changed = True
+        else:
+            changed = has_changes(changes)
+            if index is None and (changed or not external or not has_external_store(persist_dir)):
+                index = load_persisted_index(persist_dir)
+                INDEX_CACHE.put(persist_dir, fingerprint, index)
+            if changed:
+                print(
+                    f"[INFO] Updating index: {len(changes['added'])} added, "
+                    f"{len(changes['changed'])} changed, {len(changes['deleted'])} deleted file(s)"
+                )
+                updated = changes["deleted"] + changes["changed"]
+                removed_ids = [i for path in updated for i in manifest.get(path, {}).get("node_ids", [])]
+                index = update_index(index, data_dir, persist_dir, manifest, changes)
+                new_manifest = load_manifest(persist_dir)
+                added = changes["added"] + changes["changed"]
+                added_ids = [i for path in added for i in new_manifest.get(path, {}).get("node_ids", [])]
+
+        if external and index is not None and (changed or not has_external_store(persist_dir)):
+            if not has_external_store(persist_dir):
+                removed_ids = added_ids = None   # (re)build from every embedding
+            sync_external_store(index, persist_dir, removed_ids, added_ids)
+
+        if changed or entry is None or entry["dirty"] or indexed_generation != generation:
+            latest_data_mtime = max((s["mtime"] for s in changes["stats"].values()), default=0.0)
+            entry = update_registry_entry(
                 data_directory=data_dir,
                 cache_file_directory=persist_dir,
-                last_data_update=latest_data_mtime, 
-                status="rag_indexed"
+                last_data_update=latest_data_mtime,
+                status="rag_indexed",
+                metadata={"rag_generation": generation},
             )
-        else:
-            # 3. Otherwise, load the existing index
-            print(f"[INFO] Loading existing index from {persist_dir} ...")
-            storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
-            index = load_index_from_storage(storage_context)
-
-        # 4. Query with top_k
+            if index is not None:
+                INDEX_CACHE.put(persist_dir, registry_fingerprint(entry), index)
+
+        # Indexes persisted before keyword search existed get their keyword table on first use
+        # (the memmap/ANN stores read chunk texts from it too).
+        keywords = open_keyword_index(persist_dir)
+        if (mode != "vector" or external) and keywords.count() == 0:
+            index = index or load_persisted_index(persist_dir)
+            index_keywords(index, persist_dir, load_manifest(persist_dir))
+
+        # 4. Query with top_k (query engines are cached per index and top_k). Question
+        #    embeddings and results are cached too; results are keyed by the registry
+        #    fingerprint, so any index update invalidates them.
         k = int(similarity_top_k)
-        query_engine = index.as_query_engine(similarity_top_k=k)
-        response = query_engine.query(question)
+
+        def _embed_question():
+            from llama_index.core import Settings
+            return QUERY_CACHE.embedding(EMBED_MODEL_NAME, question, Settings.embed_model.get_query_embedding)
+
+        def _retrieve():
+            vector_hits, keyword_hits = [], []
+            if mode != "keyword" and external:
+                ranked = search_external_store(persist_dir, _embed_question(), k)
+                chunks = keywords.get([node_id for node_id, _ in ranked])
+                vector_hits = [dict(chunks[node_id], score=score) for node_id, score in ranked if node_id in chunks]
+            elif mode != "keyword":
+                from llama_index.core.schema import QueryBundle
+                bundle = QueryBundle(question, embedding=_embed_question().tolist())
+                vector_hits = [
+                    {"id": n.node.node_id, "text": n.node.get_content(), "metadata": n.node.metadata, "score": n.score}
+                    for n in INDEX_CACHE.query_engine(persist_dir, k, index).retrieve(bundle)
+                ]
+            if mode != "vector":
+                keyword_hits = keywords.search(question, k)
+
+            if mode == "hybrid":
+                by_id = {h["id"]: h for h in keyword_hits + vector_hits}
+                fused = reciprocal_rank_fusion([[h["id"] for h in vector_hits], [h["id"] for h in keyword_hits]])
+                return [dict(by_id[node_id], score=score) for node_id, score in fused[:k]]
+            return vector_hits or keyword_hits
+
+        index_key = (os.path.abspath(persist_dir), VECTOR_STORE, registry_fingerprint(entry))
+        hits = QUERY_CACHE.results(index_key, question, k, mode, _retrieve)
 
         # 5. Compile output with source info
         output = "-----\n"
-        for node in response.source_nodes:
-            text_fmt = node.node.get_content().strip().replace("\n", " ")
+        for hit in hits:
+            text_fmt = hit["text"].strip().replace("\n", " ")
             output += f"Text:\t {text_fmt}\n"
-            output += f"Metadata:\t {node.node.metadata}\n"
-            output += f"Score:\t {node.score:.3f}\n"
-        return output
\ No newline at end of file
+            output += f"Metadata:\t {hit['metadata']}\n"
+            output += f"Score:\t {hit['score']:.3f}\n"
+        return output
@@ -1,9 +1,14 @@
 import os
 import yaml
-import datetime
 import shutil
 from smolagents import Tool
 
+from .data_registry import update_registry_entry, list_entries, clear_entries
+from .change_detection import CHANGE_DETECTOR
+from .chroma_pool import CHROMA_POOL
+from .index_cache import INDEX_CACHE
+from .keyword_index import close_keyword_index
+
 class RegistryManager(Tool):
     name = "tool_registry_manager"
     description = (
@@ -19,69 +24,45 @@ class RegistryManager(Tool):
     }
     output_type = "string"
 
-    REGISTRY_FILE = "data_registry.yaml"
-
-    def load_registry(self):
-        if os.path.exists(self.REGISTRY_FILE):
-            with open(self.REGISTRY_FILE, "r") as f:
-                return yaml.safe_load(f) or []
-        return []
-
-    def save_registry(self, registry):
-        with open(self.REGISTRY_FILE, "w") as f:
-            yaml.safe_dump(registry, f)
-
     def get_latest_mod_time(self, directory):
-        latest_time = 0.0
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                latest_time = max(latest_time, os.path.getmtime(file_path))
-        return latest_time
+        # Snapshot-based: skips hidden/.cache dirs and only re-lists directories whose mtime changed.
+        return CHANGE_DETECTOR.latest_mtime(directory)
 
     def update(self, data_directory, status, cache_file_directory, data_format):
-        data_dir = os.path.abspath(data_directory)
-        cache_dir = os.path.abspath(cache_file_directory)
         last_mod_time = self.get_latest_mod_time(data_directory)
-
-        new_entry = {
-            "data_directory": data_directory,
-            "cache_file_directory": cache_file_directory,
-            "data_format": data_format,
-            "timestamp": datetime.datetime.now().isoformat(),
-            "status": status,
-            "last_data_update": last_mod_time,
-        }
-
-        registry = self.load_registry()
-        found = False
-        for idx, entry in enumerate(registry):
-            if os.path.abspath(entry["data_directory"]) == os.path.abspath(data_directory):
-                registry[idx] = new_entry
-                found = True
-                break
-        if not found:
-            registry.append(new_entry)
-
-        self.save_registry(registry)
+        update_registry_entry(
+            data_directory=data_directory,
+            cache_file_directory=cache_file_directory,
+            last_data_update=last_mod_time,
+            status=status,
+            data_format=data_format,
+        )
         return f"Updated registry entry for: {data_directory}"
 
     def list_entries(self):
-        registry = self.load_registry()
+        registry = list_entries()
         if not registry:
             return "Registry is empty."
         return yaml.safe_dump(registry, sort_keys=False)
 
     def clear_entries(self):
-        registry = self.load_registry()
+        registry = clear_entries()
+        if not registry:
+            return "Registry is already empty."
         for entry in registry:
-            cache_dir = entry.get("cache_file_directory", "")
-            if cache_file_directory and os.path.exists(cache_file_directory):
-                shutil.rmtree(cache_file_directory, ignore_errors=True)
-        if os.path.exists(self.REGISTRY_FILE):
-            os.remove(self.REGISTRY_FILE)
-            return "Registry and cache cleared."
-        return "No registry file found."
+            cache_dirs = [entry.get("cache_file_directory", "")]
+            cache_dirs.append(entry.get("metadata", {}).get("chroma", {}).get("cache_file_directory", ""))
+            for cache_dir in cache_dirs:
+                if not cache_dir:
+                    continue
+                # Drop this process's handles first, so the next query rebuilds instead of
+                # reusing a loaded index or an open client over deleted files.
+                CHROMA_POOL.close(cache_dir)
+                INDEX_CACHE.invalidate(cache_dir)
+                close_keyword_index(cache_dir)
+                if os.path.exists(cache_dir):
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+        return "Registry and cache cleared."
 
     def forward(self, action, data_directory="", status="", cache_file_directory="", data_format=""):
         action = action.lower().strip()
@@ -0,0 +1,205 @@
+import os
+from datetime import datetime, timezone
+
+from smolagents import Tool
+
+from .sensor_store import open_sensor_store
+from .sensor_anomaly import open_detector
+from .sensor_analysis import analyze
+
+OPERATIONS = ("summary", "sample_rates", "gaps", "nearest", "magnitude", "export", "anomalies",
+              "aggregate", "activity", "peaks", "patterns")
+
+
+def _fmt_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + " UTC"
+
+
+class SensorQuery(Tool):
+    name = "sensor_query"
+    description = (
+        "Fast queries over a timestamped sensor log (lines 'epoch_ms,CHANNEL,v1,v2,...', e.g. ACC/GYRO/MAG/LeftFoot). "
+        "The log is ingested once into a columnar cache; later calls only parse appended data. Operations: "
+        "'summary' (channels, counts, time span), 'sample_rates', 'gaps' (long pauses in a channel), "
+        "'nearest' (sample closest to a timestamp), 'magnitude' (mean/max vector magnitude of a channel), "
+        "'export' (write a channel to CSV or Parquet), 'anomalies' (spikes, gaps and stuck pressure pads found "
+        "by the streaming detector; optionally for one channel), 'aggregate' (count/mean/std/min/max of a channel "
+        "between timestamp and end_timestamp, or the whole log), 'activity' (per-bucket summary, e.g. per second, "
+        "for plots), 'peaks' (top spikes of a channel's magnitude / total pressure), 'patterns' (walking steps, "
+        "cadence and stillness segments of a channel, e.g. LeftFoot contacts or ACC steps)."
+    )
+    inputs = {
+        "log_path": {
+            "type": "string",
+            "description": "Path to the sensor log file (e.g. sensor_data/sensor_log.txt)."
+        },
+        "operation": {
+            "type": "string",
+            "description": f"One of: {', '.join(OPERATIONS)}."
+        },
+        "channel": {
+            "type": "string",
+            "description": "Channel name (ACC, GYRO, MAG, LeftFoot, ...). Required for gaps, nearest, magnitude, export.",
+            "default": "",
+            "nullable": True
+        },
+        "timestamp": {
+            "type": "string",
+            "description": "Epoch milliseconds, for 'nearest'; range start for 'aggregate', 'activity', 'peaks' and 'patterns'.",
+            "default": "",
+            "nullable": True
+        },
+        "end_timestamp": {
+            "type": "string",
+            "description": "Optional range end (epoch ms, exclusive) for 'aggregate', 'activity', 'peaks' and 'patterns'.",
+            "default": "",
+            "nullable": True
+        },
+        "level": {
+            "type": "string",
+            "description": "Bucket size for 'activity': 1s, 10s, 1min or 1h (default: chosen to fit ~50 rows).",
+            "default": "",
+            "nullable": True
+        },
+        "output_path": {
+            "type": "string",
+            "description": "Destination file for 'export' (.csv or .parquet).",
+            "default": "",
+            "nullable": True
+        }
+    }
+    output_type = "string"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def forward(self, log_path: str, operation: str, channel: str = "", timestamp: str = "", output_path: str = "",
+                end_timestamp: str = "", level: str = "") -> str:
+        operation = (operation or "").strip().lower()
+        if operation not in OPERATIONS:
+            return f"Error: unknown operation '{operation}'. Use one of: {', '.join(OPERATIONS)}."
+        if operation not in ("summary", "sample_rates", "anomalies") and not channel:
+            return f"Error: '{operation}' needs a channel."
+        try:
+            if operation == "anomalies":
+                return self._anomalies(log_path, channel)
+            store = open_sensor_store(log_path)
+            if operation == "summary":
+                lines = [f"{os.path.basename(log_path)}: {len(store.channels)} channels, "
+                         f"{store.meta['skipped']} malformed rows skipped"]
+                for tag, s in store.summary().items():
+                    lines.append(f"{tag}: {s['count']} samples x {s['width']} ({s['dtype']}), "
+                                 f"{_fmt_ms(s['first'])} .. {_fmt_ms(s['last'])}")
+                return "\n".join(lines)
+            if operation == "sample_rates":
+                lines = []
+                for tag in store.channels:
+                    s = store.sample_rate(tag)
+                    if s["count"] < 2:
+                        lines.append(f"{tag}: {s['count']} samples")
+                        continue
+                    lines.append(f"{tag}: {s['median_hz']:.2f} Hz (median interval {s['median_interval_ms']:.0f} ms), "
+                                 f"{s['mean_hz']:.3f} Hz averaged over {s['duration_s']:.0f} s incl. gaps")
+                return "\n".join(lines)
+            if operation == "gaps":
+                gaps = store.gaps(channel)
+                if not gaps:
+                    return f"No gaps in {channel}."
+                gaps.sort(key=lambda g: -g[2])
+                lines = [f"{len(gaps)} gaps in {channel} (> 5x the median interval), longest first:"]
+                lines += [f"{_fmt_ms(a)} -> {_fmt_ms(b)}: {d / 1000:.1f} s" for a, b, d in gaps[:20]]
+                return "\n".join(lines)
+            if operation == "nearest":
+                if not timestamp:
+                    return "Error: 'nearest' needs a timestamp (epoch ms)."
+                i, ts, values = store.nearest(channel, int(float(timestamp)))
+                return f"{channel}[{i}] at {ts} ({_fmt_ms(ts)}): {', '.join(f'{v:.7g}' for v in values.tolist())}"
+            start = int(float(timestamp)) if timestamp else None
+            end = int(float(end_timestamp)) if end_timestamp else None
+            if operation == "magnitude":
+                stats = store.aggregate(channel)
+                if not stats["count"]:
+                    return f"No samples in {channel}."
+                signal = list(stats["columns"])[-1]
+                m = stats["columns"][signal]
+                (peak_ts, peak), = store.peaks(channel, 1)
+                return (f"{channel} {signal} over {stats['count']} samples: mean {m['mean']:.4f}, "
+                        f"std {m['std']:.4f}, min {m['min']:.4f}, max {peak:.4f} at {peak_ts} ({_fmt_ms(peak_ts)})")
+            if operation == "aggregate":
+                stats = store.aggregate(channel, start, end)
+                if not stats["count"]:
+                    return f"No {channel} samples in the range."
+                lines = [f"{channel}: {stats['count']} samples"]
+                lines += [f"{name}: mean {m['mean']:.4f}, std {m['std']:.4f}, min {m['min']:.4f}, max {m['max']:.4f}"
+                          for name, m in stats["columns"].items()]
+                return "\n".join(lines)
+            if operation == "activity":
+                series = store.series(channel, start, end, max_points=50, level=level or None)
+                if not len(series["t"]):
+                    return f"No {channel} samples in the range."
+                lines = [f"{channel} per {series['level']} bucket ({len(series['t'])} non-empty buckets): "
+                         "start | samples | mean | min | max of the signal"]
+                for i in range(min(len(series["t"]), 200)):
+                    lines.append(f"{_fmt_ms(int(series['t'][i]))} | {int(series['count'][i])} | "
+                                 f"{series['mean'][i, -1]:.3f} | {series['min'][i, -1]:.3f} | {series['max'][i, -1]:.3f}")
+                if len(series["t"]) > 200:
+                    lines.append(f"... {len(series['t']) - 200} more buckets")
+                return "\n".join(lines)
+            if operation == "peaks":
+                peaks = store.peaks(channel, 3, start, end)
+                if not peaks:
+                    return f"No {channel} samples in the range."
+                return "\n".join(f"#{i + 1}: {value:.4f} at {ts} ({_fmt_ms(ts)})" for i, (ts, value) in enumerate(peaks))
+            if operation == "patterns":
+                return self._patterns(store, channel, start, end)
+            if not output_path:
+                return "Error: 'export' needs an output_path."
+            n = store.export(channel, output_path)
+            return f"Exported {n} {channel} rows to {output_path}."
+        except Exception as e:
+            return f"Error querying sensor log: {e}"
+
+    @staticmethod
+    def _patterns(store, channel: str, start: int = None, end: int = None) -> str:
+        ts, values = store.window(channel, start, end)
+        r = analyze(ts, values, channel)
+        if not r["recorded_s"]:
+            return f"Not enough {channel} samples in the range."
+        unit = "foot contacts (strides)" if r["pressure"] else "steps"
+        lines = [f"{channel} {r['signal']}: {r['samples']} samples, {r['recorded_s']:.0f} s recorded, "
+                 f"analysed at {r['rate_hz']:.1f} Hz"]
+        if r["cadence_hz"]:
+            lines.append(f"Walking: {r['walking_s']:.0f} s in {len(r['walking_windows'])} bouts, cadence "
+                         f"{r['cadence_hz']:.2f} Hz ({r['cadence_hz'] * 60:.0f}/min, periodicity {r['periodicity']:.2f}), "
+                         f"{r['steps']} {unit}")
+        else:
+            lines.append(f"No sustained periodic (walking) activity; {r['steps']} {unit} detected")
+        for a, b in r["walking_windows"][:10]:
+            lines.append(f"  walking {_fmt_ms(a)} -> {_fmt_ms(b)} ({(b - a) / 1000:.0f} s)")
+        lines.append(f"Still: {r['still_s']:.0f} s in {len(r['still_segments'])} segments "
+                     f"(rolling std <= {r['still_threshold']:.3g})")
+        for a, b in sorted(r["still_segments"], key=lambda s: s[0] - s[1])[:10]:
+            lines.append(f"  still {_fmt_ms(a)} -> {_fmt_ms(b)} ({(b - a) / 1000:.0f} s)")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _anomalies(log_path: str, channel: str = "") -> str:
+        detector = open_detector(log_path)
+        counts = {k: n for k, n in detector.counts().items() if not channel or k[0].lower() == channel.lower()}
+        if not counts:
+            return f"No anomalies detected in {channel or 'any channel'} ({detector.records} records scanned)."
+        lines = [f"Anomalies over {detector.records} records: "
+                 + ", ".join(f"{c} {kind}: {n}" for (c, kind), n in sorted(counts.items()))]
+        for kind, title in (("spike", "Strongest spikes"), ("gap", "Longest gaps"), ("stuck", "Stuck pads")):
+            events = detector.events(channel=channel or None, kind=kind, limit=5, order="score")
+            if not events:
+                continue
+            lines.append(f"{title}:")
+            for e in events:
+                if kind == "spike":
+                    lines.append(f"  {e['channel']} {_fmt_ms(e['start_ms'])}: magnitude {e['value']:.3f}, z={e['score']:.1f} ({e['detail']})")
+                elif kind == "gap":
+                    lines.append(f"  {e['channel']} {_fmt_ms(e['start_ms'])} -> {_fmt_ms(e['end_ms'])}: {e['value'] / 1000:.1f} s")
+                else:
+                    lines.append(f"  {e['channel']} {e['detail']} reads 0 while loaded since {_fmt_ms(e['start_ms'])}")
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""
+Compact, memory-mapped vector store.
+
+The llama_index default persistence keeps embeddings as JSON floats in
+default__vector_store.json, so every load parses the whole matrix. This store
+keeps the same vectors L2-normalised in one contiguous .npy matrix:
+    float16 - half the size of float32, recall is practically unchanged
+    int8    - a quarter of the size; symmetric per-row quantisation with a
+              float32 scale per row
+The matrix is opened with np.load(mmap_mode="r"), so opening it costs a header
+read and pages are faulted in by the first search. Top-k is a brute-force
+cosine search done block by block over the mapped rows.
+
+Files under <persist_dir>/vectors/: vectors.<version>.npy, scales.<version>.npy
+(int8 only) and the manifest ids.json (node id per row and the file names).
+Each write puts its matrices under new names and then replaces the manifest
+in one os.replace (commit_files), so a reader always sees one complete
+version. Chunk texts and metadata are read from the keyword index
+(keyword_index.py), which stores the same nodes.
+"""
+import os
+import json
+import uuid
+
+import numpy as np
+
+VECTOR_DIR = "vectors"
+VECTOR_DTYPES = ("float16", "int8")
+DEFAULT_VECTOR_DTYPE = os.environ.get("EDA_VECTOR_DTYPE", "float16")
+BLOCK_ROWS = 65536
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def read_manifest(path: str, manifest: str):
+    """The decoded manifest file, or None if there is none yet."""
+    try:
+        with open(os.path.join(path, manifest), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def commit_files(path: str, manifest: str, writers: dict, meta: dict) -> dict:
+    """
+    Writes a new version of a multi-file store in 'path' atomically.
+
+    'writers' maps a file name to (suffix, write(filepath)); each file is written
+    under a name that is new for this version, then 'manifest' (meta plus
+    {"files": {name: file}}) replaces the old one in a single os.replace. Readers
+    that open files through the manifest see the old or the new version, never
+    a mix. Files of older versions are removed, except those of the version just
+    replaced (a reader may have read its manifest and not opened them yet).
+    """
+    os.makedirs(path, exist_ok=True)
+    version = uuid.uuid4().hex[:12]
+    previous = read_manifest(path, manifest)
+    files = {}
+    for name, (suffix, write) in writers.items():
+        files[name] = f"{name}.{version}{suffix}"
+        write(os.path.join(path, files[name]))
+    meta = dict(meta, files=files)
+    tmp = os.path.join(path, f"{manifest}.{version}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, manifest))
+
+    keep = set(files.values())
+    if isinstance(previous, dict):
+        keep.update(previous.get("files", {}).values())
+    for entry in os.listdir(path):
+        if entry not in keep and any(entry.startswith(name + ".") for name in writers):
+            try:
+                os.remove(os.path.join(path, entry))
+            except OSError:
+                pass
+    return meta
+
+
+class MemmapVectorStore:
+    def __init__(self, path: str, ids: list, vectors: np.ndarray, scales: np.ndarray | None = None):
+        self.path = path
+        self.ids = ids
+        self.vectors = vectors
+        self.scales = scales
+
+    @property
+    def dtype(self) -> str:
+        return str(self.vectors.dtype)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def write(cls, path: str, ids: list, embeddings, dtype: str = DEFAULT_VECTOR_DTYPE) -> "MemmapVectorStore":
+        """Quantises 'embeddings' (rows matching 'ids') into 'path' and returns the opened store."""
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype '{dtype}', expected one of {', '.join(VECTOR_DTYPES)}")
+        matrix = _normalize(embeddings) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+
+        writers = {}
+        if dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0 if len(ids) else np.zeros(0, dtype=np.float32)
+            scales[scales == 0] = 1.0
+            quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+            writers["scales"] = (".npy", lambda fp: np.save(fp, scales.astype(np.float32)))
+        else:
+            quantized = matrix.astype(np.float16)
+        writers["vectors"] = (".npy", lambda fp: np.save(fp, quantized))
+        # The manifest goes last, so a concurrent reader never sees a half-written store.
+        commit_files(path, "ids.json", writers, {"ids": list(ids)})
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "MemmapVectorStore":
+        meta = read_manifest(path, "ids.json")
+        if isinstance(meta, list):  # stores written before the manifest named the files
+            meta = {"ids": meta, "files": {"vectors": "vectors.npy", "scales": "scales.npy"}}
+        files = meta["files"]
+        vectors = np.load(os.path.join(path, files["vectors"]), mmap_mode="r")
+        scales = None
+        if vectors.dtype == np.int8:
+            scales = np.load(os.path.join(path, files["scales"]), mmap_mode="r")
+        return cls(path, meta["ids"], vectors, scales)
+
+    def scores(self, query) -> np.ndarray:
+        """Cosine similarity of 'query' against every stored row."""
+        q = _normalize(query).ravel()
+        out = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ q
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def query(self, query, k: int) -> list:
+        """Returns the top-k [(id, cosine similarity)], best first."""
+        if not self.ids:
+            return []
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+
+def vector_store_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, VECTOR_DIR)
+
+
+def has_vector_store(persist_dir: str) -> bool:
+    return os.path.exists(os.path.join(vector_store_path(persist_dir), "ids.json"))
+
+
+def export_llama_index(index, persist_dir: str, dtype: str = DEFAULT_VECTOR_DTYPE) -> MemmapVectorStore:
+    """Writes the embeddings of a llama_index SimpleVectorStore into the memmap store in 'persist_dir'."""
+    embedding_dict = index.vector_store.data.embedding_dict
+    ids = list(embedding_dict)
+    matrix = np.array([embedding_dict[i] for i in ids], dtype=np.float32)
+    return MemmapVectorStore.write(vector_store_path(persist_dir), ids, matrix, dtype=dtype)
+
+
+_open_stores = {}
+
+
+def open_vector_store(persist_dir: str) -> MemmapVectorStore | None:
+    """Returns the (process-wide, re-opened when rewritten) memmap store in 'persist_dir', or None."""
+    path = vector_store_path(persist_dir)
+    try:
+        stamp = os.stat(os.path.join(path, "ids.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _open_stores.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _open_stores[path] = (stamp, MemmapVectorStore.open(path))
+    return cached[1]
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from tools.ann_index import HNSWIndex, IVFIndex, has_ann_index, open_ann_index, sync_llama_index
+
+RNG = np.random.default_rng(3)
+CENTERS = RNG.standard_normal((40, 48))
+EMBEDDINGS = (CENTERS[RNG.integers(0, 40, 4000)] + 0.3 * RNG.standard_normal((4000, 48))).astype(np.float32)
+IDS = [f"n{i}" for i in range(len(EMBEDDINGS))]
+QUERIES = EMBEDDINGS[RNG.choice(len(EMBEDDINGS), 50, replace=False)] + 0.1 * RNG.standard_normal((50, 48))
+
+
+def _brute_force(ids, embeddings, query, k):
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+def _recall(index, ids, embeddings, k=10):
+    found = sum(len({i for i, _ in index.search(q, k)} & set(_brute_force(ids, embeddings, q, k))) for q in QUERIES)
+    return found / (k * len(QUERIES))
+
+
+def _backend(name):
+    if name == "hnsw":
+        pytest.importorskip("hnswlib")
+        return HNSWIndex
+    return IVFIndex
+
+
+@pytest.mark.parametrize("name", ["ivf", "hnsw"])
+def test_recall_against_brute_force(tmp_path, name):
+    cls = _backend(name)
+    index = cls.build(IDS, EMBEDDINGS)
+    assert _recall(index, IDS, EMBEDDINGS) >= 0.9
+    index.save(str(tmp_path))
+    loaded = cls.load(str(tmp_path))
+    assert len(loaded) == len(IDS)
+    assert _recall(loaded, IDS, EMBEDDINGS) >= 0.9
+
+
+@pytest.mark.parametrize("name", ["ivf", "hnsw"])
+def test_incremental_inserts_and_deletes(tmp_path, name):
+    cls = _backend(name)
+    index = cls.build(IDS[:3000], EMBEDDINGS[:3000])
+    index.remove(IDS[:500])
+    index.add(IDS[3000:], EMBEDDINGS[3000:])
+    index.add(IDS[1000:1010], -EMBEDDINGS[1000:1010])  # re-inserted ids replace their vectors
+    live_ids = IDS[500:]
+    live = EMBEDDINGS[500:].copy()
+    live[500:510] = -EMBEDDINGS[1000:1010]
+    for current in (index, index.save(str(tmp_path))):
+        assert len(current) == len(live_ids)
+        assert _recall(current, live_ids, live) >= 0.9
+        hits = {i for q in QUERIES for i, _ in current.search(q, 10)}
+        assert not hits & set(IDS[:500])
+        assert current.search(-EMBEDDINGS[1005], 1)[0][0] == "n1005"
+
+
+def test_ivf_retrains_once_it_quadruples(tmp_path):
+    index = IVFIndex.build(IDS[:200], EMBEDDINGS[:200])
+    assert len(index.centroids) == 14
+    index.add(IDS[200:], EMBEDDINGS[200:])
+    saved = index.save(str(tmp_path))
+    assert saved.trained_size == len(IDS) and len(saved.centroids) == int(np.sqrt(len(IDS)))
+
+
+def _llama(ids, embeddings):
+    return SimpleNamespace(vector_store=SimpleNamespace(data=SimpleNamespace(
+        embedding_dict={i: e.tolist() for i, e in zip(ids, embeddings)})))
+
+
+def test_sync_llama_index(tmp_path):
+    persist = str(tmp_path)
+    assert open_ann_index(persist, "ivf") is None
+    sync_llama_index(_llama([], []), persist, "ivf")
+    assert has_ann_index(persist, "ivf") and len(open_ann_index(persist, "ivf")) == 0
+
+    sync_llama_index(_llama(IDS[:100], EMBEDDINGS[:100]), persist, "ivf")  # no ids given: full build
+    assert len(open_ann_index(persist, "ivf")) == 100
+    llama = _llama(IDS[10:120], EMBEDDINGS[10:120])
+    synced = sync_llama_index(llama, persist, "ivf", removed_ids=IDS[:10], added_ids=IDS[100:120])
+    assert open_ann_index(persist, "ivf") is synced and len(synced) == 110
+    assert synced.search(EMBEDDINGS[115], 1)[0][0] == "n115"
@@ -0,0 +1,80 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from tools.archive_vfs import ArchiveVFS
+
+CSV = "order_id,price\nO-2007,150.00\n"
+LOGS = "".join(f"line {i} deadlock detected\n" for i in range(5000))
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    """bundle.tar holding notes.txt and bundle.zip (audit/audit.csv deflated, blob.bin stored, inner.zip)."""
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as z:
+        z.writestr("deep/readme.txt", "three levels down", compress_type=zipfile.ZIP_DEFLATED)
+    zip_path = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.writestr("audit/audit.csv", CSV, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("logs.txt", LOGS, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("blob.bin", bytes(range(256)) * 64, compress_type=zipfile.ZIP_STORED)
+        z.writestr("inner.zip", inner.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    notes = tmp_path / "notes.txt"
+    notes.write_text("plain member")
+    tar_path = tmp_path / "bundle.tar"
+    with tarfile.open(tar_path, "w") as t:
+        t.add(notes, "notes.txt")
+        t.add(zip_path, "./bundle.zip")
+    return str(tar_path)
+
+
+def test_nested_members(bundle):
+    vfs = ArchiveVFS()
+    assert vfs.list_members(bundle) == ["notes.txt", "bundle.zip"]
+    assert vfs.list_members(bundle + "!/bundle.zip") == ["audit/audit.csv", "logs.txt", "blob.bin", "inner.zip"]
+    assert vfs.read_text(bundle + "!/notes.txt") == "plain member"
+    assert vfs.read_text(bundle + "!/bundle.zip!/audit/audit.csv") == CSV
+    assert vfs.read_text(bundle + "!/bundle.zip!/logs.txt") == LOGS
+    assert vfs.read_text(bundle + "!/bundle.zip!/inner.zip!/deep/readme.txt") == "three levels down"
+    assert vfs.getsize(bundle + "!/bundle.zip!/logs.txt") == len(LOGS)
+
+
+def test_stored_member_is_seekable(bundle):
+    vfs = ArchiveVFS()
+    with vfs.open(bundle + "!/bundle.zip!/blob.bin") as f:
+        f.seek(1000)
+        assert f.read(4) == bytes([1000 % 256, 1001 % 256, 1002 % 256, 1003 % 256])
+        f.seek(10)
+        assert f.read(2) == bytes([10, 11])
+
+
+def test_text_mode_and_index_cache(bundle):
+    vfs = ArchiveVFS()
+    path = bundle + "!/./bundle.zip!//audit/audit.csv"
+    with vfs.open(path, "r") as f:
+        assert f.readline() == "order_id,price\n"
+    misses = vfs.stats()["index_misses"]
+    assert vfs.read_text(path) == CSV
+    assert vfs.stats()["index_misses"] == misses
+
+
+def test_missing_members(bundle):
+    vfs = ArchiveVFS()
+    with pytest.raises(FileNotFoundError, match="No member 'missing.csv'"):
+        vfs.open(bundle + "!/bundle.zip!/missing.csv")
+    with pytest.raises(FileNotFoundError):
+        vfs.read_bytes(bundle + "!/nope.zip!/audit/audit.csv")
+    with pytest.raises(FileNotFoundError):
+        vfs.read_bytes(bundle + ".gone!/bundle.zip")
+    with pytest.raises(NotADirectoryError):
+        vfs.list_members(bundle + "!/notes.txt")
+    assert not vfs.exists(bundle + "!/bundle.zip!/missing.csv")
+    assert vfs.exists(bundle + "!/bundle.zip!/audit/audit.csv")
+
+
+def test_read_only(bundle):
+    with pytest.raises(ValueError):
+        ArchiveVFS().open(bundle + "!/notes.txt", "w")
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+import pytest
+
+from tools import change_detection
+from tools.change_detection import ChangeDetector
+
+
+@pytest.fixture
+def data(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("bravo")
+    return tmp_path
+
+
+def _touch(path, content):
+    st = os.stat(path)
+    path.write_text(content)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_generation_bumps_on_every_kind_of_change(data):
+    detector = ChangeDetector(use_inotify=False)
+    gen = detector.generation(str(data))
+    assert detector.generation(str(data)) == gen
+
+    steps = [
+        lambda: _touch(data / "a.txt", "ALPHA"),                 # same size, rewritten in place
+        lambda: (data / "sub" / "c.txt").write_text("charlie"),  # added in a subdirectory
+        lambda: os.remove(data / "sub" / "b.txt"),
+        lambda: (data / "sub" / "deeper").mkdir(),
+    ]
+    seen = {gen}
+    for step in steps:
+        step()
+        gen = detector.generation(str(data))
+        assert gen not in seen
+        seen.add(gen)
+        assert detector.generation(str(data)) == gen
+
+
+def test_hidden_entries_and_cache_writes_are_ignored(data):
+    detector = ChangeDetector(use_inotify=False)
+    gen = detector.generation(str(data))
+    assert (data / ".cache" / change_detection.SNAPSHOT_FILE).exists()
+    (data / ".cache" / "index.bin").write_bytes(b"x")
+    (data / ".hidden").write_text("x")
+    assert detector.generation(str(data)) == gen
+
+
+def test_snapshot_persists_across_detectors(data):
+    gen = ChangeDetector(use_inotify=False).generation(str(data))
+    assert ChangeDetector(use_inotify=False).generation(str(data)) == gen
+    (data / "new.txt").write_text("x")
+    later = ChangeDetector(use_inotify=False)
+    assert later.generation(str(data)) != gen
+    assert later.latest_mtime(str(data)) == os.stat(data / "new.txt").st_mtime_ns / 1e9
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_event_marks_dirty_and_bumps(data, monkeypatch):
+    marked = []
+    monkeypatch.setattr(change_detection, "mark_dirty", marked.append)
+    detector = ChangeDetector(use_inotify=True)
+    gen = detector.generation(str(data))
+    if detector._watcher is None:
+        pytest.skip("inotify unavailable")
+    (data / "sub" / "c.txt").write_text("charlie")
+    deadline = time.monotonic() + 5
+    while not marked and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert marked == [str(data)]
+    assert detector.generation(str(data)) != gen
+    detector.forget(str(data))
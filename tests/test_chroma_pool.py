@@ -0,0 +1,98 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from tools import chroma_pool
+from tools.chroma_pool import ChromaClientPool
+
+
+class FakeClient:
+    created = []
+
+    def __init__(self, path):
+        self.path, self.collections, self.healthy = path, {}, True
+        FakeClient.created.append(self)
+
+    def heartbeat(self):
+        if not self.healthy:
+            raise ConnectionError("gone")
+
+    def get_collection(self, name, embedding_function=None):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def create_collection(self, name, embedding_function=None, configuration=None):
+        self.collections[name] = SimpleNamespace(name=name, client=self)
+        return self.collections[name]
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+@pytest.fixture
+def fake_chromadb(monkeypatch):
+    FakeClient.created = []
+    monkeypatch.setitem(sys.modules, "chromadb", SimpleNamespace(PersistentClient=FakeClient))
+    return FakeClient.created
+
+
+def test_client_and_collection_reuse(tmp_path, fake_chromadb):
+    pool = ChromaClientPool()
+    cache = str(tmp_path / "cache")
+    assert pool.client(cache) is pool.client(cache + "/.")
+    assert pool.get_collection(cache, "docs") is None
+    created = pool.reset_collection(cache, "docs")
+    assert pool.is_open(cache, "docs")
+    assert pool.get_collection(cache, "docs") is created
+    assert pool.client(str(tmp_path / "other")) is not pool.client(cache)
+    assert len(fake_chromadb) == 2
+
+
+def test_reset_replaces_the_open_handle(tmp_path, fake_chromadb):
+    pool = ChromaClientPool()
+    first = pool.reset_collection(str(tmp_path), "docs")
+    second = pool.reset_collection(str(tmp_path), "docs")
+    assert second is not first
+    assert pool.get_collection(str(tmp_path), "docs") is second
+
+
+def test_release_and_close(tmp_path, fake_chromadb):
+    pool = ChromaClientPool()
+    a, b = str(tmp_path / "a"), str(tmp_path / "b")
+    pool.reset_collection(a, "docs")
+    pool.reset_collection(b, "docs")
+    pool.release(a, "docs")
+    assert not pool.is_open(a, "docs") and pool.is_open(b, "docs")
+    assert pool.get_collection(a, "docs") is not None  # reopened through the pooled client
+    assert len(fake_chromadb) == 2
+
+    pool.close(a)
+    assert not pool.is_open(a, "docs") and pool.is_open(b, "docs")
+    pool.client(a)
+    assert len(fake_chromadb) == 3
+    pool.close()
+    assert not pool.is_open(b, "docs")
+    pool.client(b)
+    assert len(fake_chromadb) == 4
+
+
+def test_handles_are_not_kept_when_disabled(tmp_path, fake_chromadb):
+    pool = ChromaClientPool(keep_collections_open=False)
+    pool.reset_collection(str(tmp_path), "docs")
+    assert not pool.is_open(str(tmp_path), "docs")
+    assert pool.get_collection(str(tmp_path), "docs") is not None
+    assert not pool.is_open(str(tmp_path), "docs")
+
+
+def test_failed_health_check_reconnects(tmp_path, fake_chromadb, monkeypatch):
+    pool = ChromaClientPool()
+    client = pool.client(str(tmp_path))
+    pool.reset_collection(str(tmp_path), "docs")
+    monkeypatch.setattr(chroma_pool, "HEALTH_CHECK_INTERVAL", -1)
+    assert pool.client(str(tmp_path)) is client  # healthy: kept
+    client.healthy = False
+    assert pool.client(str(tmp_path)) is not client
+    assert pool.reconnects == 1
+    assert not pool.is_open(str(tmp_path), "docs")
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import threading
+
+import yaml
+
+from tools import data_registry as reg
+
+
+def test_upsert_merges_metadata_and_clears_dirty(tmp_path):
+    db = str(tmp_path / "registry.db")
+    data = str(tmp_path / "data")
+    entry = reg.update_registry_entry(data, "", 1.5, metadata={"chroma": {"n": 1}}, db_path=db)
+    assert entry["cache_file_directory"] == data + "/.cache"
+    fingerprint = reg.registry_fingerprint(entry)
+
+    reg.update_entry_metadata(data, "tables", {"pages": 3}, db_path=db)
+    assert reg.registry_fingerprint(reg.get_entry(data, db_path=db)) == fingerprint
+    assert reg.mark_dirty(data, db_path=db) and not reg.mark_dirty(data, db_path=db)
+    assert reg.get_entry(tmp_path / "data" / ".." / "data", db_path=db)["dirty"]
+
+    entry = reg.update_registry_entry(data, str(tmp_path / "c"), 2.0, metadata={"chroma": {"n": 2}}, db_path=db)
+    assert entry["metadata"] == {"chroma": {"n": 2}, "tables": {"pages": 3}}
+    stored = reg.get_entry(data, db_path=db)
+    assert stored == entry and not stored["dirty"]
+    assert reg.registry_fingerprint(stored) != fingerprint
+
+    assert [e["data_directory"] for e in reg.clear_entries(db_path=db)] == [data]
+    assert reg.list_entries(db_path=db) == [] and reg.get_entry(data, db_path=db) is None
+
+
+def test_yaml_registry_is_migrated_once(tmp_path):
+    legacy = tmp_path / reg.LEGACY_REGISTRY_FILE
+    legacy.write_text(yaml.safe_dump([
+        {"data_directory": "data", "cache_file_directory": "data/.cache", "last_data_update": 1.0,
+         "status": "rag_indexed", "metadata": {"k": 1}},
+        {"data_directory": "other", "last_data_update": 5.0},
+        {"data_directory": "data", "last_data_update": 2.0, "status": "rag_indexed"},
+        {"cache_file_directory": "orphan"},
+    ]))
+    db = str(tmp_path / "registry.db")
+    entries = reg.list_entries(db_path=db)
+    assert [os.path.basename(e["data_directory"]) for e in entries] == ["data", "other"]
+    assert entries[0]["last_data_update"] == 2.0 and entries[0]["metadata"] == {}
+    assert not legacy.exists() and (tmp_path / (reg.LEGACY_REGISTRY_FILE + ".migrated")).exists()
+
+    # Later connections find only the renamed file and do not import it again over newer rows.
+    reg.update_registry_entry(str(tmp_path / "other"), "", 9.0, db_path=db)
+    reg._migrate_yaml(reg.connect(db), str(legacy))
+    assert reg.get_entry(str(tmp_path / "other"), db_path=db)["last_data_update"] == 9.0
+
+
+def _write_rows(db, prefix, n):
+    for i in range(n):
+        reg.update_registry_entry(f"/data/{prefix}{i}", "", float(i), db_path=db)
+        reg.update_entry_metadata("/data/shared", f"{prefix}{i}", i, db_path=db)
+
+
+def test_concurrent_writers_keep_every_update(tmp_path):
+    db = str(tmp_path / "registry.db")
+    reg.connect(db)
+    threads = [threading.Thread(target=_write_rows, args=(db, f"t{k}-", 20)) for k in range(4)]
+    procs = [multiprocessing.get_context("fork").Process(target=_write_rows, args=(db, f"p{k}-", 20))
+             for k in range(2)]
+    for w in procs + threads:  # fork before any writer thread holds a lock
+        w.start()
+    for w in threads + procs:
+        w.join()
+    assert all(p.exitcode == 0 for p in procs)
+    entries = {e["data_directory"]: e for e in reg.list_entries(db_path=db)}
+    assert len(entries) == 6 * 20 + 1
+    assert len(entries["/data/shared"]["metadata"]) == 6 * 20
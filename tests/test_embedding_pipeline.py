@@ -0,0 +1,76 @@
+import numpy as np
+
+from tools.embedding_pipeline import chunk_blocks, chunk_text, iter_chunks, read_blocks, run_pipeline
+
+TEXT = " ".join(f"w{i}" for i in range(1000))
+
+
+def _reference(words, max_tokens, overlap):
+    step = max(1, max_tokens - overlap)
+    out = []
+    for start in range(0, len(words), step):
+        out.append((start, " ".join(words[start:start + max_tokens])))
+        if start + max_tokens >= len(words):
+            break
+    return out
+
+
+def test_chunk_text_bounds_and_overlap():
+    chunks = list(chunk_text(TEXT, max_tokens=200, overlap=30))
+    words = TEXT.split()
+    assert chunks == _reference(words, 200, 30)
+    assert all(len(c.split()) <= 200 for _, c in chunks)
+    for (_, a), (_, b) in zip(chunks, chunks[1:]):
+        assert a.split()[-30:] == b.split()[:30]
+    assert chunks[-1][1].split()[-1] == words[-1]
+    assert list(chunk_text(" \n ")) == []
+    assert list(chunk_text("one two", max_tokens=5)) == [(0, "one two")]
+    assert list(chunk_text("a b c d e f", max_tokens=3, overlap=5)) == [(0, "a b c"), (1, "b c d"), (2, "c d e"),
+                                                                       (3, "d e f")]
+
+
+def test_block_boundaries_do_not_change_chunks():
+    expected = list(chunk_text(TEXT, max_tokens=50, overlap=10))
+    for size in (1, 3, 7, 64, 1000):
+        blocks = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+        assert list(chunk_blocks(blocks, max_tokens=50, overlap=10)) == expected, size
+
+
+def test_iter_chunks_streams_text_files(tmp_path):
+    (tmp_path / "a.txt").write_text(TEXT)
+    assert {len(b) for b in read_blocks(str(tmp_path / "a.txt"), 16)} <= set(range(1, 17))
+    assert list(chunk_blocks(read_blocks(str(tmp_path / "a.txt"), 16), 100, 0)) == list(chunk_text(TEXT, 100, 0))
+    (tmp_path / "empty.txt").write_text("")
+    (tmp_path / "bad.bin").write_bytes(b"\xff\xfe\x00")
+    (tmp_path / ".cache").mkdir()
+    (tmp_path / ".cache" / "skip.txt").write_text("hidden")
+    chunks = list(iter_chunks(str(tmp_path), max_tokens=100, overlap=0))
+    assert [c["id"] for c in chunks] == [f"{tmp_path / 'a.txt'}#{i}" for i in range(10)]
+    assert [c["metadata"]["word_offset"] for c in chunks] == list(range(0, 1000, 100))
+    assert " ".join(c["text"] for c in chunks) == TEXT
+
+
+class FakeEncoder:
+    def encode(self, texts):
+        return np.array([[float(len(t))] for t in texts])
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    def add(self, ids, documents, metadatas, embeddings):
+        assert len(ids) == len(documents) == len(metadatas) == len(embeddings)
+        self.batches.append(ids)
+
+
+def test_pipeline_writes_bounded_batches(tmp_path):
+    for n in range(3):
+        (tmp_path / f"doc{n}.txt").write_text(TEXT)
+    collection = FakeCollection()
+    stats = run_pipeline(str(tmp_path), collection, workers=0, batch_size=4, max_tokens=100, overlap=0,
+                         encoder=FakeEncoder())
+    assert (stats["files"], stats["chunks"], stats["batches"]) == (3, 30, 8)
+    assert [len(b) for b in collection.batches] == [4] * 7 + [2]
+    ids = [i for b in collection.batches for i in b]
+    assert len(set(ids)) == 30
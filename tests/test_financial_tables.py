@@ -0,0 +1,87 @@
+import pytest
+
+from tools import financial_tables
+from tools.financial_tables import FinancialIndex, detect_statement, normalize_metric, parse_statement
+
+
+def _statement(title, years, rows):
+    lines = ["Tesla, Inc.", title, "(in millions)", "Year Ended December 31,"] + [str(y) for y in years]
+    for row in rows:
+        lines += row if isinstance(row, list) else [row]
+    return "\n".join(lines)
+
+
+OPERATIONS_2024 = _statement("Consolidated Statements of Operations", [2024, 2023, 2022], [
+    "Revenues",
+    ["Automotive sales", "72,480", "78,509", "67,210"],
+    ["Total revenues", "97,690", "96,773", "81,462"],
+    ["Gross profit", "17,450", "17,660", "20,853"],
+    "Operating expenses",
+    ["Research and development", "4,540", "3,969", "3,075"],
+    ["Total operating expenses", "9,690", "8,769", "7,197"],
+    ["Net income attributable to common stockholders", "7,091", "14,997", "12,556"],
+    "42",  # page number
+])
+# The earlier filing reports FY2022 differently: the later filing's restated value must win.
+OPERATIONS_2023 = _statement("Consolidated Statements of Operations", [2023, 2022, 2021], [
+    ["Total revenues", "96,773", "81,000", "53,823"],
+    ["Gross profit", "17,660", "20,853", "13,606"],
+    ["Net income attributable to common stockholders", "14,997", "12,556", "5,519"],
+])
+CASH_FLOWS_2024 = _statement("Consolidated Statements of Cash Flows", [2024, 2023, 2022], [
+    "Cash Flows from Investing Activities",
+    ["Purchases of property and equipment excluding finance leases, net of sales", "(", "11,339", ")",
+     "(8,898)", "(7,158)"],
+])
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    pages = {"tsla-2024.pdf": [OPERATIONS_2024, "Notes to the financial statements", CASH_FLOWS_2024],
+             "tsla-2023.pdf": [OPERATIONS_2023]}
+    monkeypatch.setattr(financial_tables, "extract_pages", lambda path: [
+        {"page": i, "text": text} for i, text in enumerate(pages[path.rsplit("/", 1)[-1]])])
+    for name in pages:
+        (tmp_path / name).write_bytes(name.encode())
+    fin = FinancialIndex(str(tmp_path / ".cache" / "financial.db"))
+    fin.index_directory(str(tmp_path))
+    return fin
+
+
+def test_parse_statement_columns_and_sections():
+    assert detect_statement(OPERATIONS_2024) == "operations"
+    assert detect_statement("Notes\nConsolidated Statements of Operations were audited") is None
+    years, rows = parse_statement(OPERATIONS_2024)
+    assert years == [2024, 2023, 2022]
+    assert rows[0] == ("Revenues", "Automotive sales", [72480.0, 78509.0, 67210.0])
+    assert rows[1][:2] == ("Revenues", "Total revenues")
+    assert rows[2][:2] == ("", "Gross profit")  # the section closed with its total
+    _, cash = parse_statement(CASH_FLOWS_2024)
+    assert cash[0][2] == [-11339.0, -8898.0, -7158.0]
+
+
+def test_yoy_lookups(index):
+    assert index.metric("Revenue") == {2021: 53823.0, 2022: 81462.0, 2023: 96773.0, 2024: 97690.0}
+    change = index.yoy("net income", fiscal_year=2024)
+    assert change == [(2024, 7091.0, 14997.0, 7091.0 - 14997.0, pytest.approx((7091 - 14997) / 14997))]
+    assert [row[0] for row in index.yoy("r&d")] == [2023, 2024]
+    assert index.yoy("capex")[-1][1:4] == (11339.0, 8898.0, 11339.0 - 8898.0)  # outflows quoted positive
+    assert index.metric("gross_margin", fiscal_year=2024) == {2024: pytest.approx(17450 / 97690)}
+    assert index.metric("revenue", document="tsla-2023.pdf")[2022] == 81000.0
+
+
+def test_reindex_only_on_content_change(index, tmp_path):
+    facts = index.count()
+    assert index.index_directory(str(tmp_path)) == 0
+    (tmp_path / "tsla-2023.pdf").unlink()
+    index.index_directory(str(tmp_path))
+    assert index.count() < facts and 2021 not in index.metric("revenue")
+    assert [r["value"] for r in index.search("purchases of property")] == [-7158.0, -8898.0, -11339.0]
+    (tmp_path / "tsla-2024.pdf").write_bytes(b"amended")
+    assert index.index_directory(str(tmp_path)) == index.count()
+
+
+def test_unknown_metric():
+    assert normalize_metric("Capital-Expenditures") == "capex"
+    with pytest.raises(ValueError, match="Available: .*revenue"):
+        normalize_metric("ebitda")
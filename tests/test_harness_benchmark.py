@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from harness import Runner, benchmark_task, compare_benchmark, percentile, summarize
+
+
+def _report(**providers):
+    return {"tasks": {"t0": {name: {metric: summarize(values) for metric, values in metrics.items()}
+                             for name, metrics in providers.items()}}}
+
+
+def test_percentiles():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2.5
+    assert percentile(range(101), 95) == 95
+    s = summarize([0.1, 0.2, 0.3])
+    assert (s["p50"], s["min"], s["max"], s["n"]) == (0.2, 0.1, 0.3, 3)
+
+
+def test_regressions_above_threshold_and_floor():
+    baseline = _report(local_agent={"wall_s": [0.10] * 5, "peak_rss_mb": [100.0] * 5, "cpu_s": [0.001] * 5},
+                       general_llm={"latency_s": [0.5] * 5})
+    current = _report(local_agent={"wall_s": [0.13] * 5,          # +30%: regressed
+                                   "peak_rss_mb": [100.5] * 5,    # below the 1 MB floor
+                                   "cpu_s": [0.003] * 5},         # tripled, but below the 5 ms floor
+                      general_llm={"latency_s": [0.52] * 5},      # +4%: within the threshold
+                      new_provider={"wall_s": [1.0]})             # nothing to compare against
+    result = compare_benchmark(current, baseline, threshold=0.10)
+    assert result["compared"] == 8  # p50 and p95 of the four metrics present on both sides
+    assert [(r["provider"], r["metric"], r["stat"]) for r in result["regressions"]] == [
+        ("local_agent", "wall_s", "p50"), ("local_agent", "wall_s", "p95")]
+    assert result["regressions"][0]["change"] == pytest.approx(0.3)
+
+
+def test_improvements_and_missing_tasks_are_not_regressions():
+    baseline = _report(local_agent={"wall_s": [0.2]})
+    assert compare_benchmark(_report(local_agent={"wall_s": [0.1]}), baseline, 0.1)["regressions"] == []
+    assert compare_benchmark({"tasks": {"other": {}}}, baseline, 0.1)["compared"] == 0
+
+
+def test_provider_errors_are_counted_not_timed():
+    calls = iter([{"_error": "HTTP 503"}, {"answer": 1}, {"answer": 2}])
+    gllm = SimpleNamespace(run=lambda prompt: next(calls))
+    agent = SimpleNamespace(run=lambda pack_dir, prompt: {"answer": 1})
+    job = dict(task={"name": "t0", "prompt": "p"}, pack_dir="/packs/0", expected={"answer": 1})
+    out = benchmark_task(job, Runner(gllm, agent), repeats=3)
+    llm, local = out["general_llm"], out["local_agent"]
+    assert (llm["runs"], llm["errors"], llm["wall_s"]["n"]) == (3, 1, 2)
+    assert llm["error_samples"] == ["provider error: HTTP 503"]
+    assert llm["score_mean"] == 0.5
+    assert (local["errors"], local["score_mean"], local["wall_s"]["n"]) == (0, 1.0, 3)
@@ -0,0 +1,73 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import harness
+from harness import Runner, run_all
+
+
+def _jobs(n):
+    return [dict(task={"name": f"t{i}", "prompt": str(i), "answer_key_path": []}, pack_dir=f"/packs/{i}",
+                 expected={"answer": i}) for i in range(n)]
+
+
+class SlowProviders:
+    """Answers correctly; task i takes longer the lower i is, so tasks finish in reverse order."""
+
+    def __init__(self, n, delay=0.02):
+        self.n, self.delay, self.started = n, delay, []
+        self.lock = threading.Lock()
+        self.gllm = SimpleNamespace(run=self.answer)
+        self.agent = SimpleNamespace(run=lambda pack_dir, prompt: self.answer(prompt))
+
+    def answer(self, prompt):
+        with self.lock:
+            self.started.append(prompt)
+        time.sleep((self.n - int(prompt)) * self.delay)
+        return {"answer": int(prompt)}
+
+
+def test_results_keep_task_order(tmp_path, capsys):
+    providers = SlowProviders(6)
+    results = run_all(_jobs(6), Runner(providers.gllm, providers.agent, llm_jobs=4, agent_jobs=4),
+                      str(tmp_path), workers=4)
+    assert [r["task"] for r in results] == [f"t{i}" for i in range(6)]
+    assert all(r["general_llm"]["score"] == 1.0 and r["local_agent"]["score"] == 1.0 for r in results)
+    finished = [line.split()[1] for line in capsys.readouterr().out.splitlines() if line.startswith("[task]")]
+    assert finished != sorted(finished)  # they really did finish out of order
+    assert (tmp_path / "t3" / "local_agent.json").read_text().strip().endswith("}")
+
+
+def test_serial_and_parallel_runs_agree(tmp_path):
+    providers = SlowProviders(4, delay=0)
+    serial = run_all(_jobs(4), Runner(providers.gllm, providers.agent), str(tmp_path / "a"))
+    parallel = run_all(_jobs(4), Runner(providers.gllm, providers.agent, 2, 2), str(tmp_path / "b"), workers=3)
+    strip = lambda rs: [(r["task"], r["general_llm"], r["local_agent"]) for r in rs]  # noqa: E731
+    assert strip(serial) == strip(parallel)
+
+
+def test_interrupt_cancels_pending_tasks(tmp_path):
+    providers = SlowProviders(8, delay=0.01)
+
+    def agent(pack_dir, prompt):
+        if prompt == "0":
+            raise KeyboardInterrupt
+        return providers.answer(prompt)
+
+    runner = Runner(providers.gllm, SimpleNamespace(run=agent), llm_jobs=2, agent_jobs=2)
+    with pytest.raises(KeyboardInterrupt):
+        run_all(_jobs(8), runner, str(tmp_path), workers=2)
+    assert runner.cancelled.is_set()
+    assert len(set(providers.started)) < 8  # queued tasks never started
+    with pytest.raises(harness.ProviderTimeout, match="cancelled"):
+        runner.llm("1")
+
+
+def test_llm_timeout_is_scored_as_an_error(tmp_path):
+    gllm = SimpleNamespace(run=lambda prompt: time.sleep(1) or {"answer": 0})
+    agent = SimpleNamespace(run=lambda pack_dir, prompt: {"answer": 0})
+    [result] = run_all(_jobs(1), Runner(gllm, agent, timeout=0.05), str(tmp_path))
+    assert result["general_llm"] == {"score": 0.0, "details": {"error": "general_llm timed out after 0.05s"}}
+    assert result["local_agent"]["score"] == 1.0
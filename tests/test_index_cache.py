@@ -0,0 +1,81 @@
+from tools.index_cache import IndexCache, dir_size
+
+
+class FakeIndex:
+    def __init__(self):
+        self.engines_built = 0
+
+    def as_query_engine(self, similarity_top_k):
+        self.engines_built += 1
+        return ("engine", id(self), similarity_top_k)
+
+
+def test_hits_misses_and_stale_fingerprint():
+    cache = IndexCache(max_bytes=100)
+    index = FakeIndex()
+    assert cache.get("/p", 1) is None
+    cache.put("/p", 1, index, size_bytes=10)
+    assert cache.get("/p", 1) is index
+    assert cache.get("/p/../p", 1) is index      # keyed by absolute path
+    assert cache.get("/p", 2) is None            # data changed: stale entry dropped
+    assert cache.get("/p", 1) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 3, 0)
+    assert stats["hit_ratio"] == 0.4
+
+
+def test_lru_eviction_within_byte_budget():
+    cache = IndexCache(max_bytes=100)
+    a, b, c = FakeIndex(), FakeIndex(), FakeIndex()
+    cache.put("/a", 1, a, size_bytes=40)
+    cache.put("/b", 1, b, size_bytes=40)
+    assert cache.get("/a", 1) is a               # /b is now least recently used
+    cache.put("/c", 1, c, size_bytes=40)
+    assert cache.get("/b", 1) is None
+    assert cache.get("/a", 1) is a and cache.get("/c", 1) is c
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes"]) == (1, 2, 80)
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = IndexCache(max_bytes=10)
+    cache.put("/a", 1, FakeIndex(), size_bytes=5)
+    big = FakeIndex()
+    cache.put("/big", 1, big, size_bytes=50)
+    assert cache.get("/big", 1) is big
+    assert cache.stats()["entries"] == 1
+
+
+def test_query_engines_cached_per_top_k():
+    cache = IndexCache(max_bytes=100)
+    index = FakeIndex()
+    cache.put("/p", 1, index, size_bytes=1)
+    assert cache.query_engine("/p", 3, index) is cache.query_engine("/p", 3, index)
+    cache.query_engine("/p", 5, index)
+    assert index.engines_built == 2
+
+
+def test_query_engine_for_an_evicted_index_is_built_uncached():
+    cache = IndexCache(max_bytes=10)
+    old = FakeIndex()
+    cache.put("/a", 1, old, size_bytes=8)
+    cache.put("/b", 1, FakeIndex(), size_bytes=8)  # evicts /a
+    assert cache.query_engine("/a", 3, old) == ("engine", id(old), 3)
+    cache.query_engine("/a", 3, old)
+    assert old.engines_built == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_invalidate_and_dir_size(tmp_path):
+    (tmp_path / "docstore.json").write_bytes(b"x" * 30)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "ignored.bin").write_bytes(b"x" * 99)
+    assert dir_size(str(tmp_path)) == 30
+    cache = IndexCache(max_bytes=100)
+    cache.put(str(tmp_path), 1, FakeIndex())
+    assert cache.stats()["bytes"] == 30
+    cache.put("/other", 1, FakeIndex(), size_bytes=1)
+    cache.invalidate(str(tmp_path))
+    assert cache.get(str(tmp_path), 1) is None and cache.stats()["entries"] == 1
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
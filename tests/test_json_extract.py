@@ -0,0 +1,58 @@
+import pytest
+
+from tools.json_extract import JSONStream, extract_all, extract_json
+
+REPLY = (
+    'Here you go {"a": 1, "note": "braces } and ] in a string", "esc": "quote \\" and \\\\"} '
+    'then [1, [2, {"b": null}]] and a broken { "x": ] one, '
+    'and finally {"nested": {"deep": [true, false]}, "s": "\\u00e9"}.'
+)
+
+
+def _stream(chunks):
+    stream, found = JSONStream(), []
+    for chunk in chunks:
+        found += stream.feed(chunk)
+    found += stream.close()
+    return found
+
+
+def test_extract_all_finds_every_block():
+    assert extract_all(REPLY) == [
+        {"a": 1, "note": "braces } and ] in a string", "esc": 'quote " and \\'},
+        [1, [2, {"b": None}]],
+        {"nested": {"deep": [True, False]}, "s": "é"},
+    ]
+
+
+def test_stream_split_at_every_position():
+    expected = extract_all(REPLY)
+    for cut in range(1, len(REPLY)):
+        assert _stream([REPLY[:cut], REPLY[cut:]]) == expected, cut
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_stream_in_small_chunks(size):
+    chunks = [REPLY[i:i + size] for i in range(0, len(REPLY), size)]
+    assert _stream(chunks) == extract_all(REPLY)
+
+
+def test_escaped_quote_split_across_chunks():
+    # The backslash ends one chunk and the escaped quote starts the next.
+    text = '{"k": "a\\"}b"}'
+    cut = text.index("\\") + 1
+    assert _stream([text[:cut], text[cut:]]) == [{"k": 'a"}b'}]
+
+
+def test_unterminated_block_is_dropped():
+    stream = JSONStream()
+    assert stream.feed('{"done": 1} {"open": [1, 2') == [{"done": 1}]
+    assert stream.block_start == len('{"done": 1} ')
+    assert stream.close() == []
+    assert stream.skipped == 1
+
+
+def test_extract_json_prefers_fenced_block():
+    reply = 'Thinking {not json}.\n```json\n{"answer": 42}\n```\nDone.'
+    assert extract_json(reply) == {"answer": 42}
+    assert extract_json("no json here") == {"_raw": "no json here"}
@@ -0,0 +1,61 @@
+import pytest
+
+from tools.keyword_index import KeywordIndex, match_expression, normalize_mode, reciprocal_rank_fusion
+
+
+@pytest.fixture
+def index(tmp_path):
+    kw = KeywordIndex(str(tmp_path / "keyword.db"))
+    kw.add(
+        ["a#0", "a#1", "b#0", "c#0"],
+        [
+            "The Robotaxi fleet launches next year.",
+            "Robotaxi robotaxi robotaxi: unsupervised driving and the robotaxi network.",
+            "SPI3 clock divider is set in register CFG2.",
+            "Quarterly revenue grew on energy storage.",
+        ],
+        [{"file_path": "a.txt", "word_offset": 0}, {"file_path": "a.txt", "word_offset": 8},
+         {"file_path": "b.pdf", "page": 3}, {"file_path": "c.txt"}],
+    )
+    yield kw
+    kw.close()
+
+
+def test_bm25_ranks_the_denser_match_first(index):
+    hits = index.search("List all references to Robotaxi", 5)
+    assert [h["id"] for h in hits] == ["a#1", "a#0"]
+    assert hits[0]["score"] > hits[1]["score"] and hits[0]["metadata"]["word_offset"] == 8
+    assert [h["id"] for h in index.search("SPI3 clock divider", 5)] == ["b#0"]
+    assert match_expression("what is the") == '"what" OR "is" OR "the"'  # only stopwords: keep them
+    assert index.search("?! --", 5) == []
+
+
+def test_question_syntax_is_not_interpreted(index):
+    assert match_expression('revenue AND "clock" NEAR(x) text:') == '"revenue" OR "clock" OR "near" OR "x" OR "text"'
+    assert sorted(h["id"] for h in index.search('revenue" OR text:clock', 5)) == ["b#0", "c#0"]
+
+
+def test_replace_and_delete_keep_fts_in_sync(index):
+    index.add(["c#0"], ["Robotaxi revenue."], [{"file_path": "c.txt"}])
+    assert index.count() == 4
+    assert "c#0" in {h["id"] for h in index.search("robotaxi", 5)}
+    assert index.search("storage", 5) == []
+    index.delete_files(["a.txt"])
+    assert [h["id"] for h in index.search("robotaxi", 5)] == ["c#0"]
+    assert set(index.get(["a#0", "b#0", "c#0"])) == {"b#0", "c#0"}
+
+
+def test_reciprocal_rank_fusion_ordering():
+    vector = ["v1", "both", "v2"]
+    keyword = ["both", "k1"]
+    fused = reciprocal_rank_fusion([vector, keyword], k=60)
+    assert [doc for doc, _ in fused] == ["both", "v1", "k1", "v2"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    # A single ranking keeps its order.
+    assert [doc for doc, _ in reciprocal_rank_fusion([["x", "y", "z"]])] == ["x", "y", "z"]
+
+
+def test_modes():
+    assert normalize_mode(" Hybrid ") == "hybrid"
+    with pytest.raises(ValueError, match="retrieval_mode"):
+        normalize_mode("bm25")
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from providers import general_llm
+from providers.llm_cache import ResponseCache, cache_key
+from providers.llm_standin import split_request, start_standin
+
+PROMPT = "Return JSON with keys a and b."
+_real_call_gemini = general_llm._call_gemini
+
+
+def test_entries_are_content_addressed(tmp_path):
+    cache = ResponseCache(str(tmp_path), "record")
+    key = cache.put("m", "sys", "p", '{"a": 1}', {"total_tokens": 7})
+    assert key == cache_key("m", "sys", "p") != cache_key("m", "sys", "p ")
+    assert (tmp_path / key[:2] / f"{key}.json").is_file()
+    entry = cache.get("m", "sys", "p")
+    assert (entry["text"], entry["usage"]) == ('{"a": 1}', {"total_tokens": 7})
+    assert cache.get("other-model", "sys", "p") is None
+    cache.put("m", "sys", "p", '{"a": 2}')  # recording again overwrites
+    assert cache.count() == 1 and cache.get("m", "sys", "p")["text"] == '{"a": 2}'
+    with pytest.raises(ValueError, match="passthrough, record, replay"):
+        ResponseCache(str(tmp_path), "rewind")
+
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+    """Record one run against a fake model, then switch the environment to replay."""
+    calls = []
+
+    def fake_gemini(prompt, api_key, custom_base):
+        calls.append(prompt)
+        general_llm._record("sdk", 0.25, 12, 5, 17)
+        return 'Sure:\n```json\n{"a": 1, "b": [2, 3]}\n```'
+
+    monkeypatch.setattr(general_llm, "_call_gemini", fake_gemini)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.delenv("GEMINI_API_BASE", raising=False)
+    monkeypatch.setenv("GEMINI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "record")
+    assert general_llm.run(PROMPT) == {"a": 1, "b": [2, 3]}
+    assert calls == [PROMPT]
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "replay")
+    monkeypatch.delenv("GEMINI_API_KEY")
+    return tmp_path, calls
+
+
+def test_replay_answers_without_the_model(recorded):
+    cache_dir, calls = recorded
+    entry = ResponseCache(str(cache_dir)).get(general_llm.DEFAULT_MODEL, general_llm.SYSTEM_INSTRUCTION, PROMPT)
+    assert entry["usage"]["total_tokens"] == 17
+    assert general_llm.run(PROMPT) == {"a": 1, "b": [2, 3]}
+    stats = general_llm.last_call_stats()
+    assert stats["transport"] == "replay" and stats["total_tokens"] == 17
+    assert general_llm.run("A prompt nobody recorded")["_error"].startswith("No recorded")
+    assert calls == [PROMPT]  # replay never reached the model
+
+
+def test_standin_serves_recorded_responses_over_rest(recorded, monkeypatch):
+    cache_dir, calls = recorded
+    server, base = start_standin(str(cache_dir))
+    try:
+        monkeypatch.setenv("GEMINI_CACHE_MODE", "passthrough")
+        monkeypatch.setenv("GEMINI_API_BASE", base)
+        monkeypatch.setattr(general_llm, "_call_gemini", _real_call_gemini)
+        assert general_llm.run(PROMPT) == {"a": 1, "b": [2, 3]}
+        stats = general_llm.last_call_stats()
+        assert stats["transport"] == "rest" and stats["prompt_tokens"] == 12
+        assert "404" in general_llm.run("A prompt nobody recorded")["_error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert calls == [PROMPT]
+
+
+def test_split_request_separates_the_system_instruction():
+    text = general_llm.SYSTEM_INSTRUCTION + "\n\n" + PROMPT
+    assert split_request({"contents": [{"parts": [{"text": text}]}]}) == (general_llm.SYSTEM_INSTRUCTION, PROMPT)
+    body = {"systemInstruction": {"parts": [{"text": "be brief"}]}, "contents": [{"parts": [{"text": text}]}]}
+    assert split_request(body) == ("be brief", text)
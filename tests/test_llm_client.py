@@ -0,0 +1,162 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from tools import llm_client
+from tools.llm_client import AsyncLLMClient, LLMError, TokenBucket
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def _flaky(failures, result="ok"):
+    """A blocking call raising each of 'failures' once, then returning 'result'; counts its attempts."""
+    attempts = []
+
+    def fn():
+        attempts.append(time.monotonic())
+        if len(attempts) <= len(failures):
+            raise failures[len(attempts) - 1]
+        return result
+
+    return fn, attempts
+
+
+def test_retries_with_exponential_backoff():
+    client = AsyncLLMClient(rate=0, retries=3, backoff_s=0.02, max_backoff_s=1)
+    fn, attempts = _flaky([APIError(503), APIError(500)])
+    assert asyncio.run(client.call(fn)) == "ok"
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert len(gaps) == 2 and 0.01 <= gaps[0] and 0.02 <= gaps[1]  # jittered within [delay/2, delay]
+    assert client.stats()["retries"] == 2 and client.stats()["failed"] == 0
+
+
+def test_gives_up_after_the_retry_budget_and_on_client_errors():
+    client = AsyncLLMClient(rate=0, retries=2, backoff_s=0.001)
+    fn, attempts = _flaky([APIError(503)] * 5)
+    with pytest.raises(LLMError, match="after 3 attempts") as e:
+        asyncio.run(client.call(fn))
+    assert e.value.status == 503 and len(attempts) == 3
+
+    fn, attempts = _flaky([APIError(400)])
+    with pytest.raises(LLMError) as e:
+        asyncio.run(client.call(fn))
+    assert e.value.status == 400 and len(attempts) == 1
+    assert client.stats()["failed"] == 2
+
+
+def test_identical_requests_in_flight_are_coalesced():
+    client = AsyncLLMClient(rate=0)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"text": "shared"}
+
+    async def main():
+        return await client.gather([client.call(slow, key="same") for _ in range(5)] + [client.call(slow)])
+
+    results = asyncio.run(main())
+    assert results[:5] == [{"text": "shared"}] * 5 and len(calls) == 2  # one for "same", one unkeyed
+    assert client.stats()["coalesced"] == 4 and client.stats()["requests"] == 6
+
+
+def test_token_bucket_paces_requests_after_the_burst():
+    async def main():
+        bucket = TokenBucket(rate=50, burst=2)
+        started = time.monotonic()
+        times = []
+        for _ in range(6):
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+        bucket.pause(0.1)
+        await bucket.acquire()
+        return times, time.monotonic() - started - times[-1]
+
+    times, paused = asyncio.run(main())
+    assert times[1] < 0.01  # the burst goes out at once
+    assert times[-1] == pytest.approx(4 / 50, abs=0.03)
+    assert paused >= 0.1
+
+
+class _Throttling(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.hits.append(time.monotonic())
+        status, payload = (429, b"slow down") if len(self.hits) == 1 else (200, body)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0.2")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_http_429_pauses_the_bucket_for_retry_after():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Throttling)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/echo"
+    client = AsyncLLMClient(rate=100, retries=2, backoff_s=0.001)
+
+    async def main():
+        try:
+            return await client.post_json(url, {"q": 1})
+        finally:
+            await client.aclose()
+
+    try:
+        assert asyncio.run(main()) == {"q": 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+    hits = _Throttling.hits
+    assert len(hits) == 2 and hits[1] - hits[0] >= 0.2
+    assert client.stats()["throttled"] == 1
+
+
+def test_sdk_calls_go_through_the_shared_client(monkeypatch):
+    from providers import general_llm
+
+    generate_calls = []
+
+    class Model:
+        def __init__(self, name):
+            pass
+
+        def generate_content(self, contents):
+            generate_calls.append(contents)
+            if len(generate_calls) == 1:
+                raise APIError(429)
+            return SimpleNamespace(text='{"a": 1}', usage_metadata=SimpleNamespace(
+                prompt_token_count=3, candidates_token_count=2, total_token_count=5))
+
+    genai = ModuleType("google.generativeai")
+    genai.configure = lambda api_key: None
+    genai.GenerativeModel = Model
+    monkeypatch.setitem(sys.modules, "google", ModuleType("google"))
+    monkeypatch.setitem(sys.modules, "google.generativeai", genai)
+    monkeypatch.setattr(llm_client.shared_client(), "backoff_s", 0.001)
+    before = llm_client.shared_stats()
+
+    assert json.loads(general_llm._call_gemini_with_sdk("prompt", "key")) == {"a": 1}
+    stats = general_llm.last_call_stats()
+    assert stats["transport"] == "sdk" and stats["total_tokens"] == 5
+    after = llm_client.shared_stats()
+    assert len(generate_calls) == 2
+    assert after["throttled"] - before["throttled"] == 1 and after["sent"] - before["sent"] == 2
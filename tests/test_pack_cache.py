@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from providers import pack_cache
+from providers.pack_cache import ArtifactStore
+
+
+@pytest.fixture
+def counting_parser(monkeypatch):
+    """A registered 'rows' kind that counts how often it actually parses."""
+    calls = []
+
+    def parse(fp):
+        calls.append(fp)
+        with open(fp, encoding="utf-8") as f:
+            return [line.split(",") for line in f.read().splitlines()]
+
+    monkeypatch.setitem(pack_cache.PARSERS, "rows", (1, parse))
+    return calls
+
+
+def _write(path, text, mtime_ns=None):
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_memory_hits_and_changed_files(tmp_path, counting_parser):
+    fp = _write(tmp_path / "a.csv", "x,1\ny,2\n", 1_000_000_000)
+    store = ArtifactStore()
+    first = store.load(fp, "rows")
+    assert store.load(fp, "rows") is first and len(counting_parser) == 1
+    _write(tmp_path / "a.csv", "x,1\ny,3\n", 2_000_000_000)  # same size, new mtime
+    assert store.load(fp, "rows") == [["x", "1"], ["y", "3"]] and len(counting_parser) == 2
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["hit_ratio"]) == (1, 2, 2, pytest.approx(1 / 3))
+    with pytest.raises(ValueError, match="Unknown artifact kind"):
+        store.load(fp, "parquet")
+
+
+def test_disk_round_trip_across_stores(tmp_path, counting_parser):
+    fp = _write(tmp_path / "a.csv", "x,1\n")
+    cache_dir = str(tmp_path / "cache")
+    value = ArtifactStore(cache_dir).load(fp, "rows")
+    fresh = ArtifactStore(cache_dir)  # a new process: empty memory, same directory
+    assert fresh.load(fp, "rows") == value and len(counting_parser) == 1
+    assert fresh.load(fp, "rows") == value
+    assert (fresh.stats()["disk_hits"], fresh.stats()["hits"], fresh.stats()["misses"]) == (1, 1, 0)
+
+    # A new parser version ignores the old entries; an unreadable entry is just a miss.
+    pack_cache.PARSERS["rows"] = (2, pack_cache.PARSERS["rows"][1])
+    ArtifactStore(cache_dir).load(fp, "rows")
+    assert len(counting_parser) == 2
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            with open(os.path.join(root, name), "wb") as f:
+                f.write(b"not a pickle")
+    assert ArtifactStore(cache_dir).load(fp, "rows") == value and len(counting_parser) == 3
+
+
+def test_lru_bounds_entries_and_bytes(tmp_path, counting_parser):
+    paths = [_write(tmp_path / f"{i}.csv", "x" * 100) for i in range(4)]
+    store = ArtifactStore(max_entries=3, max_bytes=250)
+    for fp in paths[:2]:
+        store.load(fp, "rows")
+    store.load(paths[0], "rows")  # most recently used
+    store.load(paths[2], "rows")  # 300 bytes: evicts paths[1]
+    assert store.stats()["entries"] == 2 and store.stats()["bytes"] == 200
+    store.load(paths[0], "rows")
+    assert len(counting_parser) == 3
+    store.load(paths[1], "rows")
+    assert len(counting_parser) == 4 and store.stats()["evictions"] == 2
+
+
+def test_built_in_parsers(tmp_path):
+    store = ArtifactStore()
+    assert store.load(_write(tmp_path / "t.csv", "a,b\n1,2\n"), "csv") == [{"a": "1", "b": "2"}]
+    assert store.load(_write(tmp_path / "t.jsonl", '{"a": 1}\n\n{"a": 2}\n'), "jsonl") == [{"a": 1}, {"a": 2}]
+    assert store.load(_write(tmp_path / "t.log", "one\ntwo\n"), "lines") == ["one", "two"]
@@ -0,0 +1,83 @@
+import shutil
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from tools import pdf_pages  # noqa: E402
+from tools.pdf_pages import extract_pages, pdf_text  # noqa: E402
+
+
+def _write_pdf(path, texts):
+    """A minimal PDF with one Helvetica text line per page."""
+    n = len(texts)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{3 + 2 * i} 0 R" for i in range(n)), n)]
+    for i, text in enumerate(texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {3 + 2 * n} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    calls = []
+    extract = pdf_pages._extract_range
+
+    def counting(path, start, end):
+        calls.append((start, end))
+        return extract(path, start, end)
+
+    monkeypatch.setattr(pdf_pages, "_extract_range", counting)
+    return calls
+
+
+def test_pages_are_cached_by_content_hash(tmp_path, parses):
+    cache = str(tmp_path / "cache")
+    pdf = tmp_path / "report.pdf"
+    _write_pdf(pdf, ["Revenue grew", "Robotaxi launch", "SPI3 divider"])
+    pages = extract_pages(str(pdf), workers=0, cache_dir=cache)
+    assert [p["text"] for p in pages] == ["Revenue grew", "Robotaxi launch", "SPI3 divider"]
+    assert pages[1]["page"] == 1 and pages[1]["layout"] == {"width": 612.0, "height": 792.0, "rotation": 0}
+    assert parses == [(0, 3)]
+
+    copy = tmp_path / "renamed copy.pdf"
+    shutil.copy(pdf, copy)
+    assert extract_pages(str(copy), workers=0, cache_dir=cache) == pages  # same bytes, other path: no parse
+    assert pdf_text(str(pdf), " | ", workers=0, cache_dir=cache) == "Revenue grew | Robotaxi launch | SPI3 divider"
+    assert parses == [(0, 3)]
+
+    _write_pdf(pdf, ["Revenue fell", "Robotaxi launch", "SPI3 divider"])  # new content: new key
+    assert extract_pages(str(pdf), workers=0, cache_dir=cache)[0]["text"] == "Revenue fell"
+    assert parses == [(0, 3), (0, 3)]
+
+
+def test_only_missing_pages_are_extracted(tmp_path, parses):
+    cache = str(tmp_path / "cache")
+    pdf = tmp_path / "report.pdf"
+    _write_pdf(pdf, [f"page {i}" for i in range(5)])
+    digest = pdf_pages.file_sha256(str(pdf))
+    extract_pages(str(pdf), workers=0, cache_dir=cache)
+    pdf_pages._connect(cache).execute("DELETE FROM pages WHERE sha256 = ? AND page IN (1, 2)", (digest,))
+    pages = extract_pages(str(pdf), workers=0, cache_dir=cache, sha256=digest)
+    assert [p["text"] for p in pages] == [f"page {i}" for i in range(5)]
+    assert parses == [(0, 5), (1, 3)]
+
+
+def test_parallel_extraction_matches_in_process(tmp_path):
+    pdf = tmp_path / "long.pdf"
+    _write_pdf(pdf, [f"line {i}" for i in range(2 * pdf_pages.MIN_PAGES_PER_WORKER)])
+    parallel = extract_pages(str(pdf), workers=2, cache_dir=str(tmp_path / "a"))
+    assert parallel == extract_pages(str(pdf), workers=0, cache_dir=str(tmp_path / "b"))
+    assert [p["text"] for p in parallel][-1] == f"line {2 * pdf_pages.MIN_PAGES_PER_WORKER - 1}"
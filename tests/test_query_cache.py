@@ -0,0 +1,68 @@
+import numpy as np
+
+from tools.query_cache import QueryCache, normalize_question
+
+
+class Counter:
+    def __init__(self, result):
+        self.calls, self.result = 0, result
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.result
+
+
+def test_results_are_invalidated_by_a_new_fingerprint():
+    cache = QueryCache(db_path=None)
+    search = Counter([{"id": "a#0"}])
+    index_v1 = ("/persist", "llama", (1.0, "t1"))
+    index_v2 = ("/persist", "llama", (2.0, "t2"))
+    assert cache.results(index_v1, "What is SPI3?", 5, "hybrid", search) == [{"id": "a#0"}]
+    cache.results(index_v1, "  what is spi3 ", 5, "hybrid", search)
+    assert search.calls == 1
+    cache.results(index_v1, "what is spi3", 3, "hybrid", search)   # other top_k
+    cache.results(index_v1, "what is spi3", 5, "keyword", search)  # other mode
+    cache.results(index_v2, "what is spi3", 5, "hybrid", search)   # index updated
+    assert search.calls == 4
+    cache.results(None, "what is spi3", 5, "hybrid", search)       # no fingerprint: never cached
+    cache.results(None, "what is spi3", 5, "hybrid", search)
+    assert search.calls == 6
+    stats = cache.stats()
+    assert (stats["result_hits"], stats["result_misses"]) == (1, 4)
+
+
+def test_embeddings_persist_per_model(tmp_path):
+    db = str(tmp_path / "query_cache.db")
+    embed = Counter([0.5, 0.25])
+    first = QueryCache(db_path=db)
+    vector = first.embedding("mini", "Robotaxi?", embed)
+    assert vector.dtype == np.float32 and vector.tolist() == [0.5, 0.25]
+    first.embedding("mini", "robotaxi", embed)
+    first.embedding("other-model", "robotaxi", embed)
+    assert embed.calls == 2
+
+    restarted = QueryCache(db_path=db)
+    assert restarted.embedding("mini", "ROBOTAXI", embed).tolist() == [0.5, 0.25]
+    assert embed.calls == 2
+    assert restarted.stats()["embedding_hit_rate"] == 1.0
+
+    restarted.clear()
+    QueryCache(db_path=db).embedding("mini", "robotaxi", embed)
+    assert embed.calls == 3
+
+
+def test_lru_capacity_and_disabled_cache():
+    cache = QueryCache(db_path=None, max_results=2)
+    search = Counter([])
+    for q in ("q1", "q2", "q1", "q3", "q1", "q2"):
+        cache.results("fp", q, 5, "vector", search)
+    assert search.calls == 4  # q2 was evicted by q3, q1 stayed recently used
+
+    disabled = QueryCache(db_path=None, enabled=False)
+    disabled.results("fp", "q", 5, "vector", search)
+    disabled.results("fp", "q", 5, "vector", search)
+    assert search.calls == 6
+
+
+def test_normalize_question():
+    assert normalize_question('  "What is\n the  SPI3 divider?" ') == "what is the spi3 divider"
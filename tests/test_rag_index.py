@@ -0,0 +1,110 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from tools import rag_index
+from tools.keyword_index import close_keyword_index, open_keyword_index
+from tools.rag_index import has_changes, load_manifest, save_manifest, scan_changes, update_index
+
+
+class FakeIndex:
+    """The slice of a llama_index VectorStoreIndex that update_index uses: one node per document."""
+
+    def __init__(self):
+        self.ref_doc_info, self.nodes, self.deleted, self.persisted = {}, {}, [], 0
+        self.docstore = SimpleNamespace(get_nodes=lambda ids, raise_error=False: [self.nodes.get(i) for i in ids])
+        self.storage_context = SimpleNamespace(persist=self._persist)
+
+    def _persist(self, persist_dir):
+        self.persisted += 1
+
+    def insert(self, doc):
+        node_id = doc.id_ + "#0"
+        self.ref_doc_info[doc.id_] = SimpleNamespace(node_ids=[node_id])
+        self.nodes[node_id] = SimpleNamespace(node_id=node_id, get_content=lambda text=doc.text: text,
+                                              metadata={}, start_char_idx=0)
+
+    def delete_ref_doc(self, doc_id, delete_from_docstore=False):
+        self.deleted.append(doc_id)
+        for node_id in self.ref_doc_info.pop(doc_id).node_ids:
+            del self.nodes[node_id]
+
+
+def _read_documents(paths):
+    docs = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if text:  # empty files produce no documents
+            docs.append(SimpleNamespace(id_=path, text=text, metadata={"file_path": path}))
+    return docs
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_index, "_load_documents", _read_documents)
+    data = tmp_path / "data"
+    persist = tmp_path / "data" / ".cache" / "storage"
+    persist.mkdir(parents=True)
+    for name, text in (("a.txt", "alpha robotaxi"), ("b.txt", "bravo"), ("c.txt", "charlie"), (".hidden", "x")):
+        (data / name).write_text(text)
+    index = FakeIndex()
+    update_index(index, str(data), str(persist), {}, scan_changes(str(data), {}))
+    yield data, str(persist), index
+    close_keyword_index(str(persist))
+
+
+def test_first_scan_indexes_every_visible_file(corpus):
+    data, persist, index = corpus
+    manifest = load_manifest(persist)
+    assert sorted(os.path.basename(p) for p in manifest) == ["a.txt", "b.txt", "c.txt"]
+    assert manifest[str(data / "a.txt")]["node_ids"] == [str(data / "a.txt") + "#0"]
+    assert open_keyword_index(persist).count() == 3
+
+
+def test_incremental_update(corpus):
+    data, persist, index = corpus
+    manifest = load_manifest(persist)
+    a, b, c, d = (str(data / n) for n in ("a.txt", "b.txt", "c.txt", "d.txt"))
+
+    (data / "b.txt").write_text("bravo, rewritten")
+    os.remove(c)
+    (data / "d.txt").write_text("delta robotaxi")
+    st = os.stat(a)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))  # touched, same content
+
+    changes = scan_changes(str(data), manifest)
+    assert (changes["added"], changes["changed"], changes["deleted"], changes["unchanged"]) == ([d], [b], [c], [a])
+    assert has_changes(changes)
+
+    update_index(index, str(data), persist, manifest, changes)
+    updated = load_manifest(persist)
+    assert sorted(updated) == [a, b, d]
+    assert sorted(index.deleted) == [b, c]
+    assert updated[a]["node_ids"] == manifest[a]["node_ids"]
+    assert updated[a]["mtime"] == os.stat(a).st_mtime
+    assert updated[b]["sha256"] != manifest[b]["sha256"]
+
+    keywords = open_keyword_index(persist)
+    assert keywords.count() == 3
+    assert sorted(h["id"] for h in keywords.search("robotaxi", 5)) == [a + "#0", d + "#0"]
+
+    assert not has_changes(scan_changes(str(data), updated))
+
+
+def test_empty_file_is_tracked_without_nodes(corpus):
+    data, persist, index = corpus
+    (data / "empty.txt").write_text("")
+    manifest = load_manifest(persist)
+    update_index(index, str(data), persist, manifest, scan_changes(str(data), manifest))
+    updated = load_manifest(persist)
+    assert updated[str(data / "empty.txt")]["node_ids"] == []
+    assert not has_changes(scan_changes(str(data), updated))
+
+
+def test_manifest_of_another_version_is_ignored(tmp_path):
+    save_manifest(str(tmp_path), {"x": {}})
+    assert load_manifest(str(tmp_path)) == {"x": {}}
+    (tmp_path / rag_index.MANIFEST_FILE).write_text('{"version": 0, "files": {"x": {}}}')
+    assert load_manifest(str(tmp_path)) == {}
@@ -0,0 +1,83 @@
+import pytest
+
+from scoring import Policies, score
+
+
+def test_default_lists_are_unordered_with_float_tolerance():
+    expected = {"rows": [{"id": 1, "v": 1.0}, {"id": 2, "v": 2.0}], "total": 3.0}
+    got = {"rows": [{"id": 2, "v": 2.004}, {"id": 1, "v": 1.0}], "total": 3.009}
+    assert score(expected, got) == (1.0, {"total": 5, "correct": 5, "diffs": {}})
+
+
+def test_default_tolerance_is_float_only():
+    # As before per-key policies: ints match exactly (floats rounded to 4 places first).
+    assert score({"a": 100}, {"a": 100.005})[0] == 0.0
+    assert score({"a": 100.0}, {"a": 100})[0] == 1.0
+    assert score({"a": 1250}, {"a": 1250.00001})[0] == 1.0
+    assert score({"a": 100}, {"a": 101})[0] == 0.0
+
+
+def test_policies_opt_ints_into_tolerance():
+    assert score({"a": 100}, {"a": 100.005}, {"a": 0.01})[0] == 1.0
+    assert score({"a": 100}, {"a": 101}, {"a": {"rel_tol": 0.02}})[0] == 1.0
+    assert score({"a": 100}, {"a": 101}, {"a": {"rel_tol": 0.02, "int_tol": False}})[0] == 0.0
+    assert score({"a": 100}, {"a": 100.00001}, {"a": "exact"})[0] == 0.0
+
+
+def test_ordered_policy_compares_positions():
+    expected = {"skus": ["A", "B", "C"]}
+    got = {"skus": ["B", "A", "C"]}
+    assert score(expected, got)[0] == 1.0
+    s, details = score(expected, got, {"skus": "ordered"})
+    assert s == pytest.approx(1 / 3)
+    assert set(details["diffs"]) == {"/skus/0", "/skus/1"}
+
+
+def test_text_policy_ignores_case_and_whitespace():
+    expected = {"hint": "DB deadlock  in payments", "name": "Bob"}
+    got = {"hint": " db deadlock in Payments", "name": "bob"}
+    s, details = score(expected, got, {"hint": "text"})
+    assert s == 0.5
+    assert list(details["diffs"]) == ["/name"]
+
+
+def test_exact_and_numeric_tolerances():
+    expected = {"a": 100.0, "b": 100.0, "c": 100.0}
+    got = {"a": 100.005, "b": 100.5, "c": 100.9}
+    s, details = score(expected, got, {"a": "exact", "b": 1, "c": {"rel_tol": 0.01}})
+    assert s == pytest.approx(2 / 3)
+    assert list(details["diffs"]) == ["/a"]
+
+
+def test_deeper_path_overrides_parent_and_patterns_match():
+    expected = {"segments": [{"start": 0.0, "text": "Hello there"}, {"start": 5.0, "text": "Bye"}],
+                "meta": {"title": "Q3 Report", "code": "AbC"}}
+    got = {"segments": [{"start": 0.3, "text": "hello  THERE"}, {"start": 5.0, "text": "bye"}],
+           "meta": {"title": "q3 report", "code": "abc"}}
+    policies = {"segments": {"list": "ordered", "text": True}, "/segments/*/start": 0.5,
+                "meta": "text", "/meta/code": "exact"}
+    s, details = score(expected, got, policies)
+    assert s == pytest.approx(5 / 6)
+    assert list(details["diffs"]) == ["/meta/code"]
+
+
+def test_root_policy_and_named_keys():
+    rules = Policies({"/": "ordered", "amount": "exact"})
+    assert rules.child(None, None)[1]["list"] == "ordered"
+    path, pol = rules.child("/x/y", "amount")
+    assert path == "/x/y/amount" and pol["abs_tol"] == 0.0 and pol["list"] == "ordered"
+
+
+def test_nearly_right_row_keeps_partial_credit():
+    expected = [{"id": i, "qty": i, "sku": f"S{i}"} for i in range(50)]
+    got = [dict(row) for row in reversed(expected)]
+    got[10]["qty"] = -1  # row id 39
+    s, details = score(expected, got)
+    assert details["total"] == 150 and details["correct"] == 149
+    assert list(details["diffs"]) == ["/39/qty"]
+
+
+@pytest.mark.parametrize("spec", ["sorted", {"order": "ordered"}, [1]])
+def test_unknown_policies_are_rejected(spec):
+    with pytest.raises(ValueError):
+        Policies({"x": spec})
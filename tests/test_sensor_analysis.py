@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from tools.sensor_analysis import analyze, find_peaks, max_filter, periodicity, resample
+
+T0 = 1705991914000
+
+
+def _acc(walk_s=60, still_s=20, rate=100, cadence=1.8):
+    """Walking at 'cadence' steps/s, then standing still; 3-axis ACC at 'rate' Hz with a little noise."""
+    rng = np.random.default_rng(11)
+    t = np.arange(int((walk_s + still_s) * rate)) / rate
+    walking = t < walk_s
+    z = 9.8 + np.where(walking, 3.0 * np.sin(2 * np.pi * cadence * t), 0.0) + 0.02 * rng.standard_normal(len(t))
+    values = np.column_stack((0.05 * rng.standard_normal(len(t)), 0.05 * rng.standard_normal(len(t)), z))
+    return T0 + np.round(t * 1000).astype(np.int64), values.astype(np.float32)
+
+
+def test_imu_walking_steps_cadence_and_stillness():
+    ts, values = _acc()
+    result = analyze(ts, values, "ACC")
+    assert result["signal"] == "magnitude" and not result["pressure"]
+    assert result["cadence_hz"] == pytest.approx(1.8, abs=0.05)
+    assert result["periodicity"] > 0.8
+    assert abs(result["steps"] - 108) <= 3  # 60 s at 1.8 steps/s
+    assert result["walking_s"] == pytest.approx(60, abs=10)
+    assert result["still_s"] == pytest.approx(20, abs=2)
+    assert result["step_times"].max() < T0 + 60500
+
+
+def test_pressure_contacts_are_strides():
+    rate, stride_hz = 50, 0.9
+    t = np.arange(40 * rate) / rate
+    contact = (np.sin(2 * np.pi * stride_hz * t) > 0.2).astype(np.int32)
+    values = contact[:, None] * np.arange(1, 19, dtype=np.int32)[None, :] * 10
+    result = analyze(T0 + (t * 1000).astype(np.int64), values, "LeftFoot")
+    assert result["signal"] == "total" and result["pressure"]
+    assert result["steps"] == int(np.sum(np.diff(contact) == 1) + contact[0])
+    assert result["cadence_hz"] == pytest.approx(stride_hz, abs=0.05)
+
+
+def test_recording_gaps_are_cut_not_interpolated():
+    ts = np.array([0, 10, 20, 30, 5000, 5010, 5020])
+    grid, values, valid = resample(ts, ts.astype(np.float64), 100.0, max_gap_ms=1000)
+    assert len(grid) == 7 and grid.tolist() == ts.tolist()
+    assert values.tolist() == ts.tolist()
+    assert valid.tolist() == [True] * 4 + [False, True, True]
+    grid, _, _ = resample(ts, ts, 100.0)
+    assert len(grid) == 503
+
+
+def test_periodicity_and_peak_primitives():
+    rate = 50
+    x = np.sin(2 * np.pi * 1.25 * np.arange(20 * rate) / rate)
+    p = periodicity(x, rate)
+    assert p["frequency_hz"] == pytest.approx(1.25, abs=0.01) and p["strength"] > 0.9
+    assert p["spectral_peak_hz"] == pytest.approx(1.25, abs=0.05)
+
+    rng = np.random.default_rng(2)
+    y = rng.standard_normal(500)
+    radius = 7
+    brute = np.array([y[max(i - radius, 0):i + radius + 1].max() for i in range(len(y))])
+    np.testing.assert_array_equal(max_filter(y, radius), brute)
+    peaks = find_peaks(y, distance=10, height=0.5)
+    assert np.all(np.diff(peaks) >= 10) and np.all(y[peaks] >= 0.5)
+    assert find_peaks(np.array([0, 2, 0, 2, 0]), distance=3).tolist() == [1]
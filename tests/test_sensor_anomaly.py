@@ -0,0 +1,92 @@
+import numpy as np
+
+from tools.sensor_anomaly import StreamingDetector, detect_gaps, detect_spikes, detect_stuck
+
+T0 = 1705991914000
+N = 1200
+
+
+def _log(n=N):
+    """ACC noise with a spike at sample 500, LeftFoot with pad 3 reading 0 over samples 200-399, a 3 s gap at 800."""
+    rng = np.random.default_rng(5)
+    lines = []
+    for i in range(n):
+        t = T0 + 10 * i + (3000 if i >= 800 else 0)
+        x, y, z = 1.0 + 0.05 * rng.standard_normal(3)
+        if i == 500:
+            x = 50.0
+        lines.append(f"{t},ACC,{x:.4f},{y:.4f},{z:.4f}\n")
+        pads = [5 + (i + k) % 3 for k in range(18)]
+        if 200 <= i < 400:
+            pads[3] = 0
+        lines.append(f"{t},LeftFoot," + ",".join(map(str, pads)) + "\n")
+    return "".join(lines)
+
+
+def _events(detector):
+    return sorted((e["channel"], e["kind"], e["start_ms"], e["end_ms"], e["detail"]) for e in detector.events(limit=1000))
+
+
+def test_detects_spike_gap_and_stuck_pad(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    log.write_text(_log())
+    detector = StreamingDetector(str(log), db_path=str(tmp_path / "a.db"))
+    assert detector.poll() == 4
+    assert _events(detector) == [
+        ("ACC", "gap", T0 + 7990, T0 + 11000, ""),
+        ("ACC", "spike", T0 + 5000, T0 + 5000, "1 samples"),
+        ("LeftFoot", "gap", T0 + 7990, T0 + 11000, ""),
+        ("LeftFoot", "stuck", T0 + 2000, T0 + 2990, "pad 3"),
+    ]
+    assert detector.events(kind="spike")[0]["value"] > 49
+    assert detector.counts()[("ACC", "spike")] == 1
+    assert detector.stats()["ACC"]["interval_ms"] == 10.0
+
+
+def test_streaming_in_small_chunks_and_restarts_match_one_pass(tmp_path):
+    text = _log()
+    whole = tmp_path / "whole.txt"
+    whole.write_text(text)
+    expected = StreamingDetector(str(whole), db_path=str(tmp_path / "whole.db"))
+    expected.poll()
+
+    log = tmp_path / "growing.txt"
+    db = str(tmp_path / "growing.db")
+    cut = [0, 3000, 20000, 20017, 41000, len(text)]
+    for a, b in zip(cut, cut[1:]):
+        with open(log, "a") as f:
+            f.write(text[a:b])
+        # A fresh detector every time: state and offset come back from the database.
+        StreamingDetector(str(log), db_path=db, chunk_bytes=4096).poll()
+    resumed = StreamingDetector(str(log), db_path=db)
+    assert resumed.poll() == 0
+    assert _events(resumed) == _events(expected)
+    assert resumed.records == 2 * N
+
+
+def test_replaced_log_restarts_detection(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    log.write_text(_log())
+    detector = StreamingDetector(str(log), db_path=str(tmp_path / "a.db"))
+    detector.poll()
+    log.write_text(_log(300))
+    detector.poll()
+    assert detector.offset == log.stat().st_size
+    # Only the new log's events: pad 3 reads 0 for exactly STUCK_SAMPLES of its 300 samples.
+    assert [(e["kind"], e["start_ms"]) for e in detector.events()] == [("stuck", T0 + 2000)]
+
+
+def test_vectorised_detectors():
+    x = np.ones(100)
+    x[60] = 10.0
+    hit, score = detect_spikes(x + 0.01 * np.sin(np.arange(100)), np.empty(0), window=50, z=6)
+    assert hit.tolist() == [60] and score[0] > 6
+
+    ts = np.array([100, 110, 120, 130, 140, 150, 160, 170, 2000, 2010])
+    starts, ends, interval = detect_gaps(ts, 90, None, factor=5, min_gap_ms=1000)
+    assert (starts.tolist(), ends.tolist(), interval) == ([170], [2000], 10.0)
+
+    values = np.array([[3, 0], [2, 0], [0, 0], [4, 0], [5, 1]])  # the unloaded row neither extends nor breaks
+    events, run, start = detect_stuck(np.arange(5) * 10, values, np.array([0, 2]), np.array([0, -50]), limit=4)
+    assert events == [(1, -50, 10)]
+    assert run.tolist() == [0, 0] and start.tolist() == [0, 0]
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pytest
+
+from tools.sensor_pyramid import Pyramid, columns_of
+from tools.sensor_store import SensorStore, ingest
+
+T0 = 1705991914000
+
+
+def _lines(start, n):
+    """ACC every 7 ms (a 90 s recording gap after sample 4000), LeftFoot every 5th sample."""
+    rng = np.random.default_rng(start)
+    out = []
+    for i in range(start, start + n):
+        t = T0 + 7 * i + (90000 if i >= 4000 else 0)
+        x, y, z = rng.normal(0.0, 2.0, 3)
+        out.append(f"{t},ACC,{x:.3f},{y:.3f},{z:.3f}\n")
+        if i % 5 == 0:
+            out.append(f"{t},LeftFoot," + ",".join(str((i * 7 + k) % 11) for k in range(18)) + "\n")
+    return "".join(out)
+
+
+def _exact(store, tag, start, end):
+    ts, values = store.window(tag, start, end)
+    cols = columns_of(values)
+    return len(ts), cols.mean(axis=0), cols.std(axis=0), cols.min(axis=0), cols.max(axis=0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    log.write_text(_lines(0, 6000))
+    return SensorStore(str(tmp_path / "cache"), ingest(str(log), str(tmp_path / "cache")))
+
+
+@pytest.mark.parametrize("tag", ["ACC", "LeftFoot"])
+def test_aggregates_are_exact(store, tag):
+    rng = np.random.default_rng(1)
+    ts = store.timestamps(tag)
+    ranges = [(None, None), (int(ts[0]) + 1234, int(ts[0]) + 61234)]
+    ranges += [(int(ts[a]) + 3, int(ts[b])) for a, b in np.sort(rng.integers(0, len(ts) - 1, (10, 2)))]
+    ranges.append((int(ts[0]) + 10, int(ts[-1]) - 10))  # spans the recording gap
+    for start, end in ranges:
+        result = store.aggregate(tag, start, end)
+        n, mean, std, lo, hi = _exact(store, tag, start, end)
+        assert result["count"] == n
+        got = list(result["columns"].values())
+        np.testing.assert_allclose([c["mean"] for c in got], mean, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose([c["std"] for c in got], std, rtol=1e-6, atol=1e-9)
+        assert [c["min"] for c in got] == pytest.approx(lo.tolist())
+        assert [c["max"] for c in got] == pytest.approx(hi.tolist())
+    whole = store.aggregate(tag)
+    assert whole["samples_read"] < 2000 and whole["buckets_read"] < 100
+    assert list(whole["columns"])[-1] == ("total" if tag == "LeftFoot" else "magnitude")
+
+
+def test_series_levels_and_peaks(store):
+    series = store.series("ACC", max_points=45)
+    assert series["level"] == "1s"  # 42 s recorded: the 90 s gap adds no buckets
+    assert store.series("ACC", max_points=20)["level"] == "10s"
+    assert series["count"].sum() == len(store.timestamps("ACC"))
+    assert store.series("ACC", level="1min")["level"] == "1min"
+    with pytest.raises(ValueError, match="1s, 10s"):
+        store.series("ACC", level="5s")
+
+    ts, values = store.window("ACC")
+    signal = columns_of(values)[:, -1]
+    top = store.peaks("ACC", k=3)
+    assert top[0] == (int(ts[np.argmax(signal)]), pytest.approx(signal.max()))
+    assert len({t // 1000 for t, _ in top}) == 3
+
+
+def test_incremental_pyramid_matches_rebuild(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    cache = str(tmp_path / "cache")
+    log.write_text(_lines(0, 1500))
+    ingest(str(log), cache, chunk_bytes=8192)
+    with open(log, "a") as f:
+        f.write(_lines(1500, 4500))
+    meta = ingest(str(log), cache, chunk_bytes=8192)
+    fresh = str(tmp_path / "fresh")
+    rebuilt = SensorStore(fresh, ingest(str(log), fresh))
+    grown = SensorStore(cache, meta)
+    for level in ("1s", "10s", "1min", "1h"):
+        a, b = grown.pyramid.buckets("ACC", level), rebuilt.pyramid.buckets("ACC", level)
+        assert a["t"].tolist() == b["t"].tolist() and a["count"].tolist() == b["count"].tolist()
+        np.testing.assert_allclose(a["sum"], b["sum"])
+
+
+def test_records_past_the_saved_state_are_rolled_back(store):
+    pyramid_dir = os.path.join(store.cache_dir, "pyramid")
+    path = os.path.join(pyramid_dir, "ACC.1s.bin")
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\0" * 123)  # an ingest that died before saving pyramid.json
+    Pyramid(store.cache_dir, writable=True)
+    assert os.path.getsize(path) == size
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+from tools.sensor_store import SensorStore, ingest
+
+
+def _lines(start, n):
+    out = []
+    for i in range(start, start + n):
+        t = 1705991914000 + 10 * i
+        out.append(f"{t},ACC,{i * 0.5},{-i * 0.25},1.0\n")
+        if i % 3 == 0:
+            out.append(f"{t},GYRO,{i * 0.1},0.0,{-i * 0.1}\n")
+        if i % 5 == 0:
+            out.append(f"{t},LeftFoot," + ", ".join(str((i + k) % 7) for k in range(18)) + "\n")
+    return "".join(out)
+
+
+def _columns(cache_dir, meta):
+    store = SensorStore(cache_dir, meta)
+    return {tag: (np.array(store.timestamps(tag)), np.array(store.values(tag))) for tag in store.channels}
+
+
+def _assert_same(a, b):
+    assert sorted(a) == sorted(b)
+    for tag in a:
+        np.testing.assert_array_equal(a[tag][0], b[tag][0])
+        np.testing.assert_array_equal(a[tag][1], b[tag][1])
+
+
+def test_tail_reingest_matches_full_ingest(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    cache = str(tmp_path / "cache")
+    log.write_text(_lines(0, 200))
+    meta = ingest(str(log), cache, chunk_bytes=1024)
+    assert meta["rebuilt"] and meta["offset"] == os.path.getsize(log)
+
+    # Append more rows plus half of a row still being written.
+    tail = _lines(200, 100)
+    partial = "1705991917000,ACC,1.5,"
+    with open(log, "a") as f:
+        f.write(tail + partial)
+    meta = ingest(str(log), cache, chunk_bytes=1024)
+    assert not meta["rebuilt"]
+    assert meta["offset"] == os.path.getsize(log) - len(partial)
+    assert meta["channels"]["ACC"]["count"] == 300
+
+    # The held-back row is picked up once its newline arrives.
+    with open(log, "a") as f:
+        f.write("2.5,3.5\n")
+    meta = ingest(str(log), cache, chunk_bytes=1024)
+    assert meta["offset"] == os.path.getsize(log)
+    assert meta["channels"]["ACC"]["count"] == 301
+
+    fresh = str(tmp_path / "fresh")
+    _assert_same(_columns(cache, meta), _columns(fresh, ingest(str(log), fresh)))
+    acc = _columns(cache, meta)["ACC"]
+    assert acc[0][-1] == 1705991917000 and acc[1][-1].tolist() == [1.5, 2.5, 3.5]
+
+
+def test_unchanged_log_is_not_reparsed(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    log.write_text(_lines(0, 50))
+    chunks = []
+    first = ingest(str(log), str(tmp_path / "cache"), on_chunk=chunks.append)
+    assert len(chunks) == 1
+    again = ingest(str(log), str(tmp_path / "cache"), on_chunk=chunks.append)
+    assert len(chunks) == 1
+    assert again["offset"] == first["offset"] and again["channels"] == first["channels"]
+
+
+def test_truncated_log_is_rebuilt(tmp_path):
+    log = tmp_path / "sensor_log.txt"
+    cache = str(tmp_path / "cache")
+    log.write_text(_lines(0, 100))
+    ingest(str(log), cache)
+    log.write_text(_lines(0, 40))
+    meta = ingest(str(log), cache)
+    assert meta["rebuilt"]
+    assert meta["channels"]["ACC"]["count"] == 40
+    _assert_same(_columns(cache, meta), _columns(str(tmp_path / "fresh"), ingest(str(log), str(tmp_path / "fresh"))))
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+HEAVY = ("torch", "llama_index", "chromadb", "sentence_transformers")
+
+pytest.importorskip("smolagents")
+
+
+def _run(code: str) -> str:
+    # A fresh interpreter: this process may already have imported heavy modules for other tests.
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.join(ROOT, "src"),
+                         capture_output=True, text=True, timeout=300)
+    assert out.returncode == 0, out.stderr
+    return out.stdout.strip()
+
+
+def test_load_tools_imports_no_heavy_dependency():
+    loaded = _run(
+        "import sys\n"
+        "from tools import load_tools, available_tools\n"
+        "tools = load_tools(available_tools())\n"
+        "assert sorted(t.name for t in tools) == available_tools(), [t.name for t in tools]\n"
+        f"print(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY!r})))"
+    )
+    assert loaded == "[]"
+
+
+def test_registry_imports_only_the_requested_module():
+    loaded = _run(
+        "import sys\n"
+        "from tools import load_tool\n"
+        "load_tool('sqlite_tool')\n"
+        "print(sorted(m for m in sys.modules if m.startswith('tools.tool_')))"
+    )
+    assert loaded == "['tools.tool_sqlite']"
+
+
+def test_unknown_tool_lists_the_available_ones():
+    from tools import available_tools, get_tool_class
+    with pytest.raises(KeyError, match="sqlite_tool"):
+        get_tool_class("no_such_tool")
+    assert "rag_tool" in available_tools()
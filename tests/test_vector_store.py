@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from tools.vector_store import MemmapVectorStore, commit_files, open_vector_store, read_manifest, vector_store_path
+
+RNG = np.random.default_rng(7)
+EMBEDDINGS = RNG.standard_normal((300, 32)).astype(np.float32)
+IDS = [f"node-{i}" for i in range(300)]
+
+
+def _exact_top(query, k):
+    unit = EMBEDDINGS / np.linalg.norm(EMBEDDINGS, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    return [IDS[i] for i in np.argsort(-scores)[:k]], scores
+
+
+@pytest.mark.parametrize("dtype, tol", [("float16", 2e-3), ("int8", 2e-2)])
+def test_round_trip(tmp_path, dtype, tol):
+    store = MemmapVectorStore.write(str(tmp_path), IDS, EMBEDDINGS, dtype=dtype)
+    reopened = MemmapVectorStore.open(str(tmp_path))
+    assert reopened.dtype == dtype and reopened.ids == IDS
+    assert isinstance(reopened.vectors, np.memmap)
+    assert (reopened.scales is not None) == (dtype == "int8")
+
+    query = EMBEDDINGS[42] + 0.1 * RNG.standard_normal(32).astype(np.float32)
+    expected, exact = _exact_top(query, 10)
+    np.testing.assert_allclose(reopened.scores(query), exact, atol=tol)
+    hits = reopened.query(query, 10)
+    assert hits[0][0] == "node-42"
+    assert len(set(i for i, _ in hits) & set(expected)) >= 9
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+    assert store.query(query, 1000)[-1][0] in IDS and len(store.query(query, 1000)) == 300
+
+
+def test_empty_store_and_bad_dtype(tmp_path):
+    assert MemmapVectorStore.write(str(tmp_path), [], np.zeros((0, 4))).query(np.ones(4), 3) == []
+    with pytest.raises(ValueError, match="float16, int8"):
+        MemmapVectorStore.write(str(tmp_path), IDS, EMBEDDINGS, dtype="float32")
+
+
+def test_commit_files_versions(tmp_path):
+    path = str(tmp_path)
+    assert read_manifest(path, "m.json") is None
+
+    def writer(content):
+        def write(fp):
+            with open(fp, "w") as f:
+                f.write(content)
+        return (".txt", write)
+
+    versions = [commit_files(path, "m.json", {"a": writer(str(n)), "b": writer("b")}, {"n": n}) for n in range(3)]
+    assert read_manifest(path, "m.json") == versions[-1] and versions[-1]["n"] == 2
+    with open(os.path.join(path, versions[-1]["files"]["a"])) as f:
+        assert f.read() == "2"
+    # The current and the just-replaced version survive; older ones are removed.
+    live = {f for v in versions[1:] for f in v["files"].values()}
+    assert set(os.listdir(path)) == live | {"m.json"}
+    assert len({v["files"]["a"] for v in versions}) == 3
+
+
+def test_open_vector_store_reopens_rewritten_store(tmp_path):
+    persist = str(tmp_path)
+    assert open_vector_store(persist) is None
+    MemmapVectorStore.write(vector_store_path(persist), IDS[:5], EMBEDDINGS[:5])
+    first = open_vector_store(persist)
+    assert open_vector_store(persist) is first
+    MemmapVectorStore.write(vector_store_path(persist), IDS[:7], EMBEDDINGS[:7])
+    assert len(open_vector_store(persist)) == 7
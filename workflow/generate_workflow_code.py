@@ -1,16 +1,22 @@
 import os
+import sys
 import yaml
-import litellm
 import json 
 from pathlib import Path
 
-litellm.model = "xai/grok-3-latest"  # or any supported model
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from tools.pdf_pages import pdf_text
+from tools.llm_client import chat_sync, chat_batch
+
+# Any litellm model string; calls go through litellm.acompletion behind one shared
+# rate limiter with retries and coalescing (tools/llm_client.py: EDA_LLM_RATE, EDA_LLM_RETRIES, ...).
+MODEL = os.environ.get("EDA_WORKFLOW_MODEL", "xai/grok-3-latest")
 
 PROMPT_DIR = "llm_prompts"
 
-def auto_generate_prompt(name, description):
-    # Use GPT to generate a clean system prompt for the step
-    messages = [
+def prompt_request(name, description):
+    # Messages asking the LLM to write a clean system prompt for the step
+    return [
         {"role": "system", "content": "You are an expert prompt writer for LLM function agents."},
         {"role": "user", "content": f"""
 Write a system prompt for an LLM agent named `{name}`.
@@ -27,8 +33,9 @@ Your response must include:
 - What the expected output looks like
 """}
     ]
-    response = litellm.completion(model=litellm.model, messages=messages)
-    return response["choices"][0]["message"]["content"].strip()
+
+def auto_generate_prompt(name, description):
+    return chat_sync(MODEL, prompt_request(name, description))["text"]
 
 def build_prompts(workflow_path: str, save: bool = True):
     with open(workflow_path, "r") as f:
@@ -37,9 +44,9 @@ def build_prompts(workflow_path: str, save: bool = True):
     prompts = {}
     os.makedirs(PROMPT_DIR, exist_ok=True)
 
+    missing = []
     for step in workflow["steps"]:
         name = step["step"]
-        desc = step["description"]
         prompt_path = f"{PROMPT_DIR}/{name}.yaml"
 
         if os.path.exists(prompt_path):
@@ -47,16 +54,25 @@ def build_prompts(workflow_path: str, save: bool = True):
             with open(prompt_path, "r") as f:
                 prompts[name] = yaml.safe_load(f)
         else:
-            print(f"✨ Generating new system prompt for: {name}")
-            content = auto_generate_prompt(name, desc)
+            missing.append(step)
+
+    # Steps don't depend on each other here, so their prompts are generated in one batch
+    if missing:
+        print(f"✨ Generating new system prompts for: {', '.join(step['step'] for step in missing)}")
+        replies = chat_batch(MODEL, [prompt_request(step["step"], step["description"]) for step in missing])
+        for step, reply in zip(missing, replies):
+            name = step["step"]
+            if isinstance(reply, Exception):
+                raise RuntimeError(f"Could not generate the prompt for {name}: {reply}") from reply
             prompt_obj = {
                 "name": name,
                 "role": "system",
-                "content": content
+                "content": reply["text"]
             }
             prompts[name] = prompt_obj
 
             if save:
+                prompt_path = f"{PROMPT_DIR}/{name}.yaml"
                 with open(prompt_path, "w") as f:
                     yaml.dump(prompt_obj, f, allow_unicode=True)
                 print(f"✅ Saved new prompt: {prompt_path}")
@@ -68,8 +84,7 @@ def run_llm_step(prompt: dict, user_input: dict):
         {"role": prompt["role"], "content": prompt["content"]},
         {"role": "user", "content": f"{user_input}"}
     ]
-    response = litellm.completion(model=litellm.model, messages=messages)
-    return response["choices"][0]["message"]["content"].strip()
+    return chat_sync(MODEL, messages)["text"]
 
 def run_workflow(workflow_path: str, initial_data_path: str, prompts: dict):
     with open(workflow_path, "r") as f:
@@ -82,6 +97,12 @@ def run_workflow(workflow_path: str, initial_data_path: str, prompts: dict):
         prompt = prompts[name]
 
         print(f"\n⚙️ Running step: {name}")
+        if name == "file_reader" and isinstance(data, str) and os.path.isfile(data):
+            # Read the file directly (PDFs via the shared page cache, so the RAG tools
+            # and agents reuse the same parsed pages) and hand the text to the next steps.
+            data = pdf_text(data) if data.lower().endswith(".pdf") else Path(data).read_text()
+            print(f"🔁 Output: {len(data)} characters read")
+            continue
         result = run_llm_step(prompt, data)
         print(f"🔁 Output: {result}")
 